@@ -0,0 +1,217 @@
+"""Packet sampling and packet count estimation of pcap and pcapng captures.
+
+A sample keeps the first ``head`` packets of a capture and then every
+``stride``-th packet. It is written by copying records byte for byte; the
+skipped records are seeked over without being read, so sampling a
+multi-GB capture costs little more than reading its record headers.
+
+pcapng section headers, interface descriptions and other non-packet blocks
+are always kept so the sample stays a valid capture with the same link
+types and interfaces as the original.
+"""
+
+from __future__ import annotations
+
+import struct
+from pathlib import Path
+from typing import BinaryIO
+
+# Classic pcap magic numbers (micro- and nanosecond timestamps), as read little-endian
+_PCAP_MAGICS = {
+    0xA1B2C3D4: "<",
+    0xD4C3B2A1: ">",
+    0xA1B23C4D: "<",
+    0x4D3CB2A1: ">",
+}
+_PCAP_HEADER_SIZE = 24
+_PCAP_RECORD_HEADER_SIZE = 16
+
+_PCAPNG_SHB = 0x0A0D0D0A
+_PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+# Obsolete packet block, simple packet block, enhanced packet block
+_PCAPNG_PACKET_BLOCKS = {0x00000002, 0x00000003, 0x00000006}
+
+
+class _Sampler:
+    """Decide which packets of a capture are kept."""
+
+    def __init__(self, head: int, stride: int) -> None:
+        self.head = max(0, head)
+        self.stride = max(1, stride)
+        self.seen = 0
+        self.kept = 0
+
+    def keep(self) -> bool:
+        index = self.seen
+        self.seen += 1
+        if index < self.head or (index - self.head) % self.stride == 0:
+            self.kept += 1
+            return True
+        return False
+
+
+def sample_capture(source: Path, destination: Path, head: int, stride: int) -> int:
+    """
+    Write a packet sample of a capture.
+
+    Args:
+        source: pcap or pcapng capture
+        destination: Path of the sampled capture (same format as ``source``)
+        head: Number of leading packets always kept
+        stride: After the head, keep one packet out of ``stride``
+
+    Returns:
+        Number of packets written
+
+    Raises:
+        ValueError: If ``source`` is not an uncompressed pcap or pcapng file
+            or is truncated inside a header
+        OSError: If a file cannot be read or written
+    """
+    sampler = _Sampler(head, stride)
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        magic = src.read(4)
+        if len(magic) < 4:
+            raise ValueError(f"{source.name} is too short to be a capture")
+        (value,) = struct.unpack("<I", magic)
+        src.seek(0)
+        if value in _PCAP_MAGICS:
+            _sample_pcap(src, dst, _PCAP_MAGICS[value], sampler)
+        elif value == _PCAPNG_SHB:
+            _sample_pcapng(src, dst, sampler)
+        else:
+            raise ValueError(f"{source.name} is not an uncompressed pcap or pcapng capture")
+    return sampler.kept
+
+
+def _sample_pcap(src: BinaryIO, dst: BinaryIO, byte_order: str, sampler: _Sampler) -> None:
+    """Copy the global header and the sampled records of a classic pcap."""
+    header = src.read(_PCAP_HEADER_SIZE)
+    if len(header) < _PCAP_HEADER_SIZE:
+        raise ValueError("Truncated pcap global header")
+    dst.write(header)
+    record_header = struct.Struct(f"{byte_order}IIII")
+
+    while True:
+        raw = src.read(_PCAP_RECORD_HEADER_SIZE)
+        if len(raw) < _PCAP_RECORD_HEADER_SIZE:
+            return  # end of file (a partial trailing record is dropped)
+        captured_length = record_header.unpack(raw)[2]
+        if sampler.keep():
+            data = src.read(captured_length)
+            if len(data) < captured_length:
+                return
+            dst.write(raw)
+            dst.write(data)
+        else:
+            src.seek(captured_length, 1)
+
+
+def _sample_pcapng(src: BinaryIO, dst: BinaryIO, sampler: _Sampler) -> None:
+    """Copy all non-packet blocks and the sampled packet blocks of a pcapng."""
+    byte_order = "<"
+    while True:
+        raw = src.read(8)
+        if len(raw) < 8:
+            return
+        (block_type,) = struct.unpack("<I", raw[:4])
+        if block_type == _PCAPNG_SHB:
+            # The byte order of a section is given by its header block
+            order_magic = src.read(4)
+            if len(order_magic) < 4:
+                raise ValueError("Truncated pcapng section header")
+            byte_order = "<" if struct.unpack("<I", order_magic)[0] == _PCAPNG_BYTE_ORDER_MAGIC else ">"
+            src.seek(-4, 1)
+        else:
+            (block_type,) = struct.unpack(f"{byte_order}I", raw[:4])
+        (block_length,) = struct.unpack(f"{byte_order}I", raw[4:])
+        if block_length < 12:
+            raise ValueError(f"Invalid pcapng block length {block_length}")
+
+        if block_type not in _PCAPNG_PACKET_BLOCKS or sampler.keep():
+            body = src.read(block_length - 8)
+            if len(body) < block_length - 8:
+                return
+            dst.write(raw)
+            dst.write(body)
+        else:
+            src.seek(block_length - 8, 1)
+
+
+def estimate_packet_count(path: Path, sample_records: int = 1000) -> int | None:
+    """
+    Estimate the number of packets of a capture from its leading records.
+
+    The mean size of the first ``sample_records`` records (headers included)
+    is extrapolated to the file size, so the estimate costs a small read
+    regardless of the capture size.
+
+    Args:
+        path: pcap or pcapng capture
+        sample_records: Number of leading packet records measured
+
+    Returns:
+        Estimated packet count, or None if the file is not an uncompressed
+        pcap or pcapng capture
+    """
+    try:
+        size = path.stat().st_size
+        with open(path, "rb") as src:
+            magic = src.read(4)
+            if len(magic) < 4:
+                return None
+            (value,) = struct.unpack("<I", magic)
+            src.seek(0)
+            if value in _PCAP_MAGICS:
+                start, records, end = _scan_pcap(src, _PCAP_MAGICS[value], sample_records)
+            elif value == _PCAPNG_SHB:
+                start, records, end = _scan_pcapng(src, sample_records)
+            else:
+                return None
+    except (OSError, ValueError, struct.error):
+        return None
+    if records == 0 or end <= start:
+        return 0
+    return max(records, round((size - start) * records / (end - start)))
+
+
+def _scan_pcap(src: BinaryIO, byte_order: str, limit: int) -> tuple[int, int, int]:
+    """Offsets of the first record and after the ``limit``-th, and records seen."""
+    src.seek(_PCAP_HEADER_SIZE)
+    record_header = struct.Struct(f"{byte_order}IIII")
+    records = 0
+    while records < limit:
+        raw = src.read(_PCAP_RECORD_HEADER_SIZE)
+        if len(raw) < _PCAP_RECORD_HEADER_SIZE:
+            break
+        src.seek(record_header.unpack(raw)[2], 1)
+        records += 1
+    return _PCAP_HEADER_SIZE, records, src.tell()
+
+
+def _scan_pcapng(src: BinaryIO, limit: int) -> tuple[int, int, int]:
+    """Offsets of the first packet block and after the ``limit``-th, and packets seen."""
+    byte_order = "<"
+    start: int | None = None
+    records = 0
+    while records < limit:
+        offset = src.tell()
+        raw = src.read(12)
+        if len(raw) < 12:
+            break
+        (block_type,) = struct.unpack("<I", raw[:4])
+        if block_type == _PCAPNG_SHB:
+            magic = struct.unpack("<I", raw[8:])[0]
+            byte_order = "<" if magic == _PCAPNG_BYTE_ORDER_MAGIC else ">"
+        else:
+            (block_type,) = struct.unpack(f"{byte_order}I", raw[:4])
+        (block_length,) = struct.unpack(f"{byte_order}I", raw[4:8])
+        if block_length < 12:
+            raise ValueError(f"Invalid pcapng block length {block_length}")
+        if block_type in _PCAPNG_PACKET_BLOCKS:
+            if start is None:
+                start = offset
+            records += 1
+        src.seek(offset + block_length)
+    end = src.tell()
+    return (start if start is not None else end), records, end
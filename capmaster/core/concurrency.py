@@ -0,0 +1,127 @@
+"""Concurrent extraction of the two captures of a dual-input command.
+
+Dual-capture commands (match, packet diff, topology, quality analysis, F5
+matching) dissect capture A and capture B independently. Most of that time
+is spent in an external tshark process, so the two sides are run on two
+threads: both tshark subprocesses run at the same time and the Python-side
+parsing of one side overlaps with dissection of the other. A command then
+takes roughly as long as its larger capture instead of the sum of both.
+
+Every side holds one slot of a process-wide extraction budget while it
+runs, so nested helpers or several commands in the same process never have
+more than :func:`get_extraction_limit` extractions in flight.
+
+Example:
+    >>> connections_a, connections_b = run_dual(
+    ...     lambda: extract_connections_from_pcap(file_a),
+    ...     lambda: extract_connections_from_pcap(file_b),
+    ... )
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator, TypeVar
+
+logger = logging.getLogger(__name__)
+
+A = TypeVar("A")
+B = TypeVar("B")
+
+# Environment variable overriding the default extraction budget
+LIMIT_ENV_VAR = "CAPMASTER_MAX_EXTRACTIONS"
+
+
+def _default_limit() -> int:
+    """Extraction budget from the environment, else one per CPU."""
+    value = os.environ.get(LIMIT_ENV_VAR)
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            logger.warning(f"Ignoring invalid {LIMIT_ENV_VAR}={value!r}")
+    return os.cpu_count() or 1
+
+
+_limit = _default_limit()
+_slots = threading.BoundedSemaphore(_limit)
+_local = threading.local()
+
+
+def get_extraction_limit() -> int:
+    """Maximum number of extractions running at the same time."""
+    return _limit
+
+
+def set_extraction_limit(limit: int) -> None:
+    """
+    Change the process-wide extraction budget.
+
+    Only call this while no extraction is running (e.g. at CLI start-up).
+
+    Args:
+        limit: Maximum number of concurrent extractions (1 disables overlap)
+    """
+    global _limit, _slots
+    if limit < 1:
+        raise ValueError(f"Extraction limit must be at least 1, got {limit}")
+    _limit = limit
+    _slots = threading.BoundedSemaphore(limit)
+
+
+@contextmanager
+def extraction_slot() -> Iterator[None]:
+    """
+    Hold one slot of the extraction budget.
+
+    Re-entrant per thread: code already running inside a slot does not take
+    a second one, so nested helpers cannot deadlock on the budget.
+    """
+    if getattr(_local, "held", False):
+        yield
+        return
+    slots = _slots
+    with slots:
+        _local.held = True
+        try:
+            yield
+        finally:
+            _local.held = False
+
+
+def _run_in_slot(task: Callable[[], A]) -> A:
+    with extraction_slot():
+        return task()
+
+
+def run_dual(task_a: Callable[[], A], task_b: Callable[[], B]) -> tuple[A, B]:
+    """
+    Run the extraction of both captures concurrently.
+
+    ``task_b`` runs on a worker thread while ``task_a`` runs on the calling
+    thread. When the budget has a single slot, or the caller already holds
+    a slot, the two tasks run one after the other.
+
+    Args:
+        task_a: Zero-argument callable extracting capture A
+        task_b: Zero-argument callable extracting capture B
+
+    Returns:
+        (result of task_a, result of task_b)
+
+    Raises:
+        Whatever either task raised; if both fail, the error of ``task_a``
+        is raised once ``task_b`` has finished.
+    """
+    if _limit < 2 or getattr(_local, "held", False):
+        return _run_in_slot(task_a), _run_in_slot(task_b)
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="capmaster-extract") as pool:
+        future_b = pool.submit(_run_in_slot, task_b)
+        result_a = _run_in_slot(task_a)
+        result_b = future_b.result()
+    return result_a, result_b
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from capmaster.core.connection.extractor import TcpFieldExtractor
+from capmaster.core.connection.extractor import PacketSink, TcpFieldExtractor
 from capmaster.core.connection.models import (
     ConnectionBuilder,
     FiveTupleConnectionBuilder,
@@ -13,7 +13,9 @@ from capmaster.core.connection.models import (
 
 
 def extract_connections_from_pcap(
-    pcap_file: Path, merge_by_5tuple: bool = False
+    pcap_file: Path,
+    merge_by_5tuple: bool = False,
+    packet_sink: PacketSink | None = None,
 ) -> list[TcpConnection]:
     """
     Extract TCP connections from a PCAP file.
@@ -25,6 +27,8 @@ def extract_connections_from_pcap(
         pcap_file: Path to PCAP file
         merge_by_5tuple: If True, merge connections by direction-independent 5-tuple
                         instead of by stream ID. This allows port reuse detection.
+        packet_sink: Optional receiver retaining per-packet data from the same
+                     tshark pass (see :class:`PacketSink`)
 
     Returns:
         List of TcpConnection objects
@@ -47,7 +51,7 @@ def extract_connections_from_pcap(
         builder = ConnectionBuilder()
 
     # Extract packets and build connections
-    for packet in extractor.extract(pcap_file):
+    for packet in extractor.extract(pcap_file, packet_sink=packet_sink):
         builder.add_packet(packet)
 
     # Build and return connections
@@ -2,12 +2,39 @@
 
 from __future__ import annotations
 import csv
-from collections.abc import Iterator
+import logging
+from collections.abc import Iterator, Sequence
 from pathlib import Path
+from typing import Protocol
 
 from capmaster.core.tshark_wrapper import TsharkWrapper
 from capmaster.core.connection.models import TcpPacket
 
+logger = logging.getLogger(__name__)
+
+
+class PacketSink(Protocol):
+    """
+    Receiver of the packets dissected by :meth:`TcpFieldExtractor.extract`.
+
+    A sink lets a consumer retain per-packet data from the connection
+    extraction pass instead of dissecting the capture a second time.
+
+    The pass runs with TCP reassembly disabled, unlike a default tshark
+    dissection: per-segment fields are the same, but columns summarizing
+    upper layers (such as ``_ws.col.Info``) describe each segment on its own
+    instead of showing "TCP segment of a reassembled PDU".
+    """
+
+    @property
+    def extra_fields(self) -> Sequence[str]:
+        """Additional tshark fields appended after TcpFieldExtractor.FIELDS."""
+        ...
+
+    def add(self, packet: TcpPacket, row: list[str]) -> None:
+        """Receive a parsed packet together with its raw field row."""
+        ...
+
 
 class TcpFieldExtractor:
     """
@@ -45,12 +72,16 @@ class TcpFieldExtractor:
         """Initialize the extractor with a tshark wrapper."""
         self.tshark = TsharkWrapper()
 
-    def extract(self, pcap_file: Path) -> Iterator[TcpPacket]:
+    def extract(
+        self, pcap_file: Path, packet_sink: PacketSink | None = None
+    ) -> Iterator[TcpPacket]:
         """
         Extract TCP packets from a PCAP file.
 
         Args:
             pcap_file: Path to the PCAP file
+            packet_sink: Optional receiver of every parsed packet and its raw
+                row; its ``extra_fields`` are added to the same tshark pass
 
         Yields:
             TcpPacket objects for each TCP packet in the file
@@ -70,7 +101,8 @@ class TcpFieldExtractor:
             "-o",
             "tcp.relative_sequence_numbers:false",  # Use absolute sequence numbers
             "-o",
-            "tcp.desegment_tcp_streams:false",  # Disable TCP reassembly
+            # Disable TCP reassembly (also for packet sink fields, see PacketSink)
+            "tcp.desegment_tcp_streams:false",
             "-T",
             "fields",
             "-E",
@@ -82,7 +114,10 @@ class TcpFieldExtractor:
         ]
 
         # Add field extraction arguments
-        for field in self.FIELDS:
+        fields = list(self.FIELDS)
+        if packet_sink is not None:
+            fields.extend(packet_sink.extra_fields)
+        for field in fields:
             args.extend(["-e", field])
 
         # OPTIMIZATION: Use pipe to read tshark output directly
@@ -96,14 +131,17 @@ class TcpFieldExtractor:
         # So if we reach here, the command succeeded or had only warnings
 
         # Parse the TSV output from stdout
-        yield from self._parse_tsv_string(result.stdout)
+        yield from self._parse_tsv_string(result.stdout, packet_sink)
 
-    def _parse_tsv_string(self, tsv_content: str) -> Iterator[TcpPacket]:
+    def _parse_tsv_string(
+        self, tsv_content: str, packet_sink: PacketSink | None = None
+    ) -> Iterator[TcpPacket]:
         """
         Parse TSV output from tshark (from string).
 
         Args:
             tsv_content: TSV content as string
+            packet_sink: Optional receiver of each parsed packet and its row
 
         Yields:
             TcpPacket objects
@@ -112,19 +150,27 @@ class TcpFieldExtractor:
         lines = tsv_content.strip().split('\n')
         reader = csv.reader(lines, delimiter="\t")
 
+        skipped = 0
         for row in reader:
             if len(row) < len(self.FIELDS):
                 # Skip incomplete rows
+                skipped += 1
                 continue
 
             try:
                 packet = self._parse_row(row)
                 if packet:
+                    if packet_sink is not None:
+                        packet_sink.add(packet, row)
                     yield packet
             except (ValueError, IndexError):
                 # Skip malformed rows
+                skipped += 1
                 continue
 
+        if skipped:
+            logger.debug(f"Skipped {skipped} unparsable TCP field rows")
+
     def _parse_tsv(self, tsv_file: Path) -> Iterator[TcpPacket]:
         """
         Parse TSV output from tshark (from file).
@@ -5,6 +5,7 @@ from collections import defaultdict
 from dataclasses import dataclass
 from pathlib import Path
 
+from capmaster.core.concurrency import run_dual
 from capmaster.core.connection.f5_extractor import F5EthTrailerExtractor, F5TrailerInfo
 from capmaster.utils.logger import get_logger
 
@@ -132,12 +133,13 @@ class F5Matcher:
         Returns:
             List of matched connection pairs
         """
-        logger.info("Extracting F5 trailer information from SNAT side...")
-        snat_peers = self._extract_snat_peers(snat_pcap)
+        # Both sides are extracted concurrently
+        logger.info("Extracting F5 trailer information from SNAT and VIP sides...")
+        snat_peers, vip_clients = run_dual(
+            lambda: self._extract_snat_peers(snat_pcap),
+            lambda: self._extract_vip_clients(vip_pcap),
+        )
         logger.info(f"Found {len(snat_peers)} SNAT streams with F5 trailer")
-        
-        logger.info("Extracting client information from VIP side...")
-        vip_clients = self._extract_vip_clients(vip_pcap)
         logger.info(f"Found {len(vip_clients)} VIP streams with F5 trailer")
         
         logger.info("Matching connections...")
@@ -10,6 +10,7 @@ from typing import Any
 from capmaster.core.connection.matcher import ConnectionMatch
 from capmaster.core.connection.models import TcpConnection
 from capmaster.core.connection.scorer import MatchScore
+from capmaster.utils.fingerprint import capture_fingerprints
 
 logger = logging.getLogger(__name__)
 
@@ -197,6 +198,7 @@ class MatchSerializer:
             "version": "1.0",
             "file1": str(file1_path),
             "file2": str(file2_path),
+            "fingerprints": capture_fingerprints(Path(file1_path), Path(file2_path)),
             "metadata": metadata or {},
             "matches": [MatchSerializer.serialize_match(m) for m in matches],
         }
@@ -243,6 +245,7 @@ class MatchSerializer:
             metadata = {
                 "file1": data.get("file1"),
                 "file2": data.get("file2"),
+                "fingerprints": data.get("fingerprints", {}),
                 "version": version,
                 **data.get("metadata", {}),
             }
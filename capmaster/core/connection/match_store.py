@@ -0,0 +1,674 @@
+"""Compact binary store for match results.
+
+The store is a versioned, columnar file written by ``capmaster match`` next
+to its text report. Downstream commands open it through :mod:`mmap` instead
+of re-parsing the human-readable table, so opening a store with millions of
+pairs only reads a small JSON header, and stream id lookups are O(1).
+
+Layout (all integers little-endian)::
+
+    MAGIC (8 bytes) | VERSION (u16) | header length (u32) | header JSON
+    section 0 | section 1 | ...            (each aligned to 8 bytes)
+
+The header JSON records the capture paths and fingerprints, free-form match
+metadata, the table sizes and the ``[offset, length, typecode]`` of every
+section. Sections are:
+
+- ``strings.offsets`` / ``strings.data``: interned strings (IPs, evidence)
+- ``a.<column>`` / ``b.<column>``: connection tables of captures A and B,
+  one fixed-width column per frequently used field
+- ``a.payload.offsets`` / ``a.payload.data``: remaining TcpConnection
+  fields as compact JSON, decoded only when a full connection is requested
+- ``a.index``: open-addressing hash table from stream id to row
+- ``a.pairs.offsets`` / ``a.pairs.rows``: pairs referencing each connection
+- ``pairs.<column>``: the pair table
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Iterator, NamedTuple, cast
+
+from capmaster.core.connection.match_serializer import MatchSerializer
+from capmaster.core.connection.matcher import ConnectionMatch
+from capmaster.core.connection.models import TcpConnection
+from capmaster.core.connection.scorer import MatchScore
+from capmaster.utils.fingerprint import capture_fingerprints, fingerprints_match
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CMSTORE\x00"
+VERSION = 1
+STORE_SUFFIX = ".cmstore"
+
+_PREAMBLE = struct.Struct("<8sHI")
+_ALIGNMENT = 8
+_SIDES = ("a", "b")
+
+# Connection fields stored as fixed-width columns. String fields are stored
+# as ids into the interned string table.
+_CONNECTION_COLUMNS: tuple[tuple[str, str], ...] = (
+    ("stream_id", "q"),
+    ("protocol", "B"),
+    ("client_ip", "I"),
+    ("client_port", "H"),
+    ("server_ip", "I"),
+    ("server_port", "H"),
+    ("client_ttl", "B"),
+    ("server_ttl", "B"),
+    ("total_bytes", "q"),
+    ("packet_count", "I"),
+    ("first_packet_time", "d"),
+    ("last_packet_time", "d"),
+)
+_STRING_COLUMNS = frozenset({"client_ip", "server_ip"})
+
+_PAIR_COLUMNS: tuple[tuple[str, str], ...] = (
+    ("conn_a", "I"),
+    ("conn_b", "I"),
+    ("normalized_score", "d"),
+    ("raw_score", "d"),
+    ("available_weight", "d"),
+    ("flags", "B"),
+    ("evidence", "I"),
+)
+_FLAG_IPID_MATCH = 1
+_FLAG_FORCE_ACCEPT = 2
+_FLAG_MICROFLOW_ACCEPT = 4
+
+_EMPTY_SLOT = 0
+
+_PAYLOAD_ENCODER = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+
+class StoredPair(NamedTuple):
+    """Summary of one stored pair, without decoding full connections."""
+
+    position: int
+    """0-based position of the pair (the text report numbers pairs from 1)"""
+
+    stream_a: int
+    """Stream ID in file A"""
+
+    client_a: str
+    """Client endpoint in file A (``ip:port``)"""
+
+    server_a: str
+    """Server endpoint in file A (``ip:port``)"""
+
+    stream_b: int
+    """Stream ID in file B"""
+
+    client_b: str
+    """Client endpoint in file B (``ip:port``)"""
+
+    server_b: str
+    """Server endpoint in file B (``ip:port``)"""
+
+    normalized_score: float
+    """Normalized match score"""
+
+    evidence: str
+    """Match evidence"""
+
+
+def _slot(stream_id: int, mask: int) -> int:
+    """Initial hash table slot for a stream id."""
+    return ((stream_id * 0x9E3779B97F4A7C15) >> 16) & mask
+
+
+def _to_little_endian(values: array) -> bytes:
+    if sys.byteorder == "big" and values.itemsize > 1:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+class _StoreWriter:
+    """Build the sections of a match store in memory."""
+
+    def __init__(self) -> None:
+        self.sections: list[tuple[str, str, bytes]] = []
+        self._strings: dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        string_id = self._strings.get(value)
+        if string_id is None:
+            string_id = self._strings[value] = len(self._strings)
+        return string_id
+
+    def add(self, name: str, values: array) -> None:
+        self.sections.append((name, values.typecode, _to_little_endian(values)))
+
+    def add_blob(self, name: str, data: bytes) -> None:
+        self.sections.append((name, "B", data))
+
+    def add_strings(self) -> None:
+        offsets = array("Q", [0])
+        chunks = []
+        position = 0
+        for value in self._strings:
+            encoded = value.encode("utf-8")
+            chunks.append(encoded)
+            position += len(encoded)
+            offsets.append(position)
+        self.add("strings.offsets", offsets)
+        self.add_blob("strings.data", b"".join(chunks))
+
+    def add_connections(self, side: str, connections: list[TcpConnection]) -> None:
+        column_names = [name for name, _ in _CONNECTION_COLUMNS]
+        for name, typecode in _CONNECTION_COLUMNS:
+            values = [getattr(conn, name) for conn in connections]
+            if name in _STRING_COLUMNS:
+                values = [self.intern(value) for value in values]
+            self.add(f"{side}.{name}", array(typecode, values))
+
+        # Remaining fields, serialized exactly like MatchSerializer does
+        payload_offsets = array("Q", [0])
+        payload_chunks = []
+        position = 0
+        encode = _PAYLOAD_ENCODER.encode
+        for conn in connections:
+            data = MatchSerializer.serialize_connection(conn)
+            for name in column_names:
+                del data[name]
+            encoded = encode(data).encode("utf-8")
+            payload_chunks.append(encoded)
+            position += len(encoded)
+            payload_offsets.append(position)
+        self.add(f"{side}.payload.offsets", payload_offsets)
+        self.add_blob(f"{side}.payload.data", b"".join(payload_chunks))
+
+        # Open-addressing hash table: slot -> row + 1 (0 = empty)
+        size = 8
+        while size < 2 * len(connections):
+            size <<= 1
+        mask = size - 1
+        index = array("I", bytes(4 * size))
+        for row, conn in enumerate(connections):
+            slot = _slot(conn.stream_id, mask)
+            while index[slot] != _EMPTY_SLOT:
+                slot = (slot + 1) & mask
+            index[slot] = row + 1
+        self.add(f"{side}.index", index)
+
+    def add_pair_lists(self, side: str, connection_count: int, rows: array) -> None:
+        """Group pair rows by connection (CSR layout)."""
+        counts = [0] * (connection_count + 1)
+        for conn_row in rows:
+            counts[conn_row + 1] += 1
+        offsets = array("I", counts)
+        for i in range(1, len(offsets)):
+            offsets[i] += offsets[i - 1]
+        cursor = list(offsets[:-1])
+        pair_rows = array("I", bytes(4 * len(rows)))
+        for pair_row, conn_row in enumerate(rows):
+            pair_rows[cursor[conn_row]] = pair_row
+            cursor[conn_row] += 1
+        self.add(f"{side}.pairs.offsets", offsets)
+        self.add(f"{side}.pairs.rows", pair_rows)
+
+
+class MatchStore:
+    """Read-only, memory-mapped view of a binary match store."""
+
+    def __init__(self, path: Path, header: dict[str, Any], buffer: mmap.mmap | bytes):
+        """
+        Initialize the store. Use :meth:`open` instead of calling this directly.
+
+        Args:
+            path: Path of the store file
+            header: Decoded header JSON
+            buffer: Memory-mapped file content
+        """
+        self.path = path
+        self._header = header
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+        self._columns: dict[str, Any] = {}
+        self._strings: dict[int, str] = {}
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def save(
+        matches: list[ConnectionMatch],
+        output_file: Path,
+        file1_path: Path | str,
+        file2_path: Path | str,
+        metadata: dict[str, Any] | None = None,
+    ) -> None:
+        """
+        Save matches to a binary match store.
+
+        Args:
+            matches: List of ConnectionMatch objects
+            output_file: Path to the store file
+            file1_path: Path to first PCAP file (capture A)
+            file2_path: Path to second PCAP file (capture B)
+            metadata: Optional metadata to include in the header
+        """
+        writer = _StoreWriter()
+
+        # Connection tables, deduplicated by stream id per side
+        tables: dict[str, list[TcpConnection]] = {side: [] for side in _SIDES}
+        rows: dict[str, dict[int, int]] = {side: {} for side in _SIDES}
+        pair_columns: dict[str, array[Any]] = {
+            name: array(code) for name, code in _PAIR_COLUMNS
+        }
+        for match in matches:
+            for side, conn, column in (("a", match.conn1, "conn_a"), ("b", match.conn2, "conn_b")):
+                row = rows[side].get(conn.stream_id)
+                if row is None:
+                    row = rows[side][conn.stream_id] = len(tables[side])
+                    tables[side].append(conn)
+                pair_columns[column].append(row)
+            score = match.score
+            pair_columns["normalized_score"].append(score.normalized_score)
+            pair_columns["raw_score"].append(score.raw_score)
+            pair_columns["available_weight"].append(score.available_weight)
+            pair_columns["flags"].append(
+                (_FLAG_IPID_MATCH if score.ipid_match else 0)
+                | (_FLAG_FORCE_ACCEPT if score.force_accept else 0)
+                | (_FLAG_MICROFLOW_ACCEPT if score.microflow_accept else 0)
+            )
+            pair_columns["evidence"].append(writer.intern(score.evidence))
+
+        for side in _SIDES:
+            writer.add_connections(side, tables[side])
+            writer.add_pair_lists(side, len(tables[side]), pair_columns[f"conn_{side}"])
+        for name, _ in _PAIR_COLUMNS:
+            writer.add(f"pairs.{name}", pair_columns[name])
+        writer.add_strings()
+
+        fingerprints = capture_fingerprints(Path(file1_path), Path(file2_path))
+
+        # Lay out sections after the header. The header size depends on the
+        # offsets it records, so compute it with relative offsets first.
+        relative: dict[str, list[Any]] = {}
+        position = 0
+        for name, typecode, data in writer.sections:
+            relative[name] = [position, len(data), typecode]
+            position += len(data) + (-len(data) % _ALIGNMENT)
+
+        header: dict[str, Any] = {
+            "file1": str(file1_path),
+            "file2": str(file2_path),
+            "fingerprints": fingerprints,
+            "metadata": metadata or {},
+            "counts": {
+                "a": len(tables["a"]),
+                "b": len(tables["b"]),
+                "pairs": len(matches),
+                "strings": len(writer._strings),
+            },
+            "base": 0,
+            "sections": relative,
+        }
+        encoded = json.dumps(header, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        # Reserve room for the base offset digits, then pad to alignment
+        base = _PREAMBLE.size + len(encoded) + 32
+        base += -base % _ALIGNMENT
+        header["base"] = base
+        encoded = json.dumps(header, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        encoded += b" " * (base - _PREAMBLE.size - len(encoded))
+
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = output_file.with_name(output_file.name + ".tmp")
+        with open(tmp_file, "wb") as f:
+            f.write(_PREAMBLE.pack(MAGIC, VERSION, len(encoded)))
+            f.write(encoded)
+            for _, _, data in writer.sections:
+                f.write(data)
+                f.write(bytes(-len(data) % _ALIGNMENT))
+        tmp_file.replace(output_file)
+
+        logger.info(f"Saved {len(matches)} matches to {output_file}")
+
+    # ------------------------------------------------------------------
+    # Opening
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def path_for_report(report_file: Path) -> Path:
+        """Store path written next to a text report."""
+        return report_file.with_suffix(STORE_SUFFIX)
+
+    @staticmethod
+    def is_store(path: Path) -> bool:
+        """Check whether a file is a binary match store."""
+        try:
+            with open(path, "rb") as f:
+                return f.read(len(MAGIC)) == MAGIC
+        except OSError:
+            return False
+
+    @staticmethod
+    def find_for_report(report_file: Path) -> Path | None:
+        """
+        Locate the store to use instead of parsing a text report.
+
+        Args:
+            report_file: Path given on the command line (store or text report)
+
+        Returns:
+            ``report_file`` itself if it is a store, the sibling store if it is
+            at least as recent as the report, otherwise None
+        """
+        if MatchStore.is_store(report_file):
+            return report_file
+        store_file = MatchStore.path_for_report(report_file)
+        if store_file == report_file or not store_file.exists():
+            return None
+        try:
+            if store_file.stat().st_mtime < report_file.stat().st_mtime:
+                logger.debug(f"Ignoring stale match store: {store_file}")
+                return None
+        except OSError:
+            return None
+        return store_file if MatchStore.is_store(store_file) else None
+
+    @classmethod
+    def open(cls, path: Path) -> MatchStore:
+        """
+        Open a match store for reading.
+
+        Args:
+            path: Path to the store file
+
+        Returns:
+            MatchStore backed by a read-only memory map
+
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+            ValueError: If the file is not a supported match store
+        """
+        if not path.exists():
+            raise FileNotFoundError(f"Match store not found: {path}")
+
+        with open(path, "rb") as f:
+            preamble = f.read(_PREAMBLE.size)
+            if len(preamble) < _PREAMBLE.size:
+                raise ValueError(f"Invalid match store (truncated header): {path}")
+            magic, version, header_length = _PREAMBLE.unpack(preamble)
+            if magic != MAGIC:
+                raise ValueError(f"Not a match store: {path}")
+            if version != VERSION:
+                raise ValueError(f"Unsupported match store version {version}: {path}")
+            try:
+                header = json.loads(f.read(header_length).decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                raise ValueError(f"Invalid match store header: {e}") from e
+            buffer: mmap.mmap | bytes
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                f.seek(0)
+                buffer = f.read()
+        return cls(path, header, buffer)
+
+    def close(self) -> None:
+        """Release the memory map."""
+        for column in self._columns.values():
+            if isinstance(column, memoryview):
+                column.release()
+        self._columns.clear()
+        self._view.release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def __enter__(self) -> MatchStore:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Header
+    # ------------------------------------------------------------------
+
+    @property
+    def file1(self) -> str:
+        """Path of capture A when the store was written."""
+        return cast(str, self._header["file1"])
+
+    @property
+    def file2(self) -> str:
+        """Path of capture B when the store was written."""
+        return cast(str, self._header["file2"])
+
+    @property
+    def fingerprints(self) -> dict[str, str | None]:
+        """Capture fingerprints recorded when the store was written."""
+        return cast("dict[str, str | None]", self._header["fingerprints"])
+
+    @property
+    def metadata(self) -> dict[str, Any]:
+        """Free-form match metadata (statistics, match mode, ...)."""
+        return cast("dict[str, Any]", self._header["metadata"])
+
+    def captures_match(self, file1: Path, file2: Path) -> bool:
+        """
+        Check whether the given captures are the ones the store was built from.
+
+        Args:
+            file1: Capture A
+            file2: Capture B
+
+        Returns:
+            True if both capture fingerprints are unchanged
+        """
+        return fingerprints_match(self.fingerprints, file1, file2)
+
+    def __len__(self) -> int:
+        return cast(int, self._header["counts"]["pairs"])
+
+    def connection_count(self, side: str) -> int:
+        """Number of distinct connections stored for capture ``"a"`` or ``"b"``."""
+        return cast(int, self._header["counts"][side])
+
+    # ------------------------------------------------------------------
+    # Columns
+    # ------------------------------------------------------------------
+
+    def _column(self, name: str) -> Any:
+        """Zero-copy view of a section (copied only on big-endian hosts)."""
+        column = self._columns.get(name)
+        if column is None:
+            offset, length, typecode = self._header["sections"][name]
+            start = self._header["base"] + offset
+            raw = self._view[start:start + length]
+            if typecode == "B":
+                column = raw
+            elif sys.byteorder == "little":
+                column = raw.cast(typecode)
+            else:
+                column = array(typecode, raw.tobytes())
+                column.byteswap()
+            self._columns[name] = column
+        return column
+
+    def _string(self, string_id: int) -> str:
+        value = self._strings.get(string_id)
+        if value is None:
+            offsets = self._column("strings.offsets")
+            data = self._column("strings.data")
+            value = bytes(data[offsets[string_id]:offsets[string_id + 1]]).decode("utf-8")
+            self._strings[string_id] = value
+        return value
+
+    def _endpoint(self, side: str, row: int, role: str) -> str:
+        ip = self._string(self._column(f"{side}.{role}_ip")[row])
+        return f"{ip}:{self._column(f'{side}.{role}_port')[row]}"
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def find_connection(self, side: str, stream_id: int) -> int | None:
+        """
+        Find the connection row of a stream id in O(1).
+
+        Args:
+            side: ``"a"`` for file1 or ``"b"`` for file2
+            stream_id: TCP stream id
+
+        Returns:
+            Row in the connection table, or None if the stream is not stored
+        """
+        index = self._column(f"{side}.index")
+        stream_ids = self._column(f"{side}.stream_id")
+        mask = len(index) - 1
+        slot = _slot(stream_id, mask)
+        while True:
+            entry: int = index[slot]
+            if entry == _EMPTY_SLOT:
+                return None
+            if stream_ids[entry - 1] == stream_id:
+                return entry - 1
+            slot = (slot + 1) & mask
+
+    def find_pairs(self, side: str, stream_id: int) -> list[int]:
+        """
+        Find the pairs a stream takes part in.
+
+        Args:
+            side: ``"a"`` for file1 or ``"b"`` for file2
+            stream_id: TCP stream id
+
+        Returns:
+            0-based pair indices, in report order
+        """
+        row = self.find_connection(side, stream_id)
+        if row is None:
+            return []
+        offsets = self._column(f"{side}.pairs.offsets")
+        return list(self._column(f"{side}.pairs.rows")[offsets[row]:offsets[row + 1]])
+
+    def pair(self, index: int) -> StoredPair:
+        """
+        Get the summary of a pair without decoding full connections.
+
+        Args:
+            index: 0-based pair index
+
+        Returns:
+            StoredPair for the pair
+
+        Raises:
+            IndexError: If the index is out of range
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f"Pair index {index} out of range (0-{len(self) - 1})")
+        row_a = self._column("pairs.conn_a")[index]
+        row_b = self._column("pairs.conn_b")[index]
+        return StoredPair(
+            position=index,
+            stream_a=self._column("a.stream_id")[row_a],
+            client_a=self._endpoint("a", row_a, "client"),
+            server_a=self._endpoint("a", row_a, "server"),
+            stream_b=self._column("b.stream_id")[row_b],
+            client_b=self._endpoint("b", row_b, "client"),
+            server_b=self._endpoint("b", row_b, "server"),
+            normalized_score=self._column("pairs.normalized_score")[index],
+            evidence=self._string(self._column("pairs.evidence")[index]),
+        )
+
+    def iter_pairs(self) -> Iterator[StoredPair]:
+        """Iterate over pair summaries in report order."""
+        for index in range(len(self)):
+            yield self.pair(index)
+
+    def stream_pairs(self) -> list[tuple[int, int]]:
+        """All ``(stream_a, stream_b)`` pairs in report order."""
+        stream_a = self._column("a.stream_id")
+        stream_b = self._column("b.stream_id")
+        return [
+            (stream_a[row_a], stream_b[row_b])
+            for row_a, row_b in zip(self._column("pairs.conn_a"), self._column("pairs.conn_b"))
+        ]
+
+    def connection(self, side: str, row: int) -> TcpConnection:
+        """
+        Decode the full TcpConnection stored at a row.
+
+        Args:
+            side: ``"a"`` for file1 or ``"b"`` for file2
+            row: Row in the connection table
+
+        Returns:
+            TcpConnection equal to the one that was saved
+        """
+        offsets = self._column(f"{side}.payload.offsets")
+        data = json.loads(
+            bytes(self._column(f"{side}.payload.data")[offsets[row]:offsets[row + 1]])
+        )
+        for name, _ in _CONNECTION_COLUMNS:
+            value = self._column(f"{side}.{name}")[row]
+            data[name] = self._string(value) if name in _STRING_COLUMNS else value
+        return MatchSerializer.deserialize_connection(data)
+
+    def match(self, index: int) -> ConnectionMatch:
+        """
+        Decode a full ConnectionMatch.
+
+        Args:
+            index: 0-based pair index
+
+        Returns:
+            ConnectionMatch equal to the one that was saved
+        """
+        flags = self._column("pairs.flags")[index]
+        score = MatchScore(
+            normalized_score=self._column("pairs.normalized_score")[index],
+            raw_score=self._column("pairs.raw_score")[index],
+            available_weight=self._column("pairs.available_weight")[index],
+            ipid_match=bool(flags & _FLAG_IPID_MATCH),
+            evidence=self._string(self._column("pairs.evidence")[index]),
+            force_accept=bool(flags & _FLAG_FORCE_ACCEPT),
+            microflow_accept=bool(flags & _FLAG_MICROFLOW_ACCEPT),
+        )
+        return ConnectionMatch(
+            conn1=self.connection("a", self._column("pairs.conn_a")[index]),
+            conn2=self.connection("b", self._column("pairs.conn_b")[index]),
+            score=score,
+        )
+
+    def matches(self) -> list[ConnectionMatch]:
+        """Decode all matches in report order."""
+        return [self.match(index) for index in range(len(self))]
+
+    @staticmethod
+    def load_matches(input_file: Path) -> tuple[list[ConnectionMatch], dict[str, Any]]:
+        """
+        Load matches from a store, mirroring :meth:`MatchSerializer.load_matches`.
+
+        Args:
+            input_file: Path to the store file
+
+        Returns:
+            Tuple of (matches, metadata)
+
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+            ValueError: If the file is not a supported match store
+        """
+        with MatchStore.open(input_file) as store:
+            matches = store.matches()
+            metadata = {
+                "file1": store.file1,
+                "file2": store.file2,
+                "version": f"store-{VERSION}",
+                **store.metadata,
+            }
+        logger.info(f"Loaded {len(matches)} matches from {input_file}")
+        return matches, metadata
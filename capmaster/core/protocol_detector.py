@@ -1,23 +1,69 @@
-"""Protocol detection using tshark."""
+"""Protocol detection using tshark.
+
+Detection runs ``tshark -q -z io,phs``. Its output is memoized per capture
+fingerprint, in memory and in the on-disk cache (see
+:mod:`capmaster.utils.cache`), so re-analyzing an unchanged capture skips
+the pass entirely; the same output serves as the report of the
+``protocol_hierarchy`` analysis module.
+
+:meth:`ProtocolDetector.detect_sampled` trades completeness for speed: it
+dissects only the first packets and a sparse stride of the rest (see
+:mod:`capmaster.core.capture_sampler`). Protocols that appear only in
+skipped packets are missed, so it is meant for gating which modules run,
+not for reporting.
+"""
 
 from __future__ import annotations
+
+import logging
 import re
+import tempfile
 from pathlib import Path
 
+from capmaster.core.capture_sampler import sample_capture
 from capmaster.core.tshark_wrapper import TsharkWrapper
+from capmaster.utils.cache import cache_key, default_cache_dir, read_entry, write_entry
+from capmaster.utils.fingerprint import capture_fingerprint
+
+logger = logging.getLogger(__name__)
+
+HIERARCHY_ARGS = ["-q", "-z", "io,phs"]
+
+# Packets always dissected by sampled detection, then one packet out of SAMPLE_STRIDE
+SAMPLE_HEAD_PACKETS = 10_000
+SAMPLE_STRIDE = 50
+
+# Cache namespace of protocol hierarchy outputs
+CACHE_NAMESPACE = "protocols"
 
 
 class ProtocolDetector:
     """Detect protocols present in a PCAP file."""
 
-    def __init__(self, tshark: TsharkWrapper) -> None:
+    def __init__(
+        self,
+        tshark: TsharkWrapper,
+        cache_dir: Path | None = None,
+        timeout: int = 300,
+    ) -> None:
         """
         Initialize ProtocolDetector.
 
         Args:
             tshark: TsharkWrapper instance for executing tshark commands
+            cache_dir: Directory of the on-disk cache; None keeps results in
+                memory only (see :meth:`with_default_cache`)
+            timeout: Timeout of a detection pass in seconds
         """
         self.tshark = tshark
+        self.cache_dir = cache_dir
+        self.timeout = timeout
+        self._memo: dict[str, str] = {}
+
+    @classmethod
+    def with_default_cache(cls, tshark: TsharkWrapper) -> ProtocolDetector:
+        """Create a detector using the default on-disk cache location."""
+        return cls(tshark, cache_dir=default_cache_dir(CACHE_NAMESPACE))
 
     def detect(self, pcap_file: Path) -> set[str]:
         """
@@ -32,17 +78,112 @@ class ProtocolDetector:
         Raises:
             TsharkExecutionError: If tshark command fails
         """
-        # Execute tshark with protocol hierarchy statistics
+        return self._parse_protocol_hierarchy(self.hierarchy(pcap_file))
+
+    def detect_sampled(self, pcap_file: Path) -> set[str]:
+        """
+        Detect protocols from a sample of the packets of a PCAP file.
+
+        The first :data:`SAMPLE_HEAD_PACKETS` packets and one packet out of
+        :data:`SAMPLE_STRIDE` after them are dissected. A complete result
+        already known for the capture is used instead.
+
+        Args:
+            pcap_file: Path to PCAP file
+
+        Returns:
+            Set of protocol names (lowercase) found in the sample
+
+        Raises:
+            TsharkExecutionError: If tshark command fails
+        """
+        fingerprint = self._fingerprint(pcap_file)
+        full = self._lookup(fingerprint, "full")
+        if full is not None:
+            return self._parse_protocol_hierarchy(full)
+        output = self._lookup(fingerprint, "sampled")
+        if output is None:
+            output = self._run_sampled(pcap_file)
+            self._store(fingerprint, "sampled", output)
+        return self._parse_protocol_hierarchy(output)
+
+    def hierarchy(self, pcap_file: Path) -> str:
+        """
+        Return the ``tshark -q -z io,phs`` output of a PCAP file.
+
+        Args:
+            pcap_file: Path to PCAP file
+
+        Returns:
+            Protocol hierarchy statistics of all packets
+
+        Raises:
+            TsharkExecutionError: If tshark command fails
+        """
+        fingerprint = self._fingerprint(pcap_file)
+        output = self._lookup(fingerprint, "full")
+        if output is None:
+            output = self._execute(pcap_file)
+            self._store(fingerprint, "full", output)
+        return output
+
+    def _execute(self, pcap_file: Path, args: list[str] | None = None) -> str:
+        """Run the protocol hierarchy pass."""
         result = self.tshark.execute(
-            args=["-q", "-z", "io,phs"],
+            args=args or HIERARCHY_ARGS,
             input_file=pcap_file,
-            timeout=60,
+            timeout=self.timeout,
         )
-
-        # Parse output to extract protocols
-        protocols = self._parse_protocol_hierarchy(result.stdout)
-
-        return protocols
+        return result.stdout
+
+    def _run_sampled(self, pcap_file: Path) -> str:
+        """Run the protocol hierarchy pass over a packet sample."""
+        with tempfile.TemporaryDirectory(prefix="capmaster-sample-") as tmp:
+            sample = Path(tmp) / f"sample{pcap_file.suffix or '.pcap'}"
+            try:
+                kept = sample_capture(pcap_file, sample, SAMPLE_HEAD_PACKETS, SAMPLE_STRIDE)
+            except ValueError as e:
+                # e.g. compressed captures: fall back to the leading packets only
+                logger.debug(f"Cannot sample {pcap_file.name} ({e}), reading its first packets")
+                return self._execute(pcap_file, ["-c", str(SAMPLE_HEAD_PACKETS), *HIERARCHY_ARGS])
+            logger.debug(f"Detecting protocols of {pcap_file.name} from {kept} sampled packets")
+            return self._execute(sample)
+
+    def _fingerprint(self, pcap_file: Path) -> str | None:
+        """Fingerprint of the capture and tshark version, None if unreadable."""
+        try:
+            fingerprint = capture_fingerprint(pcap_file)
+        except OSError:
+            return None
+        version = getattr(self.tshark, "version", None)
+        return f"{fingerprint}:{version if isinstance(version, str) else ''}"
+
+    def _lookup(self, fingerprint: str | None, mode: str) -> str | None:
+        """Find a memoized hierarchy output."""
+        if fingerprint is None:
+            return None
+        key = cache_key(fingerprint, mode)
+        output = self._memo.get(key)
+        if output is None and self.cache_dir is not None:
+            entry = read_entry(self.cache_dir, key)
+            if entry is not None and isinstance(entry.get("hierarchy"), str):
+                output = entry["hierarchy"]
+                self._memo[key] = output
+                logger.debug(f"Using cached protocol hierarchy ({mode})")
+        return output
+
+    def _store(self, fingerprint: str | None, mode: str, output: str) -> None:
+        """Memoize a hierarchy output in memory and on disk."""
+        if fingerprint is None:
+            return
+        key = cache_key(fingerprint, mode)
+        self._memo[key] = output
+        if self.cache_dir is not None:
+            write_entry(
+                self.cache_dir,
+                key,
+                {"fingerprint": fingerprint, "mode": mode, "hierarchy": output},
+            )
 
     def _parse_protocol_hierarchy(self, output: str) -> set[str]:
         """
@@ -0,0 +1,100 @@
+"""Largest-first scheduling of per-file jobs.
+
+Worker pools dispatch jobs in submission order. When jobs are submitted in
+input order, a large capture that comes last starts last and runs alone
+while every other worker is idle. Dispatching jobs by decreasing estimated
+cost (the LPT, longest-processing-time-first rule) starts the long jobs
+first and lets the short ones fill the gaps, which bounds the makespan to
+at most 4/3 of the optimum.
+
+The cost of a capture is estimated from its packet count (extrapolated
+from the leading records, see
+:func:`capmaster.core.capture_sampler.estimate_packet_count`) and falls
+back to its size for captures that cannot be scanned.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Callable, Iterable, Sequence, TypeVar
+
+from capmaster.core.capture_sampler import estimate_packet_count
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Bytes per packet assumed when a capture cannot be scanned
+FALLBACK_BYTES_PER_PACKET = 500
+
+
+def file_size(path: Path) -> int:
+    """Size of a file in bytes, 0 if it cannot be read."""
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def estimate_packets(path: Path) -> int:
+    """
+    Estimated packet count of a capture.
+
+    Args:
+        path: Capture file
+
+    Returns:
+        Packet count extrapolated from the leading records, or the size
+        divided by :data:`FALLBACK_BYTES_PER_PACKET` for captures that
+        cannot be scanned (e.g. compressed)
+    """
+    packets = estimate_packet_count(path)
+    if packets is None:
+        return file_size(path) // FALLBACK_BYTES_PER_PACKET
+    return packets
+
+
+def lpt_order(items: Iterable[T], cost: Callable[[T], float]) -> list[T]:
+    """
+    Order items by decreasing cost; ties keep their input order.
+
+    Args:
+        items: Jobs to order
+        cost: Estimated cost of a job
+
+    Returns:
+        Items in dispatch order
+    """
+    return sorted(items, key=cost, reverse=True)
+
+
+def map_largest_first(
+    executor: Executor,
+    fn: Callable[[T], R],
+    items: Sequence[T],
+    cost: Callable[[T], float] = file_size,  # type: ignore[assignment]
+) -> list[R]:
+    """
+    Like ``executor.map``, but submit the most expensive items first.
+
+    Args:
+        executor: Pool running the jobs
+        fn: Function applied to each item
+        items: Items, e.g. capture paths
+        cost: Estimated cost of an item (default: file size)
+
+    Returns:
+        Results in the order of ``items``
+
+    Raises:
+        Exception: The first exception raised by ``fn``, in item order
+    """
+    costs = [cost(item) for item in items]
+    order = sorted(range(len(items)), key=costs.__getitem__, reverse=True)
+    futures = {index: executor.submit(fn, items[index]) for index in order}
+    try:
+        return [futures[index].result() for index in range(len(items))]
+    finally:
+        # Like executor.map: do not start the remaining items after a failure
+        for future in futures.values():
+            future.cancel()
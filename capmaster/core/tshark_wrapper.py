@@ -5,7 +5,10 @@ import logging
 import os
 import shutil
 import subprocess
+import tempfile
+import threading
 from pathlib import Path
+from typing import Iterator
 
 from capmaster.utils.errors import TsharkExecutionError, TsharkNotFoundError
 
@@ -98,7 +101,7 @@ class TsharkWrapper:
         args: list[str],
         input_file: Path | None = None,
         output_file: Path | None = None,
-        timeout: int | None = None,
+        timeout: float | None = None,
     ) -> subprocess.CompletedProcess[str]:
         """
         Execute tshark command.
@@ -154,33 +157,105 @@ class TsharkWrapper:
                 timeout=timeout,
             )
 
-        # Handle exit codes
-        # Exit code 0: Success
-        # Exit code 2: Warning (e.g., truncated file) - still produces output
-        # Other codes: Error
-        if result.returncode == 0:
+        self._check_exit_code(cmd, result.returncode, result.stderr)
+        return result
+
+    def stream(
+        self,
+        args: list[str],
+        input_file: Path | None = None,
+        timeout: float | None = None,
+    ) -> Iterator[str]:
+        """
+        Execute tshark and yield its stdout lines as they are produced.
+
+        Unlike :meth:`execute`, the output is never held in memory as a
+        whole, so large ``-T fields`` extractions can be consumed row by row.
+        Closing the iterator early terminates tshark.
+
+        Args:
+            args: List of tshark arguments
+            input_file: Input PCAP file (will add -r argument)
+            timeout: Command timeout in seconds (None for no timeout)
+
+        Yields:
+            Output lines, including the trailing newline
+
+        Raises:
+            TsharkExecutionError: If tshark exits with a code not in {0, 2}
+            subprocess.TimeoutExpired: If the command times out
+        """
+        cmd = [self.tshark_path]
+        if input_file is not None:
+            cmd.extend(["-r", str(input_file)])
+        cmd.extend(args)
+
+        # stderr goes to a file so a chatty tshark cannot block on a full pipe
+        with tempfile.TemporaryFile(mode="w+") as stderr_file:
+            process = subprocess.Popen(
+                cmd, stdout=subprocess.PIPE, stderr=stderr_file, text=True
+            )
+            timed_out = threading.Event()
+
+            def kill_on_timeout() -> None:
+                timed_out.set()
+                process.kill()
+
+            timer = threading.Timer(timeout, kill_on_timeout) if timeout is not None else None
+            if timer is not None:
+                timer.start()
+            completed = False
+            try:
+                assert process.stdout is not None
+                yield from process.stdout
+                completed = True
+            finally:
+                if timer is not None:
+                    timer.cancel()
+                if not completed and process.poll() is None:
+                    # Iterator closed early or the consumer failed
+                    process.kill()
+                assert process.stdout is not None
+                process.stdout.close()
+                returncode = process.wait()
+
+            if timed_out.is_set():
+                raise subprocess.TimeoutExpired(cmd, timeout or 0)
+            stderr_file.seek(0)
+            self._check_exit_code(cmd, returncode, stderr_file.read())
+
+    def _check_exit_code(self, cmd: list[str], returncode: int, stderr: str | None) -> None:
+        """
+        Handle the exit code of a finished tshark command.
+
+        Exit code 0 is success and exit code 2 a warning (e.g. truncated
+        file) that still produces output. Other codes raise.
+
+        Raises:
+            TsharkExecutionError: If the exit code is not 0 or 2
+        """
+        if returncode == 0:
             # Success
-            pass
-        elif result.returncode == 2:
+            return
+        if returncode == 2:
             # Warning - log but don't fail
-            if result.stderr:
-                logger.warning(f"tshark warning: {result.stderr.strip()}")
-        else:
-            # Error - log and then raise a domain-specific exception
-            stderr = result.stderr or ""
             if stderr:
-                logger.error(
-                    "tshark command failed with exit code %s: %s",
-                    result.returncode,
-                    stderr.strip(),
-                )
-            raise TsharkExecutionError(
-                " ".join(cmd),
-                result.returncode,
-                stderr,
-            )
+                logger.warning(f"tshark warning: {stderr.strip()}")
+            return
 
-        return result
+        # Error - log and then raise a domain-specific exception
+        stderr = stderr or ""
+        if stderr:
+            logger.error(
+                "tshark command failed with exit code %s: %s",
+                returncode,
+                stderr.strip(),
+            )
+        raise TsharkExecutionError(
+            " ".join(cmd),
+            returncode,
+            stderr,
+        )
 
     def check_version_requirement(self, min_version: str = "4.0") -> bool:
         """
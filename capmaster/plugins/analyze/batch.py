@@ -0,0 +1,434 @@
+"""Resumable, journaled batch analysis.
+
+Batch mode (``capmaster analyze --batch``) records the progress of a run in
+an append-only JSONL journal so that an interrupted batch over thousands of
+captures resumes where it stopped:
+
+* every completed module appends a ``module`` event (written by the worker
+  that ran it);
+* every finished attempt of a file appends a ``file`` event with its status,
+  duration and error;
+* the end of the run appends a ``metrics`` event with the batch throughput.
+
+On restart, files whose last ``file`` event is ``done`` are skipped, and the
+modules already completed for a partially analyzed file are not run again.
+A file is identified by its path, size and modification time, so a capture
+that changed since it was journaled is analyzed from scratch.
+
+Failed files are retried with exponential backoff, and an optional per-file
+wall-clock budget bounds the tshark passes of each attempt.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from rich.progress import Progress
+
+from capmaster.core.scheduling import estimate_packets, lpt_order
+
+logger = logging.getLogger(__name__)
+
+# File name of the journal in the output directory
+JOURNAL_NAME = "analyze-journal.jsonl"
+
+# Seconds between two throughput log lines
+METRICS_INTERVAL = 10.0
+
+_JOURNAL_LOCK = threading.Lock()
+
+
+def file_identity(path: Path) -> str:
+    """Identity of a capture on disk: size and modification time."""
+    stat = path.stat()
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def append_event(journal_path: Path, event: dict[str, Any]) -> None:
+    """
+    Append one event to a journal.
+
+    Each event is written with a single ``write`` on a file opened in append
+    mode, so events of concurrent worker processes do not interleave.
+
+    Args:
+        journal_path: Path of the JSONL journal
+        event: JSON-serializable event
+    """
+    line = json.dumps({"time": time.time(), **event}, ensure_ascii=False) + "\n"
+    with _JOURNAL_LOCK, open(journal_path, "a", encoding="utf-8") as f:
+        f.write(line)
+
+
+@dataclass(slots=True)
+class FileState:
+    """Journaled progress of one capture."""
+
+    identity: str
+    status: str = "pending"
+    """``pending``, ``done`` or ``failed``"""
+    modules: dict[str, str] = field(default_factory=dict)
+    """Completed module name -> output file"""
+    attempts: int = 0
+    error: str | None = None
+
+
+class BatchJournal:
+    """Append-only JSONL record of the progress of a batch."""
+
+    def __init__(self, path: Path) -> None:
+        """
+        Open a journal, replaying the events of previous runs.
+
+        Args:
+            path: Path of the JSONL journal (created on first event)
+        """
+        self.path = path
+        self._states: dict[str, FileState] = {}
+        self._load()
+
+    def _load(self) -> None:
+        """Replay the journal; unreadable lines (e.g. a torn last line) are skipped."""
+        if not self.path.exists():
+            return
+        skipped = 0
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                    self._apply(event)
+                except (ValueError, KeyError, TypeError):
+                    skipped += 1
+        if skipped:
+            logger.warning(f"Skipped {skipped} unreadable line(s) of journal {self.path}")
+
+    def _apply(self, event: dict[str, Any]) -> None:
+        """Fold one event into the file states."""
+        kind = event["event"]
+        if kind not in ("module", "file"):
+            return
+        state = self._states.get(event["file"])
+        if state is None or state.identity != event["identity"]:
+            state = self._states[event["file"]] = FileState(event["identity"])
+        if kind == "module":
+            state.modules[event["module"]] = event["output"]
+        else:
+            state.status = event["status"]
+            state.attempts = event.get("attempt", state.attempts)
+            state.error = event.get("error")
+
+    def state(self, pcap_file: Path) -> FileState:
+        """
+        Current state of a capture.
+
+        Args:
+            pcap_file: Capture path
+
+        Returns:
+            Journaled state, or a fresh pending state if the capture was never
+            journaled or changed since
+        """
+        identity = file_identity(pcap_file)
+        state = self._states.get(str(pcap_file))
+        if state is None or state.identity != identity:
+            state = self._states[str(pcap_file)] = FileState(identity)
+        return state
+
+    def record_file(
+        self,
+        pcap_file: Path,
+        status: str,
+        attempt: int,
+        elapsed: float,
+        outputs: int = 0,
+        error: str | None = None,
+    ) -> None:
+        """Record the outcome of one attempt at a capture."""
+        state = self.state(pcap_file)
+        state.status = status
+        state.attempts = attempt
+        state.error = error
+        append_event(
+            self.path,
+            {
+                "event": "file",
+                "file": str(pcap_file),
+                "identity": state.identity,
+                "status": status,
+                "attempt": attempt,
+                "elapsed": round(elapsed, 3),
+                "outputs": outputs,
+                "error": error,
+            },
+        )
+
+    def record_metrics(self, meter: ThroughputMeter) -> None:
+        """Record the throughput of the run."""
+        append_event(self.path, {"event": "metrics", **meter.snapshot()})
+
+
+class ThroughputMeter:
+    """Files and bytes processed per second since the start of a run."""
+
+    def __init__(self) -> None:
+        self.started = time.monotonic()
+        self.files = 0
+        self.bytes = 0
+        self._last_report = self.started
+
+    def add(self, size: int) -> None:
+        """Account for one processed capture of ``size`` bytes."""
+        self.files += 1
+        self.bytes += size
+
+    def snapshot(self) -> dict[str, float]:
+        """Current totals and rates."""
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            "files": self.files,
+            "bytes": self.bytes,
+            "elapsed": round(elapsed, 3),
+            "files_per_s": round(self.files / elapsed, 3),
+            "mb_per_s": round(self.bytes / elapsed / 1_000_000, 3),
+        }
+
+    def summary(self) -> str:
+        """Human-readable throughput."""
+        snapshot = self.snapshot()
+        return (
+            f"{snapshot['files']} file(s), {snapshot['bytes'] / 1_000_000:.1f} MB in "
+            f"{snapshot['elapsed']:.1f}s ({snapshot['files_per_s']:.2f} files/s, "
+            f"{snapshot['mb_per_s']:.2f} MB/s)"
+        )
+
+    def report_due(self) -> bool:
+        """True once every :data:`METRICS_INTERVAL` seconds."""
+        now = time.monotonic()
+        if now - self._last_report >= METRICS_INTERVAL:
+            self._last_report = now
+            return True
+        return False
+
+
+@dataclass(slots=True)
+class FileResult:
+    """Outcome of one attempt at a capture (returned by worker processes)."""
+
+    pcap_file: Path
+    outputs: int
+    elapsed: float
+    error: str | None = None
+    modules: dict[str, str] = field(default_factory=dict)
+    """Modules completed by this attempt -> output file"""
+
+
+def journaled_worker(
+    process_file: Callable[..., tuple[Path, int]],
+    journal_path: Path,
+    identity: str,
+    pcap_file: Path,
+    *args: Any,
+    skip_modules: tuple[str, ...] = (),
+    budget: float | None = None,
+) -> FileResult:
+    """
+    Analyze one capture, journaling each completed module.
+
+    Runs in a worker process; exceptions are returned in the result so that
+    the parent decides whether to retry.
+
+    Args:
+        process_file: Function analyzing a capture
+            (:func:`capmaster.plugins.analyze.plugin._process_single_file`)
+        journal_path: Path of the JSONL journal
+        identity: :func:`file_identity` of the capture when it was scheduled
+        pcap_file: Capture to analyze
+        *args: Further positional arguments of ``process_file``
+        skip_modules: Modules completed by an earlier attempt
+        budget: Wall-clock budget of the attempt in seconds
+
+    Returns:
+        FileResult with the number of outputs (including skipped modules)
+    """
+    started = time.monotonic()
+    completed: dict[str, str] = {}
+
+    def on_module_done(name: str, output_file: Path) -> None:
+        completed[name] = str(output_file)
+        append_event(
+            journal_path,
+            {
+                "event": "module",
+                "file": str(pcap_file),
+                "identity": identity,
+                "module": name,
+                "output": str(output_file),
+            },
+        )
+
+    try:
+        _, outputs = process_file(
+            pcap_file,
+            *args,
+            skip_modules=skip_modules,
+            on_module_done=on_module_done,
+            budget=budget,
+        )
+    except Exception as e:  # noqa: BLE001 - reported to the parent for retry
+        return FileResult(
+            pcap_file, 0, time.monotonic() - started, f"{type(e).__name__}: {e}", completed
+        )
+    return FileResult(pcap_file, outputs + len(skip_modules), time.monotonic() - started, None, completed)
+
+
+@dataclass(slots=True)
+class BatchOutcome:
+    """Totals of a batch run."""
+
+    outputs: int = 0
+    failed: int = 0
+    skipped: int = 0
+
+
+def run_batch(
+    pcap_files: list[Path],
+    journal_path: Path,
+    process_file: Callable[..., tuple[Path, int]],
+    process_args: tuple[Any, ...],
+    file_workers: int = 1,
+    retries: int = 2,
+    backoff: float = 1.0,
+    file_timeout: float | None = None,
+    progress: Progress | None = None,
+    overall_task: Any = None,
+) -> BatchOutcome:
+    """
+    Analyze captures with a persistent journal, retries and a time budget.
+
+    Args:
+        pcap_files: Captures to analyze
+        journal_path: Path of the JSONL journal (resumed if it exists)
+        process_file: Function analyzing one capture; called as
+            ``process_file(pcap_file, *process_args, skip_modules=...,
+            on_module_done=..., budget=...)``
+        process_args: Positional arguments following the capture
+        file_workers: Number of captures analyzed at the same time (worker
+            processes when greater than 1)
+        retries: Attempts after the first one for a failing capture
+        backoff: Delay before the first retry in seconds, doubled for
+            every further retry
+        file_timeout: Wall-clock budget of one attempt in seconds
+        progress: Optional Progress instance
+        overall_task: Task of ``progress`` advanced once per capture
+
+    Returns:
+        BatchOutcome with the outputs generated and the failed captures
+    """
+    journal_path.parent.mkdir(parents=True, exist_ok=True)
+    journal = BatchJournal(journal_path)
+    outcome = BatchOutcome()
+    meter = ThroughputMeter()
+
+    queue: deque[tuple[Path, int]] = deque()
+    # Largest captures first, so that none starts last and runs alone
+    for pcap_file in lpt_order(pcap_files, estimate_packets):
+        state = journal.state(pcap_file)
+        if state.status == "done":
+            outcome.skipped += 1
+            outcome.outputs += len(state.modules)
+            if progress and overall_task is not None:
+                progress.update(overall_task, advance=1)
+            continue
+        queue.append((pcap_file, 1))
+    if outcome.skipped:
+        logger.info(f"Resuming batch: {outcome.skipped} file(s) already analyzed, {len(queue)} to go")
+
+    delayed: list[tuple[float, int, Path, int]] = []
+    in_flight: dict[Future[FileResult], tuple[Path, int]] = {}
+    pool: Executor = (
+        ProcessPoolExecutor(max_workers=file_workers)
+        if file_workers > 1
+        else ThreadPoolExecutor(max_workers=1, thread_name_prefix="capmaster-batch")
+    )
+
+    def submit(pcap_file: Path, attempt: int) -> None:
+        state = journal.state(pcap_file)
+        future = pool.submit(
+            journaled_worker,
+            process_file,
+            journal_path,
+            state.identity,
+            pcap_file,
+            *process_args,
+            skip_modules=tuple(state.modules),
+            budget=file_timeout,
+        )
+        in_flight[future] = (pcap_file, attempt)
+
+    with pool:
+        while queue or delayed or in_flight:
+            now = time.monotonic()
+            while delayed and delayed[0][0] <= now:
+                _, _, pcap_file, attempt = heapq.heappop(delayed)
+                queue.append((pcap_file, attempt))
+            while queue and len(in_flight) < file_workers:
+                submit(*queue.popleft())
+            if not in_flight:
+                time.sleep(max(0.0, delayed[0][0] - time.monotonic()))
+                continue
+
+            timeout = max(0.0, delayed[0][0] - now) if delayed else None
+            done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                pcap_file, attempt = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:  # e.g. a worker process died
+                    result = FileResult(pcap_file, 0, 0.0, f"{type(e).__name__}: {e}")
+                journal.state(pcap_file).modules.update(result.modules)
+
+                if result.error is None:
+                    journal.record_file(pcap_file, "done", attempt, result.elapsed, result.outputs)
+                    outcome.outputs += result.outputs
+                elif attempt <= retries:
+                    delay = backoff * 2 ** (attempt - 1)
+                    logger.warning(
+                        f"Attempt {attempt} at {pcap_file.name} failed ({result.error}), "
+                        f"retrying in {delay:.1f}s"
+                    )
+                    journal.record_file(pcap_file, "failed", attempt, result.elapsed, error=result.error)
+                    heapq.heappush(delayed, (time.monotonic() + delay, id(future), pcap_file, attempt + 1))
+                    continue
+                else:
+                    logger.error(f"Failed to process {pcap_file.name}: {result.error}")
+                    journal.record_file(pcap_file, "failed", attempt, result.elapsed, error=result.error)
+                    outcome.failed += 1
+
+                try:
+                    meter.add(pcap_file.stat().st_size)
+                except OSError:
+                    meter.add(0)
+                if progress and overall_task is not None:
+                    progress.update(overall_task, advance=1)
+                if meter.report_due():
+                    logger.info(f"Throughput: {meter.summary()}")
+
+    journal.record_metrics(meter)
+    logger.info(f"Batch throughput: {meter.summary()}")
+    return outcome
@@ -3,32 +3,82 @@
 from __future__ import annotations
 
 import json
+import subprocess
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import partial
 from pathlib import Path
+from typing import Callable, Collection, Mapping
 
-from rich.progress import Progress
+from rich.progress import Progress, TaskID
 
+from capmaster.core.concurrency import extraction_slot
 from capmaster.core.output_manager import OutputManager
-from capmaster.core.protocol_detector import ProtocolDetector
+from capmaster.core.protocol_detector import HIERARCHY_ARGS, ProtocolDetector
 from capmaster.core.tshark_wrapper import TsharkWrapper
+from capmaster.plugins.analyze.field_planner import FieldPass, plan_field_passes
 from capmaster.plugins.analyze.modules import AnalysisModule
+from capmaster.plugins.analyze.modules.base import RowAggregator, iter_rows
+from capmaster.plugins.analyze.result_cache import CachedResult, ResultCache
+from capmaster.plugins.analyze.stats_taps import assign_sections, fused_tap_args, stats_tap
+from capmaster.utils.errors import TsharkExecutionError
 from capmaster.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Output of a module's tshark run: the completed command, or the aggregator
+# its rows were streamed into
+ModuleResult = subprocess.CompletedProcess[str] | RowAggregator
+
+# Results of a tshark pass shared by several modules, keyed by module name
+SharedResults = dict[str, ModuleResult]
+
+# Timeout of one tshark pass in seconds
+PASS_TIMEOUT = 300
+
 
 class AnalysisExecutor:
     """Execute analysis modules on PCAP files."""
 
-    def __init__(self, tshark: TsharkWrapper, protocol_detector: ProtocolDetector):
+    def __init__(
+        self,
+        tshark: TsharkWrapper,
+        protocol_detector: ProtocolDetector,
+        fuse_taps: bool = True,
+        fuse_fields: bool = True,
+        workers: int = 1,
+        sample_detection: bool = False,
+        result_cache: ResultCache | None = None,
+    ):
         """
         Initialize AnalysisExecutor.
 
         Args:
             tshark: TsharkWrapper instance for executing tshark commands
             protocol_detector: ProtocolDetector instance for detecting protocols
+            fuse_taps: Run the ``-z`` taps of all statistics modules in one
+                tshark pass instead of one pass per module
+            fuse_fields: Extract the fields of all field modules with the
+                same dissection options in one tshark pass
+            workers: Number of tshark passes and module post-processing
+                steps run concurrently for one file (1 runs them in order)
+            sample_detection: Decide which modules run from a packet sample
+                when no module needs the complete protocol hierarchy
+            result_cache: Cache of module results; modules with a cached
+                result on the capture are not run again (None = no cache)
         """
         self.tshark = tshark
         self.protocol_detector = protocol_detector
+        self.fuse_taps = fuse_taps
+        self.fuse_fields = fuse_fields
+        self.workers = max(1, workers)
+        self.sample_detection = sample_detection
+        self.result_cache = result_cache
+        # time.monotonic() deadline bounding the tshark passes of a file (None = no budget)
+        self.deadline: float | None = None
+        # Wall-clock seconds spent per module in the last execute_modules call;
+        # the time of a shared pass is split between the modules it served
+        self.module_timings: dict[str, float] = {}
 
     def execute_modules(
         self,
@@ -38,6 +88,8 @@ class AnalysisExecutor:
         progress: Progress | None = None,
         output_format: str = "txt",
         generate_sidecar: bool = False,
+        skip_modules: Collection[str] = (),
+        on_module_done: Callable[[str, Path], None] | None = None,
     ) -> dict[str, Path]:
         """
         Execute analysis modules on a PCAP file.
@@ -49,22 +101,64 @@ class AnalysisExecutor:
             progress: Optional Progress instance for progress tracking
             output_format: Output format ("txt" or "md", default: "txt")
         generate_sidecar: Whether to emit metadata sidecar files per module output
+            skip_modules: Names of modules whose output already exists (e.g.
+                from an interrupted run); they keep their sequence number
+            on_module_done: Called with the module name and output file as
+                each module completes
 
         Returns:
-            Dictionary mapping module names to output file paths
+            Dictionary mapping names of the executed modules to output file paths
+
+        Raises:
+            TimeoutError: If :attr:`deadline` passes before all modules ran
         """
         logger.info(f"Analyzing {input_file.name}...")
+        self.module_timings = {}
+
+        # Modules with a cached result on this capture are rendered from it
+        cached_results = self._cached_results(
+            input_file, [m for m in modules if m.name not in skip_modules]
+        )
+        cache_hits = {
+            m.name for m in modules
+            if m.name in cached_results and cached_results[m.name].hit(m, output_format)
+        }
+        if cache_hits:
+            logger.info(f"Reusing cached results of {len(cache_hits)} module(s)")
+
+        # Modules reporting the protocol hierarchy reuse the detection pass
+        hierarchy_modules = [
+            m for m in modules
+            if m.name not in skip_modules
+            and m.name not in cache_hits
+            and m.build_tshark_args(input_file) == HIERARCHY_ARGS
+        ]
 
         # Detect protocols in the file
         logger.debug("Detecting protocols...")
-        detected_protocols = self.protocol_detector.detect(input_file)
+        if self.sample_detection and not hierarchy_modules:
+            detected_protocols = self.protocol_detector.detect_sampled(input_file)
+        else:
+            detected_protocols = self.protocol_detector.detect(input_file)
         logger.debug(f"Detected protocols: {sorted(detected_protocols)}")
 
         # Get base name for output files
         base_name = OutputManager.get_base_name(input_file)
 
-        # Filter modules that should execute
-        modules_to_run = [m for m in modules if m.should_execute(detected_protocols)]
+        # Filter modules that should execute; the module index is the
+        # sequence number (1-based) of its output file
+        applicable = [m for m in modules if m.should_execute(detected_protocols)]
+        sequences = {module.name: seq for seq, module in enumerate(applicable, start=1)}
+        modules_to_run = [m for m in applicable if m.name not in skip_modules]
+
+        known_results = self._hierarchy_results(
+            input_file, [m for m in hierarchy_modules if m in modules_to_run]
+        )
+        shared_passes = self._shared_passes(
+            input_file,
+            [m for m in modules_to_run if m.name not in known_results and m.name not in cache_hits],
+            output_format,
+        )
 
         # Execute each module with progress tracking
         results: dict[str, Path] = {}
@@ -76,8 +170,31 @@ class AnalysisExecutor:
                 total=len(modules_to_run)
             )
 
-        # Use module index as sequence number (1-based) for each pcap file
-        for module_sequence, module in enumerate(modules_to_run, start=1):
+        if self.workers > 1 and len(modules_to_run) > 1:
+            results = self._execute_concurrently(
+                modules_to_run,
+                sequences,
+                known_results,
+                cached_results,
+                shared_passes,
+                input_file,
+                output_dir,
+                base_name,
+                progress,
+                module_task,
+                output_format,
+                generate_sidecar,
+                on_module_done,
+            )
+            logger.debug(f"Analysis complete. Generated {len(results)} output files.")
+            return results
+
+        # Collect the output of modules sharing a tshark pass
+        shared_results: SharedResults = dict(known_results)
+        for run_pass, _ in shared_passes:
+            shared_results.update(run_pass())
+
+        for module in modules_to_run:
             if progress and module_task is not None:
                 progress.update(module_task, description=f"[green]Running {module.name}...")
 
@@ -87,11 +204,15 @@ class AnalysisExecutor:
                 input_file,
                 output_dir,
                 base_name,
-                module_sequence,
+                sequences[module.name],
                 output_format,
                 generate_sidecar,
+                result=shared_results.get(module.name),
+                cached=cached_results.get(module.name),
             )
             results[module.name] = output_file
+            if on_module_done is not None:
+                on_module_done(module.name, output_file)
 
             if progress and module_task is not None:
                 progress.update(module_task, advance=1)
@@ -99,6 +220,98 @@ class AnalysisExecutor:
         logger.debug(f"Analysis complete. Generated {len(results)} output files.")
         return results
 
+    def _execute_concurrently(
+        self,
+        modules: list[AnalysisModule],
+        sequences: dict[str, int],
+        known_results: SharedResults,
+        cached_results: dict[str, CachedResult],
+        shared_passes: list[tuple[Callable[[], SharedResults], list[AnalysisModule]]],
+        input_file: Path,
+        output_dir: Path,
+        base_name: str,
+        progress: Progress | None,
+        module_task: TaskID | None,
+        output_format: str,
+        generate_sidecar: bool,
+        on_module_done: Callable[[str, Path], None] | None,
+    ) -> dict[str, Path]:
+        """
+        Execute modules with up to :attr:`workers` of them running at once.
+
+        Shared passes and modules with their own tshark run start right
+        away; modules of a shared pass are post-processed as soon as their
+        pass finishes. tshark runs as a subprocess, so threads overlap the
+        dissection of independent passes. Every task holds a slot of the
+        process-wide extraction budget.
+
+        Returns:
+            Dictionary mapping module names to output file paths, in the
+            order of ``modules``
+        """
+        covered = {m.name for _, pass_modules in shared_passes for m in pass_modules}
+        outputs: dict[str, Path] = {}
+
+        def in_slot(task: Callable[[], object]) -> object:
+            with extraction_slot():
+                return task()
+
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="capmaster-analyze"
+        ) as pool:
+            pending: dict[Future[object], AnalysisModule | list[AnalysisModule]] = {}
+
+            def submit_module(module: AnalysisModule, result: ModuleResult | None) -> None:
+                logger.debug(f"Running module: {module.name}")
+                task = partial(
+                    self._execute_module,
+                    module,
+                    input_file,
+                    output_dir,
+                    base_name,
+                    sequences[module.name],
+                    output_format,
+                    generate_sidecar,
+                    result=result,
+                    cached=cached_results.get(module.name),
+                )
+                pending[pool.submit(in_slot, task)] = module
+
+            for run_pass, pass_modules in shared_passes:
+                pending[pool.submit(in_slot, run_pass)] = pass_modules
+            for module in modules:
+                if module.name not in covered:
+                    submit_module(module, known_results.get(module.name))
+
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        owner = pending.pop(future)
+                        result = future.result()
+                        if isinstance(owner, list):
+                            # A shared pass: hand its results to its modules
+                            assert isinstance(result, dict)
+                            for module in owner:
+                                submit_module(module, result.get(module.name))
+                            continue
+                        assert isinstance(result, Path)
+                        outputs[owner.name] = result
+                        if on_module_done is not None:
+                            on_module_done(owner.name, outputs[owner.name])
+                        if progress and module_task is not None:
+                            progress.update(
+                                module_task,
+                                description=f"[green]Finished {owner.name}",
+                                advance=1,
+                            )
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                raise
+
+        return {module.name: outputs[module.name] for module in modules}
+
     def _execute_module(
         self,
         module: AnalysisModule,
@@ -108,6 +321,8 @@ class AnalysisExecutor:
         sequence: int,
         output_format: str = "txt",
         generate_sidecar: bool = False,
+        result: ModuleResult | None = None,
+        cached: CachedResult | None = None,
     ) -> Path:
         """
         Execute a single analysis module.
@@ -120,10 +335,18 @@ class AnalysisExecutor:
             sequence: Sequence number for output file
             output_format: Output format ("txt" or "md", default: "txt")
             generate_sidecar: Whether to emit metadata sidecar files per module output
+            result: tshark output already collected for this module by a
+                shared pass (tshark is run if None). Rows of streaming
+                modules (see :meth:`AnalysisModule.aggregator`) are streamed
+                from tshark into their aggregator.
+            cached: Cache entry of the module on this capture; tshark is not
+                run if the module's report can be rendered from it
 
         Returns:
             Path to generated output file
         """
+        started = time.monotonic()
+
         # Build tshark arguments
         tshark_args = module.build_tshark_args(input_file)
         required_protocols = sorted(module.required_protocols)
@@ -133,16 +356,40 @@ class AnalysisExecutor:
             output_dir, base_name, sequence, module.output_suffix, output_format
         )
 
-        # Execute tshark command (without output_file parameter to capture stdout)
-        logger.debug(f"Executing tshark with args: {tshark_args}")
-        result = self.tshark.execute(
-            args=tshark_args,
-            input_file=input_file,
-            timeout=300,  # 5 minutes timeout
-        )
-
-        # Post-process output if module provides custom processing
-        processed_output = module.post_process(result.stdout, output_format)
+        returncode = 0
+        raw_output: str | None = None
+        cached_output = cached.render(module, output_format) if cached is not None else None
+        cache_hit = cached_output is not None
+        if cached_output is not None:
+            logger.debug(f"Using cached result of module {module.name}")
+            processed_output = cached_output
+        elif result is None and module.streaming and module.fields:
+            logger.debug(f"Streaming tshark rows with args: {tshark_args}")
+            lines = self.tshark.stream(
+                args=tshark_args,
+                input_file=input_file,
+                timeout=self._pass_timeout(),
+            )
+            processed_output = module.consume(iter_rows(lines, module.field_separator), output_format)
+        elif isinstance(result, RowAggregator):
+            processed_output = result.report()
+        else:
+            # Execute tshark command (without output_file parameter to capture stdout)
+            if result is None:
+                logger.debug(f"Executing tshark with args: {tshark_args}")
+                result = self.tshark.execute(
+                    args=tshark_args,
+                    input_file=input_file,
+                    timeout=self._pass_timeout(),
+                )
+            returncode = result.returncode
+            raw_output = result.stdout
+
+            # Post-process output if module provides custom processing
+            processed_output = module.post_process(result.stdout, output_format)
+
+        if cached is not None and self.result_cache is not None and cached.report(module, output_format) is None:
+            self.result_cache.store(cached, module, output_format, processed_output, raw_output)
 
         if output_format.lower() == "md":
             header = module.name.replace("_", " ")
@@ -164,17 +411,233 @@ class AnalysisExecutor:
                 "source_pcap": input_file.name,
                 "tshark_args": tshark_args,
                 "protocols": required_protocols,
+                "cache_hit": cache_hit,
             }
             # Parent directory already created above
             with open(sidecar_path, "w", encoding="utf-8") as sidecar_file:
                 json.dump(sidecar_content, sidecar_file, indent=2)
 
+        if not cache_hit:
+            self._add_timing(module.name, time.monotonic() - started)
+
         # Log execution status
-        if result.returncode == 0:
+        if returncode == 0:
             logger.debug(f"Module {module.name} completed successfully")
         else:
             logger.warning(
-                f"Module {module.name} completed with warnings (exit code: {result.returncode})"
+                f"Module {module.name} completed with warnings (exit code: {returncode})"
             )
 
         return output_file
+
+    def _add_timing(self, module_name: str, seconds: float) -> None:
+        """Account wall-clock time to a module."""
+        self.module_timings[module_name] = self.module_timings.get(module_name, 0.0) + seconds
+
+    def _share_pass_time(self, results: Mapping[str, ModuleResult], started: float) -> None:
+        """Split the time of a shared pass between the modules it served."""
+        if results:
+            share = (time.monotonic() - started) / len(results)
+            for name in results:
+                self._add_timing(name, share)
+
+    def _pass_timeout(self) -> float:
+        """
+        Timeout of the next tshark pass, bounded by the remaining file budget.
+
+        Raises:
+            TimeoutError: If :attr:`deadline` has passed
+        """
+        if self.deadline is None:
+            return PASS_TIMEOUT
+        remaining = self.deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("Analysis time budget of the file exhausted")
+        return min(PASS_TIMEOUT, remaining)
+
+    def _cached_results(self, input_file: Path, modules: list[AnalysisModule]) -> dict[str, CachedResult]:
+        """
+        Look up the cached results of modules on a capture.
+
+        Args:
+            input_file: Path to input PCAP file
+            modules: Modules that may run
+
+        Returns:
+            Dictionary mapping module names to their cache entry (possibly
+            empty); empty if there is no cache or the capture is unreadable
+        """
+        if self.result_cache is None:
+            return {}
+        fingerprint = self.result_cache.fingerprint(input_file)
+        if fingerprint is None:
+            return {}
+        return {
+            module.name: self.result_cache.lookup(fingerprint, module, module.build_tshark_args(input_file))
+            for module in modules
+        }
+
+    def _hierarchy_results(self, input_file: Path, modules: list[AnalysisModule]) -> SharedResults:
+        """
+        Reuse the protocol detection pass as the report of hierarchy modules.
+
+        Args:
+            input_file: Path to input PCAP file
+            modules: Modules running ``tshark -q -z io,phs`` that will be executed
+
+        Returns:
+            Dictionary mapping module names to the detection output
+        """
+        if not modules:
+            return {}
+        output = self.protocol_detector.hierarchy(input_file)
+        result = subprocess.CompletedProcess(list(HIERARCHY_ARGS), 0, output, "")
+        return {module.name: result for module in modules}
+
+    def _shared_passes(
+        self,
+        input_file: Path,
+        modules: list[AnalysisModule],
+        output_format: str = "txt",
+    ) -> list[tuple[Callable[[], SharedResults], list[AnalysisModule]]]:
+        """
+        Plan the tshark passes shared by several modules.
+
+        Args:
+            input_file: Path to input PCAP file
+            modules: Modules that will be executed
+            output_format: Output format of the module reports
+
+        Returns:
+            List of (callable running the pass, modules it covers). Modules
+            missing from the results of a pass are run separately.
+        """
+        passes: list[tuple[Callable[[], SharedResults], list[AnalysisModule]]] = []
+        if self.fuse_taps:
+            tap_modules = [m for m in modules if stats_tap(m.build_tshark_args(input_file))]
+            if len(tap_modules) > 1:
+                passes.append((partial(self._run_stats_taps, input_file, tap_modules), tap_modules))
+        if self.fuse_fields:
+            for field_pass in plan_field_passes(modules):
+                passes.append(
+                    (
+                        partial(self._run_field_pass, input_file, field_pass, output_format),
+                        field_pass.modules,
+                    )
+                )
+        return passes
+
+    def _run_stats_taps(
+        self,
+        input_file: Path,
+        modules: list[AnalysisModule],
+    ) -> SharedResults:
+        """
+        Run the ``-z`` taps of all statistics-only modules in one tshark pass.
+
+        Identical taps (e.g. ``conv,tcp`` of tcp_conversations and
+        tcp_duration) are requested once and shared by their modules.
+
+        Args:
+            input_file: Path to input PCAP file
+            modules: Modules that will be executed
+
+        Returns:
+            Dictionary mapping module names to a result holding only the
+            report of their tap. Modules missing from it are run separately,
+            e.g. when the combined output cannot be split or the fused run
+            fails.
+        """
+        module_taps = [stats_tap(m.build_tshark_args(input_file)) for m in modules]
+        taps = list(dict.fromkeys(tap for tap in module_taps if tap))
+        if sum(tap is not None for tap in module_taps) < 2:
+            return {}
+
+        args = fused_tap_args(taps)
+        started = time.monotonic()
+        logger.debug(f"Executing fused statistics pass with args: {args}")
+        try:
+            result = self.tshark.execute(
+                args=args,
+                input_file=input_file,
+                timeout=self._pass_timeout(),
+            )
+        except TsharkExecutionError as e:
+            logger.warning(f"Fused statistics pass failed, running taps separately: {e}")
+            return {}
+
+        if len(taps) == 1:
+            tap_results = {taps[0]: result}
+        else:
+            sections = assign_sections(taps, result.stdout)
+            if sections is None:
+                logger.debug("Could not split fused statistics output, running taps separately")
+                return {}
+            tap_results = {
+                tap: subprocess.CompletedProcess(result.args, result.returncode, section, result.stderr)
+                for tap, section in sections.items()
+            }
+
+        results: SharedResults = {
+            module.name: tap_results[tap]
+            for module, tap in zip(modules, module_taps)
+            if tap is not None
+        }
+        self._share_pass_time(results, started)
+        return results
+
+    def _run_field_pass(
+        self,
+        input_file: Path,
+        field_pass: FieldPass,
+        output_format: str = "txt",
+    ) -> SharedResults:
+        """
+        Extract the fields of several field modules in one tshark pass.
+
+        The rows of the pass are streamed from tshark and routed to the
+        modules whose display filter they satisfy (see
+        :mod:`capmaster.plugins.analyze.field_planner`). Streaming modules
+        aggregate their rows as they are read.
+
+        Args:
+            input_file: Path to input PCAP file
+            field_pass: Planned pass
+            output_format: Output format of the module reports
+
+        Returns:
+            Dictionary mapping module names to a result holding the rows of
+            their own extraction, or to the aggregator of streaming modules;
+            empty if the pass failed, in which case the modules are run
+            separately.
+        """
+        args = field_pass.build_tshark_args()
+        started = time.monotonic()
+        logger.debug(
+            f"Extracting fields of {len(field_pass.modules)} modules in one pass: "
+            f"{', '.join(m.name for m in field_pass.modules)}"
+        )
+        aggregators = {
+            module.name: aggregator
+            for module in field_pass.modules
+            if (aggregator := module.aggregator(output_format)) is not None
+        }
+        try:
+            outputs = field_pass.dispatch(
+                self.tshark.stream(
+                    args=args,
+                    input_file=input_file,
+                    timeout=self._pass_timeout(),
+                ),
+                aggregators,
+            )
+        except TsharkExecutionError as e:
+            logger.warning(f"Fused field pass failed, running modules separately: {e}")
+            return {}
+        results: SharedResults = {
+            name: subprocess.CompletedProcess(args, 0, output, "")
+            for name, output in outputs.items()
+        }
+        results.update(aggregators)
+        self._share_pass_time(results, started)
+        return results
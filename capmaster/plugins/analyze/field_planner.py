@@ -0,0 +1,180 @@
+"""Single-pass extraction of the fields of several analysis modules.
+
+Field modules (``mq_stats``, ``sip_stats``, ``tls_alert``, ...) each declare a
+display filter and the fields they need. Instead of one ``-Y <filter> -T
+fields`` dissection per module, the planner unions the fields of all
+modules sharing the same dissection options into one pass:
+
+* the display filter is the OR of the module filters;
+* for every module, the fields named in its filter are extracted as
+  membership columns: a field is non-empty exactly when it is present in the
+  packet, so a row satisfies ``a && b`` when both columns are non-empty;
+* each output row is routed, as it is read, to the modules whose filter it
+  satisfies, projected onto that module's fields and separator; rows of
+  streaming modules are folded into their aggregator instead of being kept.
+
+Every module therefore receives the same rows its own tshark run would have
+produced. Modules whose filter is not a conjunction of field names, or that
+are alone in their option group, are left to run separately.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Mapping
+
+from capmaster.plugins.analyze.modules.base import AnalysisModule, RowAggregator
+
+logger = logging.getLogger(__name__)
+
+# A protocol or field name usable both in a filter and with -e
+_FIELD_NAME = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.\-]*$")
+
+
+def filter_fields(display_filter: str | None) -> list[str] | None:
+    """
+    Return the field names of a conjunctive display filter.
+
+    Args:
+        display_filter: Display filter such as ``"sip"`` or
+            ``"tls.alert_message && tcp"``
+
+    Returns:
+        Field names whose joint presence is equivalent to the filter, or
+        None if the filter has any other form
+    """
+    if not display_filter:
+        return None
+    names = [part.strip() for part in display_filter.split("&&")]
+    if all(_FIELD_NAME.match(name) for name in names):
+        return names
+    return None
+
+
+@dataclass(slots=True)
+class _Route:
+    """Projection of fused rows onto one module."""
+
+    module: AnalysisModule
+    membership: list[int]
+    columns: list[int]
+    aggregator: RowAggregator | None = None
+    lines: list[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class FieldPass:
+    """One tshark pass extracting the fields of several modules."""
+
+    modules: list[AnalysisModule]
+    dissection_options: list[str]
+    columns: list[str] = field(init=False, default_factory=list)
+    _filters: list[str] = field(init=False, default_factory=list)
+
+    def __post_init__(self) -> None:
+        index: dict[str, int] = {}
+
+        def column(name: str) -> int:
+            if name not in index:
+                index[name] = len(self.columns)
+                self.columns.append(name)
+            return index[name]
+
+        for module in self.modules:
+            for name in module.fields:
+                column(name)
+        for module in self.modules:
+            for name in filter_fields(module.display_filter) or []:
+                column(name)
+            display_filter = module.display_filter
+            if display_filter and display_filter not in self._filters:
+                self._filters.append(display_filter)
+
+    @property
+    def display_filter(self) -> str:
+        """OR of the module display filters."""
+        return " || ".join(f"({f})" for f in self._filters)
+
+    def build_tshark_args(self) -> list[str]:
+        """Build the tshark arguments of the fused pass."""
+        args = list(self.dissection_options)
+        args.extend(["-Y", self.display_filter, "-T", "fields"])
+        for name in self.columns:
+            args.extend(["-e", name])
+        return args
+
+    def dispatch(
+        self,
+        lines: Iterable[str],
+        aggregators: Mapping[str, RowAggregator] | None = None,
+    ) -> dict[str, str]:
+        """
+        Route the rows of the fused pass to their modules.
+
+        Args:
+            lines: Output lines of the fused pass (e.g. a streaming reader)
+            aggregators: Aggregators of streaming modules by module name;
+                their rows are added to the aggregator as they are read
+
+        Returns:
+            Dictionary mapping the names of the other modules to the output
+            their own tshark run would have produced
+        """
+        aggregators = aggregators or {}
+        index = {name: i for i, name in enumerate(self.columns)}
+        routes = [
+            _Route(
+                module,
+                [index[name] for name in filter_fields(module.display_filter) or []],
+                [index[name] for name in module.fields],
+                aggregators.get(module.name),
+            )
+            for module in self.modules
+        ]
+        width = len(self.columns)
+        skipped = 0
+
+        for line in lines:
+            values = line.rstrip("\r\n").split("\t")
+            if len(values) != width:
+                skipped += 1
+                continue
+            for route in routes:
+                if all(values[i] for i in route.membership):
+                    row = [values[i] for i in route.columns]
+                    if route.aggregator is not None:
+                        route.aggregator.add(row)
+                    else:
+                        route.lines.append(route.module.field_separator.join(row))
+
+        if skipped:
+            logger.debug(f"Skipped {skipped} malformed rows of the fused field pass")
+        return {
+            route.module.name: "".join(f"{row}\n" for row in route.lines)
+            for route in routes
+            if route.aggregator is None
+        }
+
+
+def plan_field_passes(modules: Iterable[AnalysisModule]) -> list[FieldPass]:
+    """
+    Group field modules into shared extraction passes.
+
+    Modules are grouped by their dissection options; only groups of at
+    least two modules are returned.
+
+    Args:
+        modules: Modules that will be executed
+
+    Returns:
+        Fused passes, in order of their first module
+    """
+    groups: dict[tuple[str, ...], list[AnalysisModule]] = {}
+    for module in modules:
+        if module.fields and filter_fields(module.display_filter) is not None:
+            groups.setdefault(tuple(module.dissection_options), []).append(module)
+    return [
+        FieldPass(group, list(options)) for options, group in groups.items() if len(group) > 1
+    ]
@@ -72,6 +72,8 @@ def discover_modules() -> None:
         "mgcp_stats",
         "rtcp_stats",
         "sdp_stats",
+        "rtp_quality",
+        "io_timeseries",
     ]
 
     for module_name in module_names:
@@ -1,14 +1,145 @@
-"""Base class for analysis modules."""
+"""Base class for analysis modules.
+
+Modules receive the output of their tshark run in one of two ways:
+
+* :meth:`AnalysisModule.post_process` is given the complete stdout as one
+  string. This is the default and suits small reports such as ``-z``
+  statistics.
+* Field modules can instead return an incremental :class:`RowAggregator`
+  from :meth:`AnalysisModule.aggregator`. Their rows are then streamed from
+  tshark into the aggregator one at a time (see
+  :meth:`AnalysisModule.consume`), so the memory they use depends on the
+  number of distinct keys they aggregate, not on the size of the capture.
+
+Both contracts are available on every module: the default
+:meth:`~AnalysisModule.consume` joins the rows back into text for
+:meth:`~AnalysisModule.post_process`, and the default
+:meth:`~AnalysisModule.post_process` of an aggregating module splits the
+text into rows for its aggregator.
+"""
 
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Sequence, TypeVar
+from typing import Generic, Iterable, Iterator, Sequence, TypeVar
 
 T = TypeVar("T")
 
 
+def sample_evenly(items: Sequence[T], limit: int = 3) -> list[T]:
+    """Return an evenly distributed sample from a sequence."""
+    if limit <= 0:
+        return []
+    seq = list(items)
+    if len(seq) <= limit:
+        return seq
+    if limit == 1:
+        return [seq[0]]
+    step = (len(seq) - 1) / float(limit - 1)
+    indices: list[int] = []
+    for i in range(limit):
+        idx = int(round(i * step))
+        if indices and idx <= indices[-1]:
+            idx = indices[-1] + 1
+        if idx >= len(seq):
+            idx = len(seq) - 1
+        indices.append(idx)
+    # Ensure unique indices while keeping order
+    unique_indices: list[int] = []
+    for idx in indices:
+        if not unique_indices or idx != unique_indices[-1]:
+            unique_indices.append(idx)
+    while len(unique_indices) < limit and unique_indices[-1] + 1 < len(seq):
+        unique_indices.append(unique_indices[-1] + 1)
+    return [seq[i] for i in unique_indices[:limit]]
+
+
+def iter_rows(lines: Iterable[str], separator: str = "\t") -> Iterator[list[str]]:
+    """
+    Split ``-T fields`` output lines into rows, skipping blank lines.
+
+    Args:
+        lines: Output lines, with or without line terminators (e.g. a
+            streaming tshark reader or ``stdout.split("\\n")``)
+        separator: Column separator
+
+    Yields:
+        Column values of each row
+    """
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line.strip():
+            yield line.split(separator)
+
+
+class SpreadSample(Generic[T]):
+    """
+    Bounded, evenly spread sample of a stream of items.
+
+    Keeps every ``stride``-th item in a buffer of at most ``capacity``
+    items, doubling the stride (and dropping every other kept item) when
+    the buffer fills up, plus the last item seen. :meth:`sample` therefore
+    returns exactly what :func:`sample_evenly` would return for the whole
+    stream as long as it holds at most ``capacity`` items, and an evenly
+    spread approximation beyond that.
+    """
+
+    __slots__ = ("capacity", "count", "_kept", "_stride", "_last")
+
+    def __init__(self, capacity: int = 64) -> None:
+        self.capacity = max(2, capacity)
+        self.count = 0
+        self._kept: list[T] = []
+        self._stride = 1
+        self._last: T | None = None
+
+    def add(self, item: T) -> None:
+        """Account one item of the stream."""
+        if self.count % self._stride == 0:
+            if len(self._kept) == self.capacity:
+                self._kept = self._kept[::2]
+                self._stride *= 2
+            if self.count % self._stride == 0:
+                self._kept.append(item)
+        self._last = item
+        self.count += 1
+
+    @property
+    def first(self) -> T | None:
+        """First item of the stream (None if empty)."""
+        return self._kept[0] if self._kept else None
+
+    def sample(self, limit: int = 3) -> list[T]:
+        """Evenly distributed sample of the items seen."""
+        items = list(self._kept)
+        if self.count and (self.count - 1) % self._stride:
+            items.append(self._last)  # type: ignore[arg-type]
+        return sample_evenly(items, limit)
+
+
+class RowAggregator(ABC):
+    """Incremental aggregation state of a streaming analysis module."""
+
+    @abstractmethod
+    def add(self, row: list[str]) -> None:
+        """
+        Fold one extracted row into the state.
+
+        Args:
+            row: Column values in the order of :attr:`AnalysisModule.fields`
+        """
+
+    @abstractmethod
+    def report(self) -> str:
+        """
+        Render the report of the rows added so far.
+
+        Returns:
+            Output string to write to file
+        """
+
+
 class AnalysisModule(ABC):
     """Abstract base class for all analysis modules."""
 
@@ -44,18 +175,143 @@ class AnalysisModule(ABC):
         """
         return set()
 
-    @abstractmethod
+    @property
+    def display_filter(self) -> str | None:
+        """
+        Display filter (``-Y``) of a field extraction module.
+
+        Returns:
+            Filter selecting the packets whose fields are extracted, or None
+        """
+        return None
+
+    @property
+    def fields(self) -> list[str]:
+        """
+        Fields (``-e``) of a field extraction module.
+
+        Modules declaring fields do not need to build tshark arguments
+        themselves, and can share a single extraction pass with other
+        field modules (see :mod:`capmaster.plugins.analyze.field_planner`).
+
+        Returns:
+            Field names in output column order. Empty for modules running
+            other tshark commands (e.g. ``-z`` statistics).
+        """
+        return []
+
+    @property
+    def field_separator(self) -> str:
+        """
+        Column separator of the rows passed to :meth:`post_process`.
+
+        Returns:
+            Separator character (tshark default: tab)
+        """
+        return "\t"
+
+    @property
+    def dissection_options(self) -> list[str]:
+        """
+        Extra tshark options changing how packets are dissected or printed.
+
+        Options such as ``-2``, ``-o <pref>`` or ``-E occurrence=l`` affect
+        every field of a pass, so only modules with identical options share
+        an extraction pass.
+
+        Returns:
+            List of tshark arguments
+        """
+        return []
+
     def build_tshark_args(self, input_file: Path) -> list[str]:
         """
         Build tshark command arguments for this module.
 
+        The default builds a ``-T fields`` extraction from the declared
+        :attr:`display_filter`, :attr:`fields`, :attr:`field_separator` and
+        :attr:`dissection_options`. Modules running other tshark commands
+        override it.
+
         Args:
             input_file: Path to input PCAP file
 
         Returns:
             List of tshark command arguments
+
+        Raises:
+            NotImplementedError: If the module declares no fields
         """
-        pass
+        if not self.fields:
+            raise NotImplementedError(
+                f"{type(self).__name__} must declare fields or override build_tshark_args()"
+            )
+        args = list(self.dissection_options)
+        if self.display_filter:
+            args.extend(["-Y", self.display_filter])
+        args.extend(["-T", "fields"])
+        if self.field_separator != "\t":
+            args.extend(["-E", f"separator={self.field_separator}"])
+        for field in self.fields:
+            args.extend(["-e", field])
+        return args
+
+    def aggregator(self, output_format: str = "txt") -> RowAggregator | None:
+        """
+        Create the incremental aggregation state of a streaming module.
+
+        Field modules override this to have their rows streamed from
+        tshark instead of receiving the whole output as one string.
+
+        Args:
+            output_format: Output format ("txt" or "md", default: "txt")
+
+        Returns:
+            A fresh aggregator, or None (default) for modules implementing
+            :meth:`post_process`
+        """
+        return None
+
+    @property
+    def streaming(self) -> bool:
+        """Whether the module aggregates rows incrementally (see :meth:`aggregator`)."""
+        return type(self).aggregator is not AnalysisModule.aggregator
+
+    @property
+    def format_dependent_output(self) -> bool:
+        """
+        Whether the report depends on the output format.
+
+        Reports are the same in every format by default (the executor adds
+        the markdown wrapper), so one cached report serves every format.
+        Modules rendering ``output_format`` themselves return True to have
+        their reports cached per format.
+        """
+        return False
+
+    def consume(self, rows: Iterable[list[str]], output_format: str = "txt") -> str:
+        """
+        Build the report of the module from extracted rows.
+
+        Rows are folded into the module's :meth:`aggregator` as they are
+        produced. Modules without an aggregator are adapted: the rows are
+        joined back into tshark output for :meth:`post_process`.
+
+        Args:
+            rows: Column values of each extracted row
+            output_format: Output format ("txt" or "md", default: "txt")
+
+        Returns:
+            Processed output string to write to file
+        """
+        aggregator = self.aggregator(output_format)
+        if aggregator is None:
+            separator = self.field_separator
+            text = "".join(f"{separator.join(row)}\n" for row in rows)
+            return self.post_process(text, output_format)
+        for row in rows:
+            aggregator.add(row)
+        return aggregator.report()
 
     def post_process(self, tshark_output: str, output_format: str = "txt") -> str:
         """
@@ -78,36 +334,18 @@ class AnalysisModule(ABC):
         Returns:
             Processed output string to write to file
         """
+        # Streaming modules aggregate the rows of the output
+        if self.streaming:
+            return self.consume(
+                iter_rows(tshark_output.split("\n"), self.field_separator), output_format
+            )
         # Default: no post-processing, just return as-is
         # Subclasses can override to provide format-specific processing
         return tshark_output
 
     def sample_items(self, items: Sequence[T], limit: int = 3) -> list[T]:
         """Return an evenly distributed sample from a sequence."""
-        if limit <= 0:
-            return []
-        seq = list(items)
-        if len(seq) <= limit:
-            return seq
-        if limit == 1:
-            return [seq[0]]
-        step = (len(seq) - 1) / float(limit - 1)
-        indices: list[int] = []
-        for i in range(limit):
-            idx = int(round(i * step))
-            if indices and idx <= indices[-1]:
-                idx = indices[-1] + 1
-            if idx >= len(seq):
-                idx = len(seq) - 1
-            indices.append(idx)
-        # Ensure unique indices while keeping order
-        unique_indices: list[int] = []
-        for idx in indices:
-            if not unique_indices or idx != unique_indices[-1]:
-                unique_indices.append(idx)
-        while len(unique_indices) < limit and unique_indices[-1] + 1 < len(seq):
-            unique_indices.append(unique_indices[-1] + 1)
-        return [seq[i] for i in unique_indices[:limit]]
+        return sample_evenly(items, limit)
 
     def should_execute(self, detected_protocols: set[str]) -> bool:
         """
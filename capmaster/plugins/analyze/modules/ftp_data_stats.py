@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 from collections import Counter, defaultdict
-from pathlib import Path
 
 from capmaster.plugins.analyze.modules import register_module
 from capmaster.plugins.analyze.modules.base import AnalysisModule
@@ -37,38 +36,23 @@ class FtpDataStatsModule(AnalysisModule):
         """Required protocols."""
         return {"ftp-data"}
 
-    def build_tshark_args(self, input_file: Path) -> list[str]:
-        """
-        Build tshark command arguments.
-
-        Args:
-            input_file: Path to input PCAP file
+    @property
+    def display_filter(self) -> str:
+        """Display filter."""
+        return "ftp-data"
 
-        Returns:
-            List of tshark arguments for FTP-DATA statistics extraction
-        """
+    @property
+    def fields(self) -> list[str]:
+        """Extracted fields."""
         return [
-            "-Y",
-            "ftp-data",
-            "-T",
-            "fields",
-            "-e",
             "frame.number",
-            "-e",
             "frame.time_relative",
-            "-e",
             "ip.src",
-            "-e",
             "tcp.srcport",
-            "-e",
             "ip.dst",
-            "-e",
             "tcp.dstport",
-            "-e",
             "tcp.stream",
-            "-e",
             "tcp.len",
-            "-e",
             "frame.len",
         ]
 
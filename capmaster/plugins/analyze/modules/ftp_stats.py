@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from pathlib import Path
 
 from typing import cast
 
@@ -35,39 +34,31 @@ class FtpStatsModule(AnalysisModule):
         """Required protocols."""
         return {"ftp"}
 
-    def build_tshark_args(self, input_file: Path) -> list[str]:
-        """
-        Build tshark command arguments.
-
-        Args:
-            input_file: Path to input PCAP file
+    @property
+    def display_filter(self) -> str:
+        """Display filter."""
+        return "ftp.response.code"
 
-        Returns:
-            List of tshark arguments for FTP response code extraction
-        """
+    @property
+    def fields(self) -> list[str]:
+        """Extracted fields."""
         return [
-            "-Y",
-            "ftp.response.code",
-            "-o",
-            "tcp.desegment_tcp_streams:TRUE",
-            "-o",
-            "tcp.reassemble_out_of_order:TRUE",
-            "-T",
-            "fields",
-            "-e",
             "ip.src_host",
-            "-e",
             "tcp.srcport",
-            "-e",
             "ip.dst_host",
-            "-e",
             "tcp.dstport",
-            "-e",
             "ftp.response.code",
-            "-e",
             "ftp.response.arg",
         ]
 
+    @property
+    def dissection_options(self) -> list[str]:
+        """Reassemble TCP segments so multi-segment FTP responses are parsed."""
+        return [
+            "-o", "tcp.desegment_tcp_streams:TRUE",
+            "-o", "tcp.reassemble_out_of_order:TRUE",
+        ]
+
     def post_process(self, tshark_output: str, output_format: str = "txt") -> str:
         """
         Post-process FTP response codes to aggregate by code and message.
@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from pathlib import Path
 
 from capmaster.plugins.analyze.modules import register_module
 from capmaster.plugins.analyze.modules.base import AnalysisModule
@@ -32,30 +31,19 @@ class HttpResponseModule(AnalysisModule):
         """Required protocols."""
         return {"http"}
 
-    def build_tshark_args(self, input_file: Path) -> list[str]:
-        """
-        Build tshark command arguments.
-
-        Args:
-            input_file: Path to input PCAP file
+    @property
+    def display_filter(self) -> str:
+        """Display filter."""
+        return "http.response"
 
-        Returns:
-            List of tshark arguments for HTTP response code extraction
-        """
+    @property
+    def fields(self) -> list[str]:
+        """Extracted fields."""
         return [
-            "-Y",
-            "http.response",
-            "-T",
-            "fields",
-            "-e",
             "ip.src",
-            "-e",
             "tcp.srcport",
-            "-e",
             "ip.dst",
-            "-e",
             "tcp.dstport",
-            "-e",
             "http.response.code",
         ]
 
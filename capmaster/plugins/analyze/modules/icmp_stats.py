@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from pathlib import Path
 
 from capmaster.plugins.analyze.modules import register_module
 from capmaster.plugins.analyze.modules.base import AnalysisModule
@@ -73,45 +72,36 @@ class IcmpStatsModule(AnalysisModule):
         """Required protocols."""
         return {"icmp"}
 
-    def build_tshark_args(self, input_file: Path) -> list[str]:
-        """
-        Build tshark command arguments.
-
-        Args:
-            input_file: Path to input PCAP file
+    @property
+    def display_filter(self) -> str:
+        """Display filter."""
+        return "icmp"
 
-        Returns:
-            List of tshark arguments for ICMP message extraction
-        """
+    @property
+    def fields(self) -> list[str]:
+        """Extracted fields."""
         return [
-            "-Y",
-            "icmp",
-            "-T",
-            "fields",
-            "-e",
             "icmp.type",
-            "-e",
             "icmp.code",
-            "-e",
             "ip.proto",
-            "-e",
             "ip.src",
-            "-e",
             "tcp.srcport",
-            "-e",
             "udp.srcport",
-            "-e",
             "ip.dst",
-            "-e",
             "tcp.dstport",
-            "-e",
             "udp.dstport",
-            "-E",
-            "occurrence=l",
-            "-E",
-            "separator=,",
         ]
 
+    @property
+    def field_separator(self) -> str:
+        """Column separator."""
+        return ","
+
+    @property
+    def dissection_options(self) -> list[str]:
+        """Use the last occurrence of repeated fields (the embedded IP header)."""
+        return ["-E", "occurrence=l"]
+
     def post_process(self, tshark_output: str, output_format: str = "txt") -> str:
         """
         Post-process ICMP messages to decode types/codes and extract embedded protocols.
@@ -0,0 +1,352 @@
+"""Time-binned traffic series module."""
+
+from __future__ import annotations
+
+import heapq
+import logging
+from array import array
+from collections import Counter
+
+from capmaster.plugins.analyze.modules import register_module
+from capmaster.plugins.analyze.modules.base import AnalysisModule, RowAggregator
+
+logger = logging.getLogger(__name__)
+
+# Bin widths, in microseconds (1 ms, 100 ms, 1 s)
+RESOLUTIONS_US = (1_000, 100_000, 1_000_000)
+
+# Largest number of bins kept per resolution for the series
+MAX_STORED_BINS = 200_000
+
+# Largest series printed in the report
+MAX_SERIES_ROWS = 3_600
+
+# Busiest bins listed per resolution
+TOP_BURSTS = 10
+
+
+@register_module
+class IoTimeseriesModule(AnalysisModule):
+    """Generate time-binned traffic series and burst summaries.
+
+    Bins the frames of the capture at several resolutions at once
+    (1 ms, 100 ms and 1 s) in a single pass:
+    - Frames, bytes, retransmissions and zero-window events per bin
+    - Busiest bins (microbursts) with their dominant service
+    - CSV series of the resolutions short enough to list
+
+    Memory depends on the number of bins, not on the number of frames.
+    """
+
+    @property
+    def name(self) -> str:
+        """Module name."""
+        return "io_timeseries"
+
+    @property
+    def output_suffix(self) -> str:
+        """Output file suffix."""
+        return "io-timeseries.txt"
+
+    @property
+    def fields(self) -> list[str]:
+        """Extracted fields."""
+        return [
+            "frame.time_relative",
+            "frame.len",
+            "tcp.srcport",
+            "tcp.dstport",
+            "udp.srcport",
+            "udp.dstport",
+            "tcp.analysis.retransmission",
+            "tcp.analysis.zero_window",
+        ]
+
+    def aggregator(self, output_format: str = "txt") -> RowAggregator:
+        """
+        Bin frames into traffic series.
+
+        Args:
+            output_format: Output format ("txt" or "md", default: "txt")
+
+        Returns:
+            Aggregator producing the time series report
+        """
+        return _IoTimeseriesAggregator()
+
+
+def _label(width_us: int) -> str:
+    """Human-readable bin width."""
+    if width_us >= 1_000_000:
+        return f"{width_us / 1_000_000:g} s"
+    return f"{width_us / 1_000:g} ms"
+
+
+def _service(row: list[str]) -> str:
+    """Transport and lower port of a frame (e.g. ``tcp/443``), empty if neither."""
+    for protocol, src, dst in (("tcp", row[2], row[3]), ("udp", row[4], row[5])):
+        if src and dst:
+            ports = (int(src.split(",", 1)[0]), int(dst.split(",", 1)[0]))
+            return f"{protocol}/{min(ports)}"
+    return ""
+
+
+class _BinnedSeries:
+    """Counters of one resolution, closed bin by bin as time advances."""
+
+    __slots__ = (
+        "width",
+        "first",
+        "current",
+        "frames",
+        "bytes",
+        "retransmissions",
+        "zero_windows",
+        "services",
+        "series",
+        "total_frames",
+        "total_bytes",
+        "peak_frames",
+        "bursts",
+    )
+
+    def __init__(self, width_us: int) -> None:
+        self.width = width_us
+        self.first = -1
+        self.current = -1
+        self.frames = 0
+        self.bytes = 0
+        self.retransmissions = 0
+        self.zero_windows = 0
+        self.services: Counter[str] = Counter()
+        # Frames, bytes, retransmissions and zero windows of the closed bins;
+        # None once the capture spans more than MAX_STORED_BINS bins
+        self.series: tuple[array[int], ...] | None = (
+            array("Q"),
+            array("Q"),
+            array("Q"),
+            array("Q"),
+        )
+        self.total_frames = 0
+        self.total_bytes = 0
+        self.peak_frames = 0
+        # Min-heap of the busiest closed bins by bytes
+        self.bursts: list[tuple[int, int, int, int, int, str]] = []
+
+    @property
+    def bins(self) -> int:
+        """Number of bins spanned by the frames seen."""
+        return self.current - self.first + 1 if self.first >= 0 else 0
+
+    def add(
+        self, time_us: int, length: int, retransmission: bool, zero_window: bool, service: str
+    ) -> None:
+        """Account one frame."""
+        index = time_us // self.width
+        if self.first < 0:
+            self.first = self.current = index
+        elif index > self.current:
+            self._close()
+            self.current = index
+        elif index < self.current and self._add_late(
+            index, length, retransmission, zero_window, service
+        ):
+            return
+        self.frames += 1
+        self.bytes += length
+        self.retransmissions += retransmission
+        self.zero_windows += zero_window
+        if service:
+            self.services[service] += 1
+
+    def _add_late(
+        self, index: int, length: int, retransmission: bool, zero_window: bool, service: str
+    ) -> bool:
+        """
+        Account an out-of-order frame to its closed bin, if still stored.
+
+        The peak and the bursts are updated with the grown bin; a bin ranked
+        among the bursts keeps the top service it was closed with, one
+        entering them is attributed to the service of the late frame.
+        """
+        offset = index - self.first
+        if self.series is None or not 0 <= offset < len(self.series[0]):
+            return False  # counted in the open bin
+        frames, octets, retransmissions, zero_windows = self.series
+        frames[offset] += 1
+        octets[offset] += length
+        retransmissions[offset] += retransmission
+        zero_windows[offset] += zero_window
+        self.total_frames += 1
+        self.total_bytes += length
+        self.peak_frames = max(self.peak_frames, frames[offset])
+
+        for position, burst in enumerate(self.bursts):
+            if burst[2] == index:
+                service = burst[5]
+                self.bursts.pop(position)
+                heapq.heapify(self.bursts)
+                break
+        self._push_burst(
+            (
+                octets[offset],
+                frames[offset],
+                index,
+                retransmissions[offset],
+                zero_windows[offset],
+                service,
+            )
+        )
+        return True
+
+    def _push_burst(self, burst: tuple[int, int, int, int, int, str]) -> None:
+        """Keep a bin if it is among the busiest."""
+        if len(self.bursts) < TOP_BURSTS:
+            heapq.heappush(self.bursts, burst)
+        elif burst > self.bursts[0]:
+            heapq.heapreplace(self.bursts, burst)
+
+    def _close(self) -> None:
+        """Fold the open bin into the series, totals and bursts."""
+        if self.series is not None:
+            offset = self.current - self.first
+            if offset >= MAX_STORED_BINS:
+                logger.debug(f"Capture spans over {MAX_STORED_BINS} bins of {_label(self.width)}")
+                self.series = None
+            else:
+                gap = offset - len(self.series[0])
+                for column, value in zip(
+                    self.series,
+                    (self.frames, self.bytes, self.retransmissions, self.zero_windows),
+                    strict=False,
+                ):
+                    if gap > 0:
+                        column.extend(array("Q", bytes(column.itemsize * gap)))
+                    column.append(value)
+
+        self.total_frames += self.frames
+        self.total_bytes += self.bytes
+        self.peak_frames = max(self.peak_frames, self.frames)
+        top_service = self.services.most_common(1)[0][0] if self.services else ""
+        self._push_burst(
+            (
+                self.bytes,
+                self.frames,
+                self.current,
+                self.retransmissions,
+                self.zero_windows,
+                top_service,
+            )
+        )
+
+        self.frames = self.bytes = self.retransmissions = self.zero_windows = 0
+        self.services.clear()
+
+    def finish(self) -> None:
+        """Close the last bin."""
+        if self.frames:
+            self._close()
+
+    def mbps(self, octets: float) -> float:
+        """Throughput of a bin holding ``octets`` bytes, in Mbit/s."""
+        return octets * 8 / self.width
+
+
+class _IoTimeseriesAggregator(RowAggregator):
+    """Incremental traffic series at every resolution."""
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.first_us: int | None = None
+        self.last_us = 0
+        self.retransmissions = 0
+        self.zero_windows = 0
+        self.resolutions = [_BinnedSeries(width) for width in RESOLUTIONS_US]
+
+    def add(self, row: list[str]) -> None:
+        """Account one frame."""
+        self.rows += 1
+        if len(row) < 8:
+            return
+        try:
+            time_us = round(float(row[0]) * 1_000_000)
+            length = int(row[1])
+            service = _service(row)
+        except ValueError:
+            return
+        retransmission = bool(row[6])
+        zero_window = bool(row[7])
+        if self.first_us is None:
+            self.first_us = time_us
+        self.last_us = max(self.last_us, time_us)
+        self.retransmissions += retransmission
+        self.zero_windows += zero_window
+        for resolution in self.resolutions:
+            resolution.add(time_us, length, retransmission, zero_window, service)
+
+    def report(self) -> str:
+        """Render the time series report."""
+        for resolution in self.resolutions:
+            resolution.finish()
+        coarsest = self.resolutions[-1]
+        if not coarsest.total_frames:
+            return "No frames found for time series analysis\n"
+
+        lines: list[str] = []
+        lines.append("IO Time Series Overview")
+        lines.append("Metric,Value")
+        lines.append(f"Frames,{coarsest.total_frames}")
+        lines.append(f"Bytes,{coarsest.total_bytes}")
+        lines.append(f"Duration (s),{(self.last_us - (self.first_us or 0)) / 1_000_000:.3f}")
+        lines.append(f"Retransmissions,{self.retransmissions}")
+        lines.append(f"Zero Window Events,{self.zero_windows}")
+        lines.append("")
+
+        lines.append("Resolution Summary")
+        lines.append("Resolution,Bins,MeanFrames/Bin,PeakFrames,MeanMbps,PeakMbps,Peak/Mean")
+        for resolution in self.resolutions:
+            mean_bytes = resolution.total_bytes / resolution.bins
+            peak_bytes = max(resolution.bursts)[0] if resolution.bursts else 0
+            ratio = peak_bytes / mean_bytes if mean_bytes else 0.0
+            lines.append(
+                f"{_label(resolution.width)},{resolution.bins},"
+                f"{resolution.total_frames / resolution.bins:.2f},{resolution.peak_frames},"
+                f"{resolution.mbps(mean_bytes):.3f},{resolution.mbps(peak_bytes):.3f},{ratio:.1f}"
+            )
+
+        for resolution in self.resolutions:
+            lines.append("")
+            lines.append(f"Top Bursts ({_label(resolution.width)})")
+            lines.append("Rank,Start(s),Frames,Bytes,Mbps,Retransmissions,ZeroWindow,TopService")
+            bursts = sorted(resolution.bursts, reverse=True)
+            for rank, (octets, frames, index, retrans, zero_windows, service) in enumerate(
+                bursts, 1
+            ):
+                start = index * resolution.width / 1_000_000
+                lines.append(
+                    f"{rank},{start:.3f},{frames},{octets},{resolution.mbps(octets):.3f},"
+                    f"{retrans},{zero_windows},{service or '-'}"
+                )
+
+        listed = [
+            resolution
+            for resolution in self.resolutions
+            if resolution.series is not None and resolution.bins <= MAX_SERIES_ROWS
+        ]
+        if not listed and coarsest.series is not None:
+            listed = [coarsest]
+        for resolution in listed:
+            lines.append("")
+            lines.append(f"Series ({_label(resolution.width)})")
+            lines.append("Start(s),Frames,Bytes,Mbps,Retransmissions,ZeroWindow")
+            assert resolution.series is not None
+            bin_frames, bin_bytes, bin_retransmissions, bin_zero_windows = resolution.series
+            for offset in range(len(bin_frames)):
+                start = (resolution.first + offset) * resolution.width / 1_000_000
+                lines.append(
+                    f"{start:.3f},{bin_frames[offset]},{bin_bytes[offset]},"
+                    f"{resolution.mbps(bin_bytes[offset]):.3f},"
+                    f"{bin_retransmissions[offset]},{bin_zero_windows[offset]}"
+                )
+
+        return "\n".join(lines) + "\n"
@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-from pathlib import Path
 from collections import Counter, defaultdict
 
 from capmaster.plugins.analyze.modules import register_module
@@ -38,31 +37,27 @@ class MgcpStatsModule(AnalysisModule):
         """Required protocols."""
         return {"mgcp"}
 
-    def build_tshark_args(self, input_file: Path) -> list[str]:
-        """
-        Build tshark command arguments.
-
-        Args:
-            input_file: Path to input PCAP file
+    @property
+    def display_filter(self) -> str:
+        """Display filter."""
+        return "mgcp"
 
-        Returns:
-            List of tshark arguments for MGCP analysis
-        """
+    @property
+    def fields(self) -> list[str]:
+        """Extracted fields."""
         return [
-            "-Y", "mgcp",
-            "-T", "fields",
-            "-e", "frame.number",
-            "-e", "frame.len",
-            "-e", "ip.src",
-            "-e", "tcp.srcport",
-            "-e", "udp.srcport",
-            "-e", "ip.dst",
-            "-e", "tcp.dstport",
-            "-e", "udp.dstport",
-            "-e", "mgcp.req",
-            "-e", "mgcp.rsp",
-            "-e", "mgcp.req.verb",
-            "-e", "mgcp.rsp.rspcode",
+            "frame.number",
+            "frame.len",
+            "ip.src",
+            "tcp.srcport",
+            "udp.srcport",
+            "ip.dst",
+            "tcp.dstport",
+            "udp.dstport",
+            "mgcp.req",
+            "mgcp.rsp",
+            "mgcp.req.verb",
+            "mgcp.rsp.rspcode",
         ]
 
     def post_process(self, tshark_output: str, output_format: str = "txt") -> str:
@@ -3,10 +3,10 @@
 from __future__ import annotations
 
 from collections import Counter, defaultdict
-from pathlib import Path
+from typing import Any
 
 from capmaster.plugins.analyze.modules import register_module
-from capmaster.plugins.analyze.modules.base import AnalysisModule
+from capmaster.plugins.analyze.modules.base import AnalysisModule, RowAggregator
 
 
 @register_module
@@ -43,44 +43,30 @@ class MqStatsModule(AnalysisModule):
         """Required protocols."""
         return {"mq"}
 
-    def build_tshark_args(self, input_file: Path) -> list[str]:
-        """
-        Build tshark command arguments.
-
-        Args:
-            input_file: Path to input PCAP file
+    @property
+    def display_filter(self) -> str:
+        """Display filter."""
+        return "mq"
 
-        Returns:
-            List of tshark arguments for MQ statistics extraction
-        """
+    @property
+    def fields(self) -> list[str]:
+        """Extracted fields."""
         return [
-            "-Y",
-            "mq",
-            "-T",
-            "fields",
-            "-e",
             "frame.number",
-            "-e",
             "frame.len",
-            "-e",
             "ip.src",
-            "-e",
             "tcp.srcport",
-            "-e",
             "ip.dst",
-            "-e",
             "tcp.dstport",
-            "-e",
             "tcp.stream",
-            "-e",
             "mq.api.completioncode",  # MQ API completion code
-            "-e",
-            "mq.api.reasoncode",      # MQ API reason code
+            "mq.api.reasoncode",  # MQ API reason code
         ]
 
-    def post_process(self, tshark_output: str, output_format: str = "txt") -> str:
+
+    def aggregator(self, output_format: str = "txt") -> RowAggregator:
         """
-        Post-process MQ messages to generate statistics.
+        Aggregate MQ messages into statistics.
 
         Groups MQ messages by:
         1. Completion codes and reason codes (for error detection)
@@ -89,26 +75,31 @@ class MqStatsModule(AnalysisModule):
         4. Message sizes
 
         Args:
-            tshark_output: Raw tshark output (tab-separated fields)
             output_format: Output format ("txt" or "md", default: "txt")
 
         Returns:
-            Formatted output with MQ statistics including error analysis
+            Aggregator producing the MQ statistics including error analysis
         """
-        if not tshark_output.strip():
-            return "No MQ messages found\n"
+        return _MqStatsAggregator()
 
-        # Counters and storage
-        total_messages = 0
-        total_size = 0
 
-        # Completion code and reason code tracking
-        completion_codes: dict[str, list[str]] = defaultdict(list)  # {code: [connections]}
-        reason_codes: dict[str, list[str]] = defaultdict(list)      # {code: [connections]}
-        error_messages = 0  # Messages with non-zero completion code
+class _MqStatsAggregator(RowAggregator):
+    """Incremental MQ statistics."""
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.total_messages = 0
+        self.total_size = 0
+
+        # Completion code and reason code tracking: counts and first connection
+        self.completion_codes: Counter[str] = Counter()
+        self.completion_samples: dict[str, str] = {}
+        self.reason_codes: Counter[str] = Counter()
+        self.reason_samples: dict[str, str] = {}
+        self.error_messages = 0  # Messages with non-zero completion code
 
         # Size distribution
-        size_buckets = {
+        self.size_buckets = {
             "< 1KB": 0,
             "1KB - 10KB": 0,
             "10KB - 100KB": 0,
@@ -117,93 +108,106 @@ class MqStatsModule(AnalysisModule):
         }
 
         # Stream tracking
-        streams: dict[str, dict] = defaultdict(lambda: {
+        self.streams: dict[str, dict[str, Any]] = defaultdict(lambda: {
             'count': 0,
             'src': None,
             'dst': None,
             'total_size': 0,
-            'frames': [],
             'errors': 0  # Count of error messages in this stream
         })
 
         # Connection tracking
-        connections: dict[str, int] = defaultdict(int)
-
-        for line in tshark_output.strip().split('\n'):
-            if not line.strip():
-                continue
+        self.connections: dict[str, int] = defaultdict(int)
+
+    def add(self, row: list[str]) -> None:
+        """Account one MQ message."""
+        self.rows += 1
+        parts = row
+        if len(parts) < 9:
+            # Handle old format without completion/reason codes
+            if len(parts) >= 7:
+                parts = parts + [''] * (9 - len(parts))
+            else:
+                return
+
+        frame_len = parts[1] if parts[1] else "0"
+        src_ip = parts[2] if parts[2] else ""
+        src_port = parts[3] if parts[3] else ""
+        dst_ip = parts[4] if parts[4] else ""
+        dst_port = parts[5] if parts[5] else ""
+        stream_id = parts[6] if parts[6] else ""
+        completion_code = parts[7] if parts[7] else ""
+        reason_code = parts[8] if parts[8] else ""
+
+        self.total_messages += 1
+
+        # Parse frame length
+        try:
+            size = int(frame_len)
+            self.total_size += size
+
+            # Categorize by size
+            if size < 1024:
+                self.size_buckets["< 1KB"] += 1
+            elif size < 10240:
+                self.size_buckets["1KB - 10KB"] += 1
+            elif size < 102400:
+                self.size_buckets["10KB - 100KB"] += 1
+            elif size < 1048576:
+                self.size_buckets["100KB - 1MB"] += 1
+            else:
+                self.size_buckets["> 1MB"] += 1
+        except ValueError:
+            size = 0
+
+        # Track completion and reason codes
+        connection = f"{src_ip}:{src_port} -> {dst_ip}:{dst_port}"
+
+        if completion_code:
+            self.completion_codes[completion_code] += 1
+            self.completion_samples.setdefault(completion_code, connection)
+            # Non-zero completion code indicates an error
+            if completion_code != "0":
+                self.error_messages += 1
+                if stream_id and stream_id in self.streams:
+                    self.streams[stream_id]['errors'] += 1
+
+        if reason_code:
+            self.reason_codes[reason_code] += 1
+            self.reason_samples.setdefault(reason_code, connection)
+
+        # Track stream
+        if stream_id:
+            stream = self.streams[stream_id]
+            stream['count'] += 1
+            stream['total_size'] += size
+
+            # Record endpoints (use first occurrence)
+            if not stream['src'] and src_ip and src_port:
+                stream['src'] = f"{src_ip}:{src_port}"
+            if not stream['dst'] and dst_ip and dst_port:
+                stream['dst'] = f"{dst_ip}:{dst_port}"
+
+        # Track connection
+        if src_ip and dst_ip:
+            self.connections[connection] += 1
+
+    def report(self) -> str:
+        """Render the MQ statistics."""
+        if not self.rows:
+            return "No MQ messages found\n"
 
-            parts = line.split('\t')
-            if len(parts) < 9:  # Now expecting 9 fields (added 2 new fields)
-                # Handle old format without completion/reason codes
-                if len(parts) >= 7:
-                    parts.extend(['', ''])  # Add empty completion and reason codes
-                else:
-                    continue
+        total_messages = self.total_messages
+        total_size = self.total_size
+        completion_codes = self.completion_codes
+        completion_samples = self.completion_samples
+        reason_codes = self.reason_codes
+        reason_samples = self.reason_samples
+        error_messages = self.error_messages
+        size_buckets = self.size_buckets
+        streams = self.streams
+        connections = self.connections
 
-            frame_num = parts[0] if parts[0] else ""
-            frame_len = parts[1] if parts[1] else "0"
-            src_ip = parts[2] if parts[2] else ""
-            src_port = parts[3] if parts[3] else ""
-            dst_ip = parts[4] if parts[4] else ""
-            dst_port = parts[5] if parts[5] else ""
-            stream_id = parts[6] if parts[6] else ""
-            completion_code = parts[7] if len(parts) > 7 and parts[7] else ""
-            reason_code = parts[8] if len(parts) > 8 and parts[8] else ""
-
-            total_messages += 1
-
-            # Parse frame length
-            try:
-                size = int(frame_len)
-                total_size += size
-
-                # Categorize by size
-                if size < 1024:
-                    size_buckets["< 1KB"] += 1
-                elif size < 10240:
-                    size_buckets["1KB - 10KB"] += 1
-                elif size < 102400:
-                    size_buckets["10KB - 100KB"] += 1
-                elif size < 1048576:
-                    size_buckets["100KB - 1MB"] += 1
-                else:
-                    size_buckets["> 1MB"] += 1
-            except ValueError:
-                size = 0
-
-            # Track completion and reason codes
-            connection = f"{src_ip}:{src_port} -> {dst_ip}:{dst_port}"
-
-            if completion_code:
-                completion_codes[completion_code].append(connection)
-                # Non-zero completion code indicates an error
-                if completion_code != "0":
-                    error_messages += 1
-                    if stream_id and stream_id in streams:
-                        streams[stream_id]['errors'] += 1
-
-            if reason_code:
-                reason_codes[reason_code].append(connection)
-
-            # Track stream
-            if stream_id:
-                stream = streams[stream_id]
-                stream['count'] += 1
-                stream['total_size'] += size
-                if frame_num:
-                    stream['frames'].append(frame_num)
-
-                # Record endpoints (use first occurrence)
-                if not stream['src'] and src_ip and src_port:
-                    stream['src'] = f"{src_ip}:{src_port}"
-                if not stream['dst'] and dst_ip and dst_port:
-                    stream['dst'] = f"{dst_ip}:{dst_port}"
-
-            # Track connection
-            if src_ip and dst_ip:
-                connections[connection] += 1
-        
         # Generate output
         lines = []
         lines.append("=" * 90)
@@ -243,12 +247,11 @@ class MqStatsModule(AnalysisModule):
             }
 
             for code in sorted_codes:
-                conns = completion_codes[code]
-                count = len(conns)
+                count = completion_codes[code]
                 desc = code_descriptions.get(code, "Unknown")
                 severity = "High" if code == "2" else ("Medium" if code == "1" else "Low")
 
-                sample = conns[0] if conns else ""
+                sample = completion_samples.get(code, "")
                 sample_display = sample[:39] if len(sample) <= 39 else sample[:36] + "..."
 
                 lines.append(f"{code:<10} {count:>10} {severity:<10} {desc:<30} {sample_display:<40}")
@@ -262,14 +265,13 @@ class MqStatsModule(AnalysisModule):
             lines.append(f"{'Code':<10} {'Count':>10} {'Severity':<10} {'Sample Connection':<60}")
             lines.append("-" * 90)
 
-            sorted_reasons = sorted(reason_codes.items(), key=lambda x: -len(x[1]))[:5]
+            sorted_reasons = sorted(reason_codes.items(), key=lambda x: -x[1])[:5]
 
-            for code, conns in sorted_reasons:
+            for code, count in sorted_reasons:
                 if not code:
                     continue
-                count = len(conns)
                 severity = "High" if code != "0" else "Low"
-                sample = conns[0] if conns else ""
+                sample = reason_samples.get(code, "")
                 sample_display = sample[:59] if len(sample) <= 59 else sample[:56] + "..."
 
                 lines.append(f"{code:<10} {count:>10} {severity:<10} {sample_display:<60}")
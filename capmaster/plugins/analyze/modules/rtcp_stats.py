@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-from pathlib import Path
 from collections import Counter, defaultdict
 
 from capmaster.plugins.analyze.modules import register_module
@@ -39,26 +38,22 @@ class RtcpStatsModule(AnalysisModule):
         """Required protocols."""
         return {"rtcp"}
 
-    def build_tshark_args(self, input_file: Path) -> list[str]:
-        """
-        Build tshark command arguments.
-
-        Args:
-            input_file: Path to input PCAP file
+    @property
+    def display_filter(self) -> str:
+        """Display filter."""
+        return "rtcp"
 
-        Returns:
-            List of tshark arguments for RTCP analysis
-        """
+    @property
+    def fields(self) -> list[str]:
+        """Extracted fields."""
         return [
-            "-Y", "rtcp",
-            "-T", "fields",
-            "-e", "frame.number",
-            "-e", "frame.len",
-            "-e", "ip.src",
-            "-e", "udp.srcport",
-            "-e", "ip.dst",
-            "-e", "udp.dstport",
-            "-e", "rtcp.pt",
+            "frame.number",
+            "frame.len",
+            "ip.src",
+            "udp.srcport",
+            "ip.dst",
+            "udp.dstport",
+            "rtcp.pt",
         ]
 
     def post_process(self, tshark_output: str, output_format: str = "txt") -> str:
@@ -0,0 +1,256 @@
+"""RTP stream quality module (single-pass engine)."""
+
+from __future__ import annotations
+
+import heapq
+from collections import defaultdict
+
+from capmaster.plugins.analyze.modules import register_module
+from capmaster.plugins.analyze.modules.base import AnalysisModule, RowAggregator
+from capmaster.plugins.analyze.rtp_engine import RtpQualityEngine, RtpStream, mos_rating
+
+# Length of the intervals of the MOS series, in seconds
+MOS_INTERVAL = 5.0
+
+# Largest number of points of the MOS series (longer captures use coarser intervals)
+MAX_SERIES_POINTS = 720
+
+# Streams and calls listed in the report
+HIGHLIGHT_LIMIT = 10
+
+_SEVERITY = {
+    "Excellent": "Low",
+    "Good": "Low",
+    "Fair": "Medium",
+    "Poor": "High",
+    "Bad": "High",
+}
+
+
+@register_module
+class RtpQualityModule(AnalysisModule):
+    """Generate RTP stream quality with call legs and a MOS time series.
+
+    Computes loss, sequence errors, RFC 3550 jitter and max delta of every
+    RTP stream from one field extraction, instead of the ``rtp,streams``
+    tap which holds all packets in memory. SIP/SDP and RTCP packets of the
+    same pass attribute streams to call legs and add the quality reported
+    by the receivers. The MOS of every stream is also computed per interval
+    to show when quality degraded.
+    """
+
+    @property
+    def name(self) -> str:
+        """Module name."""
+        return "rtp_quality"
+
+    @property
+    def output_suffix(self) -> str:
+        """Output file suffix."""
+        return "rtp-quality.txt"
+
+    @property
+    def required_protocols(self) -> set[str]:
+        """Required protocols."""
+        return {"rtp"}
+
+    @property
+    def display_filter(self) -> str:
+        """Display filter."""
+        return "rtp || rtcp || sdp"
+
+    @property
+    def fields(self) -> list[str]:
+        """Extracted fields."""
+        return [
+            "frame.time_relative",
+            "ip.src",
+            "udp.srcport",
+            "ip.dst",
+            "udp.dstport",
+            "rtp.ssrc",
+            "rtp.seq",
+            "rtp.timestamp",
+            "rtp.p_type",
+            "rtcp.ssrc.identifier",
+            "rtcp.ssrc.fraction",
+            "rtcp.ssrc.jitter",
+            "sip.Call-ID",
+            "sdp.connection_info.address",
+            "sdp.media.port",
+            "sdp.mime.type",
+            "sdp.sample_rate",
+            "ipv6.src",
+            "ipv6.dst",
+        ]
+
+    def aggregator(self, output_format: str = "txt") -> RowAggregator:
+        """
+        Fold RTP, RTCP and SDP packets into stream quality.
+
+        Args:
+            output_format: Output format ("txt" or "md", default: "txt")
+
+        Returns:
+            Aggregator producing the RTP quality report
+        """
+        return _RtpQualityAggregator()
+
+
+def _values(column: str) -> list[str]:
+    """Occurrences of a multi-valued field."""
+    return column.split(",") if column else []
+
+
+class _RtpQualityAggregator(RowAggregator):
+    """Incremental RTP stream quality."""
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.engine = RtpQualityEngine(MOS_INTERVAL)
+
+    def add(self, row: list[str]) -> None:
+        """Account one RTP, RTCP or SDP packet."""
+        self.rows += 1
+        if len(row) < 19:
+            return
+        try:
+            if row[5]:
+                self._add_rtp(row)
+            elif row[9]:
+                self._add_rtcp(row)
+            elif row[14]:
+                self._add_sdp(row)
+        except ValueError:
+            return
+
+    def _add_rtp(self, row: list[str]) -> None:
+        # Tunneled packets carry several occurrences; keep the outermost one
+        ssrc, seq, timestamp, payload_type = (value.split(",", 1)[0] for value in row[5:9])
+        src = (row[1] or row[17]).split(",", 1)[0]
+        dst = (row[3] or row[18]).split(",", 1)[0]
+        self.engine.add_packet(
+            float(row[0]),
+            f"{src}:{row[2].split(',', 1)[0]}",
+            f"{dst}:{row[4].split(',', 1)[0]}",
+            int(ssrc, 0),
+            int(seq),
+            int(timestamp),
+            int(payload_type),
+        )
+
+    def _add_rtcp(self, row: list[str]) -> None:
+        for ssrc, fraction, jitter in zip(
+            _values(row[9]), _values(row[10]), _values(row[11]), strict=False
+        ):
+            self.engine.add_rtcp(int(ssrc, 0), int(fraction), int(jitter))
+
+    def _add_sdp(self, row: list[str]) -> None:
+        addresses = [address for address in _values(row[13]) if address]
+        if not addresses:
+            return
+        codecs = [
+            (name, int(rate))
+            for name, rate in zip(_values(row[15]), _values(row[16]), strict=False)
+            if rate.isdigit()
+        ]
+        self.engine.add_sdp(row[12] or None, addresses[0], _values(row[14]), codecs)
+
+    def report(self) -> str:
+        """Render the RTP quality report."""
+        engine = self.engine
+        engine.finish()
+        streams = list(engine.streams.values())
+        if not streams:
+            return "No RTP streams found for quality analysis\n"
+
+        scored: list[tuple[float, str, RtpStream]] = []
+        calls: dict[str, list[tuple[float, str, RtpStream]]] = defaultdict(list)
+        for stream in streams:
+            mos, rating = stream.mos()
+            entry = (mos, rating, stream)
+            scored.append(entry)
+            call_id = engine.call_id(stream)
+            if call_id:
+                calls[call_id].append(entry)
+
+        total_streams = len(scored)
+        total_packets = sum(stream.packets for stream in streams)
+        total_expected = sum(stream.expected for stream in streams)
+        total_lost = sum(stream.lost for stream in streams)
+        correlated = sum(len(entries) for entries in calls.values())
+        severity_counts = {"High": 0, "Medium": 0, "Low": 0}
+        for _, rating, _ in scored:
+            severity_counts[_SEVERITY[rating]] += 1
+        overall_severity = (
+            "High"
+            if severity_counts["High"]
+            else ("Medium" if severity_counts["Medium"] else "Low")
+        )
+
+        lines: list[str] = []
+        lines.append("RTP Quality Overview")
+        lines.append("Metric,Value")
+        lines.append(f"Total Streams,{total_streams}")
+        lines.append(f"Total Packets,{total_packets}")
+        loss_share = total_lost / total_expected * 100 if total_expected > 0 else 0.0
+        lines.append(f"Lost Packets,{total_lost} ({loss_share:.2f}%)")
+        lines.append(f"Sequence Errors,{sum(stream.seq_errors for stream in streams)}")
+        lines.append(f"Average MOS,{sum(mos for mos, _, _ in scored) / total_streams:.2f}")
+        lines.append(f"Overall Severity,{overall_severity}")
+        lines.append(f"High-Severity Streams,{severity_counts['High']}")
+        lines.append(f"Medium-Severity Streams,{severity_counts['Medium']}")
+        lines.append(f"Call Legs,{len(calls)}")
+        lines.append(f"Streams Without Call Leg,{total_streams - correlated}")
+        lines.append("")
+
+        lines.append("Worst Streams")
+        lines.append(
+            "Index,Endpoints,SSRC,Codec,Call-ID,Packets,Lost,Loss%,SeqErrors,"
+            "MeanJitter(ms),MaxJitter(ms),MaxDelta(ms),MOS,Rating,RTCP Loss%,RTCP Jitter(ms)"
+        )
+        worst = heapq.nsmallest(HIGHLIGHT_LIMIT, scored, key=lambda entry: entry[0])
+        for idx, (mos, rating, stream) in enumerate(worst, 1):
+            feedback = engine.rtcp_feedback(stream)
+            rtcp = f"{feedback[0]:.1f},{feedback[1]:.2f}" if feedback else "-,-"
+            lines.append(
+                f"{idx},{stream.src} -> {stream.dst},0x{stream.ssrc:08X},{stream.codec},"
+                f"{engine.call_id(stream) or '-'},{stream.packets},{stream.lost},"
+                f"{stream.loss_percent:.1f},{stream.seq_errors},{stream.mean_jitter:.2f},"
+                f"{stream.max_jitter:.2f},{stream.max_delta:.2f},{mos:.2f},{rating},{rtcp}"
+            )
+        remaining = total_streams - len(worst)
+        if remaining > 0:
+            lines.append(f"... {remaining} additional streams hidden")
+
+        if calls:
+            lines.append("")
+            lines.append("Worst Call Legs")
+            lines.append("Index,Call-ID,Streams,Packets,Loss%,MinMOS,Rating")
+            call_rows = []
+            for call_id, entries in calls.items():
+                packets = sum(stream.packets for _, _, stream in entries)
+                expected = sum(stream.expected for _, _, stream in entries)
+                lost = sum(stream.lost for _, _, stream in entries)
+                mos, rating, _ = min(entries, key=lambda entry: entry[0])
+                loss = lost / expected * 100 if expected > 0 else 0.0
+                call_rows.append((mos, rating, call_id, len(entries), packets, loss))
+            worst_calls = heapq.nsmallest(HIGHLIGHT_LIMIT, call_rows, key=lambda row: row[0])
+            for idx, (mos, rating, call_id, count, packets, loss) in enumerate(worst_calls, 1):
+                lines.append(f"{idx},{call_id},{count},{packets},{loss:.1f},{mos:.2f},{rating}")
+            if len(call_rows) > len(worst_calls):
+                lines.append(f"... {len(call_rows) - len(worst_calls)} additional call legs hidden")
+
+        step, series = engine.mos_series(MAX_SERIES_POINTS)
+        if series:
+            lines.append("")
+            lines.append(f"MOS Series ({step:g} s intervals)")
+            lines.append("Start(s),Streams,Packets,Loss%,MeanJitter(ms),MeanMOS,MinMOS,Rating")
+            for start, bucket in series:
+                lines.append(
+                    f"{start:g},{bucket.stream_intervals},{bucket.packets},"
+                    f"{bucket.loss_percent:.1f},{bucket.mean_jitter:.2f},"
+                    f"{bucket.mean_mos:.2f},{bucket.min_mos:.2f},{mos_rating(bucket.mean_mos)}"
+                )
+
+        return "\n".join(lines) + "\n"
@@ -2,7 +2,6 @@
 
 from __future__ import annotations
 
-from pathlib import Path
 from collections import Counter, defaultdict
 
 from capmaster.plugins.analyze.modules import register_module
@@ -40,27 +39,23 @@ class SdpStatsModule(AnalysisModule):
         """Required protocols."""
         return {"sdp"}
 
-    def build_tshark_args(self, input_file: Path) -> list[str]:
-        """
-        Build tshark command arguments.
-
-        Args:
-            input_file: Path to input PCAP file
+    @property
+    def display_filter(self) -> str:
+        """Display filter."""
+        return "sdp"
 
-        Returns:
-            List of tshark arguments for SDP analysis
-        """
+    @property
+    def fields(self) -> list[str]:
+        """Extracted fields."""
         return [
-            "-Y", "sdp",
-            "-T", "fields",
-            "-e", "frame.number",
-            "-e", "frame.len",
-            "-e", "ip.src",
-            "-e", "ip.dst",
-            "-e", "sdp.media",
-            "-e", "sdp.media.port",
-            "-e", "sdp.media.proto",
-            "-e", "sdp.media.format",
+            "frame.number",
+            "frame.len",
+            "ip.src",
+            "ip.dst",
+            "sdp.media",
+            "sdp.media.port",
+            "sdp.media.proto",
+            "sdp.media.format",
         ]
 
     def post_process(self, tshark_output: str, output_format: str = "txt") -> str:
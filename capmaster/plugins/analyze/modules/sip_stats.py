@@ -3,10 +3,9 @@
 from __future__ import annotations
 
 from collections import Counter, defaultdict
-from pathlib import Path
 
 from capmaster.plugins.analyze.modules import register_module
-from capmaster.plugins.analyze.modules.base import AnalysisModule
+from capmaster.plugins.analyze.modules.base import AnalysisModule, RowAggregator, SpreadSample
 
 
 @register_module
@@ -36,101 +35,98 @@ class SipStatsModule(AnalysisModule):
         """Required protocols."""
         return {"sip"}
 
-    def build_tshark_args(self, input_file: Path) -> list[str]:
-        """
-        Build tshark command arguments.
-
-        Args:
-            input_file: Path to input PCAP file
+    @property
+    def display_filter(self) -> str:
+        """Display filter."""
+        return "sip"
 
-        Returns:
-            List of tshark arguments for SIP statistics extraction
-        """
+    @property
+    def fields(self) -> list[str]:
+        """Extracted fields."""
         return [
-            "-Y",
-            "sip",
-            "-T",
-            "fields",
-            "-e",
             "ip.src",
-            "-e",
             "tcp.srcport",
-            "-e",
             "udp.srcport",
-            "-e",
             "ip.dst",
-            "-e",
             "tcp.dstport",
-            "-e",
             "udp.dstport",
-            "-e",
             "sip.Method",
-            "-e",
             "sip.Status-Code",
-            "-e",
             "sip.Status-Line",
         ]
 
-    def post_process(self, tshark_output: str, output_format: str = "txt") -> str:
+    def aggregator(self, output_format: str = "txt") -> RowAggregator:
         """
-        Post-process SIP messages to generate statistics.
-        
+        Aggregate SIP messages into statistics.
+
         Groups SIP messages by:
         1. Methods (requests)
         2. Response codes (responses)
-        
+
         Args:
-            tshark_output: Raw tshark output (tab-separated fields)
             output_format: Output format ("txt" or "md", default: "txt")
-            
+
         Returns:
-            Formatted output with SIP statistics
+            Aggregator producing the SIP statistics
         """
-        if not tshark_output.strip():
-            return "No SIP messages found\n"
-        
+        return _SipStatsAggregator()
+
+
+class _SipStatsAggregator(RowAggregator):
+    """Incremental SIP statistics."""
+
+    def __init__(self) -> None:
+        self.rows = 0
+
         # Counters for methods and response codes
-        method_counter: Counter[str] = Counter()
-        response_counter: Counter[str] = Counter()
-        
-        # Detailed connection info grouped by method/response
-        method_connections: dict[str, list[str]] = defaultdict(list)
-        response_connections: dict[str, list[str]] = defaultdict(list)
-        
-        for line in tshark_output.strip().split('\n'):
-            if not line.strip():
-                continue
-            
-            parts = line.split('\t')
-            if len(parts) < 9:
-                continue
-            
-            src_ip = parts[0] if parts[0] else ""
-            tcp_src_port = parts[1] if parts[1] else ""
-            udp_src_port = parts[2] if parts[2] else ""
-            dst_ip = parts[3] if parts[3] else ""
-            tcp_dst_port = parts[4] if parts[4] else ""
-            udp_dst_port = parts[5] if parts[5] else ""
-            method = parts[6] if parts[6] else ""
-            status_code = parts[7] if parts[7] else ""
-            status_line = parts[8] if parts[8] else ""
-            
-            # Determine actual source and destination ports
-            src_port = tcp_src_port if tcp_src_port else udp_src_port
-            dst_port = tcp_dst_port if tcp_dst_port else udp_dst_port
-            
-            connection = f"{src_ip}:{src_port} -> {dst_ip}:{dst_port}"
-            
-            # Process SIP request (has method)
-            if method:
-                method_counter[method] += 1
-                method_connections[method].append(connection)
-            
-            # Process SIP response (has status code)
-            if status_code:
-                response_counter[status_code] += 1
-                response_connections[status_code].append(connection)
-        
+        self.method_counter: Counter[str] = Counter()
+        self.response_counter: Counter[str] = Counter()
+
+        # Sampled connections grouped by method/response
+        self.method_connections: dict[str, SpreadSample[str]] = defaultdict(SpreadSample)
+        self.response_connections: dict[str, SpreadSample[str]] = defaultdict(SpreadSample)
+
+    def add(self, row: list[str]) -> None:
+        """Account one SIP message."""
+        self.rows += 1
+        if len(row) < 9:
+            return
+
+        src_ip = row[0] if row[0] else ""
+        tcp_src_port = row[1] if row[1] else ""
+        udp_src_port = row[2] if row[2] else ""
+        dst_ip = row[3] if row[3] else ""
+        tcp_dst_port = row[4] if row[4] else ""
+        udp_dst_port = row[5] if row[5] else ""
+        method = row[6] if row[6] else ""
+        status_code = row[7] if row[7] else ""
+
+        # Determine actual source and destination ports
+        src_port = tcp_src_port if tcp_src_port else udp_src_port
+        dst_port = tcp_dst_port if tcp_dst_port else udp_dst_port
+
+        connection = f"{src_ip}:{src_port} -> {dst_ip}:{dst_port}"
+
+        # Process SIP request (has method)
+        if method:
+            self.method_counter[method] += 1
+            self.method_connections[method].add(connection)
+
+        # Process SIP response (has status code)
+        if status_code:
+            self.response_counter[status_code] += 1
+            self.response_connections[status_code].add(connection)
+
+    def report(self) -> str:
+        """Render the SIP statistics."""
+        if not self.rows:
+            return "No SIP messages found\n"
+
+        method_counter = self.method_counter
+        response_counter = self.response_counter
+        method_connections = self.method_connections
+        response_connections = self.response_connections
+
         # Generate output
         lines = []
         lines.append("=" * 70)
@@ -156,10 +152,10 @@ class SipStatsModule(AnalysisModule):
                 lines.append("-" * 70)
                 for method, count in top_methods:
                     lines.append(f"{method} total={count}")
-                    samples = self.sample_items(method_connections[method], limit=3)
+                    samples = method_connections[method].sample(limit=3)
                     for conn in samples:
                         lines.append(f"  sample: {conn}")
-                    remaining = len(method_connections[method]) - len(samples)
+                    remaining = method_connections[method].count - len(samples)
                     if remaining > 0:
                         lines.append(f"  ... {remaining} more")
                 lines.append("")
@@ -194,10 +190,10 @@ class SipStatsModule(AnalysisModule):
                     severity = classify_status(code)
                     total = response_counter[code]
                     lines.append(f"Status {code} [{severity}] total={total}")
-                    samples = self.sample_items(response_connections[code], limit=3)
+                    samples = response_connections[code].sample(limit=3)
                     for conn in samples:
                         lines.append(f"  sample: {conn}")
-                    remaining = len(response_connections[code]) - len(samples)
+                    remaining = response_connections[code].count - len(samples)
                     if remaining > 0:
                         lines.append(f"  ... {remaining} more")
                 lines.append("")
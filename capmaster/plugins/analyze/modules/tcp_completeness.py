@@ -1,12 +1,11 @@
 """TCP completeness statistics module."""
 
 from __future__ import annotations
-import re
+
 from collections import defaultdict
-from pathlib import Path
 
 from capmaster.plugins.analyze.modules import register_module
-from capmaster.plugins.analyze.modules.base import AnalysisModule
+from capmaster.plugins.analyze.modules.base import AnalysisModule, RowAggregator, SpreadSample
 
 
 @register_module
@@ -37,131 +36,44 @@ class TcpCompletenessModule(AnalysisModule):
         """Required protocols."""
         return {"tcp"}
 
-    def build_tshark_args(self, input_file: Path) -> list[str]:
-        """
-        Build tshark command arguments.
-
-        Uses two-pass analysis (-2) to extract tcp.completeness.str
-
-        Args:
-            input_file: Path to input PCAP file
+    @property
+    def display_filter(self) -> str:
+        """Display filter."""
+        return "tcp"
 
-        Returns:
-            List of tshark arguments for TCP completeness analysis
-        """
+    @property
+    def fields(self) -> list[str]:
+        """Extracted fields."""
         return [
-            "-2",  # Two-pass analysis
-            "-Y",
-            "tcp",
-            "-T",
-            "fields",
-            "-E",
-            "separator=\t",
-            "-e",
             "tcp.stream",
-            "-e",
             "tcp.completeness.str",
-            "-e",
             "ip.src",
-            "-e",
             "tcp.srcport",
-            "-e",
             "ip.dst",
-            "-e",
             "tcp.dstport",
-            "-e",
             "ipv6.src",
-            "-e",
             "ipv6.dst",
         ]
 
-    def post_process(self, tshark_output: str, output_format: str = "txt") -> str:
+    @property
+    def dissection_options(self) -> list[str]:
+        """Two-pass analysis, required for tcp.completeness.str."""
+        return ["-2"]
+
+    def aggregator(self, output_format: str = "txt") -> RowAggregator:
         """
-        Post-process TCP completeness data to categorize connections.
+        Aggregate TCP completeness data to categorize connections.
 
-        Decodes tcp.completeness.str flags and categorizes connections.
+        Decodes the tcp.completeness.str flags of the first packet of each
+        stream and categorizes the connections.
 
         Args:
-            tshark_output: Raw tshark output (tab-separated fields)
             output_format: Output format ("txt" or "md", default: "txt")
 
         Returns:
-            Formatted output with connections grouped by status/data/closure
+            Aggregator producing the connections grouped by status/data/closure
         """
-        # Storage: {(status, flags, count): [connection_list]}
-        categories: dict[tuple[str, str], list[str]] = defaultdict(list)
-        seen_streams: set[int] = set()
-        stream_data: dict[int, tuple[str, str]] = {}  # stream_id -> (completeness, direction)
-
-        for line in tshark_output.strip().split('\n'):
-            if not line.strip():
-                continue
-
-            parts = line.split('\t')
-            if len(parts) < 8:
-                continue
-
-            stream_id = int(parts[0]) if parts[0] else -1
-            completeness = parts[1] if parts[1] else ""
-            ip_src = parts[2] if parts[2] else parts[6]  # IPv4 or IPv6
-            src_port = parts[3] if parts[3] else ""
-            ip_dst = parts[4] if parts[4] else parts[7]  # IPv4 or IPv6
-            dst_port = parts[5] if parts[5] else ""
-
-            if stream_id < 0 or stream_id in seen_streams:
-                continue
-
-            seen_streams.add(stream_id)
-            direction = f"{ip_src}:{src_port} -> {ip_dst}:{dst_port}"
-            stream_data[stream_id] = (completeness, direction)
-
-        # Decode completeness flags and categorize
-        for stream_id, (comp, direction) in stream_data.items():
-            status, data_type = self._decode_completeness(comp)
-            # Combine status and data_type for the key
-            status_label = f"{status}, {data_type}"
-            key = (status_label, comp)
-            categories[key].append(direction)
-
-        def classify_severity(label: str) -> str:
-            if "Half-open" in label or "Unknown" in label:
-                return "High"
-            if "Established" in label or "NO_DATA" in label:
-                return "Medium"
-            return "Low"
-
-        summary_rows: list[tuple[str, str, int, str]] = []
-        for (status_label, flags), connections in categories.items():
-            severity = classify_severity(status_label)
-            summary_rows.append((status_label, flags, len(connections), severity))
-
-        summary_rows.sort(key=lambda row: (-row[2], row[0], row[1]))
-
-        lines: list[str] = []
-        lines.append("Status,Flags,Count,Severity")
-        for status_label, flags, count, severity in summary_rows:
-            lines.append(f"{status_label},{flags},{count},{severity}")
-
-        highlighted = [row for row in summary_rows if row[3] == "High"]
-        if len(highlighted) < 3:
-            highlighted.extend(row for row in summary_rows if row[3] == "Medium" and row not in highlighted)
-        highlighted = highlighted[:3]
-
-        if highlighted:
-            lines.append("")
-            lines.append("Highlighted TCP Streams (sampled)")
-            for status_label, flags, count, severity in highlighted:
-                key = (status_label, flags)
-                connections = categories[key]
-                samples = self.sample_items(connections, limit=3)
-                lines.append(f"{status_label} [{severity}] flags={flags} total={count}")
-                for conn in samples:
-                    lines.append(f"  sample: {conn}")
-                remaining = count - len(samples)
-                if remaining > 0:
-                    lines.append(f"  ... {remaining} more")
-
-        return '\n'.join(lines)
+        return _TcpCompletenessAggregator(self)
 
     def _decode_completeness(self, flags: str) -> tuple[str, str]:
         """
@@ -211,3 +123,79 @@ class TcpCompletenessModule(AnalysisModule):
             data_type = "WITH_DATA" if has_data else "NO_DATA"
 
         return status, data_type
+
+
+class _TcpCompletenessAggregator(RowAggregator):
+    """Incremental TCP completeness categories."""
+
+    def __init__(self, module: TcpCompletenessModule) -> None:
+        self.module = module
+        # Sampled connections by (status label, flags), in order of first stream
+        self.categories: dict[tuple[str, str], SpreadSample[str]] = defaultdict(SpreadSample)
+        self.seen_streams: set[int] = set()
+
+    def add(self, row: list[str]) -> None:
+        """Categorize the stream of a packet when it is first seen."""
+        parts = row
+        if len(parts) < 8:
+            return
+
+        stream_id = int(parts[0]) if parts[0] else -1
+        if stream_id < 0 or stream_id in self.seen_streams:
+            return
+
+        completeness = parts[1] if parts[1] else ""
+        ip_src = parts[2] if parts[2] else parts[6]  # IPv4 or IPv6
+        src_port = parts[3] if parts[3] else ""
+        ip_dst = parts[4] if parts[4] else parts[7]  # IPv4 or IPv6
+        dst_port = parts[5] if parts[5] else ""
+
+        self.seen_streams.add(stream_id)
+        status, data_type = self.module._decode_completeness(completeness)
+        # Combine status and data_type for the key
+        status_label = f"{status}, {data_type}"
+        direction = f"{ip_src}:{src_port} -> {ip_dst}:{dst_port}"
+        self.categories[(status_label, completeness)].add(direction)
+
+    def report(self) -> str:
+        """Render the connection categories."""
+        categories = self.categories
+
+        def classify_severity(label: str) -> str:
+            if "Half-open" in label or "Unknown" in label:
+                return "High"
+            if "Established" in label or "NO_DATA" in label:
+                return "Medium"
+            return "Low"
+
+        summary_rows: list[tuple[str, str, int, str]] = []
+        for (status_label, flags), connections in categories.items():
+            severity = classify_severity(status_label)
+            summary_rows.append((status_label, flags, connections.count, severity))
+
+        summary_rows.sort(key=lambda row: (-row[2], row[0], row[1]))
+
+        lines: list[str] = []
+        lines.append("Status,Flags,Count,Severity")
+        for status_label, flags, count, severity in summary_rows:
+            lines.append(f"{status_label},{flags},{count},{severity}")
+
+        highlighted = [row for row in summary_rows if row[3] == "High"]
+        if len(highlighted) < 3:
+            highlighted.extend(row for row in summary_rows if row[3] == "Medium" and row not in highlighted)
+        highlighted = highlighted[:3]
+
+        if highlighted:
+            lines.append("")
+            lines.append("Highlighted TCP Streams (sampled)")
+            for status_label, flags, count, severity in highlighted:
+                key = (status_label, flags)
+                samples = categories[key].sample(limit=3)
+                lines.append(f"{status_label} [{severity}] flags={flags} total={count}")
+                for conn in samples:
+                    lines.append(f"  sample: {conn}")
+                remaining = count - len(samples)
+                if remaining > 0:
+                    lines.append(f"  ... {remaining} more")
+
+        return '\n'.join(lines)
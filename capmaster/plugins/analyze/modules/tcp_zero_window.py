@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 from collections import Counter
-from pathlib import Path
 
 from capmaster.plugins.analyze.modules import register_module
 from capmaster.plugins.analyze.modules.base import AnalysisModule
@@ -32,29 +31,18 @@ class TcpZeroWindowModule(AnalysisModule):
         """Required protocols."""
         return {"tcp"}
 
-    def build_tshark_args(self, input_file: Path) -> list[str]:
-        """
-        Build tshark command arguments.
-
-        Args:
-            input_file: Path to input PCAP file
+    @property
+    def display_filter(self) -> str:
+        """Display filter."""
+        return "tcp.analysis.zero_window"
 
-        Returns:
-            List of tshark arguments for TCP zero window detection
-        """
-        # Extract the 4 fields needed for grouping
+    @property
+    def fields(self) -> list[str]:
+        """Extracted fields."""
         return [
-            "-Y",
-            "tcp.analysis.zero_window",
-            "-T",
-            "fields",
-            "-e",
             "ip.src",
-            "-e",
             "tcp.srcport",
-            "-e",
             "ip.dst",
-            "-e",
             "tcp.dstport",
         ]
 
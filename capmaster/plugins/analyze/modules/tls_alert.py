@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from pathlib import Path
 from typing import cast
 
 from capmaster.plugins.analyze.modules import register_module
@@ -33,37 +32,30 @@ class TlsAlertModule(AnalysisModule):
         """Required protocols."""
         return {"tls", "ssl"}
 
-    def build_tshark_args(self, input_file: Path) -> list[str]:
-        """
-        Build tshark command arguments.
-
-        Args:
-            input_file: Path to input PCAP file
+    @property
+    def display_filter(self) -> str:
+        """Display filter."""
+        return "tls.alert_message && tcp"
 
-        Returns:
-            List of tshark arguments for TLS alert message extraction
-        """
+    @property
+    def fields(self) -> list[str]:
+        """Extracted fields."""
         return [
-            "-Y",
-            "tls.alert_message && tcp",
-            "-o",
-            "tcp.desegment_tcp_streams:TRUE",
-            "-o",
-            "tcp.reassemble_out_of_order:TRUE",
-            "-T",
-            "fields",
-            "-e",
             "ip.src",
-            "-e",
             "tcp.srcport",
-            "-e",
             "ip.dst",
-            "-e",
             "tcp.dstport",
-            "-e",
             "tls.alert_message.desc",
         ]
 
+    @property
+    def dissection_options(self) -> list[str]:
+        """Reassemble TCP segments so TLS records split across segments are parsed."""
+        return [
+            "-o", "tcp.desegment_tcp_streams:TRUE",
+            "-o", "tcp.reassemble_out_of_order:TRUE",
+        ]
+
     def post_process(self, tshark_output: str, output_format: str = "txt") -> str:
         """
         Post-process TLS alert messages to aggregate by alert type.
@@ -9,6 +9,7 @@ from typing import TypedDict
 
 from capmaster.plugins.analyze.modules import register_module
 from capmaster.plugins.analyze.modules.base import AnalysisModule
+from capmaster.plugins.analyze.rtp_engine import estimate_mos
 
 
 class StreamInfo(TypedDict):
@@ -61,46 +62,7 @@ class VoipQualityModule(AnalysisModule):
         codec: str,
     ) -> tuple[float, str]:
         """Calculate MOS from packet loss, jitter, and codec."""
-        codec_r_base = {
-            "g711u": 93.2,
-            "g711a": 93.2,
-            "g722": 92.0,
-            "g729": 83.0,
-            "opus": 92.0,
-            "ilbc": 82.0,
-        }
-        codec_lower = codec.lower()
-        r_base = codec_r_base.get(codec_lower, 93.2)
-        id_factor = 10.0 + (40.0 * packet_loss / 100.0)
-        ie_eff: float
-        if mean_jitter < 20.0:
-            ie_eff = 0.0
-        elif mean_jitter < 50.0:
-            ie_eff = (mean_jitter - 20.0) * 0.5
-        elif mean_jitter < 100.0:
-            ie_eff = 15.0 + (mean_jitter - 50.0) * 0.8
-        else:
-            ie_eff = 55.0 + (mean_jitter - 100.0) * 1.0
-        r_factor = r_base - id_factor - ie_eff
-        r_factor = max(0.0, min(100.0, r_factor))
-        if r_factor <= 0.0:
-            mos = 1.0
-        elif r_factor >= 100.0:
-            mos = 4.5
-        else:
-            mos = 1.0 + 0.035 * r_factor + r_factor * (r_factor - 60.0) * (100.0 - r_factor) * 7e-6
-        mos = max(1.0, min(5.0, mos))
-        if mos >= 4.3:
-            rating = "Excellent"
-        elif mos >= 4.0:
-            rating = "Good"
-        elif mos >= 3.6:
-            rating = "Fair"
-        elif mos >= 3.1:
-            rating = "Poor"
-        else:
-            rating = "Bad"
-        return mos, rating
+        return estimate_mos(packet_loss, mean_jitter, codec)
 
     def post_process(self, tshark_output: str, output_format: str = "txt") -> str:
         """
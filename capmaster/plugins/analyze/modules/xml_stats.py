@@ -3,11 +3,9 @@
 from __future__ import annotations
 
 from collections import Counter, defaultdict
-from pathlib import Path
-import re
 
 from capmaster.plugins.analyze.modules import register_module
-from capmaster.plugins.analyze.modules.base import AnalysisModule
+from capmaster.plugins.analyze.modules.base import AnalysisModule, RowAggregator, SpreadSample
 
 
 @register_module
@@ -39,161 +37,163 @@ class XmlStatsModule(AnalysisModule):
         """Required protocols."""
         return {"xml"}
 
-    def build_tshark_args(self, input_file: Path) -> list[str]:
-        """
-        Build tshark command arguments.
-
-        Args:
-            input_file: Path to input PCAP file
+    @property
+    def display_filter(self) -> str:
+        """Display filter."""
+        return "xml"
 
-        Returns:
-            List of tshark arguments for XML statistics extraction
-        """
+    @property
+    def fields(self) -> list[str]:
+        """Extracted fields."""
         return [
-            "-Y",
-            "xml",
-            "-T",
-            "fields",
-            "-e",
             "frame.number",
-            "-e",
             "frame.len",
-            "-e",
             "ip.src",
-            "-e",
             "tcp.srcport",
-            "-e",
             "ip.dst",
-            "-e",
             "tcp.dstport",
-            "-e",
             "http.request.method",
-            "-e",
             "http.response.code",
-            "-e",
             "http.content_type",
-            "-e",
             "http.content_length",
         ]
 
-    def post_process(self, tshark_output: str, output_format: str = "txt") -> str:
+    def aggregator(self, output_format: str = "txt") -> RowAggregator:
         """
-        Post-process XML messages to generate statistics.
-        
+        Aggregate XML messages into statistics.
+
         Groups XML messages by:
         1. HTTP methods (for requests)
         2. HTTP response codes (for responses)
         3. Content types (text/xml, application/soap+xml, etc.)
         4. Message sizes
-        
+
         Args:
-            tshark_output: Raw tshark output (tab-separated fields)
             output_format: Output format ("txt" or "md", default: "txt")
-            
+
         Returns:
-            Formatted output with XML statistics
+            Aggregator producing the XML statistics
         """
-        if not tshark_output.strip():
-            return "No XML messages found\n"
-        
+        return _XmlStatsAggregator()
+
+
+class _XmlStatsAggregator(RowAggregator):
+    """Incremental XML statistics."""
+
+    def __init__(self) -> None:
+        self.rows = 0
+
         # Counters and storage
-        method_counter: Counter[str] = Counter()
-        response_counter: Counter[str] = Counter()
-        content_type_counter: Counter[str] = Counter()
-        
-        total_messages = 0
-        total_size = 0
-        request_count = 0
-        response_count = 0
-        
+        self.method_counter: Counter[str] = Counter()
+        self.response_counter: Counter[str] = Counter()
+        self.content_type_counter: Counter[str] = Counter()
+
+        self.total_messages = 0
+        self.total_size = 0
+        self.request_count = 0
+        self.response_count = 0
+
         # Size distribution
-        size_buckets = {
+        self.size_buckets = {
             "< 1KB": 0,
             "1KB - 10KB": 0,
             "10KB - 100KB": 0,
             "100KB - 1MB": 0,
             "> 1MB": 0
         }
-        
+
         # Connection tracking
-        connections: dict[str, int] = defaultdict(int)
-        
-        # Detailed records for error analysis
-        error_responses: list[tuple[str, str, str]] = []  # (code, connection, frame)
-        
+        self.connections: dict[str, int] = defaultdict(int)
+
+        # Sampled (frame, connection) of error responses by status code
+        self.error_responses: dict[str, SpreadSample[tuple[str, str]]] = {}
+
         # SOAP-specific tracking
-        soap_messages = 0
-        
-        for line in tshark_output.strip().split('\n'):
-            if not line.strip():
-                continue
-            
-            parts = line.split('\t')
-            if len(parts) < 10:
-                continue
-            
-            frame_num = parts[0] if parts[0] else ""
-            frame_len = parts[1] if parts[1] else "0"
-            src_ip = parts[2] if parts[2] else ""
-            src_port = parts[3] if parts[3] else ""
-            dst_ip = parts[4] if parts[4] else ""
-            dst_port = parts[5] if parts[5] else ""
-            method = parts[6] if parts[6] else ""
-            response_code = parts[7] if parts[7] else ""
-            content_type = parts[8] if parts[8] else ""
-            content_length = parts[9] if parts[9] else ""
-            
-            total_messages += 1
-            
-            # Parse frame length
-            try:
-                size = int(frame_len)
-                total_size += size
-                
-                # Categorize by size
-                if size < 1024:
-                    size_buckets["< 1KB"] += 1
-                elif size < 10240:
-                    size_buckets["1KB - 10KB"] += 1
-                elif size < 102400:
-                    size_buckets["10KB - 100KB"] += 1
-                elif size < 1048576:
-                    size_buckets["100KB - 1MB"] += 1
-                else:
-                    size_buckets["> 1MB"] += 1
-            except ValueError:
-                pass
-            
-            # Track connection
-            if src_ip and dst_ip:
-                connection = f"{src_ip}:{src_port} <-> {dst_ip}:{dst_port}"
-                connections[connection] += 1
-            
-            # Process HTTP request (has method)
-            if method:
-                method_counter[method] += 1
-                request_count += 1
-            
-            # Process HTTP response (has status code)
-            if response_code:
-                response_counter[response_code] += 1
-                response_count += 1
-                
-                # Track error responses (4xx, 5xx)
-                if response_code.startswith('4') or response_code.startswith('5'):
-                    conn = f"{src_ip}:{src_port} -> {dst_ip}:{dst_port}"
-                    error_responses.append((response_code, conn, frame_num))
-            
-            # Track content type
-            if content_type:
-                # Extract main content type (before semicolon)
-                main_type = content_type.split(';')[0].strip()
-                content_type_counter[main_type] += 1
-                
-                # Check if SOAP
-                if 'soap' in main_type.lower():
-                    soap_messages += 1
-        
+        self.soap_messages = 0
+
+    def add(self, row: list[str]) -> None:
+        """Account one XML message."""
+        self.rows += 1
+        if len(row) < 10:
+            return
+
+        frame_num = row[0] if row[0] else ""
+        frame_len = row[1] if row[1] else "0"
+        src_ip = row[2] if row[2] else ""
+        src_port = row[3] if row[3] else ""
+        dst_ip = row[4] if row[4] else ""
+        dst_port = row[5] if row[5] else ""
+        method = row[6] if row[6] else ""
+        response_code = row[7] if row[7] else ""
+        content_type = row[8] if row[8] else ""
+
+        self.total_messages += 1
+
+        # Parse frame length
+        try:
+            size = int(frame_len)
+            self.total_size += size
+
+            # Categorize by size
+            if size < 1024:
+                self.size_buckets["< 1KB"] += 1
+            elif size < 10240:
+                self.size_buckets["1KB - 10KB"] += 1
+            elif size < 102400:
+                self.size_buckets["10KB - 100KB"] += 1
+            elif size < 1048576:
+                self.size_buckets["100KB - 1MB"] += 1
+            else:
+                self.size_buckets["> 1MB"] += 1
+        except ValueError:
+            pass
+
+        # Track connection
+        if src_ip and dst_ip:
+            connection = f"{src_ip}:{src_port} <-> {dst_ip}:{dst_port}"
+            self.connections[connection] += 1
+
+        # Process HTTP request (has method)
+        if method:
+            self.method_counter[method] += 1
+            self.request_count += 1
+
+        # Process HTTP response (has status code)
+        if response_code:
+            self.response_counter[response_code] += 1
+            self.response_count += 1
+
+            # Track error responses (4xx, 5xx)
+            if response_code.startswith('4') or response_code.startswith('5'):
+                conn = f"{src_ip}:{src_port} -> {dst_ip}:{dst_port}"
+                self.error_responses.setdefault(response_code, SpreadSample()).add((frame_num, conn))
+
+        # Track content type
+        if content_type:
+            # Extract main content type (before semicolon)
+            main_type = content_type.split(';')[0].strip()
+            self.content_type_counter[main_type] += 1
+            # Check if SOAP
+            if 'soap' in main_type.lower():
+                self.soap_messages += 1
+
+    def report(self) -> str:
+        """Render the XML statistics."""
+        if not self.rows:
+            return "No XML messages found\n"
+
+        method_counter = self.method_counter
+        response_counter = self.response_counter
+        content_type_counter = self.content_type_counter
+        total_messages = self.total_messages
+        total_size = self.total_size
+        request_count = self.request_count
+        response_count = self.response_count
+        size_buckets = self.size_buckets
+        connections = self.connections
+        error_responses = self.error_responses
+        soap_messages = self.soap_messages
+
         # Generate output
         lines = []
         lines.append("=" * 80)
@@ -260,19 +260,15 @@ class XmlStatsModule(AnalysisModule):
             lines.append("-" * 80)
             lines.append("Status,Severity,Total,Sample Connections")
 
-            grouped_errors: dict[str, list[tuple[str, str]]] = defaultdict(list)
-            for code, conn, frame in error_responses:
-                grouped_errors[code].append((frame, conn))
-
-            sorted_errors = sorted(grouped_errors.items(), key=lambda item: -len(item[1]))
+            sorted_errors = sorted(error_responses.items(), key=lambda item: -item[1].count)
             for code, entries in sorted_errors:
                 severity = "High" if code.startswith('5') else "Medium"
-                samples = self.sample_items(entries, limit=2)
+                samples = entries.sample(limit=2)
                 sample_text = "; ".join(
                     f"{frame}@{conn[:55] + '...' if len(conn) > 55 else conn}"
                     for frame, conn in samples
                 )
-                lines.append(f"{code},{severity},{len(entries)},{sample_text}")
+                lines.append(f"{code},{severity},{entries.count},{sample_text}")
 
             lines.append("")
         
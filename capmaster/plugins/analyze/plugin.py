@@ -3,10 +3,12 @@
 from __future__ import annotations
 
 import logging
+import time
 from contextlib import contextmanager, nullcontext
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Collection
 
 import click
 from rich.progress import BarColumn, Progress, SpinnerColumn, TaskProgressColumn, TextColumn
@@ -16,7 +18,15 @@ from capmaster.core.input_manager import InputManager
 from capmaster.core.output_manager import OutputManager
 from capmaster.core.protocol_detector import ProtocolDetector
 from capmaster.core.tshark_wrapper import TsharkWrapper
-from capmaster.plugins.analyze.executor import AnalysisExecutor
+from capmaster.plugins.analyze.batch import JOURNAL_NAME, run_batch
+from capmaster.plugins.analyze.executor import PASS_TIMEOUT, AnalysisExecutor
+from capmaster.plugins.analyze.result_cache import ResultCache, clear_result_cache
+from capmaster.plugins.analyze.scheduler import (
+    ModuleCostModel,
+    dispatch_jobs,
+    plan_jobs,
+    record_module_costs,
+)
 from capmaster.plugins.analyze.modules import discover_modules, get_all_modules
 from capmaster.plugins import register_plugin
 from capmaster.plugins.base import PluginBase
@@ -54,6 +64,12 @@ def _process_single_file(
     output_format: str = "txt",
     selected_modules: tuple[str, ...] | None = None,
     generate_sidecar: bool = False,
+    module_workers: int = 1,
+    sample_detection: bool = False,
+    use_cache: bool = True,
+    skip_modules: Collection[str] = (),
+    on_module_done: Callable[[str, Path], None] | None = None,
+    budget: float | None = None,
 ) -> tuple[Path, int]:
     """
     Process a single PCAP file (used for multiprocessing).
@@ -68,6 +84,13 @@ def _process_single_file(
         output_format: Output format ("txt" or "md", default: "txt")
         selected_modules: Optional tuple of module names to run
     generate_sidecar: Whether to write sidecar metadata files alongside outputs
+        module_workers: Number of module tshark passes run concurrently for the file
+        sample_detection: Detect protocols from a packet sample
+        use_cache: Reuse cached module results of the capture
+        skip_modules: Modules already completed for the file (batch resume)
+        on_module_done: Called with the module name and output file as each
+            module completes
+        budget: Wall-clock budget of the file in seconds (None = unbounded)
 
     Returns:
         Tuple of (pcap_file, number of outputs generated)
@@ -75,8 +98,17 @@ def _process_single_file(
     # Initialize components (each worker needs its own instances)
     # These are lightweight and necessary for process safety
     tshark = TsharkWrapper()
-    protocol_detector = ProtocolDetector(tshark)
-    executor = AnalysisExecutor(tshark, protocol_detector)
+    protocol_detector = ProtocolDetector.with_default_cache(tshark)
+    executor = AnalysisExecutor(
+        tshark,
+        protocol_detector,
+        workers=module_workers,
+        sample_detection=sample_detection,
+        result_cache=ResultCache.with_default_cache(tshark) if use_cache else None,
+    )
+    if budget is not None:
+        executor.deadline = time.monotonic() + budget
+        protocol_detector.timeout = max(1, int(min(budget, PASS_TIMEOUT)))
 
     # Get module classes from registry
     # If registry is empty (spawn mode), discover modules
@@ -102,11 +134,34 @@ def _process_single_file(
         modules=modules,
         output_format=output_format,
         generate_sidecar=generate_sidecar,
+        skip_modules=skip_modules,
+        on_module_done=on_module_done,
     )
+    record_module_costs(pcap_file, executor.module_timings)
 
     return (pcap_file, len(results))
 
 
+def _detect_protocols(pcap_file: Path, sample_detection: bool = False) -> set[str]:
+    """
+    Detect the protocols of a capture into the protocol cache (used for multiprocessing).
+
+    Runs ahead of the module groups of a split file so that they read the
+    detection result from the cache instead of each running it.
+
+    Args:
+        pcap_file: Path to PCAP file
+        sample_detection: Detect protocols from a packet sample
+
+    Returns:
+        Set of detected protocol names
+    """
+    protocol_detector = ProtocolDetector.with_default_cache(TsharkWrapper())
+    if sample_detection:
+        return protocol_detector.detect_sampled(pcap_file)
+    return protocol_detector.detect(pcap_file)
+
+
 @register_plugin
 class AnalyzePlugin(PluginBase):
     """Plugin for analyzing PCAP files and generating statistics."""
@@ -138,7 +193,10 @@ class AnalyzePlugin(PluginBase):
             "--workers",
             type=int,
             default=1,
-            help="Number of worker processes for concurrent processing (default: 1)",
+            help=(
+                "Number of concurrent workers (default: 1). Shared between files "
+                "(worker processes) and the module tshark passes of each file."
+            ),
         )
         @click.option(
             "-f",
@@ -162,6 +220,55 @@ class AnalyzePlugin(PluginBase):
             is_flag=True,
             help="Generate a JSON sidecar (*.meta.json) for each module output.",
         )
+        @click.option(
+            "--sample-detection",
+            is_flag=True,
+            help=(
+                "Decide which modules run from a packet sample (leading packets plus a sparse "
+                "stride) instead of a full protocol hierarchy pass. Ignored when "
+                "protocol_hierarchy is run."
+            ),
+        )
+        @click.option(
+            "--no-cache",
+            "no_cache",
+            is_flag=True,
+            help="Run every module again instead of reusing cached results of the captures.",
+        )
+        @click.option(
+            "--clear-cache",
+            "clear_cache",
+            is_flag=True,
+            help="Remove the cached module results before analyzing (alone: only clear them).",
+        )
+        @click.option(
+            "--batch",
+            "batch",
+            is_flag=True,
+            help=(
+                f"Record progress in a journal ({JOURNAL_NAME} in the output directory) and "
+                "resume from it: completed files and modules are skipped on restart."
+            ),
+        )
+        @click.option(
+            "--journal",
+            "journal_path",
+            type=click.Path(path_type=Path, dir_okay=False),
+            help="Journal file of --batch (implies --batch).",
+        )
+        @click.option(
+            "--retries",
+            type=click.IntRange(min=0),
+            default=2,
+            show_default=True,
+            help="Batch mode: retries of a failing file, with exponential backoff.",
+        )
+        @click.option(
+            "--file-timeout",
+            type=click.FloatRange(min=0, min_open=True),
+            default=None,
+            help="Batch mode: wall-clock budget of one attempt at a file, in seconds.",
+        )
         @click.pass_context
         def analyze_command(
             ctx: click.Context,
@@ -180,6 +287,13 @@ class AnalyzePlugin(PluginBase):
             output_format: str,
             selected_modules: tuple[str, ...],
             generate_sidecar: bool,
+            sample_detection: bool,
+            no_cache: bool,
+            clear_cache: bool,
+            batch: bool,
+            journal_path: Path | None,
+            retries: int,
+            file_timeout: float | None,
         ) -> None:
             """
             Analyze PCAP files and generate statistics.
@@ -217,8 +331,39 @@ class AnalyzePlugin(PluginBase):
 
             \b
             Concurrent Processing:
-              Use -w/--workers to enable concurrent processing of multiple files.
+              Use -w/--workers to enable concurrent processing.
               Default is 1 (sequential). Recommended: number of CPU cores.
+              With several files, up to one worker process per file is used
+              and the remaining budget runs the modules of each file
+              concurrently; a single file uses all workers for its modules.
+
+            \b
+            Protocol Detection:
+              Protocols are detected once per capture with tshark -z io,phs;
+              the result also serves as the protocol_hierarchy report and is
+              cached per capture content (~/.cache/capmaster, override with
+              CAPMASTER_CACHE_DIR, set it empty to disable), so re-running
+              analyze on an unchanged file skips detection.
+
+            \b
+            Result Cache:
+              The tshark output and report of each module are cached per
+              capture content and tshark version. Re-running analyze (e.g.
+              with an added -m module or another -f format) only runs the
+              modules without a cached result; --no-cache runs them all.
+              With --sidecar, each *.meta.json records "cache_hit".
+              The cache is kept under 1 GiB (CAPMASTER_RESULT_CACHE_MB, 0
+              disables it) by evicting the least recently used results;
+              --clear-cache empties it.
+
+            \b
+            Batch Mode:
+              --batch journals per-file and per-module progress in
+              <output>/analyze-journal.jsonl (or --journal PATH). Re-running
+              the same command skips completed work. Failing files are
+              retried (--retries) with exponential backoff, --file-timeout
+              bounds each attempt, and throughput (files/s, MB/s) is logged
+              while the batch runs.
 
             \b
             Module Selection:
@@ -248,6 +393,13 @@ class AnalyzePlugin(PluginBase):
                 output_format=output_format,
                 selected_modules=selected_modules,
                 generate_sidecar=generate_sidecar,
+                sample_detection=sample_detection,
+                no_cache=no_cache,
+                clear_cache=clear_cache,
+                batch=batch or journal_path is not None,
+                journal_path=journal_path,
+                retries=retries,
+                file_timeout=file_timeout,
             )
             ctx.exit(exit_code)
 
@@ -268,6 +420,13 @@ class AnalyzePlugin(PluginBase):
         output_format: str = "txt",
         selected_modules: tuple[str, ...] | None = None,
         generate_sidecar: bool = False,
+        sample_detection: bool = False,
+        no_cache: bool = False,
+        clear_cache: bool = False,
+        batch: bool = False,
+        journal_path: Path | None = None,
+        retries: int = 2,
+        file_timeout: float | None = None,
         **kwargs: Any,
     ) -> int:
         """Execute analyze plugin logic."""
@@ -290,6 +449,13 @@ class AnalyzePlugin(PluginBase):
                 output_format=output_format,
                 selected_modules=selected_modules,
                 generate_sidecar=generate_sidecar,
+                sample_detection=sample_detection,
+                no_cache=no_cache,
+                clear_cache=clear_cache,
+                batch=batch,
+                journal_path=journal_path,
+                retries=retries,
+                file_timeout=file_timeout,
                 **kwargs,
             )
 
@@ -310,12 +476,24 @@ class AnalyzePlugin(PluginBase):
         output_format: str = "txt",
         selected_modules: tuple[str, ...] | None = None,
         generate_sidecar: bool = False,
+        sample_detection: bool = False,
+        no_cache: bool = False,
+        clear_cache: bool = False,
+        batch: bool = False,
+        journal_path: Path | None = None,
+        retries: int = 2,
+        file_timeout: float | None = None,
         **kwargs: Any,
     ) -> int:
         # Resolve inputs
         file_args = {
             1: file1, 2: file2, 3: file3, 4: file4, 5: file5, 6: file6
         }
+        if clear_cache:
+            removed = clear_result_cache()
+            logger.info(f"Removed {removed} cached module result(s)")
+            if input_path is None and not any(file_args.values()):
+                return 0
         input_files = InputManager.resolve_inputs(input_path, file_args)
         
         # Validate for AnalyzePlugin (needs at least 1 file)
@@ -341,8 +519,14 @@ class AnalyzePlugin(PluginBase):
             # Initialize core components
             tshark = TsharkWrapper()
 
-            protocol_detector = ProtocolDetector(tshark)
-            executor = AnalysisExecutor(tshark, protocol_detector)
+            protocol_detector = ProtocolDetector.with_default_cache(tshark)
+            executor = AnalysisExecutor(
+                tshark,
+                protocol_detector,
+                workers=workers,
+                sample_detection=sample_detection,
+                result_cache=None if no_cache else ResultCache.with_default_cache(tshark),
+            )
 
             # Discover and instantiate all analysis modules
             discover_modules()
@@ -393,37 +577,70 @@ class AnalyzePlugin(PluginBase):
                         total=len(pcap_files)
                     )
 
+                if batch or journal_path is not None:
+                    file_workers = min(workers, len(pcap_files))
+                    if journal_path is None:
+                        journal_dir = output_dir or pcap_files[0].parent / OutputManager.DEFAULT_OUTPUT_DIR_NAME
+                        journal_path = journal_dir / JOURNAL_NAME
+                    logger.info(f"Batch journal: {journal_path}")
+                    outcome = run_batch(
+                        pcap_files,
+                        journal_path,
+                        _process_single_file,
+                        (
+                            output_dir,
+                            output_format,
+                            selected_modules,
+                            generate_sidecar,
+                            max(1, workers // file_workers),
+                            sample_detection,
+                            not no_cache,
+                        ),
+                        file_workers=file_workers,
+                        retries=retries,
+                        file_timeout=file_timeout,
+                        progress=progress,
+                        overall_task=overall_task,
+                    )
+                    total_outputs += outcome.outputs
+                    failed_files += outcome.failed
                 # Use concurrent processing if workers > 1
-                if workers > 1 and len(pcap_files) > 1:
-                    logger.info(f"Using {workers} worker processes")
-
-                    with ProcessPoolExecutor(max_workers=workers) as pool:
-                        # Submit all tasks
-                        futures = {
-                            pool.submit(
-                                _process_single_file,
-                                pcap_file,
+                elif workers > 1 and len(pcap_files) > 1:
+                    # Split the worker budget between files and their modules
+                    file_workers = min(workers, len(pcap_files))
+                    module_workers = max(1, workers // file_workers)
+                    logger.info(
+                        f"Using {file_workers} worker processes "
+                        f"with {module_workers} concurrent module(s) each"
+                    )
+
+                    # Largest jobs first; files above a worker's fair share
+                    # are split into module groups
+                    module_names = [m.name for m in modules]
+                    jobs = plan_jobs(pcap_files, module_names, file_workers, ModuleCostModel.load())
+
+                    with ProcessPoolExecutor(max_workers=file_workers) as pool:
+                        outputs, failures = dispatch_jobs(
+                            pool,
+                            jobs,
+                            file_workers,
+                            _process_single_file,
+                            (
                                 output_dir,
                                 output_format,
                                 selected_modules,
                                 generate_sidecar,
-                            ): pcap_file
-                            for pcap_file in pcap_files
-                        }
-
-                        # Process results as they complete
-                        for future in as_completed(futures):
-                            pcap_file = futures[future]
-                            try:
-                                _, num_outputs = future.result()
-                                total_outputs += num_outputs
-                                logger.debug(f"Completed {pcap_file.name}: {num_outputs} outputs")
-                            except Exception as e:
-                                failed_files += 1
-                                logger.error(f"Failed to process {pcap_file.name}: {e}")
-
-                            if progress and overall_task:
-                                progress.update(overall_task, advance=1)
+                                module_workers,
+                                sample_detection,
+                                not no_cache,
+                            ),
+                            partial(_detect_protocols, sample_detection=sample_detection),
+                            module_names,
+                            progress=progress,
+                            overall_task=overall_task,
+                        )
+                    total_outputs += outputs
+                    failed_files += failures
                 else:
                     # Sequential processing
                     for file_index, pcap_file in enumerate(pcap_files, start=1):
@@ -454,6 +671,7 @@ class AnalyzePlugin(PluginBase):
                             output_format=output_format,
                             generate_sidecar=generate_sidecar,
                         )
+                        record_module_costs(pcap_file, executor.module_timings)
 
                         total_outputs += len(results)
 
@@ -0,0 +1,307 @@
+"""Per-capture cache of analysis module results.
+
+Re-analyzing a capture (for example after adding a module with
+``--modules`` or switching ``--format``) reuses the results of the modules
+that already ran on it instead of repeating their tshark passes.
+
+An entry is addressed by the capture fingerprint, the module name, its
+tshark arguments (without the input file) and the tshark version, and
+holds:
+
+* the raw tshark output of modules implementing ``post_process`` (up to
+  :data:`RAW_OUTPUT_LIMIT` characters), from which a report in any format
+  is rendered again without running tshark;
+* the rendered report, tagged with a digest of the capmaster version, the
+  analyze package sources and the module's source so that a changed
+  module, or a helper it renders with, renders again. Reports do not depend
+  on the output format (the markdown wrapper is added afterwards), so one
+  report serves every format, except for modules declaring
+  :attr:`AnalysisModule.format_dependent_output`, cached per format.
+
+Streaming modules (see :meth:`AnalysisModule.aggregator`) never hold their
+rows, so only their reports are cached; a format-dependent streaming module
+runs again in a format it has not been rendered in.
+
+Entries live in the ``analyze-results`` namespace of the on-disk cache (see
+:mod:`capmaster.utils.cache`). The namespace is kept under a size budget
+(:data:`DEFAULT_MAX_BYTES`, overridden in MiB by
+``$CAPMASTER_RESULT_CACHE_MB``) by evicting the least recently used
+entries, and :func:`clear_result_cache` empties it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.metadata
+import inspect
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+from capmaster.core.tshark_wrapper import TsharkWrapper
+from capmaster.plugins.analyze.modules.base import AnalysisModule
+from capmaster.utils.cache import (
+    cache_key,
+    clear_entries,
+    default_cache_dir,
+    prune_entries,
+    read_entry,
+    write_entry,
+)
+from capmaster.utils.fingerprint import capture_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Cache namespace of module results
+CACHE_NAMESPACE = "analyze-results"
+
+# Largest raw tshark output kept for re-rendering, in characters
+RAW_OUTPUT_LIMIT = 8 * 1024 * 1024
+
+# Default size budget of the cache, in bytes
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# Environment variable overriding the size budget, in MiB ("0" disables the cache)
+MAX_SIZE_ENV_VAR = "CAPMASTER_RESULT_CACHE_MB"
+
+# Root of the analyze package, whose sources every report depends on
+_PACKAGE_DIR = Path(__file__).resolve().parent
+
+# Report slot of modules whose report is the same in every format
+ANY_FORMAT = "any"
+
+_package_digest: bytes | None = None
+_renderer_digests: dict[type, str] = {}
+
+
+def _analyze_package_digest() -> bytes:
+    """Digest of the capmaster version and the analyze package sources."""
+    global _package_digest
+    if _package_digest is None:
+        hasher = hashlib.blake2b(digest_size=16)
+        try:
+            hasher.update(importlib.metadata.version("capmaster").encode())
+        except importlib.metadata.PackageNotFoundError:
+            pass
+        for path in sorted(_PACKAGE_DIR.rglob("*.py")):
+            hasher.update(path.relative_to(_PACKAGE_DIR).as_posix().encode())
+            try:
+                hasher.update(path.read_bytes())
+            except OSError:
+                continue
+        _package_digest = hasher.digest()
+    return _package_digest
+
+
+def renderer_digest(module: AnalysisModule) -> str:
+    """
+    Digest of the code rendering the reports of a module.
+
+    Covers the capmaster version, every source of the analyze package (the
+    module base class and shared engines such as :mod:`.rtp_engine`) and the
+    source of the module class, which may live outside the package.
+    """
+    cls = type(module)
+    digest = _renderer_digests.get(cls)
+    if digest is None:
+        try:
+            source = Path(inspect.getfile(cls)).read_bytes()
+        except (OSError, TypeError):
+            source = b""
+        hasher = hashlib.blake2b(_analyze_package_digest(), digest_size=8)
+        hasher.update(source)
+        digest = hasher.hexdigest()
+        _renderer_digests[cls] = digest
+    return digest
+
+
+def _report_slot(module: AnalysisModule, output_format: str) -> str:
+    """Key of a module's report in an entry: its format, or one slot for all formats."""
+    return output_format if module.format_dependent_output else ANY_FORMAT
+
+
+def _key_args(args: list[str]) -> list[str]:
+    """tshark arguments without the input file, which the fingerprint identifies."""
+    key_args: list[str] = []
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+        elif arg == "-r":
+            skip = True
+        else:
+            key_args.append(arg)
+    return key_args
+
+
+@dataclass(slots=True)
+class CachedResult:
+    """Cache entry of one module on one capture."""
+
+    key: str
+    raw: str | None = None
+    reports: dict[str, dict[str, str]] | None = None
+
+    def report(self, module: AnalysisModule, output_format: str) -> str | None:
+        """Cached report of the module in a format, None if missing or stale."""
+        report = (self.reports or {}).get(_report_slot(module, output_format))
+        if report is None or not report.get("renderer") or report["renderer"] != renderer_digest(module):
+            return None
+        return report.get("body")
+
+    def hit(self, module: AnalysisModule, output_format: str) -> bool:
+        """Whether the module's report in a format can be rendered without tshark."""
+        return self.raw is not None or self.report(module, output_format) is not None
+
+    def render(self, module: AnalysisModule, output_format: str) -> str | None:
+        """
+        Report of the module without running tshark.
+
+        Returns:
+            The cached report, else the report post-processed from the
+            cached raw output, else None (cache miss)
+        """
+        body = self.report(module, output_format)
+        if body is None and self.raw is not None:
+            body = module.post_process(self.raw, output_format)
+        return body
+
+
+class ResultCache:
+    """Module results of analyzed captures."""
+
+    def __init__(
+        self, cache_dir: Path, tshark_version: str, max_bytes: int = DEFAULT_MAX_BYTES
+    ) -> None:
+        """
+        Initialize ResultCache.
+
+        Args:
+            cache_dir: Directory holding the entries
+            tshark_version: Version of the tshark producing the results
+            max_bytes: Size budget of the entries; the least recently used
+                entries are evicted beyond it
+        """
+        self.cache_dir = cache_dir
+        self.tshark_version = tshark_version
+        self.max_bytes = max_bytes
+        # Estimated size of the entries, None until first measured
+        self._size: int | None = None
+
+    @classmethod
+    def with_default_cache(cls, tshark: TsharkWrapper) -> ResultCache | None:
+        """
+        Create a cache in the default on-disk location.
+
+        Returns:
+            The cache, or None if caching is disabled, its size budget is
+            zero or the tshark version is unknown
+        """
+        cache_dir = default_cache_dir(CACHE_NAMESPACE)
+        version = getattr(tshark, "version", None)
+        max_bytes = _max_bytes_from_env()
+        if cache_dir is None or not max_bytes or not isinstance(version, str) or not version:
+            return None
+        return cls(cache_dir, version, max_bytes)
+
+    def fingerprint(self, pcap_file: Path) -> str | None:
+        """Fingerprint of a capture, None if it cannot be read."""
+        try:
+            return capture_fingerprint(pcap_file)
+        except OSError:
+            return None
+
+    def lookup(self, fingerprint: str, module: AnalysisModule, args: list[str]) -> CachedResult:
+        """
+        Find the cached result of a module on a capture.
+
+        Args:
+            fingerprint: Capture fingerprint from :meth:`fingerprint`
+            module: Analysis module
+            args: tshark arguments of the module (an ``-r`` input file is
+                ignored, so a moved or copied capture hits the same entry)
+
+        Returns:
+            The entry; empty (no raw output nor reports) on a miss
+        """
+        key = cache_key(fingerprint, module.name, cache_key(*_key_args(args)), self.tshark_version)
+        entry = read_entry(self.cache_dir, key) or {}
+        raw = entry.get("raw")
+        reports = entry.get("reports")
+        return CachedResult(
+            key,
+            raw if isinstance(raw, str) else None,
+            reports if isinstance(reports, dict) else None,
+        )
+
+    def store(
+        self,
+        cached: CachedResult,
+        module: AnalysisModule,
+        output_format: str,
+        body: str,
+        raw: str | None = None,
+    ) -> None:
+        """
+        Record the result of a module run.
+
+        Args:
+            cached: Entry returned by :meth:`lookup` for the run
+            module: Analysis module
+            output_format: Format of the report
+            body: Report produced by the module (before markdown wrapping)
+            raw: Raw tshark output of the module, if it has one
+        """
+        if raw is not None and len(raw) <= RAW_OUTPUT_LIMIT:
+            cached.raw = raw
+        reports = {
+            fmt: report
+            for fmt, report in (cached.reports or {}).items()
+            if isinstance(report, dict) and report.get("renderer") == renderer_digest(module)
+        }
+        reports[_report_slot(module, output_format)] = {
+            "renderer": renderer_digest(module),
+            "body": body,
+        }
+        cached.reports = reports
+        write_entry(
+            self.cache_dir,
+            cached.key,
+            {"module": module.name, "raw": cached.raw, "reports": reports},
+        )
+        self._enforce_budget(cached.key)
+
+    def _enforce_budget(self, key: str) -> None:
+        """Account a written entry and evict entries once over the size budget."""
+        if self._size is not None:
+            try:
+                # Overwritten entries are counted twice until the next scan
+                self._size += (self.cache_dir / f"{key}.json").stat().st_size
+            except OSError:
+                pass
+        if self._size is None or self._size > self.max_bytes:
+            self._size = prune_entries(self.cache_dir, self.max_bytes)
+
+
+def _max_bytes_from_env() -> int:
+    """Size budget of the default cache, from the environment if set."""
+    value = os.environ.get(MAX_SIZE_ENV_VAR)
+    if not value:
+        return DEFAULT_MAX_BYTES
+    try:
+        return max(0, int(float(value) * 1024 * 1024))
+    except ValueError:
+        logger.warning(f"Ignoring invalid {MAX_SIZE_ENV_VAR}={value!r}")
+        return DEFAULT_MAX_BYTES
+
+
+def clear_result_cache() -> int:
+    """
+    Remove every entry of the default result cache.
+
+    Returns:
+        Number of entries removed (0 if caching is disabled)
+    """
+    cache_dir = default_cache_dir(CACHE_NAMESPACE)
+    return clear_entries(cache_dir) if cache_dir is not None else 0
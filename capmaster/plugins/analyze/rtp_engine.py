@@ -0,0 +1,468 @@
+"""Single-pass RTP quality engine.
+
+The ``rtp,streams`` tap keeps every packet of every stream until the end of
+the capture, which does not scale to captures with many concurrent calls
+and only reports whole-stream figures. This engine instead folds each
+extracted RTP packet (SSRC, sequence number, RTP timestamp, arrival time,
+payload type) into a fixed-size per-stream state:
+
+* loss from the extended highest sequence number (RFC 3550 A.1), and
+  sequence errors for every packet that is not the successor of the
+  highest one seen (losses, duplicates, reordering);
+* interarrival jitter (RFC 3550 A.8) in the clock rate of the payload
+  type, and the largest gap between consecutive packets (max delta);
+* per-interval packet, loss and jitter figures, folded into a capture-wide
+  MOS series when the stream leaves the interval.
+
+SDP bodies seen in the same pass map media endpoints to their SIP
+Call-ID and codec, so streams are grouped into call legs and dynamic
+payload types get their negotiated clock rate. RTCP receiver reports add
+the loss fraction and jitter observed by the far end.
+
+Memory depends on the number of streams, SDP endpoints and series
+intervals, not on the number of packets.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+# Codec name and RTP clock rate of static payload types (RFC 3551)
+STATIC_PAYLOAD_TYPES: dict[int, tuple[str, int]] = {
+    0: ("g711U", 8000),
+    3: ("gsm", 8000),
+    4: ("g723", 8000),
+    8: ("g711A", 8000),
+    9: ("g722", 8000),
+    18: ("g729", 8000),
+}
+
+# Clock rate assumed for payload types without a known rate
+DEFAULT_CLOCK_RATE = 8000
+
+# Length of the intervals of the MOS series, in seconds
+DEFAULT_INTERVAL = 5.0
+
+_SEQ_MOD = 1 << 16
+_TS_MOD = 1 << 32
+
+
+def estimate_mos(packet_loss: float, mean_jitter: float, codec: str) -> tuple[float, str]:
+    """
+    Estimate the MOS of a stream with a simplified E-model.
+
+    Args:
+        packet_loss: Lost packets, in percent
+        mean_jitter: Mean jitter, in milliseconds
+        codec: Codec name (e.g. ``"g711U"``)
+
+    Returns:
+        Tuple of (MOS between 1 and 5, rating from "Excellent" to "Bad")
+    """
+    codec_r_base = {
+        "g711u": 93.2,
+        "g711a": 93.2,
+        "g722": 92.0,
+        "g729": 83.0,
+        "opus": 92.0,
+        "ilbc": 82.0,
+    }
+    r_base = codec_r_base.get(codec.lower(), 93.2)
+    id_factor = 10.0 + (40.0 * packet_loss / 100.0)
+    ie_eff: float
+    if mean_jitter < 20.0:
+        ie_eff = 0.0
+    elif mean_jitter < 50.0:
+        ie_eff = (mean_jitter - 20.0) * 0.5
+    elif mean_jitter < 100.0:
+        ie_eff = 15.0 + (mean_jitter - 50.0) * 0.8
+    else:
+        ie_eff = 55.0 + (mean_jitter - 100.0) * 1.0
+    r_factor = r_base - id_factor - ie_eff
+    r_factor = max(0.0, min(100.0, r_factor))
+    if r_factor <= 0.0:
+        mos = 1.0
+    elif r_factor >= 100.0:
+        mos = 4.5
+    else:
+        mos = 1.0 + 0.035 * r_factor + r_factor * (r_factor - 60.0) * (100.0 - r_factor) * 7e-6
+    mos = max(1.0, min(5.0, mos))
+    return mos, mos_rating(mos)
+
+
+def mos_rating(mos: float) -> str:
+    """Rating of a MOS, from "Excellent" to "Bad"."""
+    if mos >= 4.3:
+        return "Excellent"
+    if mos >= 4.0:
+        return "Good"
+    if mos >= 3.6:
+        return "Fair"
+    if mos >= 3.1:
+        return "Poor"
+    return "Bad"
+
+
+@dataclass(slots=True)
+class SdpMedia:
+    """Media endpoint announced in an SDP body."""
+
+    call_id: str | None
+    codec: str | None = None
+    clock_rate: int | None = None
+
+
+@dataclass(slots=True)
+class RtcpFeedback:
+    """Reception reports about one SSRC sent by its receivers."""
+
+    reports: int = 0
+    max_fraction_lost: int = 0
+    """Largest loss fraction reported, in 1/256 units"""
+    jitter: int = 0
+    """Jitter of the latest report, in RTP timestamp units"""
+
+
+@dataclass(slots=True)
+class SeriesBucket:
+    """Quality of all streams active during one interval of the MOS series."""
+
+    stream_intervals: int = 0
+    packets: int = 0
+    expected: int = 0
+    jitter_sum: float = 0.0
+    mos_sum: float = 0.0
+    min_mos: float = 5.0
+
+    def add(self, packets: int, expected: int, jitter: float, mos: float) -> None:
+        """Account the figures of one stream during the interval."""
+        self.stream_intervals += 1
+        self.packets += packets
+        self.expected += expected
+        self.jitter_sum += jitter
+        self.mos_sum += mos
+        self.min_mos = min(self.min_mos, mos)
+
+    def merge(self, other: SeriesBucket) -> None:
+        """Account the figures of another interval."""
+        self.stream_intervals += other.stream_intervals
+        self.packets += other.packets
+        self.expected += other.expected
+        self.jitter_sum += other.jitter_sum
+        self.mos_sum += other.mos_sum
+        self.min_mos = min(self.min_mos, other.min_mos)
+
+    @property
+    def loss_percent(self) -> float:
+        """Lost packets of the interval, in percent."""
+        if self.expected <= 0:
+            return 0.0
+        return max(0, self.expected - self.packets) / self.expected * 100
+
+    @property
+    def mean_jitter(self) -> float:
+        """Mean jitter of the streams of the interval, in milliseconds."""
+        return self.jitter_sum / self.stream_intervals if self.stream_intervals else 0.0
+
+    @property
+    def mean_mos(self) -> float:
+        """Mean MOS of the streams of the interval."""
+        return self.mos_sum / self.stream_intervals if self.stream_intervals else 0.0
+
+
+@dataclass(slots=True)
+class RtpStream:
+    """Running statistics of one RTP stream (SSRC between two endpoints)."""
+
+    ssrc: int
+    src: str
+    dst: str
+    payload_type: int
+    codec: str
+    clock_rate: int
+    first_time: float
+    last_time: float = 0.0
+    packets: int = 0
+    base_seq: int = 0
+    max_seq: int = 0
+    seq_errors: int = 0
+    jitter: float = 0.0
+    """RFC 3550 interarrival jitter, in RTP timestamp units"""
+    jitter_samples: int = 0
+    jitter_sum: float = 0.0
+    max_jitter: float = 0.0
+    max_delta: float = 0.0
+    _transit: float | None = None
+    _timestamp: int = 0
+    _bucket: int = -1
+    _bucket_base: int = 0
+    _bucket_packets: int = 0
+    _bucket_jitter_sum: float = 0.0
+    _bucket_jitter_samples: int = 0
+
+    def extend(self, seq: int) -> int:
+        """Extended sequence number of ``seq`` closest to the highest one seen."""
+        extended = self.max_seq - self.max_seq % _SEQ_MOD + seq
+        if extended - self.max_seq > _SEQ_MOD // 2:
+            extended -= _SEQ_MOD
+        elif self.max_seq - extended > _SEQ_MOD // 2:
+            extended += _SEQ_MOD
+        return extended
+
+    @property
+    def expected(self) -> int:
+        """Packets expected from the sequence numbers."""
+        return self.max_seq - self.base_seq + 1
+
+    @property
+    def lost(self) -> int:
+        """Packets never received (duplicates can make up for losses)."""
+        return max(0, self.expected - self.packets)
+
+    @property
+    def loss_percent(self) -> float:
+        """Lost packets, in percent of the expected ones."""
+        return self.lost / self.expected * 100 if self.expected > 0 else 0.0
+
+    @property
+    def mean_jitter(self) -> float:
+        """Mean interarrival jitter, in milliseconds."""
+        return self.jitter_sum / self.jitter_samples if self.jitter_samples else 0.0
+
+    @property
+    def duration(self) -> float:
+        """Seconds between the first and the last packet."""
+        return self.last_time - self.first_time
+
+    def mos(self) -> tuple[float, str]:
+        """MOS and rating of the whole stream."""
+        return estimate_mos(self.loss_percent, self.mean_jitter, self.codec)
+
+
+class RtpQualityEngine:
+    """Fold RTP, RTCP and SDP packets of a capture into stream quality figures."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL) -> None:
+        """
+        Initialize RtpQualityEngine.
+
+        Args:
+            interval: Length of the intervals of the MOS series, in seconds
+        """
+        self.interval = interval
+        self.streams: dict[tuple[int, str, str], RtpStream] = {}
+        self.media: dict[str, SdpMedia] = {}
+        self.feedback: dict[int, RtcpFeedback] = {}
+        self.series: dict[int, SeriesBucket] = {}
+
+    def add_sdp(
+        self,
+        call_id: str | None,
+        address: str,
+        ports: list[str],
+        codecs: list[tuple[str, int]],
+    ) -> None:
+        """
+        Record the media endpoints announced in an SDP body.
+
+        Args:
+            call_id: SIP Call-ID of the message carrying the body, if any
+            address: Connection address (``c=``)
+            ports: Media ports (``m=``)
+            codecs: Encoding name and clock rate of the ``a=rtpmap`` lines
+        """
+        codec, clock_rate = next(
+            ((name, rate) for name, rate in codecs if name.lower() != "telephone-event"),
+            (None, None),
+        )
+        for port in ports:
+            if port and port != "0":
+                self.media[f"{address}:{port}"] = SdpMedia(call_id or None, codec, clock_rate)
+
+    def add_rtcp(self, ssrc: int, fraction_lost: int, jitter: int) -> None:
+        """
+        Record an RTCP reception report block.
+
+        Args:
+            ssrc: SSRC the block reports on
+            fraction_lost: Loss fraction since the previous report, in 1/256
+            jitter: Interarrival jitter, in RTP timestamp units
+        """
+        feedback = self.feedback.get(ssrc)
+        if feedback is None:
+            feedback = self.feedback[ssrc] = RtcpFeedback()
+        feedback.reports += 1
+        feedback.max_fraction_lost = max(feedback.max_fraction_lost, fraction_lost)
+        feedback.jitter = jitter
+
+    def add_packet(
+        self,
+        arrival: float,
+        src: str,
+        dst: str,
+        ssrc: int,
+        seq: int,
+        timestamp: int,
+        payload_type: int,
+    ) -> None:
+        """
+        Fold one RTP packet into the statistics of its stream.
+
+        Args:
+            arrival: Arrival time, in seconds
+            src: Source endpoint (``ip:port``)
+            dst: Destination endpoint (``ip:port``)
+            ssrc: Synchronization source
+            seq: Sequence number
+            timestamp: RTP timestamp
+            payload_type: RTP payload type
+        """
+        key = (ssrc, src, dst)
+        stream = self.streams.get(key)
+        bucket = int(arrival // self.interval)
+        if stream is None:
+            stream = self.streams[key] = self._new_stream(arrival, src, dst, ssrc, payload_type)
+            stream.base_seq = stream.max_seq = seq
+            stream._bucket = bucket
+            stream._bucket_base = seq - 1
+        else:
+            if bucket != stream._bucket:
+                self._flush(stream)
+                stream._bucket = bucket
+            delta = (arrival - stream.last_time) * 1000
+            if delta > stream.max_delta:
+                stream.max_delta = delta
+            extended = stream.extend(seq)
+            if extended != stream.max_seq + 1:
+                stream.seq_errors += 1
+            if extended > stream.max_seq:
+                stream.max_seq = extended
+            elif extended < stream.base_seq:
+                stream.base_seq = extended
+        stream.packets += 1
+        stream._bucket_packets += 1
+        stream.last_time = arrival
+
+        # Events sharing the SSRC (e.g. RFC 4733 DTMF) use their own timestamps
+        if payload_type == stream.payload_type:
+            self._update_jitter(stream, arrival, timestamp)
+
+    def _new_stream(
+        self, arrival: float, src: str, dst: str, ssrc: int, payload_type: int
+    ) -> RtpStream:
+        """Create the state of a stream from its first packet."""
+        codec, clock_rate = STATIC_PAYLOAD_TYPES.get(payload_type, (None, None))
+        if codec is None:
+            media = self.media.get(dst) or self.media.get(src)
+            if media is not None and media.codec:
+                codec, clock_rate = media.codec, media.clock_rate
+        return RtpStream(
+            ssrc=ssrc,
+            src=src,
+            dst=dst,
+            payload_type=payload_type,
+            codec=codec or f"pt{payload_type}",
+            clock_rate=clock_rate or DEFAULT_CLOCK_RATE,
+            first_time=arrival,
+        )
+
+    @staticmethod
+    def _update_jitter(stream: RtpStream, arrival: float, timestamp: int) -> None:
+        """Update the interarrival jitter of a stream (RFC 3550 A.8)."""
+        if stream._transit is None:
+            stream._transit = arrival * stream.clock_rate - timestamp
+            stream._timestamp = timestamp
+            return
+        # Unwrap the 32-bit timestamp relative to the previous packet
+        advance = (timestamp - stream._timestamp) % _TS_MOD
+        if advance >= _TS_MOD // 2:
+            advance -= _TS_MOD
+        unwrapped = stream._timestamp + advance
+        transit = arrival * stream.clock_rate - unwrapped
+        stream.jitter += (abs(transit - stream._transit) - stream.jitter) / 16
+        stream._transit = transit
+        stream._timestamp = unwrapped
+
+        jitter_ms = stream.jitter * 1000 / stream.clock_rate
+        stream.jitter_samples += 1
+        stream.jitter_sum += jitter_ms
+        stream._bucket_jitter_samples += 1
+        stream._bucket_jitter_sum += jitter_ms
+        if jitter_ms > stream.max_jitter:
+            stream.max_jitter = jitter_ms
+
+    def _flush(self, stream: RtpStream) -> None:
+        """Fold the current interval of a stream into the MOS series."""
+        if not stream._bucket_packets:
+            return
+        expected = stream.max_seq - stream._bucket_base
+        loss = max(0, expected - stream._bucket_packets) / expected * 100 if expected > 0 else 0.0
+        if stream._bucket_jitter_samples:
+            jitter = stream._bucket_jitter_sum / stream._bucket_jitter_samples
+        else:
+            jitter = stream.jitter * 1000 / stream.clock_rate
+        mos, _ = estimate_mos(loss, jitter, stream.codec)
+
+        bucket = self.series.get(stream._bucket)
+        if bucket is None:
+            bucket = self.series[stream._bucket] = SeriesBucket()
+        bucket.add(stream._bucket_packets, max(expected, 0), jitter, mos)
+
+        stream._bucket_base = stream.max_seq
+        stream._bucket_packets = 0
+        stream._bucket_jitter_sum = 0.0
+        stream._bucket_jitter_samples = 0
+
+    def finish(self) -> None:
+        """Fold the last interval of every stream into the MOS series."""
+        for stream in self.streams.values():
+            self._flush(stream)
+
+    def call_id(self, stream: RtpStream) -> str | None:
+        """SIP Call-ID of the call leg a stream belongs to, if announced in SDP."""
+        media = self.media.get(stream.dst) or self.media.get(stream.src)
+        return media.call_id if media is not None else None
+
+    def rtcp_feedback(self, stream: RtpStream) -> tuple[float, float] | None:
+        """
+        Quality of a stream as reported by its receivers over RTCP.
+
+        Returns:
+            Tuple of (largest reported loss in percent, latest reported
+            jitter in milliseconds), or None without reception reports
+        """
+        feedback = self.feedback.get(stream.ssrc)
+        if feedback is None:
+            return None
+        return (
+            feedback.max_fraction_lost / 256 * 100,
+            feedback.jitter * 1000 / stream.clock_rate,
+        )
+
+    def mos_series(self, max_points: int) -> tuple[float, list[tuple[float, SeriesBucket]]]:
+        """
+        MOS series of the capture.
+
+        Args:
+            max_points: Largest number of points; adjacent intervals are
+                merged when the capture spans more
+
+        Returns:
+            Tuple of (length of the points in seconds, start time in seconds
+            and figures of every point with traffic)
+        """
+        if not self.series:
+            return self.interval, []
+        first, last = min(self.series), max(self.series)
+        factor = max(1, math.ceil((last - first + 1) / max(max_points, 1)))
+        merged: dict[int, SeriesBucket] = {}
+        for index in sorted(self.series):
+            start = first + (index - first) // factor * factor
+            target = merged.get(start)
+            if target is None:
+                target = merged[start] = SeriesBucket()
+            target.merge(self.series[index])
+        return factor * self.interval, [
+            (start * self.interval, bucket) for start, bucket in merged.items()
+        ]
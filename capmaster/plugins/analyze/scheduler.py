@@ -0,0 +1,288 @@
+"""Size-aware scheduling of multi-file analysis.
+
+Files are dispatched to the worker pool by decreasing estimated cost
+(longest-processing-time first, see :mod:`capmaster.core.scheduling`), so
+a large capture never starts last and runs alone at the end of a batch.
+
+The cost of a file is its estimated packet count times the sum of the
+per-packet cost of its modules. Module costs are learned from previous
+runs: every analyzed file reports the wall-clock time of each module and
+the model keeps an exponential moving average of the seconds per packet,
+persisted in the on-disk cache (see :mod:`capmaster.utils.cache`).
+
+A file costing more than the fair share of one worker is split into module
+groups analyzed by separate jobs. Its protocols are detected once by a
+preceding job, whose result the group jobs read from the protocol cache;
+each group keeps the output sequence numbers of a full run.
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import math
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from dataclasses import dataclass
+from pathlib import Path
+from statistics import median
+from typing import Any, Callable
+
+from rich.progress import Progress
+
+from capmaster.core.scheduling import estimate_packets
+from capmaster.utils.cache import cache_key, default_cache_dir, read_entry, write_entry
+
+logger = logging.getLogger(__name__)
+
+# Cache namespace of the learned module cost model
+COST_NAMESPACE = "analyze-costs"
+
+# Seconds per packet assumed for a module never timed before
+DEFAULT_SECONDS_PER_PACKET = 2e-6
+
+# Weight of the latest observation in the moving average
+LEARNING_RATE = 0.3
+
+_MODEL_KEY = cache_key("module-costs", 1)
+
+
+class ModuleCostModel:
+    """Seconds per packet of each analysis module, learned from previous runs."""
+
+    def __init__(self, rates: dict[str, float] | None = None, cache_dir: Path | None = None) -> None:
+        """
+        Initialize ModuleCostModel.
+
+        Args:
+            rates: Known seconds per packet by module name
+            cache_dir: Directory the model is persisted in (None = not persisted)
+        """
+        self.rates = dict(rates or {})
+        self.cache_dir = cache_dir
+
+    @classmethod
+    def load(cls, cache_dir: Path | None = None) -> ModuleCostModel:
+        """Load the persisted model (empty if none or caching is disabled)."""
+        if cache_dir is None:
+            cache_dir = default_cache_dir(COST_NAMESPACE)
+        rates: dict[str, float] = {}
+        if cache_dir is not None:
+            entry = read_entry(cache_dir, _MODEL_KEY) or {}
+            rates = {
+                name: float(rate)
+                for name, rate in (entry.get("rates") or {}).items()
+                if isinstance(rate, (int, float)) and rate > 0
+            }
+        return cls(rates, cache_dir)
+
+    def rate(self, module_name: str) -> float:
+        """Seconds per packet of a module (median of known modules if unknown)."""
+        rate = self.rates.get(module_name)
+        if rate is not None:
+            return rate
+        return median(self.rates.values()) if self.rates else DEFAULT_SECONDS_PER_PACKET
+
+    def cost(self, packets: int, module_names: list[str]) -> float:
+        """Estimated seconds to run modules over a capture."""
+        return max(packets, 1) * sum(self.rate(name) for name in module_names)
+
+    def update(self, packets: int, timings: dict[str, float]) -> None:
+        """Fold the module timings of one analyzed capture into the model."""
+        if packets <= 0:
+            return
+        for name, seconds in timings.items():
+            observed = seconds / packets
+            previous = self.rates.get(name)
+            self.rates[name] = (
+                observed if previous is None else previous + LEARNING_RATE * (observed - previous)
+            )
+
+    def save(self) -> None:
+        """Persist the model."""
+        if self.cache_dir is not None:
+            write_entry(self.cache_dir, _MODEL_KEY, {"rates": self.rates})
+
+
+def record_module_costs(pcap_file: Path, timings: dict[str, float]) -> None:
+    """
+    Learn from the module timings of an analyzed capture.
+
+    Called by worker processes; concurrent updates may overwrite each other,
+    which only drops observations since entries are replaced atomically.
+
+    Args:
+        pcap_file: Analyzed capture
+        timings: Wall-clock seconds per module
+            (:attr:`AnalysisExecutor.module_timings`)
+    """
+    if not timings:
+        return
+    model = ModuleCostModel.load()
+    model.update(estimate_packets(pcap_file), timings)
+    model.save()
+
+
+@dataclass(slots=True)
+class AnalysisJob:
+    """One unit of work for the analyze worker pool."""
+
+    pcap_file: Path
+    cost: float
+    modules: tuple[str, ...] | None = None
+    """Modules run by the job; None runs every module of the file"""
+
+
+def _split_modules(module_names: list[str], model: ModuleCostModel, groups: int) -> list[list[str]]:
+    """Partition modules into balanced groups (LPT bin packing), in module order."""
+    bins: list[tuple[float, int, list[str]]] = [(0.0, i, []) for i in range(groups)]
+    for name in sorted(module_names, key=model.rate, reverse=True):
+        load, index, members = heapq.heappop(bins)
+        members.append(name)
+        heapq.heappush(bins, (load + model.rate(name), index, members))
+    order = {name: i for i, name in enumerate(module_names)}
+    return [
+        sorted(members, key=order.__getitem__)
+        for _, _, members in sorted(bins, key=lambda b: b[1])
+        if members
+    ]
+
+
+def plan_jobs(
+    pcap_files: list[Path],
+    module_names: list[str],
+    workers: int,
+    model: ModuleCostModel,
+    packets: Callable[[Path], int] = estimate_packets,
+) -> list[AnalysisJob]:
+    """
+    Plan the jobs of a multi-file analysis in dispatch order.
+
+    Args:
+        pcap_files: Captures to analyze
+        module_names: Modules run on every capture, in execution order
+        workers: Number of jobs running at the same time
+        model: Module cost model
+        packets: Packet count estimator
+
+    Returns:
+        Jobs by decreasing estimated cost. Files costing more than
+        ``total / workers`` are split into up to ``workers`` module groups.
+    """
+    costs = {path: model.cost(packets(path), module_names) for path in pcap_files}
+    fair_share = sum(costs.values()) / max(workers, 1)
+
+    jobs: list[AnalysisJob] = []
+    for path in pcap_files:
+        cost = costs[path]
+        groups = min(workers, len(module_names), math.ceil(cost / fair_share - 1e-9)) if fair_share > 0 else 1
+        if groups <= 1:
+            jobs.append(AnalysisJob(path, cost))
+            continue
+        logger.debug(f"Splitting {path.name} into {groups} module groups")
+        total_rate = sum(map(model.rate, module_names))
+        for group in _split_modules(module_names, model, groups):
+            group_cost = cost * sum(map(model.rate, group)) / total_rate
+            jobs.append(AnalysisJob(path, group_cost, tuple(group)))
+    return sorted(jobs, key=lambda job: job.cost, reverse=True)
+
+
+def dispatch_jobs(
+    pool: Executor,
+    jobs: list[AnalysisJob],
+    workers: int,
+    process_file: Callable[..., tuple[Path, int]],
+    process_args: tuple[Any, ...],
+    detect_file: Callable[[Path], Any],
+    all_modules: list[str],
+    progress: Progress | None = None,
+    overall_task: Any = None,
+) -> tuple[int, int]:
+    """
+    Run planned jobs with at most ``workers`` in flight, largest first.
+
+    The protocols of split files are detected by a ``detect_file`` job that
+    runs before their module groups.
+
+    Args:
+        pool: Worker pool
+        jobs: Jobs from :func:`plan_jobs`
+        workers: Maximum number of jobs in flight
+        process_file: Function analyzing a capture, called as
+            ``process_file(pcap_file, *process_args)`` plus
+            ``skip_modules=...`` for module groups
+        process_args: Positional arguments following the capture
+        detect_file: Function detecting (and caching) the protocols of a capture
+        all_modules: Names of all selected modules
+        progress: Optional Progress instance
+        overall_task: Task of ``progress`` advanced once per capture
+
+    Returns:
+        Tuple of (outputs generated, failed captures)
+    """
+    ready: list[tuple[float, int, AnalysisJob | Path]] = []
+    waiting: dict[Path, list[AnalysisJob]] = {}
+    remaining: dict[Path, int] = {}
+    failed: set[Path] = set()
+    outputs = 0
+    order = 0
+
+    def push(cost: float, item: AnalysisJob | Path) -> None:
+        nonlocal order
+        heapq.heappush(ready, (-cost, order, item))
+        order += 1
+
+    for job in jobs:
+        remaining[job.pcap_file] = remaining.get(job.pcap_file, 0) + 1
+        if job.modules is None:
+            push(job.cost, job)
+        else:
+            if job.pcap_file not in waiting:
+                # Detection unblocks all groups of the file: dispatch it first
+                file_cost = sum(j.cost for j in jobs if j.pcap_file == job.pcap_file)
+                push(file_cost, job.pcap_file)
+            waiting.setdefault(job.pcap_file, []).append(job)
+
+    def finish(pcap_file: Path, error: BaseException | None) -> None:
+        if error is not None and pcap_file not in failed:
+            failed.add(pcap_file)
+            logger.error(f"Failed to process {pcap_file.name}: {error}")
+        remaining[pcap_file] -= 1
+        if remaining[pcap_file] == 0 and progress and overall_task is not None:
+            progress.update(overall_task, advance=1)
+
+    in_flight: dict[Future[Any], AnalysisJob | Path] = {}
+    while ready or in_flight:
+        while ready and len(in_flight) < workers:
+            _, _, item = heapq.heappop(ready)
+            if isinstance(item, Path):
+                in_flight[pool.submit(detect_file, item)] = item
+            elif item.modules is None:
+                in_flight[pool.submit(process_file, item.pcap_file, *process_args)] = item
+            else:
+                skip = tuple(name for name in all_modules if name not in item.modules)
+                in_flight[
+                    pool.submit(process_file, item.pcap_file, *process_args, skip_modules=skip)
+                ] = item
+        if not in_flight:
+            break
+
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            item = in_flight.pop(future)
+            error = future.exception()
+            if isinstance(item, Path):
+                groups = waiting.pop(item)
+                if error is not None:
+                    for _ in groups:
+                        finish(item, error)
+                    continue
+                for job in groups:
+                    push(job.cost, job)
+                continue
+            if error is None:
+                _, num_outputs = future.result()
+                outputs += num_outputs
+                logger.debug(f"Completed {item.pcap_file.name}: {num_outputs} outputs")
+            finish(item.pcap_file, error)
+
+    return outputs, len(failed)
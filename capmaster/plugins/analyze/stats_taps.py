@@ -0,0 +1,131 @@
+"""Fused execution of the ``-z`` statistics taps of analysis modules.
+
+Modules whose tshark arguments are only ``-q -z <tap>`` print nothing while
+the capture is dissected and read just the tap report drawn at the end.
+tshark accepts any number of ``-z`` options, so the taps of all such modules
+can be collected in a single pass over the capture (identical taps only
+once) and the combined output split back into one section per tap.
+
+tshark draws taps in reverse order of registration, i.e. the report of the
+last ``-z`` comes first. Sections are attributed by position and checked
+against the heading each tap family prints; when they do not line up the
+caller falls back to one tshark run per module.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+# Heading printed in the report of well-known taps
+_TAP_HEADINGS = {
+    "io,phs": "Protocol Hierarchy Statistics",
+    "rtp,streams": "RTP Streams",
+    "conv,tcp": "TCP Conversations",
+    "conv,udp": "UDP Conversations",
+    "conv,ip": "IPv4 Conversations",
+    "endpoints,ip": "IPv4 Endpoints",
+}
+
+# Column header line of every stats_tree report (``-z <name>,tree``)
+_TREE_HEADING = "Topic / Item"
+
+
+def stats_tap(args: list[str]) -> str | None:
+    """
+    Return the tap of a statistics-only module.
+
+    Args:
+        args: tshark arguments built by the module
+
+    Returns:
+        The tap argument (e.g. ``"conv,tcp"``) if ``args`` is exactly
+        ``["-q", "-z", <tap>]``, otherwise None
+    """
+    if len(args) == 3 and args[0] == "-q" and args[1] == "-z":
+        return args[2]
+    return None
+
+
+def fused_tap_args(taps: Iterable[str]) -> list[str]:
+    """Build the tshark arguments running several taps in one pass."""
+    args = ["-q"]
+    for tap in taps:
+        args.extend(["-z", tap])
+    return args
+
+
+def _is_rule(line: str) -> bool:
+    """True for the ``====`` lines opening and closing a tap report."""
+    return len(line) >= 3 and line[0] == "=" and line[-1] == "="
+
+
+def split_sections(output: str) -> list[str]:
+    """
+    Split combined tap output into one report per tap.
+
+    Reports open with a ``====`` rule. Most also close with one; stats_tree
+    reports close with a ``----`` rule instead, so they run until the next
+    ``====`` rule. Text outside of any report (blank lines) is dropped.
+
+    Args:
+        output: stdout of a tshark run with several ``-z`` taps
+
+    Returns:
+        Report texts in output order
+    """
+    sections: list[str] = []
+    current: list[str] | None = None
+    is_tree = False
+
+    for line in output.splitlines(keepends=True):
+        stripped = line.strip()
+        if _is_rule(stripped):
+            if current is not None and not is_tree:
+                current.append(line)
+                sections.append("".join(current))
+                current = None
+                continue
+            if current is not None:
+                sections.append("".join(current))
+            current = [line]
+            is_tree = False
+            continue
+        if current is None:
+            continue
+        if stripped.startswith(_TREE_HEADING):
+            is_tree = True
+        current.append(line)
+
+    if current is not None:
+        sections.append("".join(current))
+    return sections
+
+
+def _section_matches(tap: str, section: str) -> bool:
+    """Check a report against the heading its tap is known to print."""
+    heading = _TAP_HEADINGS.get(tap)
+    if heading is None and tap.split(",")[1:2] == ["tree"]:
+        heading = _TREE_HEADING
+    return heading is None or heading in section
+
+
+def assign_sections(taps: list[str], output: str) -> dict[str, str] | None:
+    """
+    Attribute the reports of a fused run to their taps.
+
+    Args:
+        taps: Distinct taps in the order they were passed to tshark
+        output: stdout of the fused run
+
+    Returns:
+        Mapping of tap to its report, or None if the output cannot be split
+        unambiguously
+    """
+    sections = split_sections(output)
+    if len(sections) != len(taps):
+        return None
+    # tshark draws the last registered tap first; accept command-line order too
+    for ordered in (taps[::-1], taps):
+        if all(_section_matches(tap, section) for tap, section in zip(ordered, sections)):
+            return dict(zip(ordered, sections))
+    return None
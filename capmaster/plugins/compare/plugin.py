@@ -53,6 +53,7 @@ class ComparePlugin(PluginBase):
         kase_id: int | None = None,
         match_mode: str = "one-to-one",
         match_file: Path | None = None,
+        jobs: int = 1,
     ) -> int:
         """Execute the packet diff comparison shared with comparative-analysis."""
         return execute_packet_diff(
@@ -75,4 +76,5 @@ class ComparePlugin(PluginBase):
             kase_id=kase_id,
             match_mode=match_mode,
             match_file=match_file,
+            jobs=jobs,
         )
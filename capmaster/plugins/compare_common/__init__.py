@@ -7,11 +7,12 @@ import a single shared implementation without duplicating code.
 
 from .packet_extractor import PacketExtractor, TcpPacket
 from .packet_comparator import ComparisonResult, DiffType, PacketComparator, PacketDiff
-from .output_formatter import build_report_text
+from .output_formatter import build_report_text, iter_report_lines, write_lines
 from .flow_hash import (
     FlowSide,
     calculate_connection_flow_hash,
     calculate_flow_hash,
+    calculate_flow_hashes,
     format_flow_hash,
 )
 from .utils import format_tcp_flags_change, parse_tcp_flags, to_nanoseconds
@@ -24,9 +25,12 @@ __all__ = [
     "DiffType",
     "PacketDiff",
     "build_report_text",
+    "iter_report_lines",
+    "write_lines",
     "FlowSide",
     "calculate_connection_flow_hash",
     "calculate_flow_hash",
+    "calculate_flow_hashes",
     "format_flow_hash",
     "format_tcp_flags_change",
     "parse_tcp_flags",
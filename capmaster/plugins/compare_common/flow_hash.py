@@ -26,7 +26,10 @@ The messages are normalized by comparing ports and swapping if needed.
 from __future__ import annotations
 
 import ipaddress
+import struct
+from collections.abc import Sequence
 from enum import IntEnum
+from functools import lru_cache
 
 
 class FlowSide(IntEnum):
@@ -215,6 +218,73 @@ def _compare_addresses(addr1: str, addr2: str) -> FlowSide:
             return FlowSide.RHS_GT_LHS
 
 
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+# SipHash initial state for an all-zero key
+_ZERO_KEY_STATE = (
+    0x736F6D6570736575,
+    0x646F72616E646F6D,
+    0x6C7967656E657261,
+    0x7465646279746573,
+)
+
+# Message 9 of the canonical layout
+_FIXED_MESSAGE = (1).to_bytes(8, "little")
+
+
+@lru_cache(maxsize=4096)
+def _address_messages(address: str) -> bytes:
+    """Messages 3-5 (or 6-8) of the canonical layout for one IP address."""
+    packed = ipaddress.ip_address(address).packed
+    return (0).to_bytes(8, "little") + len(packed).to_bytes(8, "little") + packed
+
+
+def _siphash13_zero_key(data: bytes) -> int:
+    """
+    SipHash-1-3 of ``data`` with an all-zero key.
+
+    Same result as ``siphash13(b"\\x00" * 16, [data])``, with the rounds
+    inlined and all full 8-byte words decoded by one ``struct`` call.
+    """
+    v0, v1, v2, v3 = _ZERO_KEY_STATE
+    length = len(data)
+    words = length >> 3
+
+    for m in struct.unpack_from(f"<{words}Q", data):
+        v3 ^= m
+        v0 = (v0 + v1) & _MASK64
+        v1 = ((v1 << 13) | (v1 >> 51)) & _MASK64 ^ v0
+        v0 = ((v0 << 32) | (v0 >> 32)) & _MASK64
+        v2 = (v2 + v3) & _MASK64
+        v3 = ((v3 << 16) | (v3 >> 48)) & _MASK64 ^ v2
+        v0 = (v0 + v3) & _MASK64
+        v3 = ((v3 << 21) | (v3 >> 43)) & _MASK64 ^ v0
+        v2 = (v2 + v1) & _MASK64
+        v1 = ((v1 << 17) | (v1 >> 47)) & _MASK64 ^ v2
+        v2 = ((v2 << 32) | (v2 >> 32)) & _MASK64
+        v0 ^= m
+
+    # Final block (remaining bytes and length), then finalization rounds
+    m = int.from_bytes(data[words << 3:], "little") | ((length & 0xFF) << 56)
+    v3 ^= m
+    for round_index in range(4):
+        if round_index == 1:
+            v0 ^= m
+            v2 ^= 0xFF
+        v0 = (v0 + v1) & _MASK64
+        v1 = ((v1 << 13) | (v1 >> 51)) & _MASK64 ^ v0
+        v0 = ((v0 << 32) | (v0 >> 32)) & _MASK64
+        v2 = (v2 + v3) & _MASK64
+        v3 = ((v3 << 16) | (v3 >> 48)) & _MASK64 ^ v2
+        v0 = (v0 + v3) & _MASK64
+        v3 = ((v3 << 21) | (v3 >> 43)) & _MASK64 ^ v0
+        v2 = (v2 + v1) & _MASK64
+        v1 = ((v1 << 17) | (v1 >> 47)) & _MASK64 ^ v2
+        v2 = ((v2 << 32) | (v2 >> 32)) & _MASK64
+
+    return v0 ^ v1 ^ v2 ^ v3
+
+
 def calculate_flow_hash(
     src_ip: str,
     dst_ip: str,
@@ -252,6 +322,10 @@ def calculate_flow_hash(
     - If ports are equal, IP addresses are compared
     - This ensures bidirectional consistency
 
+    Results are memoized in an LRU cache of ``FLOW_HASH_CACHE_SIZE`` flows,
+    so repeated calls for the packets of one flow are dictionary lookups.
+    Use :func:`calculate_flow_hashes` to hash many flows at once.
+
     Args:
         src_ip: Source IP address (IPv4)
         dst_ip: Destination IP address (IPv4)
@@ -272,70 +346,96 @@ def calculate_flow_hash(
         >>> hash_val2, side2 = calculate_flow_hash("8.42.96.45", "8.67.2.125", 35101, 26302)
         >>> assert hash_val == hash_val2  # True
     """
-    key = b"\x00" * 16
+    return _cached_flow_hash(src_ip, dst_ip, src_port, dst_port, protocol)
+
+
+def calculate_flow_hashes(
+    src_ips: Sequence[str],
+    dst_ips: Sequence[str],
+    src_ports: Sequence[int],
+    dst_ports: Sequence[int],
+    protocols: Sequence[int] | int = 6,
+) -> list[tuple[int, FlowSide]]:
+    """
+    Calculate flow hashes for many flows in one call.
+
+    Equivalent to calling :func:`calculate_flow_hash` on each index of the
+    input columns; flows share its LRU cache.
+
+    Args:
+        src_ips: Source IP addresses
+        dst_ips: Destination IP addresses
+        src_ports: Source port numbers
+        dst_ports: Destination port numbers
+        protocols: IP protocol numbers, or one protocol for all flows
 
+    Returns:
+        List of (hash_value, flow_side) tuples, one per flow
+
+    Raises:
+        ValueError: If the input columns differ in length or an address is invalid
+    """
+    count = len(src_ips)
+    if isinstance(protocols, int):
+        protocols = [protocols] * count
+    if not (len(dst_ips) == len(src_ports) == len(dst_ports) == len(protocols) == count):
+        raise ValueError("Flow hash input columns must have the same length")
+    return [
+        _cached_flow_hash(src_ip, dst_ip, src_port, dst_port, protocol)
+        for src_ip, dst_ip, src_port, dst_port, protocol in zip(
+            src_ips, dst_ips, src_ports, dst_ports, protocols
+        )
+    ]
+
+
+def _compute_flow_hash(
+    src_ip: str,
+    dst_ip: str,
+    src_port: int,
+    dst_port: int,
+    protocol: int,
+) -> tuple[int, FlowSide]:
+    """
+    Compute a flow hash without caching.
+
+    The ten messages of the canonical layout are concatenated and hashed
+    with :func:`_siphash13_zero_key`, which is equivalent to
+    ``siphash13(b"\\x00" * 16, messages)`` (SipHash is a streaming hash).
+    """
     # Compare ports as little-endian integers to determine canonical order
-    src_port_le = int.from_bytes(src_port.to_bytes(2, "big"), "little")
-    dst_port_le = int.from_bytes(dst_port.to_bytes(2, "big"), "little")
+    src_port_le = ((src_port & 0xFF) << 8) | (src_port >> 8)
+    dst_port_le = ((dst_port & 0xFF) << 8) | (dst_port >> 8)
 
-    # Determine canonical order (larger port first)
     if src_port_le > dst_port_le:
-        # src_port is larger, use original order
-        p1, p2 = src_port, dst_port
-        ip_1, ip_2 = src_ip, dst_ip
         flow_side = FlowSide.LHS_GE_RHS
     elif src_port_le < dst_port_le:
-        # dst_port is larger, swap
-        p1, p2 = dst_port, src_port
-        ip_1, ip_2 = dst_ip, src_ip
         flow_side = FlowSide.RHS_GT_LHS
     else:
         # Ports equal, compare IPs
-        addr_side = _compare_addresses(src_ip, dst_ip)
-        if addr_side is FlowSide.LHS_GE_RHS:
-            p1, p2 = src_port, dst_port
-            ip_1, ip_2 = src_ip, dst_ip
-            flow_side = FlowSide.LHS_GE_RHS
-        else:
-            p1, p2 = dst_port, src_port
-            ip_1, ip_2 = dst_ip, src_ip
-            flow_side = FlowSide.RHS_GT_LHS
-
-    # Build messages in canonical order
-    msg1 = p1.to_bytes(2, "big")
-    msg2 = p2.to_bytes(2, "big")
-    msg3 = (0).to_bytes(8, "little")
-
-    # Handle both IPv4 and IPv6
-    ip_1_obj = ipaddress.ip_address(ip_1)
-    ip_2_obj = ipaddress.ip_address(ip_2)
-
-    if isinstance(ip_1_obj, ipaddress.IPv4Address):
-        msg4 = (4).to_bytes(8, "little")
-        msg5 = ip_1_obj.packed
-    else:  # IPv6
-        msg4 = (16).to_bytes(8, "little")
-        msg5 = ip_1_obj.packed
+        flow_side = _compare_addresses(src_ip, dst_ip)
 
-    msg6 = (0).to_bytes(8, "little")
-
-    if isinstance(ip_2_obj, ipaddress.IPv4Address):
-        msg7 = (4).to_bytes(8, "little")
-        msg8 = ip_2_obj.packed
-    else:  # IPv6
-        msg7 = (16).to_bytes(8, "little")
-        msg8 = ip_2_obj.packed
-
-    msg9 = (1).to_bytes(8, "little")
-    msg10 = protocol.to_bytes(1, "big")
+    if flow_side is FlowSide.LHS_GE_RHS:
+        p1, p2, ip_1, ip_2 = src_port, dst_port, src_ip, dst_ip
+    else:
+        p1, p2, ip_1, ip_2 = dst_port, src_port, dst_ip, src_ip
+
+    data = b"".join(
+        (
+            p1.to_bytes(2, "big"),
+            p2.to_bytes(2, "big"),
+            _address_messages(ip_1),
+            _address_messages(ip_2),
+            _FIXED_MESSAGE,
+            protocol.to_bytes(1, "big"),
+        )
+    )
+    return _u64_to_i64(_siphash13_zero_key(data)), flow_side
 
-    # Calculate hash
-    hash_value = siphash13(key, [msg1, msg2, msg3, msg4, msg5, msg6, msg7, msg8, msg9, msg10])
 
-    # Convert to signed 64-bit integer
-    hash_value = _u64_to_i64(hash_value)
+# Flows memoized by calculate_flow_hash
+FLOW_HASH_CACHE_SIZE = 1 << 16
 
-    return hash_value, flow_side
+_cached_flow_hash = lru_cache(maxsize=FLOW_HASH_CACHE_SIZE)(_compute_flow_hash)
 
 
 def format_flow_hash(hash_value: int, flow_side: FlowSide) -> str:
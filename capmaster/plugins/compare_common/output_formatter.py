@@ -2,13 +2,15 @@
 
 This module builds the human-readable comparison report text while keeping
 behavior identical to the original inline implementation in plugin.py.
+Reports are produced line by line so :func:`write_lines` can stream them to
+a file without holding the whole text in memory.
 """
 
 from __future__ import annotations
 
 from collections import Counter
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator, TextIO
 
 from .flow_hash import (
     calculate_connection_flow_hash,
@@ -44,6 +46,44 @@ def build_report_text(
     Returns:
         The report text exactly as previously produced by plugin.py
     """
+    return "\n".join(
+        iter_report_lines(
+            results,
+            baseline_file,
+            compare_file,
+            matched_only=matched_only,
+            show_flow_hash=show_flow_hash,
+            flow_hash_cache=flow_hash_cache,
+        )
+    )
+
+
+def iter_report_lines(
+    results: list,
+    baseline_file: Path,
+    compare_file: Path,
+    *,
+    matched_only: bool,
+    show_flow_hash: bool,
+    flow_hash_cache: dict[tuple[str, str, int, int], tuple[int, Any]] | None = None,
+) -> Iterator[str]:
+    """Yield the lines of :func:`build_report_text` one at a time.
+
+    The summary and per-stream-pair statistics are tallied while the
+    baseline connection table is produced, so ``results`` is walked twice
+    (once per connection table) and no report text is held in memory.
+
+    Args:
+        results: List of (match, packets_a, packets_b, comparison_result) tuples
+        baseline_file: Baseline PCAP file (file1)
+        compare_file: Compare PCAP file (file2)
+        matched_only: Whether to only show matched packets
+        show_flow_hash: Whether to calculate/display flow hash
+        flow_hash_cache: Cache to avoid repeated flow hash calculation
+
+    Yields:
+        Report lines without trailing newlines
+    """
     if flow_hash_cache is None:
         flow_hash_cache = {}
 
@@ -56,38 +96,46 @@ def build_report_text(
             )
         return flow_hash_cache[cache_key]
 
-    lines: list[str] = []
     # Markdown title
-    lines.append("## TCP Connection Packet-Level Comparison Report")
-    lines.append("")
+    yield "## TCP Connection Packet-Level Comparison Report"
+    yield ""
 
     # Content in code block
-    lines.append("```text")
-    lines.append(f"Baseline File: {baseline_file.name}")
-    lines.append(f"Compare File:  {compare_file.name}")
-    lines.append(f"Comparison Direction: {compare_file.name} relative to {baseline_file.name}")
-    lines.append(f"Matched Connections: {len(results)}")
+    yield "```text"
+    yield f"Baseline File: {baseline_file.name}"
+    yield f"Compare File:  {compare_file.name}"
+    yield f"Comparison Direction: {compare_file.name} relative to {baseline_file.name}"
+    yield f"Matched Connections: {len(results)}"
     if matched_only:
-        lines.append("Mode: Matched-only (only comparing packets with matching IPID in both files)")
-    lines.append("")
+        yield "Mode: Matched-only (only comparing packets with matching IPID in both files)"
+    yield ""
 
     # Section 1: Matched TCP Connections from Baseline File
-    lines.append(f"Matched TCP Connections in Baseline File ({baseline_file.name})")
-    lines.append("-" * 140)
+    yield f"Matched TCP Connections in Baseline File ({baseline_file.name})"
+    yield "-" * 140
 
     if show_flow_hash:
-        lines.append(f"{'No.':<6} {'Stream ID':<12} {'Client IP:Port':<25} {'Server IP:Port':<25} {'Packets':<10} {'First Time':<22} {'Last Time':<22} {'Flow Hash':<30}")
+        yield f"{'No.':<6} {'Stream ID':<12} {'Client IP:Port':<25} {'Server IP:Port':<25} {'Packets':<10} {'First Time':<22} {'Last Time':<22} {'Flow Hash':<30}"
     else:
-        lines.append(f"{'No.':<6} {'Stream ID':<12} {'Client IP:Port':<25} {'Server IP:Port':<25} {'Packets':<10} {'First Time':<22} {'Last Time':<22}")
-    lines.append("-" * 140)
+        yield f"{'No.':<6} {'Stream ID':<12} {'Client IP:Port':<25} {'Server IP:Port':<25} {'Packets':<10} {'First Time':<22} {'Last Time':<22}"
+    yield "-" * 140
 
     # Group results by baseline stream_id to avoid duplicates
     baseline_streams_seen: set[int] = set()
     unique_baseline_count = 0
 
+    # Running counters for the summary sections
+    identical_count = 0
+    # Structure: {(baseline_stream_id, compare_stream_id): {diff_type: count, tcp_flags: {flags_pair: count}}}
+    stream_pair_stats: dict[tuple[int, int], dict[str, Any]] = {}
+
     for idx, (match, packets_a, packets_b, result) in enumerate(results, 1):
         conn = match.conn1  # Baseline connection
 
+        if result.is_identical:
+            identical_count += 1
+        _tally_stream_pair(stream_pair_stats, match, result)
+
         # Skip if we've already output this baseline stream
         if conn.stream_id in baseline_streams_seen:
             continue
@@ -116,27 +164,27 @@ def build_report_text(
                 conn.server_port,
             )
             flow_hash_str = format_flow_hash(hash_hex, flow_side)
-            lines.append(
+            yield (
                 f"{unique_baseline_count:<6} {conn.stream_id:<12} {client_addr:<25} {server_addr:<25} {len(packets_a):<10} {first_time_str:<22} {last_time_str:<22} {flow_hash_str:<30}"
             )
         else:
-            lines.append(
+            yield (
                 f"{unique_baseline_count:<6} {conn.stream_id:<12} {client_addr:<25} {server_addr:<25} {len(packets_a):<10} {first_time_str:<22} {last_time_str:<22}"
             )
 
-    lines.append("-" * 140)
-    lines.append(f"Total: {unique_baseline_count} connections")
-    lines.append("")
+    yield "-" * 140
+    yield f"Total: {unique_baseline_count} connections"
+    yield ""
 
     # Section 2: Matched TCP Connections from Compare File
-    lines.append(f"Matched TCP Connections in Compare File ({compare_file.name})")
-    lines.append("-" * 140)
+    yield f"Matched TCP Connections in Compare File ({compare_file.name})"
+    yield "-" * 140
 
     if show_flow_hash:
-        lines.append(f"{'No.':<6} {'Stream ID':<12} {'Client IP:Port':<25} {'Server IP:Port':<25} {'Packets':<10} {'First Time':<22} {'Last Time':<22} {'Flow Hash':<30}")
+        yield f"{'No.':<6} {'Stream ID':<12} {'Client IP:Port':<25} {'Server IP:Port':<25} {'Packets':<10} {'First Time':<22} {'Last Time':<22} {'Flow Hash':<30}"
     else:
-        lines.append(f"{'No.':<6} {'Stream ID':<12} {'Client IP:Port':<25} {'Server IP:Port':<25} {'Packets':<10} {'First Time':<22} {'Last Time':<22}")
-    lines.append("-" * 140)
+        yield f"{'No.':<6} {'Stream ID':<12} {'Client IP:Port':<25} {'Server IP:Port':<25} {'Packets':<10} {'First Time':<22} {'Last Time':<22}"
+    yield "-" * 140
 
     # Group results by compare stream_id to avoid duplicates
     compare_streams_seen: set[int] = set()
@@ -173,67 +221,34 @@ def build_report_text(
                 conn.server_port,
             )
             flow_hash_str = format_flow_hash(hash_hex, flow_side)
-            lines.append(
+            yield (
                 f"{unique_compare_count:<6} {conn.stream_id:<12} {client_addr:<25} {server_addr:<25} {len(packets_b):<10} {first_time_str:<22} {last_time_str:<22} {flow_hash_str:<30}"
             )
         else:
-            lines.append(
+            yield (
                 f"{unique_compare_count:<6} {conn.stream_id:<12} {client_addr:<25} {server_addr:<25} {len(packets_b):<10} {first_time_str:<22} {last_time_str:<22}"
             )
 
-    lines.append("-" * 140)
-    lines.append(f"Total: {unique_compare_count} connections")
-    lines.append("")
+    yield "-" * 140
+    yield f"Total: {unique_compare_count} connections"
+    yield ""
 
-    # Overall summary statistics
-    identical_count = sum(1 for _, _, _, r in results if r.is_identical)
+    # Overall summary statistics, tallied with the baseline table
     diff_count = len(results) - identical_count
 
-    lines.append("Overall Summary")
-    lines.append("-" * 100)
-    lines.append(f"Total matched pairs: {len(results)}")
-    lines.append(f"Unique baseline streams: {unique_baseline_count}")
-    lines.append(f"Unique compare streams: {unique_compare_count}")
-    lines.append(f"Identical connections: {identical_count}")
-    lines.append(f"Connections with differences: {diff_count}")
-    lines.append("")
-
-    # Collect statistics per stream pair
-    # Structure: {(baseline_stream_id, compare_stream_id): {diff_type: count, tcp_flags: {flags_pair: count}}}
-    stream_pair_stats: dict[tuple[int, int], dict[str, Any]] = {}
-
-    for match, packets_a, packets_b, result in results:
-        # Create stream pair identifier
-        stream_pair = (match.conn1.stream_id, match.conn2.stream_id)
-
-        if stream_pair not in stream_pair_stats:
-            stream_pair_stats[stream_pair] = {
-                'diff_types': Counter(),
-                'tcp_flags': Counter(),
-                'tcp_flags_frames': {},
-                'connection_id': result.connection_id,
-                'is_identical': result.is_identical,
-            }
-
-        if not result.is_identical:
-            # Count differences by type for this stream pair
-            for diff in result.differences:
-                stream_pair_stats[stream_pair]['diff_types'][diff.diff_type] += 1
-
-                # Collect TCP FLAGS details for this stream pair
-                if diff.diff_type == DiffType.TCP_FLAGS:
-                    flags_pair = f"{diff.value_a} → {diff.value_b}"
-                    stream_pair_stats[stream_pair]['tcp_flags'][flags_pair] += 1
-
-                    # Track frame id pairs for this flags difference
-                    if flags_pair not in stream_pair_stats[stream_pair]['tcp_flags_frames']:
-                        stream_pair_stats[stream_pair]['tcp_flags_frames'][flags_pair] = []
-                    stream_pair_stats[stream_pair]['tcp_flags_frames'][flags_pair].append((diff.frame_a, diff.frame_b))
+    yield "Overall Summary"
+    yield "-" * 100
+    yield f"Total matched pairs: {len(results)}"
+    yield f"Unique baseline streams: {unique_baseline_count}"
+    yield f"Unique compare streams: {unique_compare_count}"
+    yield f"Identical connections: {identical_count}"
+    yield f"Connections with differences: {diff_count}"
+    yield ""
 
     # Output statistics per stream pair
     if stream_pair_stats:
-        lines.append("Per-Stream-Pair Statistics")
-        lines.append("-" * 140)
+        yield "Per-Stream-Pair Statistics"
+        yield "-" * 140
 
         # Sort stream pairs by baseline stream id, then compare stream id
         sorted_pairs = sorted(stream_pair_stats.keys())
@@ -242,63 +257,128 @@ def build_report_text(
             stats = stream_pair_stats[stream_pair]
             baseline_stream, compare_stream = stream_pair
 
-            lines.append("")
-            lines.append(f"Stream Pair: Baseline Stream {baseline_stream} ↔ Compare Stream {compare_stream}")
-            lines.append(f"Connection: {stats['connection_id']}")
-            lines.append("─" * 140)
+            yield ""
+            yield f"Stream Pair: Baseline Stream {baseline_stream} ↔ Compare Stream {compare_stream}"
+            yield f"Connection: {stats['connection_id']}"
+            yield "─" * 140
 
             # Show if identical
             if stats['is_identical']:
-                lines.append(f"\n  Status: ✓ Identical (no differences found)")
+                yield f"\n  Status: ✓ Identical (no differences found)"
                 continue
 
             # Difference Type Statistics for this stream pair
             if stats['diff_types']:
-                lines.append(f"\n  Difference Type Statistics:")
-                lines.append(f"  {'Difference Type':<20} {'Count':<15}")
-                lines.append(f"  {'-'*35}")
+                yield f"\n  Difference Type Statistics:"
+                yield f"  {'Difference Type':<20} {'Count':<15}"
+                yield f"  {'-'*35}"
 
                 for diff_type, count in stats['diff_types'].most_common():
                     diff_type_name = diff_type.value.upper() + '_DIFF'
-                    lines.append(f"  {diff_type_name:<20} {count:<15}")
+                    yield f"  {diff_type_name:<20} {count:<15}"
 
-                lines.append(f"  {'-'*35}")
+                yield f"  {'-'*35}"
 
             # TCP FLAGS Detailed Breakdown for this stream pair
             if stats['tcp_flags']:
-                lines.append(f"\n  TCP FLAGS Detailed Breakdown:")
-                lines.append(f"  {'Baseline FLAGS':<35} {'Compare FLAGS':<35} {'Count':<15}")
-                lines.append(f"  {'-'*85}")
+                yield f"\n  TCP FLAGS Detailed Breakdown:"
+                yield f"  {'Baseline FLAGS':<35} {'Compare FLAGS':<35} {'Count':<15}"
+                yield f"  {'-'*85}"
 
                 for flags_pair, count in stats['tcp_flags'].most_common():
                     flags_baseline, flags_compare = flags_pair.split(" → ")
                     # Parse flags to human-readable format
                     flags_baseline_readable = parse_tcp_flags(flags_baseline)
                     flags_compare_readable = parse_tcp_flags(flags_compare)
-                    lines.append(f"  {flags_baseline_readable:<35} {flags_compare_readable:<35} {count:<15}")
+                    yield f"  {flags_baseline_readable:<35} {flags_compare_readable:<35} {count:<15}"
 
                     # Show frame id pairs for this flags difference
                     frame_pairs = stats['tcp_flags_frames'].get(flags_pair, [])
                     if frame_pairs:
                         # Show first few pairs as examples
                         max_examples = 10
-                        lines.append(f"    Example Frame ID pairs (Baseline → Compare):")
+                        yield f"    Example Frame ID pairs (Baseline → Compare):"
 
                         # Format pairs in a compact way, multiple per line
                         pairs_per_line = 5
                         for i in range(0, min(max_examples, len(frame_pairs)), pairs_per_line):
                             batch = frame_pairs[i:i+pairs_per_line]
                             pair_strs = [f"({frame_baseline}→{frame_compare})" for frame_baseline, frame_compare in batch]
-                            lines.append(f"      {', '.join(pair_strs)}")
+                            yield f"      {', '.join(pair_strs)}"
 
                         # If there are more pairs, show summary
                         if len(frame_pairs) > max_examples:
-                            lines.append(f"      ... and {len(frame_pairs) - max_examples} more pairs")
+                            yield f"      ... and {len(frame_pairs) - max_examples} more pairs"
 
-                lines.append(f"  {'-'*85}")
-                lines.append(f"  {'TOTAL':<71} {sum(stats['tcp_flags'].values()):<15}")
+                yield f"  {'-'*85}"
+                yield f"  {'TOTAL':<71} {sum(stats['tcp_flags'].values()):<15}"
 
     # Close code block
-    lines.append("```")
+    yield "```"
+
+
+def _tally_stream_pair(
+    stream_pair_stats: dict[tuple[int, int], dict[str, Any]],
+    match: Any,
+    result: Any,
+) -> None:
+    """Add one comparison result to the per-stream-pair statistics."""
+    # Create stream pair identifier
+    stream_pair = (match.conn1.stream_id, match.conn2.stream_id)
+
+    if stream_pair not in stream_pair_stats:
+        stream_pair_stats[stream_pair] = {
+            'diff_types': Counter(),
+            'tcp_flags': Counter(),
+            'tcp_flags_frames': {},
+            'connection_id': result.connection_id,
+            'is_identical': result.is_identical,
+        }
+
+    if not result.is_identical:
+        # Count differences by type for this stream pair
+        for diff in result.differences:
+            stream_pair_stats[stream_pair]['diff_types'][diff.diff_type] += 1
+
+            # Collect TCP FLAGS details for this stream pair
+            if diff.diff_type == DiffType.TCP_FLAGS:
+                flags_pair = f"{diff.value_a} → {diff.value_b}"
+                stream_pair_stats[stream_pair]['tcp_flags'][flags_pair] += 1
+
+                # Track frame id pairs for this flags difference
+                if flags_pair not in stream_pair_stats[stream_pair]['tcp_flags_frames']:
+                    stream_pair_stats[stream_pair]['tcp_flags_frames'][flags_pair] = []
+                stream_pair_stats[stream_pair]['tcp_flags_frames'][flags_pair].append((diff.frame_a, diff.frame_b))
+
+
+def write_lines(lines: Iterable[str], stream: TextIO, chunk_size: int = 1024) -> int:
+    """Write report lines to an open text stream as they are produced.
+
+    Lines are joined with newlines exactly like ``"\\n".join(lines)`` (no
+    trailing newline), but only ``chunk_size`` lines are held at a time, so
+    the report reaches the stream while it is still being formatted.
 
-    return "\n".join(lines)
+    Args:
+        lines: Report lines without trailing newlines
+        stream: Writable text stream (a file opened with buffering, stdout)
+        chunk_size: Number of lines joined per ``write`` call
+
+    Returns:
+        Number of lines written
+    """
+    count = 0
+    chunk: list[str] = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            if count:
+                stream.write("\n")
+            stream.write("\n".join(chunk))
+            count += len(chunk)
+            chunk.clear()
+    if chunk:
+        if count:
+            stream.write("\n")
+        stream.write("\n".join(chunk))
+        count += len(chunk)
+    return count
@@ -2,9 +2,13 @@
 
 from __future__ import annotations
 import logging
-from collections import defaultdict
+from collections import Counter, defaultdict
 from dataclasses import dataclass
+from decimal import Decimal
 from enum import Enum
+from itertools import compress, repeat
+from operator import attrgetter, itemgetter, ne
+from typing import Iterable, Iterator
 
 from .packet_extractor import TcpPacket
 
@@ -113,6 +117,79 @@ class ComparisonResult:
         )
 
 
+# Compared fields, in reporting order
+_COMPARED_FIELDS = (
+    (DiffType.TCP_FLAGS, "tcp_flags"),
+    (DiffType.SEQ_NUM, "seq"),
+    (DiffType.ACK_NUM, "ack"),
+)
+
+_GETTERS = {
+    name: attrgetter(name) for name in ("ip_id", *(name for _, name in _COMPARED_FIELDS))
+}
+
+
+class _StreamIndex:
+    """
+    Column view of one stream for joining on (IP ID, occurrence).
+
+    Each packet is keyed by its IP ID and the number of earlier packets with
+    the same IP ID. When neither stream repeats an IP ID (the common case)
+    the IP ID alone serves as the key. Columns are lists built with
+    C-level ``map`` calls on first use and cached, so a stream compared
+    against several others is only scanned once per field.
+    """
+
+    __slots__ = ("packets", "count", "ipids", "_unique", "_keys", "_columns")
+
+    def __init__(self, packets: list[TcpPacket]):
+        self.packets = packets
+        self.count = len(packets)
+        self.ipids: list[int] = list(map(_GETTERS["ip_id"], packets))
+        self._unique: bool | None = None
+        self._keys: list[tuple[int, int]] | None = None
+        self._columns: dict[str, list] = {}
+
+    @property
+    def unique(self) -> bool:
+        """True if no IP ID appears twice in the stream."""
+        if self._unique is None:
+            self._unique = len(set(self.ipids)) == self.count
+        return self._unique
+
+    @property
+    def keys(self) -> list[tuple[int, int]]:
+        """(IP ID, occurrence) key of every packet."""
+        if self._keys is None:
+            if self.unique:
+                self._keys = list(zip(self.ipids, repeat(0)))
+            else:
+                occurrences: dict[int, int] = {}
+                keys = []
+                for ipid in self.ipids:
+                    occurrence = occurrences.get(ipid, 0)
+                    occurrences[ipid] = occurrence + 1
+                    keys.append((ipid, occurrence))
+                self._keys = keys
+        return self._keys
+
+    def column(self, name: str) -> list:
+        """Values of packet attribute ``name`` in capture order."""
+        column = self._columns.get(name)
+        if column is None:
+            column = self._columns[name] = list(map(_GETTERS[name], self.packets))
+        return column
+
+    def packets_with_ipids(self, ipids: set[int]) -> dict[int, list[TcpPacket]]:
+        """Packets carrying each of ``ipids``, in capture order."""
+        groups: dict[int, list[TcpPacket]] = {ipid: [] for ipid in ipids}
+        for ipid, pkt in zip(self.ipids, self.packets):
+            group = groups.get(ipid)
+            if group is not None:
+                group.append(pkt)
+        return groups
+
+
 class PacketComparator:
     """
     Compare TCP packet sequences at the packet level.
@@ -134,6 +211,9 @@ class PacketComparator:
         """
         Compare two packet sequences using IP ID as pairing key.
 
+        Packets sharing an IP ID are paired by occurrence: the i-th packet
+        with a given IP ID in A is compared with the i-th one in B.
+
         Args:
             packets_a: Packets from PCAP A
             packets_b: Packets from PCAP B
@@ -144,32 +224,70 @@ class PacketComparator:
         Returns:
             ComparisonResult with detailed differences
         """
-        differences: list[PacketDiff] = []
+        return self._compare_indexed(
+            _StreamIndex(packets_a),
+            _StreamIndex(packets_b),
+            connection_id,
+            matched_only,
+        )
 
-        # OPTIMIZATION: Build IP ID index for both sides using defaultdict
-        # This eliminates the need for "if key not in dict" checks, improving performance
-        # Note: Multiple packets may have the same IP ID, so we use lists
-        ipid_map_a: dict[int, list[TcpPacket]] = defaultdict(list)
-        ipid_map_b: dict[int, list[TcpPacket]] = defaultdict(list)
+    def compare_many(
+        self,
+        pairs: Iterable[tuple[list[TcpPacket], list[TcpPacket], str]],
+        matched_only: bool = False,
+    ) -> Iterator[ComparisonResult]:
+        """
+        Compare many packet sequence pairs in one call.
 
-        for pkt in packets_a:
-            ipid_map_a[pkt.ip_id].append(pkt)
+        Each stream is indexed once per call even when it takes part in
+        several pairs (one-to-many matches), and results are yielded in
+        the order of ``pairs`` so callers can report progress.
 
-        for pkt in packets_b:
-            ipid_map_b[pkt.ip_id].append(pkt)
+        Args:
+            pairs: (packets_a, packets_b, connection_id) tuples
+            matched_only: Same as in :meth:`compare`
 
-        # Find all unique IP IDs from both sides
-        all_ipids = set(ipid_map_a.keys()) | set(ipid_map_b.keys())
+        Yields:
+            One ComparisonResult per pair
+        """
+        pairs = list(pairs)
+
+        # Streams shared by several pairs are indexed once and released after
+        # their last pair; keyed by list identity (the lists outlive the call)
+        remaining = Counter(id(packets) for pair in pairs for packets in pair[:2])
+        indexes: dict[int, _StreamIndex] = {}
+
+        def index_of(packets: list[TcpPacket]) -> _StreamIndex:
+            key = id(packets)
+            remaining[key] -= 1
+            if remaining[key]:
+                index = indexes.get(key)
+                if index is None:
+                    index = indexes[key] = _StreamIndex(packets)
+                return index
+            index = indexes.pop(key, None)
+            return index if index is not None else _StreamIndex(packets)
+
+        for packets_a, packets_b, connection_id in pairs:
+            yield self._compare_indexed(
+                index_of(packets_a), index_of(packets_b), connection_id, matched_only
+            )
 
-        # Track packets only in A or only in B
-        only_in_a = set(ipid_map_a.keys()) - set(ipid_map_b.keys())
-        only_in_b = set(ipid_map_b.keys()) - set(ipid_map_a.keys())
+    def _compare_indexed(
+        self,
+        index_a: _StreamIndex,
+        index_b: _StreamIndex,
+        connection_id: str,
+        matched_only: bool,
+    ) -> ComparisonResult:
+        """Compare two indexed streams (see :meth:`compare`)."""
+        differences: list[PacketDiff] = []
 
         # Log packet count differences (only if not in matched_only mode)
-        if not matched_only and len(packets_a) != len(packets_b):
+        if not matched_only and index_a.count != index_b.count:
             logger.warning(
                 f"{connection_id}: Packet count mismatch: "
-                f"A={len(packets_a)}, B={len(packets_b)}"
+                f"A={index_a.count}, B={index_b.count}"
             )
             differences.append(
                 PacketDiff(
@@ -177,72 +295,96 @@ class PacketComparator:
                     packet_index=-1,
                     frame_a=-1,
                     frame_b=-1,
-                    value_a=len(packets_a),
-                    value_b=len(packets_b),
+                    value_a=index_a.count,
+                    value_b=index_b.count,
                 )
             )
 
-        # Compare packets with matching IP IDs
-        matched_ipids = set(ipid_map_a.keys()) & set(ipid_map_b.keys())
-        for ipid in sorted(matched_ipids):
-            pkts_a = ipid_map_a[ipid]
-            pkts_b = ipid_map_b[ipid]
-
-            # If counts differ for same IP ID, log it
-            if len(pkts_a) != len(pkts_b):
-                logger.debug(
-                    f"{connection_id}: IP ID {ipid:#06x} count mismatch: "
-                    f"A={len(pkts_a)}, B={len(pkts_b)}"
-                )
-
-            # Compare packets pairwise (up to min count)
-            for i in range(min(len(pkts_a), len(pkts_b))):
-                pkt_a = pkts_a[i]
-                pkt_b = pkts_b[i]
-
-                # Compare TCP flags
-                if pkt_a.tcp_flags != pkt_b.tcp_flags:
-                    differences.append(
-                        PacketDiff(
-                            diff_type=DiffType.TCP_FLAGS,
-                            packet_index=-1,  # No longer sequential index
-                            frame_a=pkt_a.frame_number,
-                            frame_b=pkt_b.frame_number,
-                            value_a=pkt_a.tcp_flags,
-                            value_b=pkt_b.tcp_flags,
-                        )
-                    )
-
-                # Compare sequence number
-                if pkt_a.seq != pkt_b.seq:
-                    differences.append(
-                        PacketDiff(
-                            diff_type=DiffType.SEQ_NUM,
-                            packet_index=-1,
-                            frame_a=pkt_a.frame_number,
-                            frame_b=pkt_b.frame_number,
-                            value_a=pkt_a.seq,
-                            value_b=pkt_b.seq,
-                        )
+        if logger.isEnabledFor(logging.DEBUG) and not (index_a.unique and index_b.unique):
+            counts_a = Counter(index_a.ipids)
+            counts_b = Counter(index_b.ipids)
+            for ipid in sorted(counts_a.keys() & counts_b.keys()):
+                count_a = counts_a[ipid]
+                count_b = counts_b[ipid]
+                if count_a != count_b:
+                    logger.debug(
+                        f"{connection_id}: IP ID {ipid:#06x} count mismatch: "
+                        f"A={count_a}, B={count_b}"
                     )
 
-                # Compare acknowledgment number
-                if pkt_a.ack != pkt_b.ack:
+        # Join on (ipid, occurrence); positions i of the aligned columns
+        # pair packet rows_a[i] of A with rows_b[i] of B
+        same_ipids = index_a.ipids == index_b.ipids
+        keys_a: list
+        keys_b: list
+        matched_keys: list
+        if same_ipids or (index_a.unique and index_b.unique):
+            keys_a = index_a.ipids
+            keys_b = index_b.ipids
+        else:
+            keys_a = index_a.keys
+            keys_b = index_b.keys
+
+        rows_a: list[int] | None
+        rows_b: list[int] | None
+        if same_ipids:
+            # Same IP IDs in the same order: columns are already aligned, and
+            # occurrence indexes agree so IP IDs alone order the rows
+            rows_a = rows_b = None
+            matched_keys = keys_a
+        else:
+            position_b = dict(zip(keys_b, range(len(keys_b))))
+            mask = list(map(position_b.__contains__, keys_a))
+            rows_a = list(compress(range(len(keys_a)), mask))
+            matched_keys = list(compress(keys_a, mask))
+            rows_b = list(map(position_b.__getitem__, matched_keys))
+
+        # Bulk mismatch masks per field; PacketDiff objects are only built
+        # for the (usually few) differing rows
+        differing: set[int] = set()
+        for _, name in _COMPARED_FIELDS:
+            column_a = index_a.column(name)
+            column_b = index_b.column(name)
+            if rows_a is not None and rows_b is not None:
+                column_a = list(map(column_a.__getitem__, rows_a))
+                column_b = list(map(column_b.__getitem__, rows_b))
+            if column_a != column_b:
+                differing.update(compress(range(len(column_a)), map(ne, column_a, column_b)))
+
+        # Rows sharing an IP ID keep capture (occurrence) order
+        for row in sorted(sorted(differing), key=matched_keys.__getitem__):
+            row_a = row if rows_a is None else rows_a[row]
+            row_b = row if rows_b is None else rows_b[row]
+            pkt_a = index_a.packets[row_a]
+            pkt_b = index_b.packets[row_b]
+            for diff_type, name in _COMPARED_FIELDS:
+                value_a = getattr(pkt_a, name)
+                value_b = getattr(pkt_b, name)
+                if value_a != value_b:
                     differences.append(
                         PacketDiff(
-                            diff_type=DiffType.ACK_NUM,
-                            packet_index=-1,
+                            diff_type=diff_type,
+                            packet_index=-1,  # No longer sequential index
                             frame_a=pkt_a.frame_number,
                             frame_b=pkt_b.frame_number,
-                            value_a=pkt_a.ack,
-                            value_b=pkt_b.ack,
+                            value_a=value_a,
+                            value_b=value_b,
                         )
                     )
 
-        # Record IP IDs only in A (skip if matched_only mode)
-        if not matched_only:
+        # Record IP IDs only in A or only in B (skip if matched_only mode)
+        if not matched_only and not same_ipids:
+            # Sets are built from dict key views, as earlier versions did from
+            # their IP ID maps: the set table size (and so the iteration
+            # order of the differences) depends on how the set is built
+            ipids_a = set(dict.fromkeys(index_a.ipids).keys())
+            ipids_b = set(dict.fromkeys(index_b.ipids).keys())
+            only_in_a = ipids_a - ipids_b
+            only_in_b = ipids_b - ipids_a
+
+            packets_only_in_a = index_a.packets_with_ipids(only_in_a) if only_in_a else {}
             for ipid in only_in_a:
-                for pkt in ipid_map_a[ipid]:
+                for pkt in packets_only_in_a[ipid]:
                     differences.append(
                         PacketDiff(
                             diff_type=DiffType.IP_ID,
@@ -254,9 +396,9 @@ class PacketComparator:
                         )
                     )
 
-            # Record IP IDs only in B
+            packets_only_in_b = index_b.packets_with_ipids(only_in_b) if only_in_b else {}
             for ipid in only_in_b:
-                for pkt in ipid_map_b[ipid]:
+                for pkt in packets_only_in_b[ipid]:
                     differences.append(
                         PacketDiff(
                             diff_type=DiffType.IP_ID,
@@ -270,16 +412,17 @@ class PacketComparator:
 
         return ComparisonResult(
             connection_id=connection_id,
-            packets_a=len(packets_a),
-            packets_b=len(packets_b),
+            packets_a=index_a.count,
+            packets_b=index_b.count,
             differences=differences,
         )
-    
+
     def format_comparison_table(
         self,
         packets_a: list[TcpPacket],
         packets_b: list[TcpPacket],
         result: ComparisonResult,
+        max_rows: int | None = None,
     ) -> str:
         """
         Format comparison result as a table using IP ID as pairing key.
@@ -288,121 +431,64 @@ class PacketComparator:
             packets_a: Packets from PCAP A
             packets_b: Packets from PCAP B
             result: Comparison result
+            max_rows: Maximum number of packet rows listed (None for all)
 
         Returns:
             Formatted table string
         """
-        lines = []
-        lines.append(f"\n{'='*100}")
-        lines.append(f"Connection: {result.connection_id}")
-        lines.append(f"{'='*100}")
+        return "\n".join(self.iter_comparison_table(packets_a, packets_b, result, max_rows))
 
-        # Build IP ID index for both sides
-        ipid_map_a: dict[int, list[TcpPacket]] = {}
-        ipid_map_b: dict[int, list[TcpPacket]] = {}
+    def iter_comparison_table(
+        self,
+        packets_a: list[TcpPacket],
+        packets_b: list[TcpPacket],
+        result: ComparisonResult,
+        max_rows: int | None = None,
+    ) -> Iterator[str]:
+        """
+        Yield the lines of :meth:`format_comparison_table` one at a time.
 
-        for pkt in packets_a:
-            if pkt.ip_id not in ipid_map_a:
-                ipid_map_a[pkt.ip_id] = []
-            ipid_map_a[pkt.ip_id].append(pkt)
+        Rows are produced while walking the IP ID index, so a writer can put
+        them on disk before the rest of the table is formatted. Rows past
+        ``max_rows`` are not listed but still counted in the summary.
 
-        for pkt in packets_b:
-            if pkt.ip_id not in ipid_map_b:
-                ipid_map_b[pkt.ip_id] = []
-            ipid_map_b[pkt.ip_id].append(pkt)
+        Args:
+            packets_a: Packets from PCAP A
+            packets_b: Packets from PCAP B
+            result: Comparison result
+            max_rows: Maximum number of packet rows listed (None for all)
 
-        # Get all unique IP IDs and sort them
-        all_ipids = sorted(set(ipid_map_a.keys()) | set(ipid_map_b.keys()))
+        Yields:
+            Report lines without trailing newlines
+        """
+        yield f"\n{'='*100}"
+        yield f"Connection: {result.connection_id}"
+        yield f"{'='*100}"
 
         # Header
-        lines.append(
+        yield (
             f"{'IPID':<12} {'Frame A':<10} {'Frame B':<10} "
             f"{'Flags A':<10} {'Flags B':<10} "
             f"{'Seq A':<12} {'Seq B':<12} "
             f"{'Ack A':<12} {'Ack B':<12} {'Status':<15}"
         )
-        lines.append("-" * 110)
+        yield "-" * 110
 
-        # Process each IP ID
-        for ipid in all_ipids:
-            pkts_a = ipid_map_a.get(ipid, [])
-            pkts_b = ipid_map_b.get(ipid, [])
-
-            ipid_str = f"{ipid:#06x}"
-
-            # Case 1: IP ID only in A
-            if not pkts_b:
-                for pkt_a in pkts_a:
-                    lines.append(
-                        f"{ipid_str:<12} {pkt_a.frame_number:<10} {'N/A':<10} "
-                        f"{pkt_a.tcp_flags:<10} {'N/A':<10} "
-                        f"{pkt_a.seq:<12} {'N/A':<12} "
-                        f"{pkt_a.ack:<12} {'N/A':<12} {'ONLY_IN_A':<15}"
-                    )
-            # Case 2: IP ID only in B
-            elif not pkts_a:
-                for pkt_b in pkts_b:
-                    lines.append(
-                        f"{ipid_str:<12} {'N/A':<10} {pkt_b.frame_number:<10} "
-                        f"{'N/A':<10} {pkt_b.tcp_flags:<10} "
-                        f"{'N/A':<12} {pkt_b.seq:<12} "
-                        f"{'N/A':<12} {pkt_b.ack:<12} {'ONLY_IN_B':<15}"
-                    )
-            # Case 3: IP ID in both sides - pair them up
-            else:
-                max_count = max(len(pkts_a), len(pkts_b))
-                for i in range(max_count):
-                    pkt_a = pkts_a[i] if i < len(pkts_a) else None
-                    pkt_b = pkts_b[i] if i < len(pkts_b) else None
-
-                    if pkt_a and pkt_b:
-                        # Both packets exist - compare them
-                        diffs = []
-                        if pkt_a.tcp_flags != pkt_b.tcp_flags:
-                            diffs.append("FLAGS")
-                        if pkt_a.seq != pkt_b.seq:
-                            diffs.append("SEQ")
-                        if pkt_a.ack != pkt_b.ack:
-                            diffs.append("ACK")
-
-                        status = "DIFF" if diffs else "OK"
-                        status_str = f"{status}({','.join(diffs)})" if diffs else status
-
-                        lines.append(
-                            f"{ipid_str:<12} {pkt_a.frame_number:<10} {pkt_b.frame_number:<10} "
-                            f"{pkt_a.tcp_flags:<10} {pkt_b.tcp_flags:<10} "
-                            f"{pkt_a.seq:<12} {pkt_b.seq:<12} "
-                            f"{pkt_a.ack:<12} {pkt_b.ack:<12} {status_str:<15}"
-                        )
-                    elif pkt_a:
-                        # Only A has this occurrence
-                        lines.append(
-                            f"{ipid_str:<12} {pkt_a.frame_number:<10} {'N/A':<10} "
-                            f"{pkt_a.tcp_flags:<10} {'N/A':<10} "
-                            f"{pkt_a.seq:<12} {'N/A':<12} "
-                            f"{pkt_a.ack:<12} {'N/A':<12} {'EXTRA_IN_A':<15}"
-                        )
-                    else:
-                        # Only B has this occurrence
-                        lines.append(
-                            f"{ipid_str:<12} {'N/A':<10} {pkt_b.frame_number:<10} "
-                            f"{'N/A':<10} {pkt_b.tcp_flags:<10} "
-                            f"{'N/A':<12} {pkt_b.seq:<12} "
-                            f"{'N/A':<12} {pkt_b.ack:<12} {'EXTRA_IN_B':<15}"
-                        )
+        row_counts: Counter[str] = Counter()
+        yield from _capped_rows(_table_rows(packets_a, packets_b), max_rows, row_counts)
 
         # Summary
-        lines.append(f"\n{'='*100}")
-        lines.append(f"Summary: {result}")
-        lines.append(f"{'='*100}\n")
-
-        return "\n".join(lines)
+        yield f"\n{'='*100}"
+        yield f"Summary: {result}"
+        yield _format_row_counts(row_counts)
+        yield f"{'='*100}\n"
 
     def format_flow_comparison(
         self,
         packets_a: list[TcpPacket],
         packets_b: list[TcpPacket],
         result: ComparisonResult,
+        max_rows: int | None = None,
     ) -> str:
         """
         Format comparison result as a visual flow graph.
@@ -411,14 +497,38 @@ class PacketComparator:
             packets_a: Packets from PCAP A
             packets_b: Packets from PCAP B
             result: Comparison result
+            max_rows: Maximum number of packet rows listed (None for all)
 
         Returns:
             Formatted table string
         """
-        lines = []
-        lines.append(f"\n{'='*150}")
-        lines.append(f"Connection: {result.connection_id}")
-        lines.append(f"{'='*150}")
+        return "\n".join(self.iter_flow_comparison(packets_a, packets_b, result, max_rows))
+
+    def iter_flow_comparison(
+        self,
+        packets_a: list[TcpPacket],
+        packets_b: list[TcpPacket],
+        result: ComparisonResult,
+        max_rows: int | None = None,
+    ) -> Iterator[str]:
+        """
+        Yield the lines of :meth:`format_flow_comparison` one at a time.
+
+        Rows have to be ordered by timestamp, so they are collected as small
+        tuples first; the formatted lines are only produced while yielding.
+
+        Args:
+            packets_a: Packets from PCAP A
+            packets_b: Packets from PCAP B
+            result: Comparison result
+            max_rows: Maximum number of packet rows listed (None for all)
+
+        Yields:
+            Report lines without trailing newlines
+        """
+        yield f"\n{'='*150}"
+        yield f"Connection: {result.connection_id}"
+        yield f"{'='*150}"
 
         # Build IP ID index for both sides
         ipid_map_a: dict[int, list[TcpPacket]] = defaultdict(list)
@@ -433,8 +543,8 @@ class PacketComparator:
         # Get all unique IP IDs
         all_ipids = set(ipid_map_a.keys()) | set(ipid_map_b.keys())
 
-        # Create a list of rows to be sorted by timestamp
-        rows = []
+        # (timestamp, ipid, packet A, packet B) rows, to be sorted by timestamp
+        rows: list[tuple[Decimal, int, TcpPacket | None, TcpPacket | None]] = []
 
         for ipid in all_ipids:
             pkts_a = ipid_map_a.get(ipid, [])
@@ -455,39 +565,10 @@ class PacketComparator:
                 else:
                     continue
 
-                # Determine status
-                status_str = ""
-                if pkt_a and pkt_b:
-                    diffs = []
-                    if pkt_a.tcp_flags != pkt_b.tcp_flags:
-                        diffs.append("FLAGS")
-                    if pkt_a.seq != pkt_b.seq:
-                        diffs.append("SEQ")
-                    if pkt_a.ack != pkt_b.ack:
-                        diffs.append("ACK")
-                    
-                    if diffs:
-                        status_str = f"DIFF({','.join(diffs)})"
-                    else:
-                        status_str = "MATCH"
-                elif pkt_a:
-                    status_str = "ONLY_IN_A"
-                else:
-                    status_str = "ONLY_IN_B"
-
-                rows.append({
-                    "ts": ts,
-                    "ipid": ipid,
-                    "pkt_a": pkt_a,
-                    "pkt_b": pkt_b,
-                    "status": status_str
-                })
+                rows.append((ts, ipid, pkt_a, pkt_b))
 
         # Sort rows by timestamp
-        rows.sort(key=lambda x: x["ts"])
-
-        # Calculate relative time
-        start_time = rows[0]["ts"] if rows else 0
+        rows.sort(key=itemgetter(0))
 
         # Header
         # Time | Capture A (Flow) | Capture B (Flow) | Diff
@@ -495,58 +576,191 @@ class PacketComparator:
         # Heuristic: Use the src IP of the first packet as "Client" (Left side).
         client_ip = ""
         if rows:
-            first_row = rows[0]
-            pkt = first_row["pkt_a"] or first_row["pkt_b"]
-            if pkt:
-                client_ip = pkt.src_ip
+            first = rows[0][2] or rows[0][3]
+            if first:
+                client_ip = first.src_ip
 
-        header = (
+        yield (
             f"{'Time':<10} {'IPID':<8} | "
             f"{'Capture A Flow':<80} | "
             f"{'Capture B Flow':<80} | "
             f"{'Status':<15}"
         )
-        lines.append(header)
-        lines.append("-" * 210)
-
-        for row in rows:
-            ts = row["ts"]
-            rel_time = float(ts - start_time)
-            ipid_str = f"{row['ipid']:#06x}"
-            pkt_a = row["pkt_a"]
-            pkt_b = row["pkt_b"]
-            status = row["status"]
-            time_str = f"{rel_time:.6f}"
-
-            # Helper to format flow string
-            def format_flow(pkt: TcpPacket | None) -> str:
-                if not pkt:
-                    return ""
-                
-                # Determine direction arrow
-                # If src_ip matches our "client_ip", it's -->
-                # Otherwise it's <--
-                arrow = "-->" if pkt.src_ip == client_ip else "<--"
-                
-                # Format: Arrow Info (Seq/Ack)
-                # Truncate info if too long
-                info = pkt.info[:60]
-                return f"{arrow} {info:<60} {pkt.seq}/{pkt.ack}"
-
-            flow_a = format_flow(pkt_a)
-            flow_b = format_flow(pkt_b)
-
-            line = (
-                f"{time_str:<10} {ipid_str:<8} | "
-                f"{flow_a:<80} | "
-                f"{flow_b:<80} | "
-                f"{status:<15}"
-            )
-            lines.append(line)
+        yield "-" * 210
+
+        row_counts: Counter[str] = Counter()
+        yield from _capped_rows(_flow_rows(rows, client_ip), max_rows, row_counts)
 
         # Summary footer
-        lines.append(f"\n{'='*210}")
-        lines.append(f"Summary: {result}")
-        lines.append(f"{'='*210}\n")
+        yield f"\n{'='*210}"
+        yield f"Summary: {result}"
+        yield _format_row_counts(row_counts)
+        yield f"{'='*210}\n"
+
+
+def _differing_fields(pkt_a: TcpPacket, pkt_b: TcpPacket) -> list[str]:
+    """Names of the compared fields that differ between two paired packets."""
+    diffs = []
+    if pkt_a.tcp_flags != pkt_b.tcp_flags:
+        diffs.append("FLAGS")
+    if pkt_a.seq != pkt_b.seq:
+        diffs.append("SEQ")
+    if pkt_a.ack != pkt_b.ack:
+        diffs.append("ACK")
+    return diffs
+
+
+def _table_rows(
+    packets_a: list[TcpPacket],
+    packets_b: list[TcpPacket],
+) -> Iterator[tuple[str, str]]:
+    """Yield (status, line) rows of the IP ID comparison table in IP ID order."""
+    # Build IP ID index for both sides
+    ipid_map_a: dict[int, list[TcpPacket]] = defaultdict(list)
+    ipid_map_b: dict[int, list[TcpPacket]] = defaultdict(list)
+
+    for pkt in packets_a:
+        ipid_map_a[pkt.ip_id].append(pkt)
+
+    for pkt in packets_b:
+        ipid_map_b[pkt.ip_id].append(pkt)
+
+    # Get all unique IP IDs and sort them
+    all_ipids = sorted(set(ipid_map_a.keys()) | set(ipid_map_b.keys()))
+
+    # Process each IP ID
+    pkt_a: TcpPacket | None
+    pkt_b: TcpPacket | None
+    for ipid in all_ipids:
+        pkts_a = ipid_map_a.get(ipid, [])
+        pkts_b = ipid_map_b.get(ipid, [])
+
+        ipid_str = f"{ipid:#06x}"
+
+        # Case 1: IP ID only in A
+        if not pkts_b:
+            for pkt_a in pkts_a:
+                yield "ONLY_IN_A", (
+                    f"{ipid_str:<12} {pkt_a.frame_number:<10} {'N/A':<10} "
+                    f"{pkt_a.tcp_flags:<10} {'N/A':<10} "
+                    f"{pkt_a.seq:<12} {'N/A':<12} "
+                    f"{pkt_a.ack:<12} {'N/A':<12} {'ONLY_IN_A':<15}"
+                )
+        # Case 2: IP ID only in B
+        elif not pkts_a:
+            for pkt_b in pkts_b:
+                yield "ONLY_IN_B", (
+                    f"{ipid_str:<12} {'N/A':<10} {pkt_b.frame_number:<10} "
+                    f"{'N/A':<10} {pkt_b.tcp_flags:<10} "
+                    f"{'N/A':<12} {pkt_b.seq:<12} "
+                    f"{'N/A':<12} {pkt_b.ack:<12} {'ONLY_IN_B':<15}"
+                )
+        # Case 3: IP ID in both sides - pair them up
+        else:
+            max_count = max(len(pkts_a), len(pkts_b))
+            for i in range(max_count):
+                pkt_a = pkts_a[i] if i < len(pkts_a) else None
+                pkt_b = pkts_b[i] if i < len(pkts_b) else None
+
+                if pkt_a and pkt_b:
+                    # Both packets exist - compare them
+                    diffs = _differing_fields(pkt_a, pkt_b)
+                    status = "DIFF" if diffs else "OK"
+                    status_str = f"{status}({','.join(diffs)})" if diffs else status
+
+                    yield status, (
+                        f"{ipid_str:<12} {pkt_a.frame_number:<10} {pkt_b.frame_number:<10} "
+                        f"{pkt_a.tcp_flags:<10} {pkt_b.tcp_flags:<10} "
+                        f"{pkt_a.seq:<12} {pkt_b.seq:<12} "
+                        f"{pkt_a.ack:<12} {pkt_b.ack:<12} {status_str:<15}"
+                    )
+                elif pkt_a:
+                    # Only A has this occurrence
+                    yield "EXTRA_IN_A", (
+                        f"{ipid_str:<12} {pkt_a.frame_number:<10} {'N/A':<10} "
+                        f"{pkt_a.tcp_flags:<10} {'N/A':<10} "
+                        f"{pkt_a.seq:<12} {'N/A':<12} "
+                        f"{pkt_a.ack:<12} {'N/A':<12} {'EXTRA_IN_A':<15}"
+                    )
+                elif pkt_b:
+                    # Only B has this occurrence
+                    yield "EXTRA_IN_B", (
+                        f"{ipid_str:<12} {'N/A':<10} {pkt_b.frame_number:<10} "
+                        f"{'N/A':<10} {pkt_b.tcp_flags:<10} "
+                        f"{'N/A':<12} {pkt_b.seq:<12} "
+                        f"{'N/A':<12} {pkt_b.ack:<12} {'EXTRA_IN_B':<15}"
+                    )
+
+
+def _format_flow(pkt: TcpPacket | None, client_ip: str) -> str:
+    """Format one side of a flow row: arrow, truncated info and seq/ack."""
+    if not pkt:
+        return ""
+
+    # Determine direction arrow
+    # If src_ip matches our "client_ip", it's -->
+    # Otherwise it's <--
+    arrow = "-->" if pkt.src_ip == client_ip else "<--"
+
+    # Format: Arrow Info (Seq/Ack)
+    # Truncate info if too long
+    info = pkt.info[:60]
+    return f"{arrow} {info:<60} {pkt.seq}/{pkt.ack}"
+
+
+def _flow_rows(
+    rows: list[tuple[Decimal, int, TcpPacket | None, TcpPacket | None]],
+    client_ip: str,
+) -> Iterator[tuple[str, str]]:
+    """Yield (status, line) rows of the flow view from timestamp-sorted rows."""
+    start_time = rows[0][0] if rows else 0
+
+    for ts, ipid, pkt_a, pkt_b in rows:
+        # Determine status
+        if pkt_a and pkt_b:
+            diffs = _differing_fields(pkt_a, pkt_b)
+            status = "DIFF" if diffs else "MATCH"
+            status_str = f"DIFF({','.join(diffs)})" if diffs else status
+        elif pkt_a:
+            status = status_str = "ONLY_IN_A"
+        else:
+            status = status_str = "ONLY_IN_B"
+
+        time_str = f"{float(ts - start_time):.6f}"
+        ipid_str = f"{ipid:#06x}"
+        flow_a = _format_flow(pkt_a, client_ip)
+        flow_b = _format_flow(pkt_b, client_ip)
+
+        yield status, (
+            f"{time_str:<10} {ipid_str:<8} | "
+            f"{flow_a:<80} | "
+            f"{flow_b:<80} | "
+            f"{status_str:<15}"
+        )
 
-        return "\n".join(lines)
+
+def _capped_rows(
+    rows: Iterable[tuple[str, str]],
+    max_rows: int | None,
+    row_counts: Counter[str],
+) -> Iterator[str]:
+    """
+    Yield the lines of up to ``max_rows`` rows, counting every row's status.
+
+    Rows past the cap are consumed so ``row_counts`` covers the whole table.
+    """
+    shown = 0
+    for status, line in rows:
+        row_counts[status] += 1
+        if max_rows is None or shown < max_rows:
+            shown += 1
+            yield line
+    hidden = row_counts.total() - shown
+    if hidden:
+        yield f"... {hidden} more rows not shown"
+
+
+def _format_row_counts(row_counts: Counter[str]) -> str:
+    """Summarize row statuses, most frequent first."""
+    counts = ", ".join(f"{status}={count}" for status, count in row_counts.most_common())
+    return f"Rows: {row_counts.total()}" + (f" ({counts})" if counts else "")
@@ -2,16 +2,18 @@
 
 from __future__ import annotations
 import logging
+import tempfile
 from dataclasses import dataclass
 from decimal import Decimal
 from pathlib import Path
+from typing import Iterable
 
 from capmaster.core.tshark_wrapper import TsharkWrapper
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class TcpPacket:
     """
     TCP packet information for comparison.
@@ -24,16 +26,12 @@ class TcpPacket:
     - Timestamp
     - Source/Dest IP/Port (for direction)
     - Info string (for display)
+    - TCP payload length (for sequence-aware alignment)
 
     OPTIMIZATION: Uses __slots__ to reduce memory overhead per instance.
     With large numbers of packets, this can save 20-30% memory.
     """
 
-    __slots__ = (
-        'frame_number', 'ip_id', 'tcp_flags', 'seq', 'ack', 'timestamp',
-        'src_ip', 'dst_ip', 'src_port', 'dst_port', 'info'
-    )
-
     frame_number: int
     """Frame number in the PCAP file"""
 
@@ -67,6 +65,9 @@ class TcpPacket:
     info: str
     """Packet info string (e.g. from _ws.col.Info)"""
 
+    tcp_len: int = 0
+    """TCP payload length in bytes"""
+
     def __str__(self) -> str:
         """String representation for display."""
         return (
@@ -100,8 +101,16 @@ class PacketExtractor:
         "tcp.srcport",      # Source Port
         "tcp.dstport",      # Destination Port
         "_ws.col.Info",     # Info column
+        "tcp.len",          # TCP payload length
     ]
     
+    # Maximum number of terms (single IDs or ranges) in a stream set filter
+    MAX_SET_FILTER_TERMS = 4096
+
+    # Requested fraction of a capture's streams above which one unfiltered
+    # pass with a Python-side membership test beats a display filter
+    SCAN_SELECTIVITY = 0.5
+
     def __init__(self, tshark: TsharkWrapper | None = None):
         """
         Initialize the packet extractor.
@@ -177,33 +186,7 @@ class PacketExtractor:
                 continue
             
             try:
-                # Strip quotes from fields (tshark adds quotes with -E quote=d)
-                frame_number = int(fields[0].strip('"'))
-                ip_id_str = fields[1].strip('"')
-                tcp_flags = fields[2].strip('"') if fields[2] else "0x000"
-                seq_str = fields[3].strip('"')
-                ack_str = fields[4].strip('"')
-                timestamp_str = fields[5].strip('"')
-                src_ip_val = fields[6].strip('"')
-                dst_ip_val = fields[7].strip('"')
-                src_port_val = int(fields[8].strip('"')) if fields[8] else 0
-                dst_port_val = int(fields[9].strip('"')) if fields[9] else 0
-                info_val = fields[10].strip('"')
-
-                packet = TcpPacket(
-                    frame_number=frame_number,
-                    ip_id=int(ip_id_str, 16) if ip_id_str else 0,  # Parse hex
-                    tcp_flags=tcp_flags,
-                    seq=int(seq_str) if seq_str else 0,
-                    ack=int(ack_str) if ack_str else 0,
-                    timestamp=Decimal(timestamp_str) if timestamp_str else Decimal('0'),
-                    src_ip=src_ip_val,
-                    dst_ip=dst_ip_val,
-                    src_port=src_port_val,
-                    dst_port=dst_port_val,
-                    info=info_val,
-                )
-                packets.append(packet)
+                packets.append(self._parse_fields(fields))
             except (ValueError, IndexError) as e:
                 logger.warning(f"Error parsing packet: {line}, error: {e}")
                 continue
@@ -265,33 +248,7 @@ class PacketExtractor:
                 continue
             
             try:
-                # Strip quotes from fields (tshark adds quotes with -E quote=d)
-                frame_number = int(fields[0].strip('"'))
-                ip_id_str = fields[1].strip('"')
-                tcp_flags = fields[2].strip('"') if fields[2] else "0x000"
-                seq_str = fields[3].strip('"')
-                ack_str = fields[4].strip('"')
-                timestamp_str = fields[5].strip('"')
-                src_ip_val = fields[6].strip('"')
-                dst_ip_val = fields[7].strip('"')
-                src_port_val = int(fields[8].strip('"')) if fields[8] else 0
-                dst_port_val = int(fields[9].strip('"')) if fields[9] else 0
-                info_val = fields[10].strip('"')
-
-                packet = TcpPacket(
-                    frame_number=frame_number,
-                    ip_id=int(ip_id_str, 16) if ip_id_str else 0,  # Parse hex
-                    tcp_flags=tcp_flags,
-                    seq=int(seq_str) if seq_str else 0,
-                    ack=int(ack_str) if ack_str else 0,
-                    timestamp=Decimal(timestamp_str) if timestamp_str else Decimal('0'),
-                    src_ip=src_ip_val,
-                    dst_ip=dst_ip_val,
-                    src_port=src_port_val,
-                    dst_port=dst_port_val,
-                    info=info_val,
-                )
-                packets.append(packet)
+                packets.append(self._parse_fields(fields))
             except (ValueError, IndexError) as e:
                 logger.warning(f"Error parsing packet: {line}, error: {e}")
                 continue
@@ -303,6 +260,7 @@ class PacketExtractor:
         self,
         pcap_file: Path,
         stream_ids: list[int],
+        total_streams: int | None = None,
     ) -> dict[int, list[TcpPacket]]:
         """
         Extract TCP packets for multiple stream IDs in a single tshark call.
@@ -311,9 +269,17 @@ class PacketExtractor:
         from N (one per stream) to 1 (single call for all streams), significantly
         improving performance for large numbers of matched connections.
 
+        The streams are selected with a set-membership test instead of one OR
+        term per stream, see :meth:`build_stream_filter`. When most streams of
+        the capture are requested, or the set is too fragmented for a compact
+        filter, a single pass over all TCP packets is filtered on the Python
+        side with a hash lookup instead.
+
         Args:
             pcap_file: Path to the PCAP file
             stream_ids: List of TCP stream IDs from tshark
+            total_streams: Number of TCP streams in the capture, if known
+                (used to estimate the selectivity of the requested set)
 
         Returns:
             Dictionary mapping stream_id to list of TcpPacket objects
@@ -321,16 +287,13 @@ class PacketExtractor:
         if not stream_ids:
             return {}
 
-        # Build display filter for multiple TCP streams
-        # Format: tcp.stream==1 or tcp.stream==2 or tcp.stream==3 ...
-        filter_parts = [f"tcp.stream=={sid}" for sid in stream_ids]
-        filter_expr = " or ".join(filter_parts)
+        filter_expr = self.build_stream_filter(stream_ids, total_streams)
 
         # Build tshark command
         # Note: We need to add tcp.stream to FIELDS to identify which stream each packet belongs to
         args = [
             "-r", str(pcap_file),
-            "-Y", filter_expr,
+            "-Y", filter_expr if filter_expr is not None else "tcp",
             "-o", "tcp.relative_sequence_numbers:false",  # Use absolute sequence numbers
             "-T", "fields",
             "-E", "separator=\t",
@@ -345,25 +308,126 @@ class PacketExtractor:
         for field in self.FIELDS:
             args.extend(["-e", field])
 
-        # Execute tshark
-        result = self.tshark.execute(args)
+        packets_by_stream: dict[int, list[TcpPacket]] = {sid: [] for sid in stream_ids}
 
         # Note: TsharkWrapper.execute() already handles exit codes:
         # - Exit code 0: Success
         # - Exit code 2: Warning (e.g., truncated PCAP) - logs warning but continues
         # - Other codes: Raises TsharkExecutionError
         # So if we reach here, the command succeeded or had only warnings
+        if filter_expr is not None:
+            result = self.tshark.execute(args)
+            self._collect_stream_packets(result.stdout.strip().split("\n"), packets_by_stream)
+        else:
+            # Unfiltered pass: spool tshark output to disk and stream it so the
+            # whole capture's field dump is never held in memory
+            logger.debug(
+                f"Scanning all TCP packets of {pcap_file.name} for {len(packets_by_stream)} streams"
+            )
+            with tempfile.TemporaryDirectory(prefix="capmaster-streams-") as tmp_dir:
+                output_file = Path(tmp_dir) / "packets.tsv"
+                self.tshark.execute(args, output_file=output_file)
+                with open(output_file, "r", encoding="utf-8") as f:
+                    self._collect_stream_packets(
+                        (line.rstrip("\n") for line in f), packets_by_stream
+                    )
 
-        # Parse output and group by stream_id
-        packets_by_stream: dict[int, list[TcpPacket]] = {sid: [] for sid in stream_ids}
+        # Log extraction summary
+        total_packets = sum(len(pkts) for pkts in packets_by_stream.values())
+        logger.debug(
+            f"Extracted {total_packets} packets for {len(stream_ids)} streams "
+            f"from {pcap_file.name} in single tshark call"
+        )
 
-        for line in result.stdout.strip().split("\n"):
+        return packets_by_stream
+
+    @classmethod
+    def build_stream_filter(
+        cls,
+        stream_ids: Iterable[int],
+        total_streams: int | None = None,
+    ) -> str | None:
+        """
+        Build a display filter selecting a set of TCP streams.
+
+        Consecutive stream IDs are collapsed into ranges and combined into a
+        single ``tcp.stream in {...}`` set, which tshark evaluates as one
+        membership test per packet instead of one comparison per stream.
+
+        Args:
+            stream_ids: TCP stream IDs to select
+            total_streams: Number of TCP streams in the capture, if known
+
+        Returns:
+            Display filter, or None when a single unfiltered pass with a
+            Python-side membership test is expected to be cheaper (the set
+            covers at least ``SCAN_SELECTIVITY`` of the capture's streams, or
+            needs more than ``MAX_SET_FILTER_TERMS`` terms)
+        """
+        unique_ids = sorted(set(stream_ids))
+        if not unique_ids:
+            return None
+        if len(unique_ids) == 1:
+            return f"tcp.stream=={unique_ids[0]}"
+        if total_streams and len(unique_ids) >= cls.SCAN_SELECTIVITY * total_streams:
+            return None
+
+        terms: list[str] = []
+        start = prev = unique_ids[0]
+        for sid in unique_ids[1:] + [None]:
+            if sid is not None and sid == prev + 1:
+                prev = sid
+                continue
+            terms.append(str(start) if start == prev else f"{start}..{prev}")
+            if len(terms) > cls.MAX_SET_FILTER_TERMS:
+                return None
+            if sid is not None:
+                start = prev = sid
+
+        return f"tcp.stream in {{{' '.join(terms)}}}"
+
+    @staticmethod
+    def _parse_fields(fields: list[str], offset: int = 0) -> TcpPacket:
+        """Build a TcpPacket from one line of :attr:`FIELDS`, starting at ``offset``.
+
+        Raises ValueError/IndexError on malformed values.
+        """
+        raw = fields[offset:offset + len(PacketExtractor.FIELDS)]
+        # Strip quotes from fields (tshark adds quotes with -E quote=d)
+        (
+            frame_str, ip_id_str, tcp_flags, seq_str, ack_str, timestamp_str,
+            src_ip, dst_ip, src_port_str, dst_port_str, info, tcp_len_str,
+        ) = (field.strip('"') for field in raw)
+
+        return TcpPacket(
+            frame_number=int(frame_str),
+            ip_id=int(ip_id_str, 16) if ip_id_str else 0,  # Parse hex
+            tcp_flags=tcp_flags if raw[2] else "0x000",
+            seq=int(seq_str) if seq_str else 0,
+            ack=int(ack_str) if ack_str else 0,
+            timestamp=Decimal(timestamp_str) if timestamp_str else Decimal('0'),
+            src_ip=src_ip,
+            dst_ip=dst_ip,
+            src_port=int(src_port_str) if src_port_str else 0,
+            dst_port=int(dst_port_str) if dst_port_str else 0,
+            info=info,
+            tcp_len=int(tcp_len_str) if tcp_len_str else 0,
+        )
+
+    def _collect_stream_packets(
+        self,
+        lines: Iterable[str],
+        packets_by_stream: dict[int, list[TcpPacket]],
+    ) -> None:
+        """Parse ``tcp.stream``-prefixed field lines into per-stream packet lists."""
+        # Expected: tcp.stream + len(self.FIELDS) fields
+        expected_field_count = 1 + len(self.FIELDS)
+
+        for line in lines:
             if not line:
                 continue
 
             fields = line.split("\t")
-            # Expected: tcp.stream + len(self.FIELDS) fields
-            expected_field_count = 1 + len(self.FIELDS)
             if len(fields) != expected_field_count:
                 logger.warning(f"Skipping malformed line: {line}")
                 continue
@@ -373,46 +437,12 @@ class PacketExtractor:
                 stream_id = int(fields[0].strip('"'))
 
                 # Skip if this stream_id is not in our requested list
-                if stream_id not in packets_by_stream:
+                packets = packets_by_stream.get(stream_id)
+                if packets is None:
                     continue
 
                 # Remaining fields are the standard packet fields
-                frame_number = int(fields[1].strip('"'))
-                ip_id_str = fields[2].strip('"')
-                tcp_flags = fields[3].strip('"') if fields[3] else "0x000"
-                seq_str = fields[4].strip('"')
-                ack_str = fields[5].strip('"')
-                timestamp_str = fields[6].strip('"')
-                src_ip_val = fields[7].strip('"')
-                dst_ip_val = fields[8].strip('"')
-                src_port_val = int(fields[9].strip('"')) if fields[9] else 0
-                dst_port_val = int(fields[10].strip('"')) if fields[10] else 0
-                info_val = fields[11].strip('"')
-
-                packet = TcpPacket(
-                    frame_number=frame_number,
-                    ip_id=int(ip_id_str, 16) if ip_id_str else 0,  # Parse hex
-                    tcp_flags=tcp_flags,
-                    seq=int(seq_str) if seq_str else 0,
-                    ack=int(ack_str) if ack_str else 0,
-                    timestamp=Decimal(timestamp_str) if timestamp_str else Decimal('0'),
-                    src_ip=src_ip_val,
-                    dst_ip=dst_ip_val,
-                    src_port=src_port_val,
-                    dst_port=dst_port_val,
-                    info=info_val,
-                )
-                packets_by_stream[stream_id].append(packet)
+                packets.append(self._parse_fields(fields, 1))
             except (ValueError, IndexError) as e:
                 logger.warning(f"Error parsing packet: {line}, error: {e}")
                 continue
-
-        # Log extraction summary
-        total_packets = sum(len(pkts) for pkts in packets_by_stream.values())
-        logger.debug(
-            f"Extracted {total_packets} packets for {len(stream_ids)} streams "
-            f"from {pcap_file.name} in single tshark call"
-        )
-
-        return packets_by_stream
-
@@ -0,0 +1,297 @@
+"""Columnar per-stream packet store filled during connection extraction.
+
+Packet diff needs, for every matched stream, the per-packet IPID, flags,
+sequence/acknowledgment numbers, payload length, frame number and timestamp. Those fields are
+already dissected by the connection extraction pass, so instead of running
+tshark a second time over each capture, :class:`StreamPacketStore` retains
+them while the connections are being built.
+
+Packets are appended to fixed-width :mod:`array` columns in capture order.
+Once the buffered columns exceed the memory budget they are spilled to an
+anonymous temporary file as one chunk, so memory stays bounded on captures
+of any size. Reading a set of streams back is a single sequential scan over
+the chunks, without any tshark invocation.
+"""
+
+from __future__ import annotations
+
+import logging
+import tempfile
+from array import array
+from decimal import Decimal
+from pathlib import Path
+from typing import IO, Iterable, Iterator, NamedTuple
+
+from capmaster.core.connection.extractor import TcpFieldExtractor
+from capmaster.core.connection.models import TcpPacket as ConnectionPacket
+from capmaster.plugins.compare_common.packet_extractor import TcpPacket
+
+logger = logging.getLogger(__name__)
+
+_NS_PER_SECOND = 10**9
+
+# Position of the info column in rows of the fused extraction pass
+_INFO_INDEX = len(TcpFieldExtractor.FIELDS)
+
+# Separator between info strings of a spilled chunk (never emitted by tshark)
+_INFO_SEPARATOR = "\x00"
+
+
+class _SpilledChunk(NamedTuple):
+    """Location of a spilled chunk in the spill file."""
+
+    offset: int
+    packets: int
+    info_size: int
+
+
+def _parse_epoch_ns(value: str) -> int:
+    """Parse a ``frame.time_epoch`` string into integer nanoseconds."""
+    if not value:
+        return 0
+    whole, _, fraction = value.partition(".")
+    return int(whole) * _NS_PER_SECOND + int(fraction[:9].ljust(9, "0"))
+
+
+class StreamPacketStore:
+    """
+    Spillable column store of the packet fields used by packet diff.
+
+    Pass an instance as ``packet_sink`` to
+    :func:`~capmaster.core.connection.connection_extractor.extract_connections_from_pcap`
+    to fill it during the connection extraction pass, then read matched
+    streams back with :meth:`packets_by_stream`.
+
+    Example:
+        >>> with StreamPacketStore() as store:
+        ...     connections = extract_connections_from_pcap(pcap, packet_sink=store)
+        ...     packets = store.packets_by_stream([c.stream_id for c in connections])
+    """
+
+    # Additional tshark fields requested from the extraction pass. That pass
+    # runs without TCP reassembly, so the Info of a segment carrying part of
+    # an upper-layer PDU summarizes the segment instead of reading
+    # "[TCP segment of a reassembled PDU]" as in PacketExtractor output.
+    extra_fields = ("_ws.col.Info",)
+
+    # Default in-memory budget before buffered columns are spilled to disk
+    DEFAULT_MEMORY_LIMIT = 256 << 20
+
+    # (name, typecode) of the fixed-width columns, in spill order
+    _COLUMNS = (
+        ("stream", "I"),
+        ("frame", "I"),
+        ("ip_id", "H"),
+        ("flags", "H"),
+        ("seq", "I"),
+        ("ack", "I"),
+        ("time", "q"),
+        ("endpoints", "I"),
+        ("length", "I"),
+    )
+
+    # Approximate per-packet overhead of the info column (str object header)
+    _INFO_OVERHEAD = 56
+
+    def __init__(
+        self,
+        memory_limit: int = DEFAULT_MEMORY_LIMIT,
+        spill_dir: Path | None = None,
+    ):
+        """
+        Initialize an empty store.
+
+        Args:
+            memory_limit: Approximate number of bytes buffered in memory
+                before the columns are spilled to disk
+            spill_dir: Directory for the spill file (system default if None)
+        """
+        self.memory_limit = memory_limit
+        self.spill_dir = spill_dir
+
+        self._columns = {name: array(code) for name, code in self._COLUMNS}
+        self._info: list[str] = []
+        self._row_size = sum(array(code).itemsize for _, code in self._COLUMNS)
+        self._buffered_bytes = 0
+
+        # Interned values shared by many packets
+        self._flags: list[str] = []
+        self._flag_ids: dict[str, int] = {}
+        self._endpoints: list[tuple[str, str, int, int]] = []
+        self._endpoint_ids: dict[tuple[str, str, int, int], int] = {}
+
+        self._stream_ids: set[int] = set()
+        self._packet_count = 0
+        self._spill_file: IO[bytes] | None = None
+        self._chunks: list[_SpilledChunk] = []
+
+    def __enter__(self) -> StreamPacketStore:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        """Number of packets retained."""
+        return self._packet_count
+
+    def __contains__(self, stream_id: object) -> bool:
+        return stream_id in self._stream_ids
+
+    @property
+    def spilled(self) -> bool:
+        """True if part of the store lives in the spill file."""
+        return bool(self._chunks)
+
+    def add(self, packet: ConnectionPacket, row: list[str]) -> None:
+        """
+        Retain one packet of the extraction pass.
+
+        Args:
+            packet: Packet parsed by the connection extractor
+            row: Raw tshark field row; the timestamp is re-read from it at
+                nanosecond precision and the trailing fields hold
+                :attr:`extra_fields`
+        """
+        columns = self._columns
+        flags = packet.flags if row[8] else "0x000"
+        flag_id = self._flag_ids.get(flags)
+        if flag_id is None:
+            flag_id = self._flag_ids[flags] = len(self._flags)
+            self._flags.append(flags)
+        endpoints = (packet.src_ip, packet.dst_ip, packet.src_port, packet.dst_port)
+        endpoint_id = self._endpoint_ids.get(endpoints)
+        if endpoint_id is None:
+            endpoint_id = self._endpoint_ids[endpoints] = len(self._endpoints)
+            self._endpoints.append(endpoints)
+
+        info = row[_INFO_INDEX] if len(row) > _INFO_INDEX else ""
+
+        columns["stream"].append(packet.stream_id)
+        columns["frame"].append(packet.frame_number)
+        columns["ip_id"].append(packet.ip_id & 0xFFFF)
+        columns["flags"].append(flag_id)
+        columns["seq"].append(packet.seq)
+        columns["ack"].append(packet.ack)
+        columns["time"].append(_parse_epoch_ns(row[1]))
+        columns["endpoints"].append(endpoint_id)
+        columns["length"].append(packet.length)
+        self._info.append(info)
+
+        self._stream_ids.add(packet.stream_id)
+        self._packet_count += 1
+        self._buffered_bytes += self._row_size + self._INFO_OVERHEAD + len(info)
+        if self._buffered_bytes >= self.memory_limit:
+            self._spill()
+
+    def packets_by_stream(self, stream_ids: Iterable[int]) -> dict[int, list[TcpPacket]]:
+        """
+        Read the packets of several streams back in capture order.
+
+        Args:
+            stream_ids: TCP stream IDs to read
+
+        Returns:
+            Dictionary mapping each requested stream ID to its packets (empty
+            list for streams the store has not seen)
+        """
+        packets_by_stream: dict[int, list[TcpPacket]] = {sid: [] for sid in stream_ids}
+        for columns, info in self._iter_chunks():
+            self._collect(columns, info, packets_by_stream)
+        return packets_by_stream
+
+    def packets(self, stream_id: int) -> list[TcpPacket]:
+        """Read the packets of one stream back in capture order."""
+        return self.packets_by_stream([stream_id])[stream_id]
+
+    def close(self) -> None:
+        """Release buffered columns and delete the spill file."""
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+        self._chunks.clear()
+        self._columns = {name: array(code) for name, code in self._COLUMNS}
+        self._info = []
+        self._buffered_bytes = 0
+
+    def _spill(self) -> None:
+        """Move the buffered columns to the spill file as one chunk."""
+        count = len(self._info)
+        if not count:
+            return
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(
+                prefix="capmaster-packets-", dir=self.spill_dir
+            )
+        spill_file = self._spill_file
+        spill_file.seek(0, 2)
+        offset = spill_file.tell()
+        for name, _ in self._COLUMNS:
+            spill_file.write(self._columns[name].tobytes())
+        info_bytes = _INFO_SEPARATOR.join(self._info).encode("utf-8", "surrogateescape")
+        spill_file.write(info_bytes)
+        self._chunks.append(_SpilledChunk(offset, count, len(info_bytes)))
+
+        logger.debug(
+            f"Spilled {count} packets ({self._buffered_bytes} bytes) to disk, "
+            f"{len(self._chunks)} chunk(s) so far"
+        )
+        self._columns = {name: array(code) for name, code in self._COLUMNS}
+        self._info = []
+        self._buffered_bytes = 0
+
+    def _iter_chunks(self) -> Iterator[tuple[dict[str, array], list[str]]]:
+        """Yield (columns, info) for each spilled chunk, then the buffer."""
+        for chunk in self._chunks:
+            assert self._spill_file is not None
+            self._spill_file.seek(chunk.offset)
+            columns: dict[str, array] = {}
+            for name, code in self._COLUMNS:
+                column = array(code)
+                column.frombytes(self._spill_file.read(chunk.packets * column.itemsize))
+                columns[name] = column
+            info_bytes = self._spill_file.read(chunk.info_size)
+            info = info_bytes.decode("utf-8", "surrogateescape").split(_INFO_SEPARATOR)
+            yield columns, info
+        if self._info:
+            yield self._columns, self._info
+
+    def _collect(
+        self,
+        columns: dict[str, array],
+        info: list[str],
+        packets_by_stream: dict[int, list[TcpPacket]],
+    ) -> None:
+        """Materialize the rows of one chunk that belong to requested streams."""
+        frames = columns["frame"]
+        ip_ids = columns["ip_id"]
+        flags = columns["flags"]
+        seqs = columns["seq"]
+        acks = columns["ack"]
+        times = columns["time"]
+        endpoints = columns["endpoints"]
+        lengths = columns["length"]
+        flag_values = self._flags
+        endpoint_values = self._endpoints
+
+        for row, stream_id in enumerate(columns["stream"]):
+            packets = packets_by_stream.get(stream_id)
+            if packets is None:
+                continue
+            src_ip, dst_ip, src_port, dst_port = endpoint_values[endpoints[row]]
+            packets.append(
+                TcpPacket(
+                    frame_number=frames[row],
+                    ip_id=ip_ids[row],
+                    tcp_flags=flag_values[flags[row]],
+                    seq=seqs[row],
+                    ack=acks[row],
+                    timestamp=Decimal(times[row]).scaleb(-9),
+                    src_ip=src_ip,
+                    dst_ip=dst_ip,
+                    src_port=src_port,
+                    dst_port=dst_port,
+                    info=info[row],
+                    tcp_len=lengths[row],
+                )
+            )
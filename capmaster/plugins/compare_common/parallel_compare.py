@@ -0,0 +1,185 @@
+"""Parallel packet-level comparison of matched connection pairs.
+
+Matched pairs are independent, so their comparison can be spread over worker
+processes. The parent packs the compared fields of every stream into one
+columnar file that workers map read-only with :mod:`mmap`, so packets are
+shared through the page cache instead of being pickled once per task. Pairs
+are cut into contiguous chunks of similar packet count and results come back
+in submission order, so callers see exactly the sequence the serial
+:meth:`PacketComparator.compare_many` would produce.
+"""
+
+from __future__ import annotations
+
+import logging
+import mmap
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+from .packet_comparator import ComparisonResult, PacketComparator
+from .packet_extractor import TcpPacket
+
+logger = logging.getLogger(__name__)
+
+# Columns packed per packet, all stored as signed 64-bit integers
+_COLUMNS = ("frame_number", "ip_id", "tcp_flags", "seq", "ack")
+
+# Chunks submitted per worker, so a slow chunk does not idle the others
+CHUNKS_PER_JOB = 4
+
+
+class _PairTask(NamedTuple):
+    """One pair of a chunk: where its two streams live in the column file."""
+
+    offset_a: int
+    count_a: int
+    offset_b: int
+    count_b: int
+    connection_id: str
+
+
+# Per-worker state set up by _init_worker
+_worker_columns: dict[str, memoryview] = {}
+_worker_flags: list[str] = []
+
+
+def _init_worker(column_file: str, total: int, flags: list[str]) -> None:
+    """Map the column file once per worker process."""
+    global _worker_flags
+    with open(column_file, "rb") as f:
+        buffer = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    itemsize = array("q").itemsize
+    for index, name in enumerate(_COLUMNS):
+        start = index * total * itemsize
+        _worker_columns[name] = buffer[start:start + total * itemsize].cast("q")
+    _worker_flags = flags
+
+
+def _load_stream(offset: int, count: int) -> list[TcpPacket]:
+    """Rebuild the compared fields of one stream from the column file."""
+    end = offset + count
+    frames = _worker_columns["frame_number"][offset:end]
+    ip_ids = _worker_columns["ip_id"][offset:end]
+    flags = _worker_columns["tcp_flags"][offset:end]
+    seqs = _worker_columns["seq"][offset:end]
+    acks = _worker_columns["ack"][offset:end]
+    flag_values = _worker_flags
+    zero = Decimal(0)
+    return [
+        TcpPacket(frames[i], ip_ids[i], flag_values[flags[i]], seqs[i], acks[i], zero, "", "", 0, 0, "")
+        for i in range(count)
+    ]
+
+
+def _compare_chunk(tasks: list[_PairTask], matched_only: bool) -> list[ComparisonResult]:
+    """Worker entry point: compare one chunk of pairs."""
+    comparator = PacketComparator()
+    pairs = [
+        (
+            _load_stream(task.offset_a, task.count_a),
+            _load_stream(task.offset_b, task.count_b),
+            task.connection_id,
+        )
+        for task in tasks
+    ]
+    return list(comparator.compare_many(pairs, matched_only))
+
+
+def _chunk_pairs(weights: list[int], chunk_count: int) -> list[range]:
+    """Cut pair indexes into contiguous ranges of similar total weight."""
+    target = max(1, sum(weights) // max(1, chunk_count))
+    chunks: list[range] = []
+    start = 0
+    weight = 0
+    for index, pair_weight in enumerate(weights):
+        weight += pair_weight
+        if weight >= target:
+            chunks.append(range(start, index + 1))
+            start = index + 1
+            weight = 0
+    if start < len(weights):
+        chunks.append(range(start, len(weights)))
+    return chunks
+
+
+def compare_pairs_parallel(
+    pairs: list[tuple[list[TcpPacket], list[TcpPacket], str]],
+    jobs: int,
+    matched_only: bool = False,
+) -> Iterator[list[ComparisonResult]]:
+    """
+    Compare matched pairs across worker processes.
+
+    Args:
+        pairs: (packets_a, packets_b, connection_id) tuples
+        jobs: Number of worker processes
+        matched_only: Same as in :meth:`PacketComparator.compare`
+
+    Yields:
+        Lists of ComparisonResult, one per chunk of consecutive pairs, in
+        the order of ``pairs``; concatenated they equal the serial results
+    """
+    if not pairs:
+        return
+
+    flags: list[str] = []
+    flag_ids: dict[str, int] = {}
+    columns = {name: array("q") for name in _COLUMNS}
+    # Streams shared by several pairs are packed once
+    locations: dict[int, tuple[int, int]] = {}
+    tasks: list[_PairTask] = []
+
+    def locate(packets: list[TcpPacket]) -> tuple[int, int]:
+        location = locations.get(id(packets))
+        if location is None:
+            offset = len(columns["frame_number"])
+            for pkt in packets:
+                flag_id = flag_ids.get(pkt.tcp_flags)
+                if flag_id is None:
+                    flag_id = flag_ids[pkt.tcp_flags] = len(flags)
+                    flags.append(pkt.tcp_flags)
+                columns["frame_number"].append(pkt.frame_number)
+                columns["ip_id"].append(pkt.ip_id)
+                columns["tcp_flags"].append(flag_id)
+                columns["seq"].append(pkt.seq)
+                columns["ack"].append(pkt.ack)
+            location = locations[id(packets)] = (offset, len(packets))
+        return location
+
+    for packets_a, packets_b, connection_id in pairs:
+        offset_a, count_a = locate(packets_a)
+        offset_b, count_b = locate(packets_b)
+        tasks.append(_PairTask(offset_a, count_a, offset_b, count_b, connection_id))
+
+    total = len(columns["frame_number"])
+    weights = [task.count_a + task.count_b + 1 for task in tasks]
+    chunks = _chunk_pairs(weights, jobs * CHUNKS_PER_JOB)
+    logger.debug(
+        f"Comparing {len(pairs)} pairs ({total} packets) in {len(chunks)} chunks "
+        f"on {jobs} workers"
+    )
+
+    with tempfile.TemporaryDirectory(prefix="capmaster-compare-") as tmp_dir:
+        column_file = Path(tmp_dir) / "columns.bin"
+        with open(column_file, "wb") as f:
+            for name in _COLUMNS:
+                columns[name].tofile(f)
+            # mmap cannot map an empty file
+            if not total:
+                f.write(b"\0")
+        columns.clear()
+
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(str(column_file), total, flags),
+        ) as pool:
+            yield from pool.map(
+                _compare_chunk,
+                [[tasks[i] for i in chunk] for chunk in chunks],
+                [matched_only] * len(chunks),
+            )
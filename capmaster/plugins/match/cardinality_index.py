@@ -0,0 +1,424 @@
+"""Compact endpoint cardinality index used by server detection.
+
+The index answers the three distinct-count questions that
+:class:`~capmaster.plugins.match.server_detector.ServerDetector` asks during
+cardinality-based role detection:
+
+1. How many distinct peer IPs does an ``ip:port`` endpoint talk to?
+2. How many distinct IPs use a given port?
+3. How many distinct peer ports does an ``ip:port`` endpoint talk to?
+
+IP addresses are interned to small integers and endpoints are packed into a
+single integer key (``ip_id << 16 | port``). Each counter starts as a single
+value, grows into an exact set and, in approximate mode, is promoted to a
+fixed-size HyperLogLog register array once it passes ``SPARSE_LIMIT``
+members. Exact mode never promotes, so counts (and therefore detection
+results) are identical to the original set-based implementation.
+
+The index is serializable (:meth:`CardinalityIndex.to_dict`,
+:meth:`CardinalityIndex.save`) and mergeable (:meth:`CardinalityIndex.merge`)
+so per-capture indexes can be combined and reused between commands.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Union
+
+from capmaster.utils.errors import CapMasterError
+
+# Counter representation: a single member, an exact set of members, or a
+# dense HyperLogLog register array (approximate mode only).
+_Counter = Union[int, set[int], bytearray]
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix64(value: int) -> int:
+    """SplitMix64 finalizer used to spread small integers over 64 bits."""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+def _hash_ip(ip: str) -> int:
+    """Stable 64-bit hash of an IP string (independent of interning order)."""
+    return int.from_bytes(hashlib.blake2b(ip.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _hash_port(port: int) -> int:
+    """Stable 64-bit hash of a port number."""
+    return _mix64(port)
+
+
+class CardinalityIndex:
+    """
+    Interned-integer endpoint index with exact or approximate distinct counters.
+
+    Args:
+        mode: ``"exact"`` (default) keeps exact member sets; ``"approx"``
+            promotes large sets to HyperLogLog registers so memory per key is
+            bounded by ``2 ** precision`` bytes.
+        precision: HyperLogLog precision (number of index bits) used in
+            approximate mode. The standard error is about ``1.04 / sqrt(2**p)``.
+    """
+
+    MODES = ("exact", "approx")
+
+    SPARSE_LIMIT = 16
+    """Members kept exactly before an approximate counter is promoted to HLL."""
+
+    FORMAT_VERSION = "1.0"
+
+    def __init__(self, mode: str = "exact", precision: int = 8) -> None:
+        if mode not in self.MODES:
+            raise ValueError(f"Invalid cardinality mode: {mode!r} (expected one of {self.MODES})")
+        if not 4 <= precision <= 16:
+            raise ValueError(f"Invalid HyperLogLog precision: {precision} (expected 4-16)")
+
+        self.mode = mode
+        self.precision = precision
+        self._register_count = 1 << precision
+
+        # IP interning tables
+        self._ip_ids: dict[str, int] = {}
+        self._ips: list[str] = []
+        self._ip_hashes: list[int] = []
+
+        # Key: endpoint key (ip_id << 16 | port), Value: distinct peer IP ids
+        self._endpoint_peers: dict[int, _Counter] = {}
+
+        # Key: port, Value: distinct ip ids seen using this port
+        self._port_ips: dict[int, _Counter] = {}
+
+        # Key: endpoint key, Value: distinct peer ports
+        self._endpoint_peer_ports: dict[int, _Counter] = {}
+
+        self._connection_count = 0
+
+    # ------------------------------------------------------------------
+    # Interning helpers
+    # ------------------------------------------------------------------
+
+    def _intern(self, ip: str) -> int:
+        ip_id = self._ip_ids.get(ip)
+        if ip_id is None:
+            ip_id = len(self._ips)
+            self._ip_ids[ip] = ip_id
+            self._ips.append(ip)
+            self._ip_hashes.append(_hash_ip(ip))
+        return ip_id
+
+    def endpoint_key(self, ip: str, port: int) -> int | None:
+        """Return the packed endpoint key for ``ip:port`` (None if IP unseen)."""
+        ip_id = self._ip_ids.get(ip)
+        if ip_id is None:
+            return None
+        return (ip_id << 16) | port
+
+    # ------------------------------------------------------------------
+    # Counter primitives
+    # ------------------------------------------------------------------
+
+    def _add(self, table: dict[int, _Counter], key: int, member: int, member_hash: int) -> None:
+        """Add ``member`` to the distinct counter stored at ``table[key]``."""
+        counter = table.get(key)
+        if counter is None:
+            table[key] = member
+        elif isinstance(counter, int):
+            if counter != member:
+                table[key] = {counter, member}
+        elif isinstance(counter, set):
+            counter.add(member)
+            if self.mode == "approx" and len(counter) > self.SPARSE_LIMIT:
+                table[key] = self._promote(counter, table is self._endpoint_peer_ports)
+        else:
+            self._hll_add(counter, member_hash)
+
+    def _promote(self, members: set[int], port_members: bool) -> bytearray:
+        """Convert an exact member set into HyperLogLog registers."""
+        registers = bytearray(self._register_count)
+        for member in members:
+            self._hll_add(registers, self._member_hash(member, port_members))
+        return registers
+
+    def _member_hash(self, member: int, port_members: bool) -> int:
+        return _hash_port(member) if port_members else self._ip_hashes[member]
+
+    def _hll_add(self, registers: bytearray, member_hash: int) -> None:
+        p = self.precision
+        index = member_hash >> (64 - p)
+        remainder = (member_hash << p) & _MASK64
+        rank = 65 - p if remainder == 0 else (64 - remainder.bit_length()) + 1
+        if rank > registers[index]:
+            registers[index] = rank
+
+    def _hll_estimate(self, registers: bytearray) -> int:
+        m = len(registers)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        raw = alpha * m * m / sum(2.0 ** -r for r in registers)
+        zeros = registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            raw = m * math.log(m / zeros)
+        return int(round(raw))
+
+    def _count(self, counter: _Counter | None) -> int:
+        if counter is None:
+            return 0
+        if isinstance(counter, int):
+            return 1
+        if isinstance(counter, set):
+            return len(counter)
+        return self._hll_estimate(counter)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def add_connection(self, client_ip: str, client_port: int, server_ip: str, server_port: int) -> None:
+        """
+        Record one connection in both directions.
+
+        Both endpoints are tracked as potential servers because the true
+        server side is not known yet when the index is being built.
+        """
+        client_id = self._intern(client_ip)
+        server_id = self._intern(server_ip)
+        client_hash = self._ip_hashes[client_id]
+        server_hash = self._ip_hashes[server_id]
+        server_key = (server_id << 16) | server_port
+        client_key = (client_id << 16) | client_port
+
+        # Direction 1: server_ip:server_port -> client_ip
+        self._add(self._endpoint_peers, server_key, client_id, client_hash)
+        self._add(self._port_ips, server_port, server_id, server_hash)
+        self._add(self._endpoint_peer_ports, server_key, client_port, _hash_port(client_port))
+
+        # Direction 2: client_ip:client_port -> server_ip
+        self._add(self._endpoint_peers, client_key, server_id, server_hash)
+        self._add(self._port_ips, client_port, client_id, client_hash)
+        self._add(self._endpoint_peer_ports, client_key, server_port, _hash_port(server_port))
+
+        self._connection_count += 1
+
+    def endpoint_peer_count(self, ip: str, port: int) -> int:
+        """Number of distinct peer IPs observed for endpoint ``ip:port``."""
+        key = self.endpoint_key(ip, port)
+        return 0 if key is None else self._count(self._endpoint_peers.get(key))
+
+    def port_ip_count(self, port: int) -> int:
+        """Number of distinct IPs observed using ``port``."""
+        return self._count(self._port_ips.get(port))
+
+    def endpoint_peer_port_count(self, ip: str, port: int) -> int:
+        """Number of distinct peer ports observed for endpoint ``ip:port``."""
+        key = self.endpoint_key(ip, port)
+        return 0 if key is None else self._count(self._endpoint_peer_ports.get(key))
+
+    @property
+    def connection_count(self) -> int:
+        """Number of connections recorded (including merged indexes)."""
+        return self._connection_count
+
+    def __len__(self) -> int:
+        """Number of distinct endpoints tracked."""
+        return len(self._endpoint_peers)
+
+    # ------------------------------------------------------------------
+    # Merge and serialization
+    # ------------------------------------------------------------------
+
+    def merge(self, other: CardinalityIndex) -> None:
+        """
+        Merge another index into this one.
+
+        Interned IP ids of ``other`` are remapped into this index. Exact
+        counters are unioned; HyperLogLog counters are merged register-wise.
+
+        Raises:
+            ValueError: If the precisions differ, or if an approximate index
+                would be merged into an exact one
+        """
+        if other.precision != self.precision:
+            raise ValueError(
+                f"Cannot merge cardinality indexes with different precision "
+                f"({self.precision} vs {other.precision})"
+            )
+        if self.mode == "exact" and other.mode != "exact":
+            raise ValueError("Cannot merge an approximate cardinality index into an exact one")
+
+        id_map = [self._intern(ip) for ip in other._ips]
+
+        def remap_key(key: int) -> int:
+            return (id_map[key >> 16] << 16) | (key & 0xFFFF)
+
+        self._merge_table(self._endpoint_peers, other._endpoint_peers, remap_key, id_map, False)
+        self._merge_table(self._port_ips, other._port_ips, None, id_map, False)
+        self._merge_table(self._endpoint_peer_ports, other._endpoint_peer_ports, remap_key, None, True)
+        self._connection_count += other._connection_count
+
+    def _merge_table(
+        self,
+        table: dict[int, _Counter],
+        other_table: dict[int, _Counter],
+        remap_key: Any,
+        id_map: list[int] | None,
+        port_members: bool,
+    ) -> None:
+        for key, counter in other_table.items():
+            target_key = remap_key(key) if remap_key else key
+            if isinstance(counter, bytearray):
+                existing = table.get(target_key)
+                if existing is None or not isinstance(existing, bytearray):
+                    merged = bytearray(counter)
+                    for member in self._members(existing):
+                        self._hll_add(merged, self._member_hash(member, port_members))
+                    table[target_key] = merged
+                else:
+                    for i, rank in enumerate(counter):
+                        if rank > existing[i]:
+                            existing[i] = rank
+                continue
+
+            for member in self._members(counter):
+                mapped = id_map[member] if id_map is not None else member
+                self._add(table, target_key, mapped, self._member_hash(mapped, port_members))
+
+    @staticmethod
+    def _members(counter: _Counter | None) -> tuple[int, ...] | set[int]:
+        if counter is None:
+            return ()
+        if isinstance(counter, int):
+            return (counter,)
+        if isinstance(counter, set):
+            return counter
+        raise TypeError("HyperLogLog counters do not expose members")
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize the index to a JSON-compatible dictionary."""
+
+        def dump(table: dict[int, _Counter]) -> list[list[Any]]:
+            rows: list[list[Any]] = []
+            for key, counter in table.items():
+                if isinstance(counter, bytearray):
+                    rows.append([key, base64.b64encode(bytes(counter)).decode("ascii")])
+                elif isinstance(counter, set):
+                    rows.append([key, sorted(counter)])
+                else:
+                    rows.append([key, counter])
+            return rows
+
+        return {
+            "version": self.FORMAT_VERSION,
+            "mode": self.mode,
+            "precision": self.precision,
+            "connection_count": self._connection_count,
+            "ips": list(self._ips),
+            "endpoint_peers": dump(self._endpoint_peers),
+            "port_ips": dump(self._port_ips),
+            "endpoint_peer_ports": dump(self._endpoint_peer_ports),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> CardinalityIndex:
+        """
+        Deserialize an index produced by :meth:`to_dict`.
+
+        Raises:
+            ValueError: If the payload is missing required fields
+        """
+        try:
+            index = cls(mode=data["mode"], precision=data["precision"])
+            for ip in data["ips"]:
+                index._intern(ip)
+
+            def load(rows: list[list[Any]]) -> dict[int, _Counter]:
+                table: dict[int, _Counter] = {}
+                for key, value in rows:
+                    if isinstance(value, str):
+                        table[key] = bytearray(base64.b64decode(value))
+                    elif isinstance(value, list):
+                        table[key] = set(value)
+                    else:
+                        table[key] = value
+                return table
+
+            index._endpoint_peers = load(data["endpoint_peers"])
+            index._port_ips = load(data["port_ips"])
+            index._endpoint_peer_ports = load(data["endpoint_peer_ports"])
+            index._connection_count = data.get("connection_count", 0)
+        except KeyError as e:
+            raise ValueError(f"Missing required field in cardinality index: {e}") from e
+        return index
+
+    def save(self, output_file: Path) -> None:
+        """Write the index to a JSON file."""
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, input_file: Path) -> CardinalityIndex:
+        """
+        Load an index written by :meth:`save`.
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            ValueError: If the file is not a valid cardinality index
+        """
+        if not input_file.exists():
+            raise FileNotFoundError(f"Cardinality index not found: {input_file}")
+        try:
+            with open(input_file, encoding="utf-8") as f:
+                data = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON format in cardinality index: {e}") from e
+        return cls.from_dict(data)
+
+
+@dataclass(slots=True)
+class CardinalityOptions:
+    """
+    Cardinality settings of the server detectors of one command run.
+
+    Attributes:
+        mode: "exact" or "approx" distinct counters
+        index_file: JSON index merged into every detector before its
+            connections are collected and rewritten once it is finalized, so
+            the statistics accumulate across runs (None = not persisted)
+    """
+
+    mode: str = "exact"
+    index_file: Path | None = None
+
+    def open_index(self) -> CardinalityIndex:
+        """
+        Create the index of a new detector, seeded with the persisted one.
+
+        Raises:
+            CapMasterError: If the persisted index is invalid or cannot be
+                merged into an index of ``mode``
+        """
+        index = CardinalityIndex(mode=self.mode)
+        if self.index_file is not None and self.index_file.exists():
+            try:
+                index.merge(CardinalityIndex.load(self.index_file))
+            except ValueError as e:
+                raise CapMasterError(
+                    f"Cannot reuse cardinality index {self.index_file}: {e}",
+                    "Use the same --cardinality mode the index was built with, "
+                    "or point --cardinality-index to a new file",
+                ) from e
+        return index
+
+    def save_index(self, index: CardinalityIndex) -> None:
+        """Persist ``index`` to ``index_file``, if set."""
+        if self.index_file is not None:
+            index.save(self.index_file)
@@ -11,7 +11,11 @@ from typing import Any
 import click
 from click.core import ParameterSource
 
-from capmaster.utils.cli_options import unified_input_options, validate_database_params
+from capmaster.utils.cli_options import (
+    cardinality_options,
+    unified_input_options,
+    validate_database_params,
+)
 
 
 
@@ -161,6 +165,7 @@ def register_match_command(plugin: Any, cli_group: click.Group) -> None:
         type=click.Path(exists=True, dir_okay=False, path_type=Path),
         help="Path to a text file containing known server IPs and ports (e.g., 10.10.10.10:80 or 10.10.10.11:*)",
     )
+    @cardinality_options
     @click.pass_context
     def match_command(
         ctx: click.Context,
@@ -197,6 +202,8 @@ def register_match_command(plugin: Any, cli_group: click.Group) -> None:
         service_group_mapping: Path | None,
         match_json: Path | None,
         service_list: Path | None,
+        cardinality: str,
+        cardinality_index: Path | None,
     ) -> None:
         """Match TCP connections between PCAP files.
 
@@ -237,6 +244,9 @@ def register_match_command(plugin: Any, cli_group: click.Group) -> None:
           # Custom sampling parameters
           capmaster match -i captures/ --enable-sampling --sample-threshold 5000 --sample-rate 0.3
 
+          # Approximate cardinality counters, accumulated across runs
+          capmaster match -i captures/ --cardinality approx --cardinality-index cardinality.json
+
         \b
         Bucketing Strategies:
           auto    - Automatically choose best strategy
@@ -322,6 +332,8 @@ def register_match_command(plugin: Any, cli_group: click.Group) -> None:
             service_group_mapping=service_group_mapping,
             match_json=match_json,
             service_list=service_list,
+            cardinality=cardinality,
+            cardinality_index=cardinality_index,
         )
         ctx.exit(exit_code)
 
@@ -415,7 +427,17 @@ def register_comparative_analysis_command(plugin: Any, cli_group: click.Group) -
     @click.option(
         "--match-file",
         type=click.Path(exists=True, path_type=Path),
-        help="Packet diff mode: reuse matches saved from `capmaster match --match-json`.",
+        help=(
+            "Packet diff mode: reuse matches saved from `capmaster match --match-json` "
+            "or the .cmstore file written next to the match report."
+        ),
+    )
+    @click.option(
+        "-j",
+        "--jobs",
+        type=click.IntRange(min=1),
+        default=1,
+        help="Packet diff mode: number of worker processes for packet-level comparison (default: 1).",
     )
     @click.pass_context
     def comparative_analysis_command(
@@ -444,6 +466,7 @@ def register_comparative_analysis_command(plugin: Any, cli_group: click.Group) -
         kase_id: int | None,
         match_mode: str,
         match_file: Path | None,
+        jobs: int,
     ) -> None:
         """
         Perform comparative analysis between two PCAP files.
@@ -479,7 +502,7 @@ def register_comparative_analysis_command(plugin: Any, cli_group: click.Group) -
 
           --packet-diff: Perform packet-level comparison identical to 'capmaster compare'
             Supports: --threshold, --bucket, --show-flow-hash, --matched-only,
-                      --db-connection/--kase-id, --match-mode, --match-file
+                      --db-connection/--kase-id, --match-mode, --match-file, --jobs
 
         \b
         Output:
@@ -517,6 +540,7 @@ def register_comparative_analysis_command(plugin: Any, cli_group: click.Group) -
             "kase_id",
             "match_mode",
             "match_file",
+            "jobs",
         ]
         if not packet_diff:
             for param_name in packet_diff_only_params:
@@ -571,5 +595,6 @@ def register_comparative_analysis_command(plugin: Any, cli_group: click.Group) -
             kase_id=kase_id,
             match_mode=match_mode,
             match_file=match_file,
+            jobs=jobs,
         )
         ctx.exit(exit_code)
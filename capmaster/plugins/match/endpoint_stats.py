@@ -2,12 +2,12 @@
 
 from __future__ import annotations
 
-from collections import defaultdict
-from dataclasses import dataclass
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
 
 from capmaster.core.connection.matcher import ConnectionMatch
 from capmaster.plugins.match.server_detector import ServerDetector, ServerInfo
-from capmaster.plugins.match.ttl_utils import most_common_hops
+from capmaster.plugins.match.ttl_utils import calculate_hops
 
 
 @dataclass(frozen=True)
@@ -163,6 +163,92 @@ class ServiceStats:
         )
 
 
+# Numeric weights used to average confidence levels
+_CONFIDENCE_SCORES = {
+    "HIGH": 4,
+    "MEDIUM": 3,
+    "LOW": 2,
+    "VERY_LOW": 1,
+    "UNKNOWN": 0,
+}
+
+
+class _TtlHistogram:
+    """
+    Running TTL histogram for one endpoint pair and role.
+
+    Each TTL value maps to ``[count, first_seq]`` where ``first_seq`` is the
+    sequence number of the first match that contributed the value. Ties on
+    count are broken by ``first_seq``, which reproduces
+    ``Counter(values).most_common(1)`` over the values in match order.
+    """
+
+    __slots__ = ("_counts",)
+
+    def __init__(self) -> None:
+        self._counts: dict[int, list[int]] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self._counts)
+
+    def add(self, ttl: int, seq: int) -> None:
+        entry = self._counts.get(ttl)
+        if entry is None:
+            self._counts[ttl] = [1, seq]
+        else:
+            entry[0] += 1
+            if seq < entry[1]:
+                entry[1] = seq
+
+    def most_common(self) -> int:
+        """Most common TTL value (0 if no value was recorded)."""
+        if not self._counts:
+            return 0
+        return min(self._counts.items(), key=lambda item: (-item[1][0], item[1][1]))[0]
+
+    def most_common_hops(self) -> int | None:
+        """Most common hop count derived from the TTLs (None if no data)."""
+        if not self._counts:
+            return None
+        hops_counts: dict[int, list[int]] = {}
+        for ttl, (count, first_seq) in self._counts.items():
+            hops = calculate_hops(ttl)
+            entry = hops_counts.get(hops)
+            if entry is None:
+                hops_counts[hops] = [count, first_seq]
+            else:
+                entry[0] += count
+                entry[1] = min(entry[1], first_seq)
+        return min(hops_counts.items(), key=lambda item: (-item[1][0], item[1][1]))[0]
+
+
+@dataclass
+class _PairAggregate:
+    """Running aggregate for one (tuple_a, tuple_b) endpoint pair."""
+
+    first_seq: int
+    count: int = 0
+    confidence_tally: Counter[str] = field(default_factory=Counter)
+    client_ttls_a: _TtlHistogram = field(default_factory=_TtlHistogram)
+    server_ttls_a: _TtlHistogram = field(default_factory=_TtlHistogram)
+    client_ttls_b: _TtlHistogram = field(default_factory=_TtlHistogram)
+    server_ttls_b: _TtlHistogram = field(default_factory=_TtlHistogram)
+    total_bytes_a: int = 0
+    total_bytes_b: int = 0
+
+
+@dataclass
+class _ServiceAggregate:
+    """Running aggregate for one service (server port + protocol of file A)."""
+
+    total_connections: int = 0
+    pair_keys: list[tuple[EndpointTuple, EndpointTuple]] = field(default_factory=list)
+    unique_server_ips_a: set[str] = field(default_factory=set)
+    unique_server_ips_b: set[str] = field(default_factory=set)
+    unique_client_ips_a: set[str] = field(default_factory=set)
+    unique_client_ips_b: set[str] = field(default_factory=set)
+
+
 class EndpointStatsCollector:
     """
     Collect and aggregate endpoint statistics for matched connections.
@@ -170,35 +256,39 @@ class EndpointStatsCollector:
     This collector processes matched connection pairs and aggregates them
     by endpoint tuples (client IP, server IP, server port), showing the
     paired relationship between files A and B.
+
+    Aggregation is incremental: every match updates a per-pair and a
+    per-service running aggregate (counts, confidence tallies, TTL histograms
+    and byte totals), so memory is proportional to the number of groups
+    rather than the number of matches. Matches whose server/client roles can
+    be decided without cardinality data (service list, SYN, port heuristics)
+    are folded in immediately; only the remaining ambiguous matches are held
+    until :meth:`finalize` has the cardinality statistics.
     """
 
-    def __init__(self, detector: ServerDetector):
+    def __init__(self, detector: ServerDetector, detector_finalized: bool = False):
         """
         Initialize the collector.
 
         Args:
             detector: Server detector for determining server/client roles
+            detector_finalized: True if the detector already holds the final
+                cardinality statistics (e.g. a prepopulated index). Matches are
+                then resolved as they arrive and are not collected again.
         """
         self.detector = detector
+        self._detector_finalized = detector_finalized
 
-        # Key: (tuple_a, tuple_b), Value: count
-        self.pair_stats: dict[tuple[EndpointTuple, EndpointTuple], int] = defaultdict(int)
-
-        # Track confidences for averaging
-        self.confidences: dict[tuple[EndpointTuple, EndpointTuple], list[str]] = defaultdict(list)
+        # Key: (tuple_a, tuple_b), Value: running aggregate
+        self._pairs: dict[tuple[EndpointTuple, EndpointTuple], _PairAggregate] = {}
 
-        # Track TTL values for averaging
-        self.client_ttls_a: dict[tuple[EndpointTuple, EndpointTuple], list[int]] = defaultdict(list)
-        self.server_ttls_a: dict[tuple[EndpointTuple, EndpointTuple], list[int]] = defaultdict(list)
-        self.client_ttls_b: dict[tuple[EndpointTuple, EndpointTuple], list[int]] = defaultdict(list)
-        self.server_ttls_b: dict[tuple[EndpointTuple, EndpointTuple], list[int]] = defaultdict(list)
+        # Key: service of file A, Value: running aggregate
+        self._services: dict[ServiceKey, _ServiceAggregate] = {}
 
-        # Track total bytes for each endpoint pair
-        self.total_bytes_a: dict[tuple[EndpointTuple, EndpointTuple], int] = defaultdict(int)
-        self.total_bytes_b: dict[tuple[EndpointTuple, EndpointTuple], int] = defaultdict(int)
+        # Matches waiting for cardinality analysis, with their arrival order
+        self._pending: list[tuple[int, ConnectionMatch]] = []
 
-        # Store all matches for cardinality analysis
-        self.matches: list[ConnectionMatch] = []
+        self._next_seq = 0
 
     def add_match(self, match: ConnectionMatch) -> None:
         """
@@ -207,29 +297,54 @@ class EndpointStatsCollector:
         Args:
             match: Matched connection pair from files A and B
         """
-        # Store match for later processing
-        self.matches.append(match)
+        seq = self._next_seq
+        self._next_seq += 1
+
+        if self._detector_finalized:
+            self._process_match(match, seq=seq)
+            return
+
+        self.detector.collect_connection(match.conn1)
+        self.detector.collect_connection(match.conn2)
+
+        info_a = self.detector.detect_without_cardinality(match.conn1)
+        info_b = (
+            self.detector.detect_without_cardinality(match.conn2) if info_a is not None else None
+        )
+        if info_a is None or info_b is None:
+            self._pending.append((seq, match))
+            return
+
+        self._process_match(match, info_a, info_b, seq=seq)
 
     def finalize(self) -> None:
         """
         Finalize statistics collection.
 
-        This performs cardinality analysis and then processes all matches
-        with the enhanced server detection.
+        This performs cardinality analysis and then resolves the matches whose
+        roles depended on it with the enhanced server detection.
         """
-        # Step 1: Collect all connections for cardinality analysis
-        for match in self.matches:
-            self.detector.collect_connection(match.conn1)
-            self.detector.collect_connection(match.conn2)
-
-        # Step 2: Finalize cardinality analysis
-        self.detector.finalize_cardinality()
-
-        # Step 3: Process all matches with enhanced detection
-        for match in self.matches:
-            self._process_match(match)
-
-    def _process_match(self, match: ConnectionMatch) -> None:
+        if not self._detector_finalized:
+            self.detector.finalize_cardinality()
+            self._detector_finalized = True
+
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        # Resolve the roles of each side in one batch
+        infos_a = self.detector.detect_many([match.conn1 for _, match in pending])
+        infos_b = self.detector.detect_many([match.conn2 for _, match in pending])
+        for (seq, match), info_a, info_b in zip(pending, infos_a, infos_b):
+            self._process_match(match, info_a, info_b, seq=seq)
+
+    def _process_match(
+        self,
+        match: ConnectionMatch,
+        info_a: ServerInfo | None = None,
+        info_b: ServerInfo | None = None,
+        seq: int | None = None,
+    ) -> None:
         """Process a single match with server detection.
 
         This implementation respects the server/client roles determined by
@@ -238,12 +353,21 @@ class EndpointStatsCollector:
 
         Args:
             match: Matched connection pair from files A and B
+            info_a: Pre-computed detection result for ``match.conn1`` (optional)
+            info_b: Pre-computed detection result for ``match.conn2`` (optional)
+            seq: Arrival order of the match, used for deterministic tie-breaks
         """
+        if seq is None:
+            seq = self._next_seq
+            self._next_seq += 1
+
         # Detect server/client roles for both connections. This may differ from
         # the raw TcpConnection roles if service_list/cardinality/heuristics
         # indicate a swap is needed.
-        info_a: ServerInfo = self.detector.detect(match.conn1)
-        info_b: ServerInfo = self.detector.detect(match.conn2)
+        if info_a is None:
+            info_a = self.detector.detect(match.conn1)
+        if info_b is None:
+            info_b = self.detector.detect(match.conn2)
 
         # Get protocol from connections
         protocol_a = match.conn1.protocol
@@ -279,13 +403,20 @@ class EndpointStatsCollector:
 
         # Use ordered pair as key (tuple_a, tuple_b)
         pair_key = (tuple_a, tuple_b)
+        pair = self._pairs.get(pair_key)
+        if pair is None:
+            pair = self._pairs[pair_key] = _PairAggregate(first_seq=seq)
+            self._add_pair_to_service(pair_key)
+        elif seq < pair.first_seq:
+            pair.first_seq = seq
 
         # Increment count
-        self.pair_stats[pair_key] += 1
+        pair.count += 1
+        self._services[ServiceKey(tuple_a.server_port, tuple_a.protocol)].total_connections += 1
 
         # Track confidence (use the lower of the two)
         confidence = self._min_confidence(info_a.confidence, info_b.confidence)
-        self.confidences[pair_key].append(confidence)
+        pair.confidence_tally[confidence] += 1
 
         # Track TTL values, swapping client/server TTLs when detector indicates
         # that roles should be swapped. This keeps "client hops" and
@@ -296,9 +427,9 @@ class EndpointStatsCollector:
             client_ttl_a, server_ttl_a = server_ttl_a, client_ttl_a
 
         if client_ttl_a > 0:
-            self.client_ttls_a[pair_key].append(client_ttl_a)
+            pair.client_ttls_a.add(client_ttl_a, seq)
         if server_ttl_a > 0:
-            self.server_ttls_a[pair_key].append(server_ttl_a)
+            pair.server_ttls_a.add(server_ttl_a, seq)
 
         client_ttl_b = match.conn2.client_ttl
         server_ttl_b = match.conn2.server_ttl
@@ -306,80 +437,112 @@ class EndpointStatsCollector:
             client_ttl_b, server_ttl_b = server_ttl_b, client_ttl_b
 
         if client_ttl_b > 0:
-            self.client_ttls_b[pair_key].append(client_ttl_b)
+            pair.client_ttls_b.add(client_ttl_b, seq)
         if server_ttl_b > 0:
-            self.server_ttls_b[pair_key].append(server_ttl_b)
+            pair.server_ttls_b.add(server_ttl_b, seq)
 
         # Track total bytes
-        self.total_bytes_a[pair_key] += match.conn1.total_bytes
-        self.total_bytes_b[pair_key] += match.conn2.total_bytes
+        pair.total_bytes_a += match.conn1.total_bytes
+        pair.total_bytes_b += match.conn2.total_bytes
+
+    def _add_pair_to_service(self, pair_key: tuple[EndpointTuple, EndpointTuple]) -> None:
+        """Register a newly seen endpoint pair with its service aggregate."""
+        tuple_a, tuple_b = pair_key
+        service_key = ServiceKey(server_port=tuple_a.server_port, protocol=tuple_a.protocol)
+        service = self._services.get(service_key)
+        if service is None:
+            service = self._services[service_key] = _ServiceAggregate()
+        service.pair_keys.append(pair_key)
+        service.unique_server_ips_a.add(tuple_a.server_ip)
+        service.unique_server_ips_b.add(tuple_b.server_ip)
+        service.unique_client_ips_a.add(tuple_a.client_ip)
+        service.unique_client_ips_b.add(tuple_b.client_ip)
+
+    def _ordered_pair_keys(self) -> list[tuple[EndpointTuple, EndpointTuple]]:
+        """Pair keys sorted by count (descending), ties in arrival order."""
+        return sorted(
+            self._pairs,
+            key=lambda key: (-self._pairs[key].count, self._pairs[key].first_seq),
+        )
+
+    def _build_pair_stats(
+        self, pair_key: tuple[EndpointTuple, EndpointTuple]
+    ) -> EndpointPairStats:
+        """Convert a running pair aggregate into EndpointPairStats."""
+        tuple_a, tuple_b = pair_key
+        pair = self._pairs[pair_key]
+
+        # For topology purposes we want to distinguish between "no TTL data"
+        # and a true "0 hops" observation, so hops are reported as None when
+        # no TTL was recorded. Topology treats None specially while match
+        # diagnostics can still display the raw most common TTL values.
+        return EndpointPairStats(
+            tuple_a=tuple_a,
+            tuple_b=tuple_b,
+            count=pair.count,
+            confidence=self._average_confidence_tally(pair.confidence_tally),
+            client_ttl_a=pair.client_ttls_a.most_common(),
+            server_ttl_a=pair.server_ttls_a.most_common(),
+            client_ttl_b=pair.client_ttls_b.most_common(),
+            server_ttl_b=pair.server_ttls_b.most_common(),
+            client_hops_a=pair.client_ttls_a.most_common_hops(),
+            server_hops_a=pair.server_ttls_a.most_common_hops(),
+            client_hops_b=pair.client_ttls_b.most_common_hops(),
+            server_hops_b=pair.server_ttls_b.most_common_hops(),
+            total_bytes_a=pair.total_bytes_a,
+            total_bytes_b=pair.total_bytes_b,
+        )
 
     def get_stats(self) -> list[EndpointPairStats]:
         """
         Get aggregated statistics.
 
+        Matches still waiting for cardinality analysis are only included
+        after :meth:`finalize` has been called.
+
         Returns:
             List of EndpointPairStats sorted by count (descending)
         """
-        results = []
-        for (tuple_a, tuple_b), count in self.pair_stats.items():
-            # Calculate average confidence
-            confs = self.confidences[(tuple_a, tuple_b)]
-            avg_conf = self._average_confidence(confs)
-
-            # Calculate most common TTL values
-            client_ttl_a = self._most_common_ttl(self.client_ttls_a[(tuple_a, tuple_b)])
-            server_ttl_a = self._most_common_ttl(self.server_ttls_a[(tuple_a, tuple_b)])
-            client_ttl_b = self._most_common_ttl(self.client_ttls_b[(tuple_a, tuple_b)])
-            server_ttl_b = self._most_common_ttl(self.server_ttls_b[(tuple_a, tuple_b)])
-
-            # Calculate network hops from TTL values.
-            #
-            # For topology purposes we want to distinguish between "no TTL data"
-            # and a true "0 hops" observation. The ttl_utils.most_common_hops()
-            # helper returns 0 when given an empty list, which would conflate these
-            # cases. Here we interpret an empty TTL list as "no data" and report
-            # hops as None; non-empty TTL lists are converted to hops via
-            # most_common_hops(). This keeps EndpointPairStats compatible with both
-            # topology (which treats None specially) and match diagnostics (which
-            # can still display the raw TTL values stored above).
-
-            client_ttls_a = self.client_ttls_a[(tuple_a, tuple_b)]
-            server_ttls_a = self.server_ttls_a[(tuple_a, tuple_b)]
-            client_ttls_b = self.client_ttls_b[(tuple_a, tuple_b)]
-            server_ttls_b = self.server_ttls_b[(tuple_a, tuple_b)]
-
-            client_hops_a = most_common_hops(client_ttls_a) if client_ttls_a else None
-            server_hops_a = most_common_hops(server_ttls_a) if server_ttls_a else None
-            client_hops_b = most_common_hops(client_ttls_b) if client_ttls_b else None
-            server_hops_b = most_common_hops(server_ttls_b) if server_ttls_b else None
-
-            # Get total bytes for this endpoint pair
-            total_bytes_a = self.total_bytes_a[(tuple_a, tuple_b)]
-            total_bytes_b = self.total_bytes_b[(tuple_a, tuple_b)]
+        return [self._build_pair_stats(key) for key in self._ordered_pair_keys()]
+
+    def get_service_stats(self) -> list[ServiceStats]:
+        """
+        Get statistics aggregated by service (server port + protocol).
+
+        Equivalent to ``aggregate_by_service(self.get_stats())`` but built from
+        the running per-service aggregates instead of a second pass over the
+        endpoint pairs.
 
+        Returns:
+            List of ServiceStats, sorted by total connections (descending)
+        """
+        ordered_keys = self._ordered_pair_keys()
+        rank = {key: index for index, key in enumerate(ordered_keys)}
+        pair_stats = {key: self._build_pair_stats(key) for key in ordered_keys}
+
+        results = []
+        for service_key, service in self._services.items():
+            if not service.pair_keys:
+                continue
+            keys = sorted(service.pair_keys, key=rank.__getitem__)
             results.append(
-                EndpointPairStats(
-                    tuple_a=tuple_a,
-                    tuple_b=tuple_b,
-                    count=count,
-                    confidence=avg_conf,
-                    client_ttl_a=client_ttl_a,
-                    server_ttl_a=server_ttl_a,
-                    client_ttl_b=client_ttl_b,
-                    server_ttl_b=server_ttl_b,
-                    client_hops_a=client_hops_a,
-                    server_hops_a=server_hops_a,
-                    client_hops_b=client_hops_b,
-                    server_hops_b=server_hops_b,
-                    total_bytes_a=total_bytes_a,
-                    total_bytes_b=total_bytes_b,
+                (
+                    rank[keys[0]],
+                    ServiceStats(
+                        service_key=service_key,
+                        endpoint_pairs=[pair_stats[key] for key in keys],
+                        total_connections=service.total_connections,
+                        unique_server_ips_a=set(service.unique_server_ips_a),
+                        unique_server_ips_b=set(service.unique_server_ips_b),
+                        unique_client_ips_a=set(service.unique_client_ips_a),
+                        unique_client_ips_b=set(service.unique_client_ips_b),
+                    ),
                 )
             )
 
-        # Sort by count (descending)
-        results.sort(key=lambda x: x.count, reverse=True)
-        return results
+        # Sort by total connections (descending), ties by the best ranked pair
+        results.sort(key=lambda item: (-item[1].total_connections, item[0]))
+        return [service for _, service in results]
 
     def _min_confidence(self, conf1: str, conf2: str) -> str:
         """
@@ -409,21 +572,25 @@ class EndpointStatsCollector:
         Returns:
             Average confidence level
         """
-        if not confidences:
-            return "UNKNOWN"
+        return self._average_confidence_tally(Counter(confidences))
+
+    def _average_confidence_tally(self, tally: Counter[str]) -> str:
+        """
+        Calculate average confidence level from a tally of levels.
 
-        # Map confidence to numeric values
-        conf_map = {
-            "HIGH": 4,
-            "MEDIUM": 3,
-            "LOW": 2,
-            "VERY_LOW": 1,
-            "UNKNOWN": 0,
-        }
+        Args:
+            tally: Number of occurrences of each confidence level
+
+        Returns:
+            Average confidence level
+        """
+        count = sum(tally.values())
+        if not count:
+            return "UNKNOWN"
 
         # Calculate average
-        total = sum(conf_map.get(c, 0) for c in confidences)
-        avg = total / len(confidences)
+        total = sum(_CONFIDENCE_SCORES.get(c, 0) * n for c, n in tally.items())
+        avg = total / count
 
         # Map back to confidence level
         if avg >= 3.5:
@@ -450,8 +617,6 @@ class EndpointStatsCollector:
         if not ttls:
             return 0
 
-        from collections import Counter
-
         return Counter(ttls).most_common(1)[0][0]
 
 
@@ -107,7 +107,39 @@ def save_matches_json(
     """Save match results to JSON file using MatchSerializer."""
     from capmaster.core.connection.match_serializer import MatchSerializer
 
-    metadata = {
+    MatchSerializer.save_matches(
+        matches=matches,
+        output_file=output_file,
+        file1_path=str(file1),
+        file2_path=str(file2),
+        metadata=_match_metadata(stats),
+    )
+
+
+def save_match_store(
+    matches: list,
+    report_file: Path,
+    file1: Path,
+    file2: Path,
+    stats: dict,
+) -> Path:
+    """Save match results to a binary match store next to the text report."""
+    from capmaster.core.connection.match_store import MatchStore
+
+    store_file = MatchStore.path_for_report(report_file)
+    MatchStore.save(
+        matches=matches,
+        output_file=store_file,
+        file1_path=file1,
+        file2_path=file2,
+        metadata=_match_metadata(stats),
+    )
+    return store_file
+
+
+def _match_metadata(stats: dict) -> dict:
+    """Select the match statistics persisted with serialized matches."""
+    return {
         "total_connections_1": stats["total_connections_1"],
         "total_connections_2": stats["total_connections_2"],
         "matched_pairs": stats["matched_pairs"],
@@ -119,11 +151,3 @@ def save_matches_json(
         "match_mode": stats["match_mode"],
     }
 
-    MatchSerializer.save_matches(
-        matches=matches,
-        output_file=output_file,
-        file1_path=str(file1),
-        file2_path=str(file2),
-        metadata=metadata,
-    )
-
@@ -4,8 +4,9 @@ from __future__ import annotations
 
 from contextlib import nullcontext
 import logging
+from itertools import chain
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
 from rich.progress import (
     BarColumn,
@@ -15,10 +16,16 @@ from rich.progress import (
     TextColumn,
 )
 
+from capmaster.core.concurrency import run_dual
 from capmaster.core.connection.connection_extractor import extract_connections_from_pcap
 from capmaster.core.input_manager import InputManager
-from capmaster.plugins.compare_common.packet_comparator import PacketComparator
-from capmaster.plugins.compare_common.packet_extractor import PacketExtractor
+from capmaster.plugins.compare_common.packet_comparator import (
+    ComparisonResult,
+    PacketComparator,
+)
+from capmaster.plugins.compare_common.packet_extractor import PacketExtractor, TcpPacket
+from capmaster.plugins.compare_common.packet_store import StreamPacketStore
+from capmaster.plugins.compare_common.parallel_compare import compare_pairs_parallel
 from capmaster.plugins.match.packet_diff_utils import (
     load_matches_from_file,
     output_packet_diff_results,
@@ -33,6 +40,33 @@ from capmaster.utils.errors import (
 logger = logging.getLogger(__name__)
 
 
+def _read_matched_streams(
+    store: StreamPacketStore,
+    extractor: PacketExtractor,
+    pcap_file: Path,
+    stream_ids: list[int],
+    total_streams: int,
+) -> dict[int, list[TcpPacket]]:
+    """
+    Read the packets of matched streams retained by the extraction pass.
+
+    Streams the store never saw (connections that did not come from the
+    fused extraction pass) fall back to a dedicated tshark pass.
+    """
+    packets_by_stream = store.packets_by_stream(stream_ids)
+    missing = sorted({sid for sid in stream_ids if sid not in store})
+    if missing:
+        logger.debug(
+            "Re-extracting %s stream(s) not retained for %s", len(missing), pcap_file.name
+        )
+        packets_by_stream.update(
+            extractor.extract_multiple_streams(
+                pcap_file, missing, total_streams=total_streams
+            )
+        )
+    return packets_by_stream
+
+
 def execute_packet_diff(
     input_path: str | None = None,
     file1: Path | None = None,
@@ -53,6 +87,7 @@ def execute_packet_diff(
     kase_id: int | None = None,
     match_mode: str = "one-to-one",
     match_file: Path | None = None,
+    jobs: int = 1,
 ) -> int:
     """Execute packet-level comparison between two PCAP files."""
 
@@ -106,30 +141,35 @@ def execute_packet_diff(
             )
         )
 
-        with progress_context as progress:
+        # Packet fields of every TCP stream are retained during connection
+        # extraction, so the diff phase needs no second tshark pass per file
+        with (
+            progress_context as progress,
+            StreamPacketStore() as baseline_store,
+            StreamPacketStore() as compare_store,
+        ):
             extract_task = (
                 progress.add_task("[cyan]Extracting connections...", total=2)
                 if not effective_quiet
                 else None
             )
 
-            baseline_connections = extract_connections_from_pcap(baseline_file)
-            logger.info(
-                "Found %s connections in %s",
-                len(baseline_connections),
-                baseline_file.name,
-            )
-            if not effective_quiet:
-                progress.update(extract_task, advance=1)
+            def extract(pcap_file: Path, store: StreamPacketStore) -> list:
+                connections = extract_connections_from_pcap(pcap_file, packet_sink=store)
+                logger.info(
+                    "Found %s connections in %s",
+                    len(connections),
+                    pcap_file.name,
+                )
+                if not effective_quiet:
+                    progress.update(extract_task, advance=1)
+                return connections
 
-            compare_connections = extract_connections_from_pcap(compare_file)
-            logger.info(
-                "Found %s connections in %s",
-                len(compare_connections),
-                compare_file.name,
+            # Both captures are dissected concurrently
+            baseline_connections, compare_connections = run_dual(
+                lambda: extract(baseline_file, baseline_store),
+                lambda: extract(compare_file, compare_store),
             )
-            if not effective_quiet:
-                progress.update(extract_task, advance=1)
 
             match_task = (
                 progress.add_task("[yellow]Matching connections...", total=1)
@@ -179,15 +219,24 @@ def execute_packet_diff(
             baseline_stream_ids = [match.conn1.stream_id for match in matches]
             compare_stream_ids = [match.conn2.stream_id for match in matches]
 
-            baseline_packets_by_stream = extractor.extract_multiple_streams(
-                baseline_file,
-                baseline_stream_ids,
-            )
-            compare_packets_by_stream = extractor.extract_multiple_streams(
-                compare_file,
-                compare_stream_ids,
+            baseline_packets_by_stream, compare_packets_by_stream = run_dual(
+                lambda: _read_matched_streams(
+                    baseline_store,
+                    extractor,
+                    baseline_file,
+                    baseline_stream_ids,
+                    total_streams=len(baseline_connections),
+                ),
+                lambda: _read_matched_streams(
+                    compare_store,
+                    extractor,
+                    compare_file,
+                    compare_stream_ids,
+                    total_streams=len(compare_connections),
+                ),
             )
 
+            pairs = []
             for match in matches:
                 baseline_packets = baseline_packets_by_stream.get(
                     match.conn1.stream_id, []
@@ -200,13 +249,23 @@ def execute_packet_diff(
                     f"{match.conn1.client_ip}:{match.conn1.client_port} <-> "
                     f"{match.conn1.server_ip}:{match.conn1.server_port}"
                 )
-
-                result = comparator.compare(
-                    baseline_packets,
-                    compare_packets,
-                    conn_id,
-                    matched_only,
+                pairs.append((baseline_packets, compare_packets, conn_id))
+
+            # Batch comparison indexes each stream once, even when it takes
+            # part in several matches; with several jobs, chunks of pairs are
+            # compared in worker processes and come back in order
+            comparisons: Iterable[ComparisonResult]
+            if jobs > 1 and len(pairs) > 1:
+                logger.info("Comparing packets with %s worker processes", jobs)
+                comparisons = chain.from_iterable(
+                    compare_pairs_parallel(pairs, jobs, matched_only)
                 )
+            else:
+                comparisons = comparator.compare_many(pairs, matched_only)
+
+            for match, (baseline_packets, compare_packets, _), result in zip(
+                matches, pairs, comparisons
+            ):
                 results.append((match, baseline_packets, compare_packets, result))
 
                 if not effective_quiet:
@@ -3,11 +3,15 @@
 from __future__ import annotations
 
 import logging
+import sys
 from pathlib import Path
 from typing import Any
 
 from capmaster.plugins.compare_common.flow_hash import calculate_connection_flow_hash
-from capmaster.plugins.compare_common.output_formatter import build_report_text
+from capmaster.plugins.compare_common.output_formatter import (
+    iter_report_lines,
+    write_lines,
+)
 from capmaster.plugins.compare_common.packet_comparator import DiffType
 from capmaster.plugins.compare_common.utils import (
     format_tcp_flags_change,
@@ -24,11 +28,15 @@ def load_matches_from_file(
     baseline_connections: list,
     compare_connections: list,
 ) -> list:
-    """Load matches from a JSON file and validate against current connections."""
+    """Load matches from a JSON file or match store and validate against current connections."""
 
     from capmaster.core.connection.match_serializer import MatchSerializer
+    from capmaster.core.connection.match_store import MatchStore
 
-    matches, metadata = MatchSerializer.load_matches(match_file)
+    if MatchStore.is_store(match_file):
+        matches, metadata = MatchStore.load_matches(match_file)
+    else:
+        matches, metadata = MatchSerializer.load_matches(match_file)
 
     expected_file1 = str(baseline_file)
     expected_file2 = str(compare_file)
@@ -102,10 +110,10 @@ def output_packet_diff_results(
 
     flow_hash_cache: dict[tuple[str, str, int, int], tuple[int, Any]] = {}
 
-    output_text = build_report_text(
-        results=results,
-        baseline_file=baseline_file,
-        compare_file=compare_file,
+    report_lines = iter_report_lines(
+        results,
+        baseline_file,
+        compare_file,
         matched_only=matched_only,
         show_flow_hash=show_flow_hash,
         flow_hash_cache=flow_hash_cache,
@@ -113,7 +121,8 @@ def output_packet_diff_results(
 
     if output_file:
         output_file.parent.mkdir(parents=True, exist_ok=True)
-        output_file.write_text(output_text)
+        with output_file.open("w") as f:
+            write_lines(report_lines, f)
         logger.info("Results written to: %s", output_file)
 
         from capmaster.utils.meta_writer import write_meta_json
@@ -124,7 +133,8 @@ def output_packet_diff_results(
             source="basic",
         )
     elif not quiet:
-        print(output_text)
+        write_lines(report_lines, sys.stdout)
+        sys.stdout.write("\n")
 
     if db_connection and kase_id is not None:
         write_packet_diff_to_database(
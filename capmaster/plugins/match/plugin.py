@@ -12,6 +12,7 @@ from capmaster.core.connection.connection_extractor import extract_connections_f
 from capmaster.core.input_manager import InputManager
 from capmaster.plugins import register_plugin
 from capmaster.plugins.base import PluginBase
+from capmaster.plugins.match.cardinality_index import CardinalityOptions
 from capmaster.plugins.match.cli_commands import (
     register_comparative_analysis_command,
     register_match_command,
@@ -87,6 +88,8 @@ class MatchPlugin(PluginBase):
         service_group_mapping: Path | None = None,
         match_json: Path | None = None,
         service_list: Path | None = None,
+        cardinality: str = "exact",
+        cardinality_index: Path | None = None,
         strict: bool = False,
         quiet: bool = False,
     ) -> int:
@@ -136,6 +139,7 @@ class MatchPlugin(PluginBase):
             service_group_mapping=service_group_mapping,
             match_json=match_json,
             service_list=service_list,
+            cardinality=CardinalityOptions(mode=cardinality, index_file=cardinality_index),
             strict=strict,
             allow_no_input=allow_no_input,
             quiet=quiet,
@@ -196,6 +200,7 @@ class MatchPlugin(PluginBase):
         kase_id: int | None = None,
         match_mode: str = "one-to-one",
         match_file: Path | None = None,
+        jobs: int = 1,
     ) -> int:
         """
         Execute comparative analysis between two PCAP files.
@@ -221,6 +226,7 @@ class MatchPlugin(PluginBase):
             kase_id: Case ID for database output (packet diff mode)
             match_mode: Matching mode (packet diff mode)
             match_file: Precomputed match file (packet diff mode)
+            jobs: Worker processes for packet comparison (packet diff mode)
 
         Returns:
             Exit code (0 for success)
@@ -246,6 +252,7 @@ class MatchPlugin(PluginBase):
                 kase_id=kase_id,
                 match_mode=match_mode,
                 match_file=match_file,
+                jobs=jobs,
             )
 
         # Resolve inputs
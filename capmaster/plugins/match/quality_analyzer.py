@@ -9,6 +9,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterator
 
+from capmaster.core.concurrency import run_dual
+from capmaster.core.connection.match_store import MatchStore, StoredPair
 from capmaster.core.tshark_wrapper import TsharkWrapper
 from capmaster.utils.logger import get_logger
 
@@ -296,9 +298,11 @@ class QualityAnalyzer:
         # Convert services list to set for faster lookup
         service_set = set(services)
 
-        # Analyze both PCAP files
-        metrics1 = self._analyze_pcap(pcap_file1, service_set)
-        metrics2 = self._analyze_pcap(pcap_file2, service_set)
+        # Analyze both PCAP files concurrently
+        metrics1, metrics2 = run_dual(
+            lambda: self._analyze_pcap(pcap_file1, service_set),
+            lambda: self._analyze_pcap(pcap_file2, service_set),
+        )
 
         # Combine results
         all_services = set(metrics1.keys()) | set(metrics2.keys())
@@ -328,9 +332,11 @@ class QualityAnalyzer:
         """
         results: list[ConnectionPairMetrics] = []
 
-        # Analyze both PCAP files and get per-stream metrics
-        stream_metrics_a = self._analyze_pcap_by_stream(pcap_file1)
-        stream_metrics_b = self._analyze_pcap_by_stream(pcap_file2)
+        # Analyze both PCAP files concurrently and get per-stream metrics
+        stream_metrics_a, stream_metrics_b = run_dual(
+            lambda: self._analyze_pcap_by_stream(pcap_file1),
+            lambda: self._analyze_pcap_by_stream(pcap_file2),
+        )
 
         # Match metrics for each connection pair
         for pair in connection_pairs:
@@ -487,17 +493,51 @@ class QualityAnalyzer:
         return metrics
 
 
+def connection_pair_from_store(stored: StoredPair) -> ConnectionPair:
+    """
+    Convert a pair read from a match store into a ConnectionPair.
+
+    The confidence is rounded like the text report so that both sources
+    yield identical pairs.
+
+    Args:
+        stored: Pair summary from :class:`MatchStore`
+
+    Returns:
+        ConnectionPair numbered like the text report (1-based)
+    """
+    return ConnectionPair(
+        pair_id=stored.position + 1,
+        stream_a=stored.stream_a,
+        connection_a=f"{stored.client_a} <-> {stored.server_a}",
+        stream_b=stored.stream_b,
+        connection_b=f"{stored.client_b} <-> {stored.server_b}",
+        confidence=round(stored.normalized_score, 2),
+    )
+
+
 def parse_matched_connections(matched_file: Path) -> list[ConnectionPair]:
     """
     Parse matched_connections.txt file to extract connection pairs.
     Supports both old multi-line format and new table format.
 
+    When ``matched_file`` is a binary match store, or the text report has an
+    up-to-date store written next to it by ``capmaster match``, the pairs are
+    read from the store instead of parsing the text.
+
     Args:
-        matched_file: Path to matched_connections.txt file
+        matched_file: Path to matched_connections.txt file or match store
 
     Returns:
         List of ConnectionPair objects
     """
+    store_file = MatchStore.find_for_report(matched_file)
+    if store_file is not None:
+        with MatchStore.open(store_file) as store:
+            pairs = [connection_pair_from_store(stored) for stored in store.iter_pairs()]
+        logger.info(f"Loaded {len(pairs)} connection pairs from match store {store_file}")
+        return pairs
+
     pairs = []
 
     try:
@@ -21,13 +21,19 @@ from rich.progress import (
     TextColumn,
 )
 
+from capmaster.core.concurrency import run_dual
 from capmaster.core.connection.behavioral_matcher import BehavioralMatcher
 from capmaster.core.connection.connection_extractor import extract_connections_from_pcap
 from capmaster.core.connection.f5_matcher import F5Matcher
 from capmaster.core.connection.matcher import BucketStrategy, ConnectionMatch, ConnectionMatcher, MatchMode
 from capmaster.core.connection.models import TcpConnection
 from capmaster.core.connection.tls_matcher import TlsMatcher
-from capmaster.plugins.match.output_formatter import output_match_results, save_matches_json
+from capmaster.plugins.match.cardinality_index import CardinalityOptions
+from capmaster.plugins.match.output_formatter import (
+    output_match_results,
+    save_match_store,
+    save_matches_json,
+)
 from capmaster.plugins.match.sampler import ConnectionSampler
 from capmaster.plugins.match.server_detector import ServerDetector
 from capmaster.plugins.match.strategies import (
@@ -36,6 +42,7 @@ from capmaster.plugins.match.strategies import (
 )
 from capmaster.plugins.match.stats_pipeline import (
     aggregate_and_output_service_stats,
+    collect_endpoint_stats,
     output_endpoint_stats,
     write_to_database,
     write_to_json,
@@ -75,6 +82,7 @@ def run_match_pipeline(
     service_group_mapping: Path | None = None,
     match_json: Path | None = None,
     service_list: Path | None = None,
+    cardinality: CardinalityOptions | None = None,
     strict: bool = False,
     allow_no_input: bool = False,
     quiet: bool = False,
@@ -133,6 +141,7 @@ def run_match_pipeline(
             service_group_mapping=service_group_mapping,
             match_json=match_json,
             service_list=service_list,
+            cardinality=cardinality,
             allow_no_input=allow_no_input,
             quiet=quiet,
         )
@@ -217,10 +226,11 @@ def _create_and_populate_detector(
     connections1: List[TcpConnection],
     connections2: List[TcpConnection],
     service_list: Path | None = None,
+    cardinality: CardinalityOptions | None = None,
 ) -> ServerDetector:
     """Create a ServerDetector and populate it with connections from both files."""
 
-    detector = ServerDetector(service_list_path=service_list)
+    detector = ServerDetector(service_list_path=service_list, cardinality=cardinality)
 
     # Collect all connections for cardinality analysis
     for conn in connections1:
@@ -248,9 +258,10 @@ def _improve_server_detection(
 
     improved_connections: List[TcpConnection] = []
 
-    for conn in connections:
-        # Detect server using multi-layer approach
-        server_info = detector.detect(conn)
+    # Detect servers for the whole table at once (multi-layer approach)
+    server_infos = detector.detect_many(connections)
+
+    for conn, server_info in zip(connections, server_infos):
 
         # Check if server/client roles need to be swapped
         needs_swap = (
@@ -333,6 +344,7 @@ def _run_match_pipeline_core(
     service_group_mapping: Path | None,
     match_json: Path | None,
     service_list: Path | None,
+    cardinality: CardinalityOptions | None = None,
     allow_no_input: bool = False,
     quiet: bool = False,
 ) -> int:
@@ -404,6 +416,7 @@ def _run_match_pipeline_core(
             behavioral_weight_iat=behavioral_weight_iat,
             behavioral_weight_bytes=behavioral_weight_bytes,
             service_list=service_list,
+            cardinality=cardinality,
             quiet=quiet,
         )
 
@@ -426,6 +439,7 @@ def _run_match_pipeline_core(
             endpoint_pair_mode=endpoint_pair_mode,
             service_group_mapping=service_group_mapping,
             service_list=service_list,
+            cardinality=cardinality,
             quiet=quiet,
         )
 
@@ -581,42 +595,29 @@ def _extract_connections_for_files(
 ) -> tuple[list[TcpConnection], list[TcpConnection]]:
     """Extract TCP connections from both files.
 
-    This mirrors the extraction logic in MatchPlugin.execute.
+    This mirrors the extraction logic in MatchPlugin.execute. Both files are
+    dissected concurrently (see :func:`capmaster.core.concurrency.run_dual`).
     """
 
     extract_task = None
     if not quiet and progress:
-        extract_task = progress.add_task("[cyan]Extracting connections...", total=2)
+        extract_task = progress.add_task(
+            f"[cyan]Extracting from {match_file1.name} and {match_file2.name}...",
+            total=2,
+        )
 
-    if not quiet and progress and extract_task:
-        progress.update(
-            extract_task,
-            description=f"[cyan]Extracting from {match_file1.name}...",
+    def extract(pcap_file: Path) -> list[TcpConnection]:
+        connections = extract_connections_from_pcap(
+            pcap_file, merge_by_5tuple=merge_by_5tuple
         )
-    connections1 = extract_connections_from_pcap(
-        match_file1, merge_by_5tuple=merge_by_5tuple
-    )
-    logger.info(f"Found {len(connections1)} connections in {match_file1.name}")
-    if merge_by_5tuple:
-        logger.info("  (merged by direction-independent 5-tuple)")
-    if not quiet and progress and extract_task:
-        progress.update(extract_task, advance=1)
-
-    if not quiet and progress and extract_task:
-        progress.update(
-        extract_task,
-        description=f"[cyan]Extracting from {match_file2.name}...",
-    )
-    connections2 = extract_connections_from_pcap(
-        match_file2, merge_by_5tuple=merge_by_5tuple
-    )
-    logger.info(f"Found {len(connections2)} connections in {match_file2.name}")
-    if merge_by_5tuple:
-        logger.info("  (merged by direction-independent 5-tuple)")
-    if not quiet and progress and extract_task:
-        progress.update(extract_task, advance=1)
+        logger.info(f"Found {len(connections)} connections in {pcap_file.name}")
+        if merge_by_5tuple:
+            logger.info("  (merged by direction-independent 5-tuple)")
+        if not quiet and progress and extract_task is not None:
+            progress.update(extract_task, advance=1)
+        return connections
 
-    return connections1, connections2
+    return run_dual(lambda: extract(match_file1), lambda: extract(match_file2))
 
 
 def _apply_sampling_if_enabled(
@@ -707,6 +708,7 @@ def _match_connections_with_strategy(
     behavioral_weight_iat: float,
     behavioral_weight_bytes: float,
     service_list: Path | None = None,
+    cardinality: CardinalityOptions | None = None,
     quiet: bool = False,
     allow_no_input: bool = False,
 ) -> tuple[ConnectionMatcher | BehavioralMatcher, list]:
@@ -727,7 +729,7 @@ def _match_connections_with_strategy(
             "Performing cardinality analysis for server detection (behavioral mode)..."
         )
         detector = _create_and_populate_detector(
-            connections1, connections2, service_list=service_list
+            connections1, connections2, service_list=service_list, cardinality=cardinality
         )
         connections1 = _improve_server_detection(connections1, detector)
         connections2 = _improve_server_detection(connections2, detector)
@@ -858,7 +860,7 @@ def _match_connections_with_strategy(
             logger.info("Performing cardinality analysis for server detection...")
 
             detector = _create_and_populate_detector(
-                remaining1, remaining2, service_list=service_list
+                remaining1, remaining2, service_list=service_list, cardinality=cardinality
             )
             remaining1 = _improve_server_detection(remaining1, detector)
             remaining2 = _improve_server_detection(remaining2, detector)
@@ -904,6 +906,7 @@ def _handle_outputs(
     endpoint_pair_mode: bool,
     service_group_mapping: Path | None,
     service_list: Path | None,
+    cardinality: CardinalityOptions | None = None,
     quiet: bool = False,
 ) -> None:
     """Handle all output steps after matching.
@@ -917,6 +920,10 @@ def _handle_outputs(
     if not quiet and progress:
         output_task = progress.add_task("[green]Writing results...", total=1)
     output_match_results(matches, stats, output_file)
+    if output_file:
+        # Binary store read by topology, comparative analysis, streamdiff and
+        # packet-diff instead of re-parsing the text report
+        save_match_store(matches, output_file, match_file1, match_file2, stats)
     if not quiet and progress and output_task:
         progress.update(output_task, advance=1)
 
@@ -944,12 +951,15 @@ def _handle_outputs(
         endpoint_task = progress.add_task(
             "[green]Generating endpoint statistics...", total=1
         )
+    collector = collect_endpoint_stats(
+        matches, service_list=service_list, cardinality=cardinality
+    )
     endpoint_stats_list = output_endpoint_stats(
         matches,
         match_file1,
         match_file2,
         endpoint_stats_output,
-        service_list=service_list,
+        collector=collector,
     )
     if not quiet and progress and endpoint_task:
         progress.update(endpoint_task, advance=1)
@@ -965,6 +975,7 @@ def _handle_outputs(
             match_file1,
             match_file2,
             endpoint_stats_output,
+            service_stats=collector.get_service_stats(),
         )
         if not quiet and progress and service_task:
             progress.update(service_task, advance=1)
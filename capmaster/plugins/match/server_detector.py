@@ -2,17 +2,19 @@
 
 from __future__ import annotations
 
-from collections import defaultdict
+from collections.abc import Sequence
 from dataclasses import dataclass
+from pathlib import Path
 
 from capmaster.core.connection.models import TcpConnection
+from capmaster.plugins.match.cardinality_index import CardinalityIndex, CardinalityOptions
 from capmaster.utils.context import ExecutionContext
 from capmaster.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class ServerInfo:
     """Server detection information."""
 
@@ -90,33 +92,34 @@ class ServerDetector:
         50000,  # DB2
     }
 
-    def __init__(self, service_list_path: Path | None = None) -> None:
+    def __init__(
+        self,
+        service_list_path: Path | None = None,
+        cardinality: CardinalityOptions | None = None,
+        index: CardinalityIndex | None = None,
+    ) -> None:
         """
         Initialize the detector with cardinality tracking and optional service list.
 
         Args:
             service_list_path: Path to service list file (optional)
+            cardinality: Counter mode and persisted index of the command
+                (optional, default: exact counters, nothing persisted). The
+                index is saved by :meth:`finalize_cardinality`.
+            index: Pre-built cardinality index to reuse (e.g. loaded from disk
+                or merged across capture files). New connections passed to
+                :meth:`collect_connection` are added to it.
         """
-        # Track unique client IPs for each IP:Port combination
-        # Key: (ip, port), Value: set of client IPs
-        self._endpoint_clients: dict[tuple[str, int], set[str]] = defaultdict(set)
-
-        # Track unique server IP:Port combinations for each client IP
-        # Key: client_ip, Value: set of (server_ip, server_port) tuples
-        self._client_servers: dict[str, set[tuple[str, int]]] = defaultdict(set)
-
-        # Track unique server IPs for each port number
-        # Key: port, Value: set of IPs using this port as server
-        self._port_server_ips: dict[int, set[str]] = defaultdict(set)
-
-        # Track unique client IPs for each port number
-        # Key: port, Value: set of IPs using this port as client
-        self._port_client_ips: dict[int, set[str]] = defaultdict(set)
-
-        # Track port stability: for each IP:Port, track the set of peer ports it connects to
-        # This helps identify "one port connects to many peer ports" pattern (server characteristic)
-        # Key: (ip, port), Value: set of peer ports
-        self._endpoint_peer_ports: dict[tuple[str, int], set[int]] = defaultdict(set)
+        # Interned endpoint index tracking, for every IP:Port seen on either
+        # side of a connection, its distinct peer IPs and peer ports, and for
+        # every port the distinct IPs using it.
+        self._cardinality = cardinality
+        if index is not None:
+            self._index = index
+        elif cardinality is not None:
+            self._index = cardinality.open_index()
+        else:
+            self._index = CardinalityIndex()
 
         # Flag to indicate if cardinality analysis is available
         self._cardinality_ready = False
@@ -128,6 +131,11 @@ class ServerDetector:
         if service_list_path:
             self._load_service_list(service_list_path)
 
+    @property
+    def index(self) -> CardinalityIndex:
+        """Cardinality index backing this detector (for persistence/merging)."""
+        return self._index
+
     def _load_service_list(self, path: Path) -> None:
         """Load service list from file."""
         try:
@@ -185,34 +193,11 @@ class ServerDetector:
             connection: TCP connection to collect
         """
         # Track both directions to handle cases where we don't know which is server yet
-        # Direction 1: server_ip:server_port -> client_ip
-        self._endpoint_clients[(connection.server_ip, connection.server_port)].add(
-            connection.client_ip
-        )
-        self._client_servers[connection.client_ip].add(
-            (connection.server_ip, connection.server_port)
-        )
-        # Track port usage pattern
-        self._port_server_ips[connection.server_port].add(connection.server_ip)
-        self._port_client_ips[connection.server_port].add(connection.client_ip)
-        # Track port stability: server_ip:server_port connects to client_port
-        self._endpoint_peer_ports[(connection.server_ip, connection.server_port)].add(
-            connection.client_port
-        )
-
-        # Direction 2: client_ip:client_port -> server_ip
-        self._endpoint_clients[(connection.client_ip, connection.client_port)].add(
-            connection.server_ip
-        )
-        self._client_servers[connection.server_ip].add(
-            (connection.client_ip, connection.client_port)
-        )
-        # Track port usage pattern
-        self._port_server_ips[connection.client_port].add(connection.client_ip)
-        self._port_client_ips[connection.client_port].add(connection.server_ip)
-        # Track port stability: client_ip:client_port connects to server_port
-        self._endpoint_peer_ports[(connection.client_ip, connection.client_port)].add(
-            connection.server_port
+        self._index.add_connection(
+            connection.client_ip,
+            connection.client_port,
+            connection.server_ip,
+            connection.server_port,
         )
 
     def finalize_cardinality(self) -> None:
@@ -222,6 +207,8 @@ class ServerDetector:
         This should be called after all collect_connection() calls are done.
         """
         self._cardinality_ready = True
+        if self._cardinality is not None:
+            self._cardinality.save_index(self._index)
 
     def detect(self, connection: TcpConnection) -> ServerInfo:
         """
@@ -233,6 +220,39 @@ class ServerDetector:
         Returns:
             ServerInfo with detected server/client and confidence level
         """
+        info = self.detect_without_cardinality(connection)
+        if info is not None:
+            return info
+
+        # Priority 4: Cardinality-based detection (new!)
+        if self._cardinality_ready:
+            info = self._detect_by_cardinality(connection)
+            if info.confidence in ["HIGH", "MEDIUM"]:
+                return info
+
+        # Priority 5: Traffic pattern analysis
+        # Note: This requires packet-level data which is not available in TcpConnection
+        # We skip this for now and go to fallback
+
+        # Priority 6: Fallback - use original detection
+        return self._detect_fallback(connection)
+
+    def detect_without_cardinality(self, connection: TcpConnection) -> ServerInfo | None:
+        """
+        Detect server using only the layers that do not need cardinality data.
+
+        The service list, SYN and port heuristics can be evaluated as soon as
+        a connection is seen. When none of them is decisive the final result
+        depends on cardinality statistics, and None is returned so callers can
+        defer the connection until :meth:`finalize_cardinality` has been called.
+
+        Args:
+            connection: TCP connection to analyze
+
+        Returns:
+            ServerInfo identical to what :meth:`detect` returns, or None if the
+            result depends on cardinality analysis
+        """
         # Priority 1: Service List (user configured)
         # This overrides everything else as it's explicit user intent
         info = self._detect_by_service_list(connection)
@@ -248,20 +268,190 @@ class ServerDetector:
         if info.confidence in ["HIGH", "MEDIUM"]:
             return info
 
-        # Priority 3: Cardinality-based detection (new!)
-        if self._cardinality_ready:
-            info = self._detect_by_cardinality(connection)
-            if info.confidence in ["HIGH", "MEDIUM"]:
-                return info
+        return None
 
-        # Priority 4: Traffic pattern analysis
-        # Note: This requires packet-level data which is not available in TcpConnection
-        # We skip this for now and go to fallback
+    def detect_many(self, connections: Sequence[TcpConnection]) -> list[ServerInfo]:
+        """
+        Detect servers for a whole connection table.
 
-        # Priority 5: Fallback - use original detection
-        return self._detect_fallback(connection)
+        Produces exactly the same results as calling :meth:`detect` for each
+        connection, but resolves the detection layers in passes over the
+        table instead of per connection:
+
+        1. Connections with identical endpoints (and SYN presence) are
+           deduplicated and resolved once.
+        2. The service-list join is skipped entirely when no list is loaded.
+        3. SYN-bearing connections are resolved in one pass.
+        4. Port heuristics are evaluated once per unique port pair.
+        5. Cardinality counts are looked up once per unique endpoint/port.
+
+        Args:
+            connections: TCP connections to analyze
+
+        Returns:
+            List of ServerInfo objects in the same order as ``connections``
+        """
+        # Result of every connection, by position; each pass fills in the
+        # connections it resolves
+        results: dict[int, ServerInfo] = {}
+
+        # Memoize per endpoint pair: later duplicates reuse the first result
+        first_index: dict[tuple[str, int, str, int, bool], int] = {}
+        duplicates: list[tuple[int, int]] = []
+        pending: list[int] = []
+        for i, conn in enumerate(connections):
+            key = (
+                conn.client_ip,
+                conn.client_port,
+                conn.server_ip,
+                conn.server_port,
+                bool(conn.syn_options),
+            )
+            first = first_index.get(key)
+            if first is None:
+                first_index[key] = i
+                pending.append(i)
+            else:
+                duplicates.append((i, first))
+
+        # Pass 1: service list join (only when a service list was loaded)
+        if self._service_list_ips or self._service_list_endpoints:
+            remaining: list[int] = []
+            for i in pending:
+                info = self._detect_by_service_list(connections[i])
+                if info.confidence == "HIGH":
+                    results[i] = info
+                else:
+                    remaining.append(i)
+            pending = remaining
+
+        # Pass 2: SYN mask
+        remaining = []
+        for i in pending:
+            conn = connections[i]
+            if conn.syn_options:
+                results[i] = ServerInfo(
+                    conn.server_ip,
+                    conn.server_port,
+                    conn.client_ip,
+                    conn.client_port,
+                    "HIGH",
+                    "SYN_PACKET",
+                )
+            else:
+                remaining.append(i)
+        pending = remaining
+
+        # Pass 3: port heuristics. The verdict only depends on whether each
+        # port is well-known, a database port or a system port, so it is
+        # computed once per class pair as (swapped, confidence, method), or
+        # None when the ports are not decisive.
+        port_classes: dict[int, tuple[bool, bool, bool]] = {}
+        port_verdicts: dict[
+            tuple[tuple[bool, bool, bool], tuple[bool, bool, bool]], tuple[bool, str, str] | None
+        ] = {}
+
+        def port_class(port: int) -> tuple[bool, bool, bool]:
+            cls = port_classes.get(port)
+            if cls is None:
+                cls = (port in self.WELL_KNOWN_PORTS, port in self.DATABASE_PORTS, port < 1024)
+                port_classes[port] = cls
+            return cls
+
+        remaining = []
+        for i in pending:
+            conn = connections[i]
+            class_pair = (port_class(conn.client_port), port_class(conn.server_port))
+            if class_pair in port_verdicts:
+                verdict = port_verdicts[class_pair]
+            else:
+                info = self._detect_by_port(conn)
+                verdict = None
+                if info.confidence in ["HIGH", "MEDIUM"]:
+                    verdict = (info.method.endswith("_SWAPPED"), info.confidence, info.method)
+                port_verdicts[class_pair] = verdict
+
+            if verdict is None:
+                remaining.append(i)
+            elif verdict[0]:
+                results[i] = ServerInfo(
+                    conn.client_ip,
+                    conn.client_port,
+                    conn.server_ip,
+                    conn.server_port,
+                    verdict[1],
+                    verdict[2],
+                )
+            else:
+                results[i] = ServerInfo(
+                    conn.server_ip,
+                    conn.server_port,
+                    conn.client_ip,
+                    conn.client_port,
+                    verdict[1],
+                    verdict[2],
+                )
+        pending = remaining
+
+        # Pass 4: cardinality, with counts looked up once per endpoint/port
+        if self._cardinality_ready and pending:
+            index = self._index
+            endpoint_counts: dict[tuple[str, int], tuple[int, int]] = {}
+            port_counts: dict[int, int] = {}
+
+            def counts_for(ip: str, port: int) -> tuple[int, int]:
+                counts = endpoint_counts.get((ip, port))
+                if counts is None:
+                    counts = (
+                        index.endpoint_peer_count(ip, port),
+                        index.endpoint_peer_port_count(ip, port),
+                    )
+                    endpoint_counts[(ip, port)] = counts
+                return counts
+
+            def port_count_for(port: int) -> int:
+                count = port_counts.get(port)
+                if count is None:
+                    count = index.port_ip_count(port)
+                    port_counts[port] = count
+                return count
+
+            remaining = []
+            for i in pending:
+                conn = connections[i]
+                cardinality1, peer_ports1 = counts_for(conn.server_ip, conn.server_port)
+                cardinality2, peer_ports2 = counts_for(conn.client_ip, conn.client_port)
+                info = self._detect_by_cardinality(
+                    conn,
+                    counts=(
+                        cardinality1,
+                        cardinality2,
+                        port_count_for(conn.server_port),
+                        port_count_for(conn.client_port),
+                        peer_ports1,
+                        peer_ports2,
+                    ),
+                )
+                if info.confidence in ["HIGH", "MEDIUM"]:
+                    results[i] = info
+                else:
+                    remaining.append(i)
+            pending = remaining
+
+        # Pass 5: fallback
+        for i in pending:
+            results[i] = self._detect_fallback(connections[i])
+
+        for i, first in duplicates:
+            results[i] = results[first]
 
-    def _detect_by_cardinality(self, connection: TcpConnection) -> ServerInfo:
+        return [results[i] for i in range(len(connections))]
+
+    def _detect_by_cardinality(
+        self,
+        connection: TcpConnection,
+        counts: tuple[int, int, int, int, int, int] | None = None,
+    ) -> ServerInfo:
         """
         Detect server by cardinality analysis.
 
@@ -272,24 +462,38 @@ class ServerDetector:
 
         Args:
             connection: TCP connection to analyze
+            counts: Precomputed (cardinality1, cardinality2, port1_server_ips,
+                port2_server_ips, peer_ports1, peer_ports2); looked up from the
+                index when omitted
 
         Returns:
             ServerInfo with confidence based on cardinality difference
         """
-        # Get cardinality for both endpoints
-        endpoint1 = (connection.server_ip, connection.server_port)
-        endpoint2 = (connection.client_ip, connection.client_port)
-
-        cardinality1 = len(self._endpoint_clients.get(endpoint1, set()))
-        cardinality2 = len(self._endpoint_clients.get(endpoint2, set()))
-
-        # Get port reuse patterns
-        port1_server_ips = len(self._port_server_ips.get(connection.server_port, set()))
-        port2_server_ips = len(self._port_server_ips.get(connection.client_port, set()))
+        if counts is None:
+            # Get cardinality for both endpoints
+            endpoint1 = (connection.server_ip, connection.server_port)
+            endpoint2 = (connection.client_ip, connection.client_port)
+
+            index = self._index
+            counts = (
+                index.endpoint_peer_count(*endpoint1),
+                index.endpoint_peer_count(*endpoint2),
+                # Get port reuse patterns
+                index.port_ip_count(connection.server_port),
+                index.port_ip_count(connection.client_port),
+                # Get port stability patterns (how many different peer ports each endpoint connects to)
+                index.endpoint_peer_port_count(*endpoint1),
+                index.endpoint_peer_port_count(*endpoint2),
+            )
 
-        # Get port stability patterns (how many different peer ports each endpoint connects to)
-        peer_ports1 = len(self._endpoint_peer_ports.get(endpoint1, set()))
-        peer_ports2 = len(self._endpoint_peer_ports.get(endpoint2, set()))
+        (
+            cardinality1,
+            cardinality2,
+            port1_server_ips,
+            port2_server_ips,
+            peer_ports1,
+            peer_ports2,
+        ) = counts
 
         # Minimum thresholds
         MIN_SERVER_CLIENTS = 2  # At least 2 different client IPs
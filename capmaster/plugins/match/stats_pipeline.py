@@ -12,6 +12,8 @@ import logging
 from pathlib import Path
 from typing import Any, Dict, List
 
+from capmaster.core.connection.matcher import ConnectionMatch
+from capmaster.plugins.match.cardinality_index import CardinalityOptions
 from capmaster.plugins.match.endpoint_stats import (
     EndpointStatsCollector,
     ServiceKey,
@@ -24,12 +26,41 @@ from capmaster.plugins.match.server_detector import ServerDetector
 logger = logging.getLogger(__name__)
 
 
+def collect_endpoint_stats(
+    matches: List[ConnectionMatch],
+    service_list: Path | None = None,
+    cardinality: CardinalityOptions | None = None,
+) -> EndpointStatsCollector:
+    """Stream matched connections into a finalized endpoint statistics collector.
+
+    Args:
+        matches: List of ConnectionMatch objects
+        service_list: Optional service list file for server detection
+        cardinality: Optional cardinality mode and persisted index
+
+    Returns:
+        Finalized EndpointStatsCollector holding per-pair and per-service aggregates
+    """
+    # Create detector and collector
+    detector = ServerDetector(service_list_path=service_list, cardinality=cardinality)
+    collector = EndpointStatsCollector(detector)
+
+    # Collect statistics from matches
+    for match in matches:
+        collector.add_match(match)
+
+    # Finalize collection (performs cardinality analysis)
+    collector.finalize()
+    return collector
+
+
 def output_endpoint_stats(
-    matches: List[object],
+    matches: List[ConnectionMatch],
     file1: Path,
     file2: Path,
     output_file: Path | None,
     service_list: Path | None = None,
+    collector: EndpointStatsCollector | None = None,
 ) -> list:
     """Output endpoint statistics for matched connections.
 
@@ -38,20 +69,15 @@ def output_endpoint_stats(
         file1: Path to first PCAP file
         file2: Path to second PCAP file
         output_file: Output file for statistics (None for stdout)
+        service_list: Optional service list file for server detection
+        collector: Already finalized collector to reuse instead of
+            aggregating ``matches`` again
 
     Returns:
         List of EndpointPairStats objects
     """
-    # Create detector and collector
-    detector = ServerDetector(service_list_path=service_list)
-    collector = EndpointStatsCollector(detector)
-
-    # Collect statistics from matches
-    for match in matches:
-        collector.add_match(match)
-
-    # Finalize collection (performs cardinality analysis)
-    collector.finalize()
+    if collector is None:
+        collector = collect_endpoint_stats(matches, service_list=service_list)
 
     # Get aggregated statistics
     stats = collector.get_stats()
@@ -81,6 +107,7 @@ def aggregate_and_output_service_stats(
     file1: Path,
     file2: Path,
     output_file: Path | None,
+    service_stats: list | None = None,
 ) -> list:
     """Aggregate endpoint statistics by service and output.
 
@@ -89,13 +116,16 @@ def aggregate_and_output_service_stats(
         file1: Path to first PCAP file
         file2: Path to second PCAP file
         output_file: Output file for statistics (None for stdout)
+        service_stats: Service statistics already aggregated by the
+            collector (skips re-aggregating ``endpoint_stats_list``)
 
     Returns:
         List of ServiceStats objects
     """
 
     # Aggregate by service
-    service_stats = aggregate_by_service(endpoint_stats_list)
+    if service_stats is None:
+        service_stats = aggregate_by_service(endpoint_stats_list)
 
     # Format output
     output_text = format_service_stats(
@@ -22,6 +22,7 @@ import shutil
 import tarfile
 import tempfile
 
+from capmaster.core.scheduling import map_largest_first
 from capmaster.utils.errors import CapMasterError
 
 from .config import PreprocessConfig, PreprocessRuntimeConfig
@@ -216,7 +217,7 @@ def _time_align_step(context: PreprocessContext, files: list[Path]) -> list[Path
         ranges: list[tuple[Path, TimeRange]] = [_range_for(src) for src in files]
     else:
         with ThreadPoolExecutor(max_workers=min(workers, len(files))) as executor:
-            ranges = list(executor.map(_range_for, files))
+            ranges = map_largest_first(executor, _range_for, files)
 
     # 2. Compute global overlap.
     t_start = max(tr.first_ts for _, tr in ranges)
@@ -281,7 +282,7 @@ def _time_align_step(context: PreprocessContext, files: list[Path]) -> list[Path
     else:
         with ThreadPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
             srcs = [src for src, _ in ranges]
-            result_files = list(executor.map(_crop, srcs))
+            result_files = map_largest_first(executor, _crop, srcs)
 
     return result_files
 
@@ -323,7 +324,7 @@ def _time_align_dedup_step(context: PreprocessContext, files: list[Path]) -> lis
         ranges: list[tuple[Path, TimeRange]] = [_range_for(src) for src in files]
     else:
         with ThreadPoolExecutor(max_workers=min(workers, len(files))) as executor:
-            ranges = list(executor.map(_range_for, files))
+            ranges = map_largest_first(executor, _range_for, files)
 
     # 2. Compute global overlap.
     t_start = max(tr.first_ts for _, tr in ranges)
@@ -395,7 +396,7 @@ def _time_align_dedup_step(context: PreprocessContext, files: list[Path]) -> lis
         result_files = [_crop_and_dedup(src) for src in srcs]
     else:
         with ThreadPoolExecutor(max_workers=min(workers, len(srcs))) as executor:
-            result_files = list(executor.map(_crop_and_dedup, srcs))
+            result_files = map_largest_first(executor, _crop_and_dedup, srcs)
 
     return result_files
 
@@ -437,7 +438,7 @@ def _dedup_step(context: PreprocessContext, files: list[Path]) -> list[Path]:
         return [_process(src) for src in files]
 
     with ThreadPoolExecutor(max_workers=min(workers, len(files))) as executor:
-        result_files = list(executor.map(_process, files))
+        result_files = map_largest_first(executor, _process, files)
 
     return result_files
 
@@ -486,7 +487,7 @@ def _oneway_step(context: PreprocessContext, files: list[Path]) -> list[Path]:
         return [_process(src) for src in files]
 
     with ThreadPoolExecutor(max_workers=min(workers, len(files))) as executor:
-        result_files = list(executor.map(_process, files))
+        result_files = map_largest_first(executor, _process, files)
 
     return result_files
 
@@ -3,9 +3,11 @@
 from __future__ import annotations
 
 import logging
+import sys
 from contextlib import contextmanager
+from itertools import chain
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
 import click
 
@@ -17,8 +19,21 @@ from capmaster.plugins.compare_common.packet_comparator import (
     PacketComparator,
     PacketDiff,
 )
-from capmaster.plugins.compare_common.packet_extractor import PacketExtractor
-from capmaster.plugins.match.quality_analyzer import ConnectionPair, parse_matched_connections
+from capmaster.plugins.compare_common.output_formatter import write_lines
+from capmaster.plugins.compare_common.packet_extractor import PacketExtractor, TcpPacket
+from capmaster.plugins.compare_common.parallel_compare import compare_pairs_parallel
+from capmaster.plugins.compare_common.seq_aligner import (
+    DEFAULT_MAX_ROWS,
+    SequenceAlignment,
+    align_streams,
+    iter_alignment,
+)
+from capmaster.core.connection.match_store import MatchStore
+from capmaster.plugins.match.quality_analyzer import (
+    ConnectionPair,
+    connection_pair_from_store,
+    parse_matched_connections,
+)
 from capmaster.core.input_manager import InputManager
 from capmaster.utils.cli_options import unified_input_options
 from capmaster.utils.errors import CapMasterError, InsufficientFilesError, handle_error
@@ -52,6 +67,178 @@ def _select_pair_by_index(pairs: list[ConnectionPair], pair_index: int) -> Conne
     return pairs[pair_index - 1]
 
 
+def _load_pair(matched_connections: Path, pair_index: int) -> ConnectionPair:
+    """Load one connection pair by 1-based index.
+
+    A binary match store is read directly (O(1) per pair); text reports are
+    parsed in full.
+    """
+    store_file = MatchStore.find_for_report(matched_connections)
+    if store_file is None:
+        pairs = parse_matched_connections(matched_connections)
+        if not pairs:
+            raise CapMasterError(
+                "No valid connection pairs found in matched connections file."
+            )
+        return _select_pair_by_index(pairs, pair_index)
+
+    with MatchStore.open(store_file) as store:
+        if len(store) == 0:
+            raise CapMasterError(
+                "No valid connection pairs found in matched connections file."
+            )
+        if pair_index < 1 or pair_index > len(store):
+            raise CapMasterError(
+                f"Pair index {pair_index} is out of range. Valid range is 1-{len(store)}."
+            )
+        return connection_pair_from_store(store.pair(pair_index - 1))
+
+
+def _parse_pair_spec(spec: str) -> list[int] | None:
+    """Parse a pair selection such as ``1-20,25,30`` into 1-based indices.
+
+    Returns None for ``all``. Raises CapMasterError on malformed input.
+    """
+    if spec.strip().lower() == "all":
+        return None
+
+    indices: list[int] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if "-" in part:
+                start_text, end_text = part.split("-", 1)
+                start, end = int(start_text), int(end_text)
+                if start > end:
+                    raise ValueError
+                indices.extend(range(start, end + 1))
+            else:
+                indices.append(int(part))
+        except ValueError:
+            raise CapMasterError(
+                f"Invalid pair selection '{part}'. Use 'all' or indices and ranges "
+                "such as '1-20,25'."
+            ) from None
+    if not indices:
+        raise CapMasterError("Pair selection is empty.")
+    # Keep the first occurrence of each index, in the order given
+    return list(dict.fromkeys(indices))
+
+
+def _check_pair_indices(pair_indices: list[int] | None, count: int) -> list[int]:
+    """Validate 1-based pair indices against the number of pairs (all if None)."""
+    if count == 0:
+        raise CapMasterError(
+            "No valid connection pairs found in matched connections file."
+        )
+    if pair_indices is None:
+        return list(range(1, count + 1))
+    for pair_index in pair_indices:
+        if pair_index < 1 or pair_index > count:
+            raise CapMasterError(
+                f"Pair index {pair_index} is out of range. Valid range is 1-{count}."
+            )
+    return pair_indices
+
+
+def _load_pairs(
+    matched_connections: Path,
+    pair_indices: list[int] | None,
+    max_confidence: float | None,
+) -> list[ConnectionPair]:
+    """Load several connection pairs by 1-based index and/or confidence.
+
+    Args:
+        matched_connections: Matched connections report or match store
+        pair_indices: 1-based indices to load (all pairs if None)
+        max_confidence: Keep only pairs with a confidence below this value
+
+    Raises CapMasterError when the file holds no pairs or an index is out of
+    range.
+    """
+    store_file = MatchStore.find_for_report(matched_connections)
+    if store_file is None:
+        all_pairs = parse_matched_connections(matched_connections)
+        indices = _check_pair_indices(pair_indices, len(all_pairs))
+        pairs = [all_pairs[i - 1] for i in indices]
+    else:
+        with MatchStore.open(store_file) as store:
+            indices = _check_pair_indices(pair_indices, len(store))
+            pairs = [connection_pair_from_store(store.pair(i - 1)) for i in indices]
+
+    if max_confidence is not None:
+        pairs = [pair for pair in pairs if pair.confidence < max_confidence]
+    return pairs
+
+
+def _orient_pair(
+    pair: ConnectionPair,
+    file_a: Path,
+    file_b: Path,
+    pcap_id_mapping: dict[str, int] | None,
+) -> tuple[int, int, str]:
+    """Map a matched pair onto the local A/B file order.
+
+    Returns (stream_id_a, stream_id_b, connection_label).
+    """
+    # Map pcap IDs from matched file back to our local file_a/file_b
+    if pcap_id_mapping is None:
+        # Fallback: assume file_a is PCAPID 0 and file_b is 1
+        id_a, id_b = 0, 1
+    else:
+        id_a = pcap_id_mapping.get(str(file_a), 0)
+        id_b = pcap_id_mapping.get(str(file_b), 1)
+
+    # By convention in match output, stream_a belongs to PCAPID 0, stream_b to 1
+    # We need to align those to our local A/B ordering.
+    stream_a = pair.stream_a
+    stream_b = pair.stream_b
+
+    if id_a == 0 and id_b == 1:
+        stream_id_a = stream_a
+        stream_id_b = stream_b
+    elif id_a == 1 and id_b == 0:
+        stream_id_a = stream_b
+        stream_id_b = stream_a
+    else:
+        raise CapMasterError(
+            "Unexpected PCAP ID mapping; expected exactly two PCAP IDs 0/1."
+        )
+
+    conn_label = (
+        f"{pair.connection_a} (PCAPID={id_a}, stream={stream_id_a}) vs "
+        f"{pair.connection_b} (PCAPID={id_b}, stream={stream_id_b})"
+    )
+    return stream_id_a, stream_id_b, conn_label
+
+
+def _write_report(lines: Iterable[str], output_file: Path | None) -> None:
+    """Stream report lines to ``output_file``, or to stdout when it is None."""
+    if output_file is not None:
+        with output_file.open("w") as f:
+            write_lines(lines, f)
+        return
+
+    write_lines(lines, sys.stdout)
+    sys.stdout.write("\n")
+    sys.stdout.flush()
+
+
+def _join_pair_reports(
+    reports: Iterable[tuple[ConnectionPair, Iterable[str]]],
+) -> Iterator[str]:
+    """Chain per-pair reports under "## Pair N" headings, blank-line separated."""
+    for index, (pair, report_lines) in enumerate(reports):
+        if index:
+            yield ""
+            yield ""
+        yield f"## Pair {pair.pair_id}"
+        yield ""
+        yield from report_lines
+
+
 @register_plugin
 class StreamDiffPlugin(PluginBase):
     """Expose per-stream A-only packet detection as a CLI command."""
@@ -70,7 +257,8 @@ class StreamDiffPlugin(PluginBase):
             "--matched-connections",
             type=click.Path(exists=True, dir_okay=False, path_type=Path),
             help=(
-                "Matched connections text file produced by 'capmaster match -o ...'. "
+                "Matched connections text file produced by 'capmaster match -o ...' "
+                "(or the .cmstore match store written next to it). "
                 "If provided, use --pair-index to choose a connection pair."
             ),
         )
@@ -80,7 +268,69 @@ class StreamDiffPlugin(PluginBase):
             default=None,
             help=(
                 "1-based index of the connection pair in matched-connections file "
-                "to analyze. Required when --matched-connections is used."
+                "to analyze. Required when --matched-connections is used without "
+                "--pairs or --max-confidence."
+            ),
+        )
+        @click.option(
+            "--pairs",
+            "pair_spec",
+            type=str,
+            default=None,
+            help=(
+                "Batch mode: pairs to analyze from the matched-connections file, "
+                "as 1-based indices and ranges (e.g. '1-20,25') or 'all'. Both "
+                "captures are dissected once for all selected pairs."
+            ),
+        )
+        @click.option(
+            "--max-confidence",
+            type=float,
+            default=None,
+            help=(
+                "Batch mode: only analyze pairs whose match confidence is below "
+                "this value (implies --pairs all when --pairs is not given)."
+            ),
+        )
+        @click.option(
+            "--output-dir",
+            type=click.Path(file_okay=False, path_type=Path),
+            default=None,
+            help=(
+                "Batch mode: directory for one report per pair "
+                "(pair_<index>.txt). Default: all reports to --output or stdout."
+            ),
+        )
+        @click.option(
+            "-j",
+            "--jobs",
+            type=click.IntRange(min=1),
+            default=1,
+            help=(
+                "Batch mode: number of worker processes for IP ID packet comparison "
+                "(default: 1). Ignored with --alignment seq."
+            ),
+        )
+        @click.option(
+            "--alignment",
+            type=click.Choice(["ipid", "seq"]),
+            default="ipid",
+            show_default=True,
+            help=(
+                "How packets of A and B are paired. 'ipid' pairs by IP ID and "
+                "prints both flows side by side; 'seq' pairs by (direction, "
+                "relative seq, payload length) and reports dropped, inserted and "
+                "reordered segments. Use 'seq' when a middlebox rewrites IP IDs."
+            ),
+        )
+        @click.option(
+            "--max-rows",
+            type=click.IntRange(min=1),
+            default=None,
+            help=(
+                "Maximum number of packet rows listed per table of each report "
+                "(default: all; 50 for --alignment seq). Summary counts always "
+                "cover every packet."
             ),
         )
         @click.option(
@@ -123,6 +373,12 @@ class StreamDiffPlugin(PluginBase):
             quiet: bool,
             matched_connections: Path | None,
             pair_index: int | None,
+            pair_spec: str | None,
+            max_confidence: float | None,
+            output_dir: Path | None,
+            jobs: int,
+            alignment: str,
+            max_rows: int | None,
             file1_stream_id: int | None,
             file2_stream_id: int | None,
             output_file: Path | None,
@@ -142,6 +398,17 @@ class StreamDiffPlugin(PluginBase):
 
                capmaster streamdiff -i /path/to/2pcaps \
                  --file1-stream-id 7 --file2-stream-id 33
+
+            Batch mode diffs many pairs of a matched-connections file with a
+            single extraction pass per capture and writes one report per pair:
+
+               capmaster streamdiff -i /path/to/2pcaps \
+                 --matched-connections matched_connections.txt \
+                 --pairs 1-500 --output-dir streamdiff/ -j 4
+
+               capmaster streamdiff -i /path/to/2pcaps \
+                 --matched-connections matched_connections.txt \
+                 --max-confidence 0.6 --output-dir streamdiff/
             """
 
             exit_code = self.execute(
@@ -157,6 +424,12 @@ class StreamDiffPlugin(PluginBase):
                 quiet=quiet,
                 matched_connections=matched_connections,
                 pair_index=pair_index,
+                pair_spec=pair_spec,
+                max_confidence=max_confidence,
+                output_dir=output_dir,
+                jobs=jobs,
+                alignment=alignment,
+                max_rows=max_rows,
                 file1_stream_id=file1_stream_id,
                 file2_stream_id=file2_stream_id,
                 output_file=output_file,
@@ -177,6 +450,12 @@ class StreamDiffPlugin(PluginBase):
         quiet: bool = False,
         matched_connections: Path | None = None,
         pair_index: int | None = None,
+        pair_spec: str | None = None,
+        max_confidence: float | None = None,
+        output_dir: Path | None = None,
+        jobs: int = 1,
+        alignment: str = "ipid",
+        max_rows: int | None = None,
         file1_stream_id: int | None = None,
         file2_stream_id: int | None = None,
         output_file: Path | None = None,
@@ -198,6 +477,12 @@ class StreamDiffPlugin(PluginBase):
                 quiet=quiet,
                 matched_connections=matched_connections,
                 pair_index=pair_index,
+                pair_spec=pair_spec,
+                max_confidence=max_confidence,
+                output_dir=output_dir,
+                jobs=jobs,
+                alignment=alignment,
+                max_rows=max_rows,
                 file1_stream_id=file1_stream_id,
                 file2_stream_id=file2_stream_id,
                 output_file=output_file,
@@ -217,6 +502,12 @@ class StreamDiffPlugin(PluginBase):
         quiet: bool = False,
         matched_connections: Path | None = None,
         pair_index: int | None = None,
+        pair_spec: str | None = None,
+        max_confidence: float | None = None,
+        output_dir: Path | None = None,
+        jobs: int = 1,
+        alignment: str = "ipid",
+        max_rows: int | None = None,
         file1_stream_id: int | None = None,
         file2_stream_id: int | None = None,
         output_file: Path | None = None,
@@ -244,6 +535,22 @@ class StreamDiffPlugin(PluginBase):
             str(file_b): input_files[1].pcapid
         }
 
+        if pair_spec is not None or max_confidence is not None:
+            return self._execute_batch(
+                file_a=file_a,
+                file_b=file_b,
+                pcap_id_mapping=pcap_id_mapping,
+                matched_connections=matched_connections,
+                pair_index=pair_index,
+                pair_spec=pair_spec,
+                max_confidence=max_confidence,
+                output_dir=output_dir,
+                output_file=output_file,
+                jobs=jobs,
+                alignment=alignment,
+                max_rows=max_rows,
+            )
+
         try:
             stream_id_a, stream_id_b, conn_label = self._resolve_stream_ids(
                 file_a=file_a,
@@ -273,20 +580,175 @@ class StreamDiffPlugin(PluginBase):
         packets_b = extractor.extract_by_stream_id(file_b, stream_id_b)
 
         connection_id = conn_label or f"stream {stream_id_a} vs {stream_id_b}"
-        result = comparator.compare(packets_a, packets_b, connection_id, matched_only=False)
+        result: ComparisonResult | SequenceAlignment
+        if alignment == "seq":
+            result = align_streams(packets_a, packets_b, connection_id)
+        else:
+            result = comparator.compare(packets_a, packets_b, connection_id, matched_only=False)
+
+        report_lines = self._iter_report(
+            comparator=comparator,
+            file_a=file_a,
+            file_b=file_b,
+            stream_id_a=stream_id_a,
+            stream_id_b=stream_id_b,
+            packets_a=packets_a,
+            packets_b=packets_b,
+            result=result,
+            max_rows=max_rows,
+        )
+        _write_report(report_lines, output_file)
+
+        return 0
+
+    def _execute_batch(
+        self,
+        file_a: Path,
+        file_b: Path,
+        pcap_id_mapping: dict[str, int],
+        matched_connections: Path | None,
+        pair_index: int | None,
+        pair_spec: str | None,
+        max_confidence: float | None,
+        output_dir: Path | None,
+        output_file: Path | None,
+        jobs: int,
+        alignment: str,
+        max_rows: int | None = None,
+    ) -> int:
+        """Diff many matched pairs with one extraction pass per capture.
+
+        All requested streams of each capture are extracted in a single
+        tshark call, the pairs are compared in one batch (optionally across
+        worker processes), and each report is written out as soon as its
+        pair has been compared.
+        """
+        try:
+            if matched_connections is None:
+                raise CapMasterError(
+                    "--pairs/--max-confidence require --matched-connections."
+                )
+            if pair_index is not None:
+                raise CapMasterError(
+                    "--pair-index cannot be combined with --pairs/--max-confidence."
+                )
+            pair_indices = _parse_pair_spec(pair_spec) if pair_spec is not None else None
+            pairs = _load_pairs(matched_connections, pair_indices, max_confidence)
+            selected = [
+                (pair, *_orient_pair(pair, file_a, file_b, pcap_id_mapping))
+                for pair in pairs
+            ]
+        except CapMasterError as exc:
+            return handle_error(exc, show_traceback=False)
+
+        if not selected:
+            logger.warning("No connection pairs selected; nothing to diff.")
+            return 0
+
+        logger.info(
+            "Running streamdiff for %d pairs: file_a=%s, file_b=%s",
+            len(selected),
+            file_a.name,
+            file_b.name,
+        )
+
+        extractor = PacketExtractor()
+        comparator = PacketComparator()
 
-        # Filter for A-only and B-only packets
+        packets_by_stream_a = extractor.extract_multiple_streams(
+            file_a, sorted({stream_id_a for _, stream_id_a, _, _ in selected})
+        )
+        packets_by_stream_b = extractor.extract_multiple_streams(
+            file_b, sorted({stream_id_b for _, _, stream_id_b, _ in selected})
+        )
+
+        compare_pairs: list[tuple[list[TcpPacket], list[TcpPacket], str]] = [
+            (packets_by_stream_a[stream_id_a], packets_by_stream_b[stream_id_b], conn_label)
+            for _, stream_id_a, stream_id_b, conn_label in selected
+        ]
+        results: Iterable[ComparisonResult | SequenceAlignment]
+        if alignment == "seq":
+            if jobs > 1:
+                logger.warning(
+                    "--jobs only parallelizes IP ID comparison; "
+                    "sequence alignment runs in a single process."
+                )
+            results = (align_streams(a, b, label) for a, b, label in compare_pairs)
+        elif jobs > 1 and len(compare_pairs) > 1:
+            results = chain.from_iterable(compare_pairs_parallel(compare_pairs, jobs))
+        else:
+            results = comparator.compare_many(compare_pairs)
+
+        reports = (
+            (
+                pair,
+                self._iter_report(
+                    comparator=comparator,
+                    file_a=file_a,
+                    file_b=file_b,
+                    stream_id_a=stream_id_a,
+                    stream_id_b=stream_id_b,
+                    packets_a=packets_a,
+                    packets_b=packets_b,
+                    result=result,
+                    max_rows=max_rows,
+                ),
+            )
+            for (pair, stream_id_a, stream_id_b, _), (packets_a, packets_b, _), result in zip(
+                selected, compare_pairs, results
+            )
+        )
+
+        if output_dir is not None:
+            output_dir.mkdir(parents=True, exist_ok=True)
+            for pair, report_lines in reports:
+                _write_report(report_lines, output_dir / f"pair_{pair.pair_id}.txt")
+            logger.info("Wrote %d streamdiff reports to %s", len(selected), output_dir)
+        else:
+            _write_report(_join_pair_reports(reports), output_file)
+
+        return 0
+
+    def _iter_report(
+        self,
+        comparator: PacketComparator,
+        file_a: Path,
+        file_b: Path,
+        stream_id_a: int,
+        stream_id_b: int,
+        packets_a: list[TcpPacket],
+        packets_b: list[TcpPacket],
+        result: ComparisonResult | SequenceAlignment,
+        max_rows: int | None = None,
+    ) -> Iterator[str]:
+        """Yield the lines of the full streamdiff report.
+
+        IP ID comparisons get the A-only/B-only summary and the flow view;
+        sequence alignments get the dropped/inserted/reordered segment report.
+        ``max_rows`` caps the rows listed per table.
+        """
+        if isinstance(result, SequenceAlignment):
+            yield "# streamdiff report: sequence alignment"
+            yield ""
+            yield f"Capture A: {file_a.name} (stream {stream_id_a})"
+            yield f"Capture B: {file_b.name} (stream {stream_id_b})"
+            yield ""
+            yield from iter_alignment(result, max_rows or DEFAULT_MAX_ROWS)
+            return
+
+        # Filter for A-only and B-only packets; the comparator marks the
+        # absent side of an IP ID difference with "N/A"
         a_only_diffs = [
             d for d in result.differences
-            if d.diff_type == DiffType.IP_ID and d.value_b == "MISSING"
+            if d.diff_type == DiffType.IP_ID and d.value_b == "N/A"
         ]
         b_only_diffs = [
             d for d in result.differences
-            if d.diff_type == DiffType.IP_ID and d.value_a == "MISSING"
+            if d.diff_type == DiffType.IP_ID and d.value_a == "N/A"
         ]
 
-        # Generate streamdiff specific report
-        streamdiff_report = self._build_report(
+        # Streamdiff specific report, then the flow comparison
+        yield from self._iter_summary(
             file_a=file_a,
             file_b=file_b,
             stream_id_a=stream_id_a,
@@ -294,25 +756,16 @@ class StreamDiffPlugin(PluginBase):
             result=result,
             a_only_diffs=a_only_diffs,
             b_only_diffs=b_only_diffs,
+            max_rows=max_rows,
         )
-
-        # Generate flow comparison report
-        flow_report = comparator.format_flow_comparison(
+        yield ""
+        yield from comparator.iter_flow_comparison(
             packets_a=packets_a,
             packets_b=packets_b,
             result=result,
+            max_rows=max_rows,
         )
 
-        # Combine reports
-        full_report = f"{streamdiff_report}\n\n{flow_report}"
-
-        if output_file:
-            output_file.write_text(full_report)
-        else:
-            click.echo(full_report)
-
-        return 0
-
     def _resolve_stream_ids(
         self,
         file_a: Path,
@@ -334,43 +787,8 @@ class StreamDiffPlugin(PluginBase):
                     "--pair-index is required when --matched-connections is provided."
                 )
 
-            pairs = parse_matched_connections(matched_connections)
-            if not pairs:
-                raise CapMasterError(
-                    "No valid connection pairs found in matched connections file."
-                )
-
-            pair = _select_pair_by_index(pairs, pair_index)
-
-            # Map pcap IDs from matched file back to our local file_a/file_b
-            if pcap_id_mapping is None:
-                # Fallback: assume file_a is PCAPID 0 and file_b is 1
-                id_a, id_b = 0, 1
-            else:
-                id_a = pcap_id_mapping.get(str(file_a), 0)
-                id_b = pcap_id_mapping.get(str(file_b), 1)
-
-            # By convention in match output, stream_a belongs to PCAPID 0, stream_b to 1
-            # We need to align those to our local A/B ordering.
-            stream_a = pair.stream_a
-            stream_b = pair.stream_b
-
-            if id_a == 0 and id_b == 1:
-                stream_id_a = stream_a
-                stream_id_b = stream_b
-            elif id_a == 1 and id_b == 0:
-                stream_id_a = stream_b
-                stream_id_b = stream_a
-            else:
-                raise CapMasterError(
-                    "Unexpected PCAP ID mapping; expected exactly two PCAP IDs 0/1."
-                )
-
-            conn_label = (
-                f"{pair.connection_a} (PCAPID={id_a}, stream={stream_id_a}) vs "
-                f"{pair.connection_b} (PCAPID={id_b}, stream={stream_id_b})"
-            )
-            return stream_id_a, stream_id_b, conn_label
+            pair = _load_pair(matched_connections, pair_index)
+            return _orient_pair(pair, file_a, file_b, pcap_id_mapping)
 
         # Case 2: explicit stream IDs on CLI
         if (file1_stream_id is None) ^ (file2_stream_id is None):
@@ -391,7 +809,7 @@ class StreamDiffPlugin(PluginBase):
         )
         return file1_stream_id, file2_stream_id, conn_label
 
-    def _build_report(
+    def _iter_summary(
         self,
         file_a: Path,
         file_b: Path,
@@ -400,65 +818,65 @@ class StreamDiffPlugin(PluginBase):
         result: "ComparisonResult",
         a_only_diffs: list["PacketDiff"],
         b_only_diffs: list["PacketDiff"],
-    ) -> str:
-        """Build a human-readable text report for A-only and B-only packets.
+        max_rows: int | None = None,
+    ) -> Iterator[str]:
+        """Yield a human-readable text report for A-only and B-only packets.
 
         The report is optimized for terminal viewing and Markdown rendering.
         """
         # We know at call sites that result is actually a ComparisonResult.
         assert hasattr(result, "packets_a") and hasattr(result, "packets_b")
 
-        header_lines: list[str] = []
-        header_lines.append("# streamdiff report: A-only/B-only packets")
-        header_lines.append("")
-        header_lines.append(
-            f"Capture A: {file_a.name} (stream {stream_id_a})\n"
-            f"Capture B: {file_b.name} (stream {stream_id_b})"
-        )
-        header_lines.append("")
-
-        summary_lines: list[str] = []
-        summary_lines.append("```text")
-        summary_lines.append("Summary:")
-        summary_lines.append(f"  Packets in A: {result.packets_a}")  # type: ignore[attr-defined]
-        summary_lines.append(f"  Packets in B: {result.packets_b}")  # type: ignore[attr-defined]
-        summary_lines.append(f"  A-only packets (by IP ID): {len(a_only_diffs)}")
-        summary_lines.append(f"  B-only packets (by IP ID): {len(b_only_diffs)}")
-        summary_lines.append("")
+        yield "# streamdiff report: A-only/B-only packets"
+        yield ""
+        yield f"Capture A: {file_a.name} (stream {stream_id_a})"
+        yield f"Capture B: {file_b.name} (stream {stream_id_b})"
+        yield ""
+        yield ""
+
+        yield "```text"
+        yield "Summary:"
+        yield f"  Packets in A: {result.packets_a}"  # type: ignore[attr-defined]
+        yield f"  Packets in B: {result.packets_b}"  # type: ignore[attr-defined]
+        yield f"  A-only packets (by IP ID): {len(a_only_diffs)}"
+        yield f"  B-only packets (by IP ID): {len(b_only_diffs)}"
+        yield ""
 
         if not a_only_diffs and not b_only_diffs:
-            summary_lines.append("No A-only or B-only packets detected.")
-            summary_lines.append("```")
-            return "\n".join(header_lines + [""] + summary_lines)
+            yield "No A-only or B-only packets detected."
+            yield "```"
+            return
 
         # A-only table (if any)
         if a_only_diffs:
-            summary_lines.append("A-only packet details:")
-            summary_lines.append(f"  {'IPID':<8} {'Frame A':<10}")
-            summary_lines.append(f"  {'-'*8} {'-'*10}")
+            yield "A-only packet details:"
+            yield f"  {'IPID':<8} {'Frame A':<10}"
+            yield f"  {'-'*8} {'-'*10}"
 
-            for diff in a_only_diffs:
+            for diff in a_only_diffs[:max_rows]:
                 # For A-only IP_ID diffs, value_a stores the hex IPID string,
                 # frame_a is the frame number.
                 ipid = getattr(diff, "value_a", "?")
                 frame_a = getattr(diff, "frame_a", -1)
-                summary_lines.append(f"  {ipid:<8} {str(frame_a):<10}")
+                yield f"  {ipid:<8} {str(frame_a):<10}"
+            if max_rows is not None and len(a_only_diffs) > max_rows:
+                yield f"  ... {len(a_only_diffs) - max_rows} more"
 
-            summary_lines.append("")
+            yield ""
 
         # B-only table (if any)
         if b_only_diffs:
-            summary_lines.append("B-only packet details:")
-            summary_lines.append(f"  {'IPID':<8} {'Frame B':<10}")
-            summary_lines.append(f"  {'-'*8} {'-'*10}")
+            yield "B-only packet details:"
+            yield f"  {'IPID':<8} {'Frame B':<10}"
+            yield f"  {'-'*8} {'-'*10}"
 
-            for diff in b_only_diffs:
+            for diff in b_only_diffs[:max_rows]:
                 # For B-only IP_ID diffs, value_b stores the hex IPID string,
                 # frame_b is the frame number.
                 ipid = getattr(diff, "value_b", "?")
                 frame_b = getattr(diff, "frame_b", -1)
-                summary_lines.append(f"  {ipid:<8} {str(frame_b):<10}")
-
-        summary_lines.append("```")
+                yield f"  {ipid:<8} {str(frame_b):<10}"
+            if max_rows is not None and len(b_only_diffs) > max_rows:
+                yield f"  ... {len(b_only_diffs) - max_rows} more"
 
-        return "\n".join(header_lines + [""] + summary_lines)
+        yield "```"
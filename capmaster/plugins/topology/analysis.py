@@ -5,17 +5,26 @@ from pathlib import Path
 from typing import Literal, Tuple, Optional
 
 from capmaster.core.connection.matcher import ConnectionMatch
-from capmaster.plugins.match.endpoint_stats import EndpointStatsCollector, aggregate_by_service
+from capmaster.plugins.match.cardinality_index import CardinalityOptions
+from capmaster.plugins.match.endpoint_stats import EndpointStatsCollector
 from capmaster.plugins.match.server_detector import ServerDetector
 from capmaster.plugins.analyze.modules.icmp_stats import IcmpStatsModule
 
 
 class TopologyAnalyzer:
-    def __init__(self, matches: list[ConnectionMatch], file1: Path, file2: Path, service_list: Path | None = None):
+    def __init__(
+        self,
+        matches: list[ConnectionMatch],
+        file1: Path,
+        file2: Path,
+        service_list: Path | None = None,
+        cardinality: CardinalityOptions | None = None,
+    ):
         self.matches = matches
         self.file1 = file1
         self.file2 = file2
         self.service_list = service_list
+        self.cardinality = cardinality
 
     def analyze(self) -> TopologyInfo:
         """
@@ -25,7 +34,9 @@ class TopologyAnalyzer:
             TopologyInfo containing per-service topology information
         """
         # Create detector and collector for endpoint statistics
-        detector = ServerDetector(service_list_path=self.service_list)
+        detector = ServerDetector(
+            service_list_path=self.service_list, cardinality=self.cardinality
+        )
         collector = EndpointStatsCollector(detector)
 
         # Add all matches
@@ -35,19 +46,16 @@ class TopologyAnalyzer:
         # Finalize collection (performs cardinality analysis)
         collector.finalize()
 
-        # Get aggregated statistics
-        endpoint_stats = collector.get_stats()
+        # Get statistics aggregated by service (server port + protocol)
+        service_stats_list = collector.get_service_stats()
 
-        if not endpoint_stats:
+        if not service_stats_list:
             return TopologyInfo(
                 file1_name=self.file1.name,
                 file2_name=self.file2.name,
                 services=[],
             )
 
-        # Aggregate by service (server port + protocol)
-        service_stats_list = aggregate_by_service(endpoint_stats)
-
         # Build ServiceTopologyInfoDual for each service
         services = []
         for service_stats in service_stats_list:
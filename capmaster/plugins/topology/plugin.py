@@ -11,7 +11,8 @@ from capmaster.plugins import register_plugin
 from capmaster.plugins.base import PluginBase
 from capmaster.plugins.topology.runner import run_topology_analysis
 from capmaster.core.input_manager import InputManager
-from capmaster.utils.cli_options import unified_input_options
+from capmaster.plugins.match.cardinality_index import CardinalityOptions
+from capmaster.utils.cli_options import cardinality_options, unified_input_options
 
 logger = logging.getLogger(__name__)
 
@@ -49,8 +50,10 @@ class TopologyPlugin(PluginBase):
         @click.option(
             "--matched-connections",
             type=click.Path(exists=True, dir_okay=False, path_type=Path),
-            help="Matched connections text file produced by 'capmaster match -o ...'. "
-            "Required for dual-point analysis.",
+            help="Matched connections text file produced by 'capmaster match -o ...' "
+            "(or the .cmstore match store written next to it, or a --match-json file). "
+            "Stores and match JSON built from the same captures are reused without "
+            "re-reading the PCAPs. Required for dual-point analysis.",
         )
         @click.option(
             "--empty-match-behavior",
@@ -75,6 +78,7 @@ class TopologyPlugin(PluginBase):
             type=click.Path(exists=True, dir_okay=False, path_type=Path),
             help="Optional service list file (ip:port or ip:*) to aid server detection.",
         )
+        @cardinality_options
         @click.pass_context
         def topology_command(
             ctx: click.Context,
@@ -92,6 +96,8 @@ class TopologyPlugin(PluginBase):
             empty_match_behavior: str,
             output_file: Path | None,
             service_list: Path | None,
+            cardinality: str,
+            cardinality_index: Path | None,
         ) -> None:
             """Render network topology for captures.
 
@@ -106,6 +112,10 @@ class TopologyPlugin(PluginBase):
               # Explicit files
               capmaster topology --file1 a.pcap --file2 b.pcap \
                 --matched-connections artifacts/tmp/matched.txt
+
+              # Accumulate endpoint cardinality across captures
+              capmaster topology --file1 a.pcap --cardinality approx \
+                --cardinality-index artifacts/tmp/cardinality.json
             """
 
             exit_code = self.execute(
@@ -121,6 +131,8 @@ class TopologyPlugin(PluginBase):
                 empty_match_behavior=empty_match_behavior,
                 output_file=output_file,
                 service_list=service_list,
+                cardinality=cardinality,
+                cardinality_index=cardinality_index,
                 allow_no_input=allow_no_input,
                 strict=strict,
                 quiet=quiet,
@@ -143,6 +155,8 @@ class TopologyPlugin(PluginBase):
         empty_match_behavior: str = "error",
         output_file: Path | None = None,
         service_list: Path | None = None,
+        cardinality: str = "exact",
+        cardinality_index: Path | None = None,
     ) -> int:
         """Execute the topology plugin."""
         with _silence_topology_logger(quiet):
@@ -161,6 +175,8 @@ class TopologyPlugin(PluginBase):
                 empty_match_behavior=empty_match_behavior,
                 output_file=output_file,
                 service_list=service_list,
+                cardinality=cardinality,
+                cardinality_index=cardinality_index,
             )
 
     def _execute_impl(
@@ -179,6 +195,8 @@ class TopologyPlugin(PluginBase):
         empty_match_behavior: str = "error",
         output_file: Path | None = None,
         service_list: Path | None = None,
+        cardinality: str = "exact",
+        cardinality_index: Path | None = None,
     ) -> int:
         """Delegate to the topology runner."""
         # Resolve inputs
@@ -210,6 +228,7 @@ class TopologyPlugin(PluginBase):
             empty_match_behavior=empty_match_behavior,
             output_file=output_file,
             service_list=service_list,
+            cardinality=CardinalityOptions(mode=cardinality, index_file=cardinality_index),
             quiet=quiet,
         )
 
@@ -9,11 +9,15 @@ from typing import Iterator, Sequence
 
 from rich.progress import BarColumn, Progress, SpinnerColumn, TaskProgressColumn, TextColumn
 
+from capmaster.core.concurrency import run_dual
 from capmaster.core.connection.connection_extractor import extract_connections_from_pcap
+from capmaster.core.connection.match_serializer import MatchSerializer
+from capmaster.core.connection.match_store import MatchStore
 from capmaster.core.connection.matcher import ConnectionMatch
 from capmaster.core.connection.models import TcpConnection
 from capmaster.core.connection.scorer import MatchScore
 from capmaster.core.file_scanner import PcapScanner
+from capmaster.plugins.match.cardinality_index import CardinalityOptions
 from capmaster.plugins.match.quality_analyzer import ConnectionPair, parse_matched_connections
 from capmaster.plugins.match.server_detector import ServerDetector
 from capmaster.plugins.match.ttl_utils import most_common_hops
@@ -26,6 +30,7 @@ from capmaster.plugins.topology.analysis import (
     format_topology,
 )
 from capmaster.utils.errors import CapMasterError, handle_error
+from capmaster.utils.fingerprint import fingerprints_match
 from capmaster.utils.meta_writer import write_meta_json
 
 logger = logging.getLogger(__name__)
@@ -40,6 +45,7 @@ def run_topology_analysis(
     empty_match_behavior: str = "error",
     output_file: Path | None = None,
     service_list: Path | None = None,
+    cardinality: CardinalityOptions | None = None,
     quiet: bool = False,
 ) -> int:
     """Run topology analysis for single-point or dual-point captures."""
@@ -57,7 +63,9 @@ def run_topology_analysis(
                     "Matched connections file is not needed for single-file topology analysis.",
                     "Remove --matched-connections or provide two PCAP files.",
                 )
-            result = _run_single_capture_pipeline(files[0], service_list=service_list, quiet=quiet)
+            result = _run_single_capture_pipeline(
+                files[0], service_list=service_list, cardinality=cardinality, quiet=quiet
+            )
             output_text = format_single_topology(result)
         else:
             if matched_connections_file is None:
@@ -70,6 +78,7 @@ def run_topology_analysis(
                 file_b=files[1],
                 matched_file=matched_connections_file,
                 service_list=service_list,
+                cardinality=cardinality,
                 empty_match_behavior=empty_match_behavior,
                 quiet=quiet,
             )
@@ -150,6 +159,7 @@ def _run_single_capture_pipeline(
     file_path: Path,
     *,
     service_list: Path | None,
+    cardinality: CardinalityOptions | None = None,
     quiet: bool = False,
 ) -> SingleTopologyInfo:
     """
@@ -172,7 +182,7 @@ def _run_single_capture_pipeline(
         detector_task = None
         if progress:
             detector_task = progress.add_task("[yellow]Identifying server roles...", total=1)
-        detector = ServerDetector(service_list_path=service_list)
+        detector = ServerDetector(service_list_path=service_list, cardinality=cardinality)
         for connection in connections:
             detector.collect_connection(connection)
         detector.finalize_cardinality()
@@ -190,8 +200,7 @@ def _run_single_capture_pipeline(
             }
         )
 
-        for connection in connections:
-            info = detector.detect(connection)
+        for connection, info in zip(connections, detector.detect_many(connections)):
             # Use protocol from connection (currently 6=TCP); UDP is handled
             # separately via the udp_connections module.
             protocol = connection.protocol
@@ -275,6 +284,7 @@ def _run_dual_capture_pipeline(
     file_b: Path,
     matched_file: Path,
     service_list: Path | None,
+    cardinality: CardinalityOptions | None = None,
     empty_match_behavior: str = "error",
     quiet: bool = False,
 ) -> str:
@@ -295,14 +305,43 @@ def _run_dual_capture_pipeline(
         parse_task = None
         if progress:
             parse_task = progress.add_task("[cyan]Parsing matched connections...", total=1)
-        connection_pairs = parse_matched_connections(matched_file)
+
+        # Reuse full connections from a match store or match JSON when they
+        # were built from these exact captures, skipping both dissections
+        stored_matches = _load_serialized_matches(matched_file, file_a, file_b)
+        if stored_matches is not None:
+            if progress and parse_task:
+                progress.update(parse_task, advance=1)
+            if not stored_matches:
+                if behavior == "fallback-single":
+                    logger.warning(
+                        "No matched connections found in the serialized match file. "
+                        "Falling back to per-capture single-point topology analysis.",
+                    )
+                    return _run_dual_single_fallback(
+                        file_a, file_b, service_list, cardinality, quiet=quiet
+                    )
+                raise CapMasterError(
+                    "No valid connection pairs found in matched connections file.",
+                    "Verify the file was generated with 'capmaster match -o ...'.",
+                )
+            logger.info(
+                f"Reusing {len(stored_matches)} serialized connection matches from {matched_file}",
+            )
+            return _analyze_dual_topology(
+                stored_matches, file_a, file_b, service_list, cardinality
+            )
+
+        connection_pairs = _load_connection_pairs(matched_file)
         if not connection_pairs:
             if behavior == "fallback-single":
                 logger.warning(
                     "No valid connection pairs found in matched connections file. "
                     "Falling back to per-capture single-point topology analysis.",
                 )
-                return _run_dual_single_fallback(file_a, file_b, service_list, quiet=quiet)
+                return _run_dual_single_fallback(
+                    file_a, file_b, service_list, cardinality, quiet=quiet
+                )
             raise CapMasterError(
                 "No valid connection pairs found in matched connections file.",
                 "Verify the file was generated with 'capmaster match -o ...'.",
@@ -314,14 +353,18 @@ def _run_dual_capture_pipeline(
         extract_task = None
         if progress:
             extract_task = progress.add_task("[cyan]Extracting connections...", total=2)
-        connections_a = extract_connections_from_pcap(file_a)
-        logger.info(f"Found {len(connections_a)} connections in {file_a.name}")
-        if progress and extract_task:
-            progress.update(extract_task, advance=1)
-        connections_b = extract_connections_from_pcap(file_b)
-        logger.info(f"Found {len(connections_b)} connections in {file_b.name}")
-        if progress and extract_task:
-            progress.update(extract_task, advance=1)
+
+        def extract(pcap_file: Path) -> list[TcpConnection]:
+            connections = extract_connections_from_pcap(pcap_file)
+            logger.info(f"Found {len(connections)} connections in {pcap_file.name}")
+            if progress and extract_task is not None:
+                progress.update(extract_task, advance=1)
+            return connections
+
+        # Both captures are dissected concurrently
+        connections_a, connections_b = run_dual(
+            lambda: extract(file_a), lambda: extract(file_b)
+        )
 
         match_task = None
         if progress:
@@ -333,7 +376,9 @@ def _run_dual_capture_pipeline(
                     "Could not rebuild any connection matches from the provided file. "
                     "Falling back to per-capture single-point topology analysis.",
                 )
-                return _run_dual_single_fallback(file_a, file_b, service_list, quiet=quiet)
+                return _run_dual_single_fallback(
+                    file_a, file_b, service_list, cardinality, quiet=quiet
+                )
             raise CapMasterError(
                 "Could not rebuild any connection matches from the provided file.",
                 "Ensure the matched_connections file matches the selected PCAP files.",
@@ -344,15 +389,97 @@ def _run_dual_capture_pipeline(
         if progress and match_task:
             progress.update(match_task, advance=1)
 
-    analyzer = TopologyAnalyzer(matches, file_a, file_b, service_list=service_list)
+    return _analyze_dual_topology(matches, file_a, file_b, service_list, cardinality)
+
+
+def _analyze_dual_topology(
+    matches: list[ConnectionMatch],
+    file_a: Path,
+    file_b: Path,
+    service_list: Path | None,
+    cardinality: CardinalityOptions | None = None,
+) -> str:
+    """Run the dual-capture topology analyzer and format its report."""
+    analyzer = TopologyAnalyzer(
+        matches, file_a, file_b, service_list=service_list, cardinality=cardinality
+    )
     topology = analyzer.analyze()
     return format_topology(topology)
 
 
+def _is_match_json(matched_file: Path) -> bool:
+    """Check whether a file looks like a ``capmaster match --match-json`` file."""
+    try:
+        with open(matched_file, "rb") as f:
+            return f.read(64).lstrip().startswith(b"{")
+    except OSError:
+        return False
+
+
+def _load_serialized_matches(
+    matched_file: Path,
+    file_a: Path,
+    file_b: Path,
+) -> list[ConnectionMatch] | None:
+    """Load full matches from a match store or match JSON.
+
+    Returns None when the file only holds stream IDs (text report) or when
+    the capture fingerprints recorded with the matches no longer match
+    ``file_a``/``file_b``; connections must then be extracted again.
+    """
+    store_file = MatchStore.find_for_report(matched_file)
+    if store_file is not None:
+        with MatchStore.open(store_file) as store:
+            if not store.captures_match(file_a, file_b):
+                logger.info(
+                    "Match store %s was built from different captures; re-extracting connections",
+                    store_file,
+                )
+                return None
+            return store.matches()
+
+    if not _is_match_json(matched_file):
+        return None
+
+    matches, metadata = MatchSerializer.load_matches(matched_file)
+    if not fingerprints_match(metadata.get("fingerprints") or {}, file_a, file_b):
+        logger.info(
+            "Match JSON %s was built from different captures; re-extracting connections",
+            matched_file,
+        )
+        return None
+    return matches
+
+
+def _load_connection_pairs(matched_file: Path) -> list[ConnectionPair]:
+    """Load stream ID pairs from a text report, match store or match JSON."""
+    if MatchStore.find_for_report(matched_file) is None and _is_match_json(matched_file):
+        matches, _ = MatchSerializer.load_matches(matched_file)
+        return [
+            ConnectionPair(
+                pair_id=index,
+                stream_a=match.conn1.stream_id,
+                connection_a=(
+                    f"{match.conn1.client_ip}:{match.conn1.client_port} <-> "
+                    f"{match.conn1.server_ip}:{match.conn1.server_port}"
+                ),
+                stream_b=match.conn2.stream_id,
+                connection_b=(
+                    f"{match.conn2.client_ip}:{match.conn2.client_port} <-> "
+                    f"{match.conn2.server_ip}:{match.conn2.server_port}"
+                ),
+                confidence=match.score.normalized_score,
+            )
+            for index, match in enumerate(matches, 1)
+        ]
+    return parse_matched_connections(matched_file)
+
+
 def _run_dual_single_fallback(
     file_a: Path,
     file_b: Path,
     service_list: Path | None,
+    cardinality: CardinalityOptions | None = None,
     quiet: bool = False,
 ) -> str:
     """Run single-capture topology for each file and combine outputs.
@@ -361,8 +488,12 @@ def _run_dual_single_fallback(
     of any valid cross-capture matches and ``empty_match_behavior`` is set to
     ``"fallback-single"``.
     """
-    single_a = _run_single_capture_pipeline(file_a, service_list=service_list, quiet=quiet)
-    single_b = _run_single_capture_pipeline(file_b, service_list=service_list, quiet=quiet)
+    single_a = _run_single_capture_pipeline(
+        file_a, service_list=service_list, cardinality=cardinality, quiet=quiet
+    )
+    single_b = _run_single_capture_pipeline(
+        file_b, service_list=service_list, cardinality=cardinality, quiet=quiet
+    )
 
     lines = []
     lines.append(
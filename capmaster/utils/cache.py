@@ -0,0 +1,183 @@
+"""On-disk cache for results derived from capture files.
+
+Entries are small JSON documents stored under a per-namespace directory and
+addressed by a digest of the values that determine them (typically the
+capture fingerprint and the tshark version). The cache is an optimization
+only: unreadable or corrupt entries are treated as misses and write errors
+are logged and ignored.
+
+The cache lives in ``$CAPMASTER_CACHE_DIR`` if set, else in
+``$XDG_CACHE_HOME/capmaster`` (``~/.cache/capmaster``). Setting
+``CAPMASTER_CACHE_DIR`` to an empty string disables it.
+
+Reading an entry refreshes its modification time, so namespaces with a
+size budget evict the least recently used entries first (see
+:func:`prune_entries`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Environment variable overriding the cache location ("" disables the cache)
+CACHE_DIR_ENV_VAR = "CAPMASTER_CACHE_DIR"
+
+
+def default_cache_dir(namespace: str) -> Path | None:
+    """
+    Resolve the cache directory of a namespace.
+
+    Args:
+        namespace: Subdirectory grouping entries of one kind (e.g. ``"protocols"``)
+
+    Returns:
+        Directory for the namespace (not created), or None if caching is
+        disabled through the environment
+    """
+    value = os.environ.get(CACHE_DIR_ENV_VAR)
+    if value is not None:
+        if not value:
+            return None
+        return Path(value).expanduser() / namespace
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "capmaster" / namespace
+
+
+def cache_key(*parts: object) -> str:
+    """Digest identifying an entry by the values that determine it."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def read_entry(directory: Path, key: str) -> dict[str, Any] | None:
+    """
+    Read a cache entry.
+
+    Args:
+        directory: Namespace directory
+        key: Entry key from :func:`cache_key`
+
+    Returns:
+        The stored document, or None on a miss or an unreadable entry
+    """
+    path = directory / f"{key}.json"
+    try:
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.debug(f"Ignoring unreadable cache entry {path}: {e}")
+        return None
+    if not isinstance(entry, dict):
+        return None
+    try:
+        os.utime(path)  # mark as recently used
+    except OSError:
+        pass
+    return entry
+
+
+def write_entry(directory: Path, key: str, entry: dict[str, Any]) -> None:
+    """
+    Store a cache entry atomically.
+
+    The document is written to a temporary file and renamed into place, so
+    concurrent readers never see a partial entry.
+
+    Args:
+        directory: Namespace directory (created if missing)
+        key: Entry key from :func:`cache_key`
+        entry: JSON-serializable document
+    """
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=directory, prefix=f".{key}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_name, directory / f"{key}.json")
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+    except OSError as e:
+        logger.debug(f"Could not write cache entry {key} in {directory}: {e}")
+
+
+def prune_entries(directory: Path, max_bytes: int) -> int:
+    """
+    Evict the least recently used entries beyond a size budget.
+
+    Args:
+        directory: Namespace directory
+        max_bytes: Largest total size of the entries to keep
+
+    Returns:
+        Total size of the remaining entries, in bytes
+    """
+    entries: list[tuple[float, int, Path]] = []
+    try:
+        for path in directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+    except OSError as e:
+        logger.debug(f"Could not list cache entries in {directory}: {e}")
+        return 0
+    total = sum(size for _, size, _ in entries)
+    if total <= max_bytes:
+        return total
+    entries.sort()
+    evicted = 0
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.debug(f"Could not evict cache entry {path}: {e}")
+            continue
+        total -= size
+        evicted += 1
+    logger.debug(f"Evicted {evicted} cache entries from {directory}")
+    return total
+
+
+def clear_entries(directory: Path) -> int:
+    """
+    Remove every entry of a namespace.
+
+    Args:
+        directory: Namespace directory
+
+    Returns:
+        Number of entries removed
+    """
+    removed = 0
+    try:
+        paths = list(directory.glob("*.json"))
+    except OSError:
+        return 0
+    for path in paths:
+        try:
+            path.unlink()
+        except OSError as e:
+            logger.debug(f"Could not remove cache entry {path}: {e}")
+            continue
+        removed += 1
+    return removed
@@ -117,3 +117,30 @@ def unified_input_options(func: Callable) -> Callable:
 
     return func
 
+
+
+def cardinality_options(func: Callable) -> Callable:
+    """
+    Add server detection cardinality options to a Click command.
+
+    Adds the following parameters:
+    - --cardinality: "exact" (default) or "approx" distinct counters
+    - --cardinality-index: JSON index reused and updated across runs
+    """
+    func = click.option(
+        "--cardinality-index",
+        type=click.Path(dir_okay=False, path_type=Path),
+        help="Cardinality index file (JSON). Loaded before server detection when it exists "
+        "and rewritten afterwards, so peer counts accumulate across captures and runs.",
+    )(func)
+
+    func = click.option(
+        "--cardinality",
+        type=click.Choice(["exact", "approx"], case_sensitive=False),
+        default="exact",
+        show_default=True,
+        help="Distinct counters used by cardinality-based server detection. 'approx' bounds "
+        "memory on captures with very many endpoints (HyperLogLog, about 6.5%% error).",
+    )(func)
+
+    return func
@@ -0,0 +1,80 @@
+"""Cheap content fingerprints for capture files."""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+# Bytes hashed from each end of the file
+DEFAULT_SAMPLE_SIZE = 1 << 20
+
+
+def capture_fingerprint(path: Path, sample_size: int = DEFAULT_SAMPLE_SIZE) -> str:
+    """
+    Compute a fingerprint identifying the content of a capture file.
+
+    The fingerprint combines the file size with a BLAKE2b digest of the first
+    and last ``sample_size`` bytes only. It survives copies and renames, and
+    is cheap enough to compute on multi-GB captures. Truncations, appends and
+    rewrites that touch the head or the tail change it; an in-place edit of
+    the middle of a larger file that keeps its size does not.
+
+    Args:
+        path: Path to the capture file
+        sample_size: Number of bytes hashed from the head and the tail
+
+    Returns:
+        Fingerprint string of the form ``"<size>:<hex digest>"``
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    size = path.stat().st_size
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(size.to_bytes(8, "little"))
+    with open(path, "rb") as f:
+        digest.update(f.read(sample_size))
+        if size > sample_size:
+            f.seek(max(sample_size, size - sample_size))
+            digest.update(f.read(sample_size))
+    return f"{size}:{digest.hexdigest()}"
+
+
+def capture_fingerprints(file1: Path, file2: Path) -> dict[str, str | None]:
+    """
+    Fingerprint a pair of captures for persisting alongside match results.
+
+    Args:
+        file1: First capture (file A)
+        file2: Second capture (file B)
+
+    Returns:
+        Mapping with ``"file1"`` and ``"file2"`` fingerprints (None when a
+        capture cannot be read)
+    """
+    fingerprints: dict[str, str | None] = {}
+    for key, capture in (("file1", file1), ("file2", file2)):
+        try:
+            fingerprints[key] = capture_fingerprint(capture)
+        except OSError:
+            fingerprints[key] = None
+    return fingerprints
+
+
+def fingerprints_match(fingerprints: dict[str, str | None], file1: Path, file2: Path) -> bool:
+    """
+    Check persisted fingerprints against the captures on disk.
+
+    Args:
+        fingerprints: Mapping produced by :func:`capture_fingerprints`
+        file1: First capture (file A)
+        file2: Second capture (file B)
+
+    Returns:
+        True if both captures are present and unchanged
+    """
+    expected1 = fingerprints.get("file1")
+    expected2 = fingerprints.get("file2")
+    if expected1 is None or expected2 is None:
+        return False
+    return capture_fingerprints(file1, file2) == {"file1": expected1, "file2": expected2}
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Flow hash throughput benchmark.
+
+Measures flows per second for:
+- the message-by-message ``siphash13`` reference construction
+- ``calculate_flow_hash`` on distinct flows (cache misses)
+- ``calculate_flow_hash`` on repeated flows (cache hits, e.g. per-packet UDP)
+- ``calculate_flow_hashes`` batch API
+
+Usage:
+    python scripts/benchmark_flow_hash.py [--flows N]
+"""
+
+import argparse
+import ipaddress
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from capmaster.plugins.compare_common import flow_hash  # noqa: E402
+
+
+def reference_flow_hash(src_ip, dst_ip, src_port, dst_port, protocol):
+    """Original construction: ten messages hashed with siphash13()."""
+    side = flow_hash.FlowSide.LHS_GE_RHS
+    src_le = int.from_bytes(src_port.to_bytes(2, "big"), "little")
+    dst_le = int.from_bytes(dst_port.to_bytes(2, "big"), "little")
+    if src_le < dst_le or (src_le == dst_le and flow_hash._compare_addresses(src_ip, dst_ip) is flow_hash.FlowSide.RHS_GT_LHS):
+        src_ip, dst_ip, src_port, dst_port = dst_ip, src_ip, dst_port, src_port
+        side = flow_hash.FlowSide.RHS_GT_LHS
+    packed1 = ipaddress.ip_address(src_ip).packed
+    packed2 = ipaddress.ip_address(dst_ip).packed
+    msgs = [
+        src_port.to_bytes(2, "big"),
+        dst_port.to_bytes(2, "big"),
+        (0).to_bytes(8, "little"),
+        len(packed1).to_bytes(8, "little"),
+        packed1,
+        (0).to_bytes(8, "little"),
+        len(packed2).to_bytes(8, "little"),
+        packed2,
+        (1).to_bytes(8, "little"),
+        protocol.to_bytes(1, "big"),
+    ]
+    return flow_hash._u64_to_i64(flow_hash.siphash13(b"\x00" * 16, msgs)), side
+
+
+def make_flows(count: int) -> list[tuple[str, str, int, int, int]]:
+    rng = random.Random(42)
+    clients = [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(max(1, count // 20))]
+    servers = [str(ipaddress.IPv4Address(rng.getrandbits(32))) for _ in range(50)]
+    return [
+        (rng.choice(clients), rng.choice(servers), rng.randint(1024, 65535), rng.choice([80, 443, 53]), 6)
+        for _ in range(count)
+    ]
+
+
+def rate(label: str, count: int, func) -> float:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    flows_per_second = count / elapsed if elapsed else float("inf")
+    print(f"{label:<32} {elapsed:8.3f}s  {flows_per_second:12,.0f} flows/s")
+    return flows_per_second
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--flows", type=int, default=100_000, help="Number of flows (default: 100000)")
+    args = parser.parse_args()
+
+    flows = make_flows(args.flows)
+    columns = [list(column) for column in zip(*flows)]
+
+    reference = [reference_flow_hash(*flow) for flow in flows[:1000]]
+    assert reference == flow_hash.calculate_flow_hashes(*(c[:1000] for c in columns))
+
+    print(f"Flow hash benchmark ({len(flows)} flows)")
+    rate("reference siphash13", len(flows), lambda: [reference_flow_hash(*f) for f in flows])
+    flow_hash._cached_flow_hash.cache_clear()
+    rate("calculate_flow_hash (misses)", len(flows), lambda: [flow_hash._compute_flow_hash(*f) for f in flows])
+    hot = flows[:1000] * (len(flows) // 1000 or 1)
+    rate("calculate_flow_hash (hits)", len(hot), lambda: [flow_hash.calculate_flow_hash(*f) for f in hot])
+    rate("calculate_flow_hashes (batch)", len(flows), lambda: flow_hash.calculate_flow_hashes(*columns))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
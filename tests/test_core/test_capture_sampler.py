@@ -0,0 +1,112 @@
+"""Tests for packet sampling of captures."""
+
+from __future__ import annotations
+
+import struct
+from pathlib import Path
+
+import pytest
+
+from capmaster.core.capture_sampler import estimate_packet_count, sample_capture
+from tests.fixtures import PcapBuilder
+
+
+def _pcap(path: Path, count: int) -> Path:
+    builder = PcapBuilder()
+    for i in range(count):
+        builder.add_tcp_packet("10.0.0.1", "10.0.0.2", 40000, 80, seq=i, timestamp_sec=i)
+    return builder.build(path)
+
+
+def _pcap_seqs(path: Path) -> list[int]:
+    """Timestamps (= packet indexes) of the records of a classic pcap."""
+    data = path.read_bytes()
+    offset, seqs = 24, []
+    while offset < len(data):
+        ts_sec, _, captured, _ = struct.unpack_from("<IIII", data, offset)
+        seqs.append(ts_sec)
+        offset += 16 + captured
+    return seqs
+
+
+def _block(block_type: int, body: bytes) -> bytes:
+    body += b"\x00" * (-len(body) % 4)
+    length = 12 + len(body)
+    return struct.pack("<II", block_type, length) + body + struct.pack("<I", length)
+
+
+def _pcapng(path: Path, count: int) -> Path:
+    shb = _block(0x0A0D0D0A, struct.pack("<IHHq", 0x1A2B3C4D, 1, 0, -1))
+    idb = _block(0x00000001, struct.pack("<HHI", 1, 0, 65535))
+    packets = [
+        _block(0x00000006, struct.pack("<IIIII", 0, 0, i, 4, 4) + struct.pack("<I", i))
+        for i in range(count)
+    ]
+    path.write_bytes(shb + idb + b"".join(packets))
+    return path
+
+
+@pytest.mark.unit
+class TestSampleCapture:
+    """Sampling keeps the head and a stride of the remaining packets."""
+
+    def test_pcap_head_and_stride(self, tmp_path: Path) -> None:
+        source = _pcap(tmp_path / "in.pcap", 25)
+
+        kept = sample_capture(source, tmp_path / "out.pcap", head=5, stride=10)
+
+        assert kept == 7
+        assert _pcap_seqs(tmp_path / "out.pcap") == [0, 1, 2, 3, 4, 5, 15]
+
+    def test_small_capture_is_copied(self, tmp_path: Path) -> None:
+        source = _pcap(tmp_path / "in.pcap", 3)
+
+        sample_capture(source, tmp_path / "out.pcap", head=10, stride=10)
+
+        assert (tmp_path / "out.pcap").read_bytes() == source.read_bytes()
+
+    def test_pcapng_keeps_non_packet_blocks(self, tmp_path: Path) -> None:
+        source = _pcapng(tmp_path / "in.pcapng", 12)
+
+        kept = sample_capture(source, tmp_path / "out.pcapng", head=2, stride=5)
+
+        data = (tmp_path / "out.pcapng").read_bytes()
+        offset, types, tags = 0, [], []
+        while offset < len(data):
+            block_type, length = struct.unpack_from("<II", data, offset)
+            types.append(block_type)
+            if block_type == 6:
+                tags.append(struct.unpack_from("<I", data, offset + 28)[0])
+            offset += length
+        assert kept == 4
+        assert types[:2] == [0x0A0D0D0A, 1]
+        assert tags == [0, 1, 2, 7]
+
+    def test_rejects_unknown_format(self, tmp_path: Path) -> None:
+        source = tmp_path / "in.pcap.gz"
+        source.write_bytes(b"\x1f\x8b\x08\x00" + b"\x00" * 20)
+
+        with pytest.raises(ValueError):
+            sample_capture(source, tmp_path / "out.pcap", head=1, stride=1)
+
+
+@pytest.mark.unit
+class TestEstimatePacketCount:
+    """Packet counts are extrapolated from the leading records."""
+
+    def test_pcap_extrapolates_from_sample(self, tmp_path: Path) -> None:
+        source = _pcap(tmp_path / "in.pcap", 100)
+
+        assert estimate_packet_count(source, sample_records=100) == 100
+        assert estimate_packet_count(source, sample_records=10) == 100
+
+    def test_pcapng(self, tmp_path: Path) -> None:
+        source = _pcapng(tmp_path / "in.pcapng", 40)
+
+        assert estimate_packet_count(source, sample_records=5) == 40
+
+    def test_unknown_format(self, tmp_path: Path) -> None:
+        source = tmp_path / "in.pcap"
+        source.write_bytes(b"not a capture")
+
+        assert estimate_packet_count(source) is None
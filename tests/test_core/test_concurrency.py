@@ -0,0 +1,80 @@
+"""Tests for concurrent extraction of both captures."""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from capmaster.core import concurrency
+from capmaster.core.concurrency import (
+    get_extraction_limit,
+    run_dual,
+    set_extraction_limit,
+)
+
+
+@pytest.fixture
+def limit():
+    """Restore the process-wide budget after each test."""
+    original = get_extraction_limit()
+    yield set_extraction_limit
+    set_extraction_limit(original)
+
+
+@pytest.mark.unit
+class TestRunDual:
+    """Both sides run at once within the extraction budget."""
+
+    def test_sides_overlap(self, limit) -> None:
+        limit(2)
+        # Each side waits for the other, so this only completes concurrently
+        barrier = threading.Barrier(2, timeout=5)
+
+        def side(name: str) -> str:
+            barrier.wait()
+            return name
+
+        assert run_dual(lambda: side("a"), lambda: side("b")) == ("a", "b")
+
+    def test_single_slot_runs_sequentially(self, limit) -> None:
+        limit(1)
+        order: list[str] = []
+
+        result = run_dual(lambda: order.append("a") or 1, lambda: order.append("b") or 2)
+
+        assert result == (1, 2)
+        assert order == ["a", "b"]
+
+    def test_nested_calls_do_not_exhaust_budget(self, limit) -> None:
+        limit(2)
+
+        def nested() -> tuple[int, int]:
+            return run_dual(lambda: 1, lambda: 2)
+
+        assert run_dual(nested, nested) == ((1, 2), (1, 2))
+
+    def test_error_is_raised_after_other_side_finishes(self, limit) -> None:
+        limit(2)
+        finished = threading.Event()
+
+        def fail() -> None:
+            raise ValueError("broken capture")
+
+        def slow() -> None:
+            finished.wait(0.05)
+            finished.set()
+
+        with pytest.raises(ValueError, match="broken capture"):
+            run_dual(fail, slow)
+        assert finished.is_set()
+
+    def test_limit_from_environment(self, monkeypatch) -> None:
+        monkeypatch.setenv(concurrency.LIMIT_ENV_VAR, "3")
+        assert concurrency._default_limit() == 3
+        monkeypatch.setenv(concurrency.LIMIT_ENV_VAR, "many")
+        assert concurrency._default_limit() >= 1
+
+    def test_invalid_limit(self) -> None:
+        with pytest.raises(ValueError):
+            set_extraction_limit(0)
@@ -0,0 +1,175 @@
+"""Unit tests for the binary match store."""
+
+from __future__ import annotations
+
+import os
+import random
+from pathlib import Path
+
+import pytest
+
+from capmaster.core.connection.match_store import MatchStore
+from capmaster.core.connection.matcher import ConnectionMatch
+from capmaster.core.connection.models import TcpConnection
+from capmaster.core.connection.scorer import MatchScore
+from capmaster.plugins.match.output_formatter import output_match_results, save_match_store
+from capmaster.plugins.match.quality_analyzer import parse_matched_connections
+
+
+def _make_connection(rng: random.Random, stream_id: int, subnet: str) -> TcpConnection:
+    """Create a TcpConnection with every field populated."""
+    return TcpConnection(
+        stream_id=stream_id,
+        protocol=6,
+        client_ip=f"{subnet}.{rng.randint(1, 20)}",
+        client_port=rng.randint(1024, 65535),
+        server_ip=f"{subnet}.{rng.randint(100, 103)}",
+        server_port=rng.choice([80, 443, 8443]),
+        syn_timestamp=rng.random() * 100,
+        syn_options="mss=1460;ws=7",
+        client_isn=rng.getrandbits(32),
+        server_isn=rng.getrandbits(32),
+        tcp_timestamp_tsval=str(rng.getrandbits(24)),
+        tcp_timestamp_tsecr="0",
+        client_payload_md5="a" * 32,
+        server_payload_md5="",
+        length_signature="C:100 S:200",
+        is_header_only=rng.random() < 0.5,
+        ipid_first=rng.getrandbits(16),
+        ipid_set={rng.getrandbits(16) for _ in range(5)},
+        client_ipid_set={rng.getrandbits(16) for _ in range(3)},
+        server_ipid_set={rng.getrandbits(16) for _ in range(2)},
+        first_packet_time=1.25,
+        last_packet_time=9.5,
+        packet_count=rng.randint(1, 500),
+        client_ttl=rng.choice([0, 62, 127]),
+        server_ttl=rng.choice([0, 58, 250]),
+        total_bytes=rng.randint(0, 10**9),
+        has_syn=True,
+    )
+
+
+def _make_matches(count: int, seed: int = 1) -> list[ConnectionMatch]:
+    rng = random.Random(seed)
+    conns_b = [_make_connection(rng, 1000 + i, "172.16.0") for i in range(count)]
+    matches = []
+    for i in range(count):
+        score = MatchScore(
+            normalized_score=rng.random(),
+            raw_score=rng.random() * 10,
+            available_weight=5.0,
+            ipid_match=rng.random() < 0.5,
+            evidence=rng.choice(["synopt isnC", "ipid payload", "f5 trailer"]),
+            force_accept=rng.random() < 0.2,
+            microflow_accept=False,
+        )
+        # One-to-many: some B connections are shared by several pairs
+        conn_b = conns_b[i // 2] if i % 3 == 0 else conns_b[i]
+        matches.append(
+            ConnectionMatch(conn1=_make_connection(rng, i * 3, "10.0.0"), conn2=conn_b, score=score)
+        )
+    return matches
+
+
+def _stats(matches: list[ConnectionMatch]) -> dict:
+    return {
+        "total_connections_1": len(matches),
+        "total_connections_2": len(matches),
+        "matched_pairs": len(matches),
+        "unmatched_1": 0,
+        "unmatched_2": 0,
+        "match_rate_1": 1.0,
+        "match_rate_2": 1.0,
+        "average_score": 0.5,
+        "match_mode": "one-to-many",
+    }
+
+
+@pytest.mark.unit
+class TestMatchStore:
+    """Round trip, lookups and text report compatibility."""
+
+    def test_roundtrip_matches(self, tmp_path: Path) -> None:
+        matches = _make_matches(50)
+        store_file = tmp_path / "matches.cmstore"
+        MatchStore.save(matches, store_file, "a.pcap", "b.pcap", metadata={"match_mode": "x"})
+
+        with MatchStore.open(store_file) as store:
+            assert len(store) == len(matches)
+            assert store.file1 == "a.pcap"
+            assert store.metadata == {"match_mode": "x"}
+            assert store.matches() == matches
+            assert store.stream_pairs() == [(m.conn1.stream_id, m.conn2.stream_id) for m in matches]
+
+    def test_lookup_by_stream_id(self, tmp_path: Path) -> None:
+        matches = _make_matches(200)
+        store_file = tmp_path / "matches.cmstore"
+        MatchStore.save(matches, store_file, "a.pcap", "b.pcap")
+
+        with MatchStore.open(store_file) as store:
+            for index, match in enumerate(matches):
+                assert index in store.find_pairs("a", match.conn1.stream_id)
+                assert index in store.find_pairs("b", match.conn2.stream_id)
+                row = store.find_connection("b", match.conn2.stream_id)
+                assert row is not None
+                assert store.connection("b", row) == match.conn2
+            assert store.find_connection("a", 1) is None
+            assert store.find_pairs("b", 999999) == []
+            assert store.connection_count("b") < len(matches)
+
+    def test_report_pairs_match_text_parsing(self, tmp_path: Path) -> None:
+        matches = _make_matches(40, seed=9)
+        report = tmp_path / "matched_connections.txt"
+        output_match_results(matches, _stats(matches), report)
+        text_pairs = parse_matched_connections(report)
+
+        store_file = save_match_store(matches, report, tmp_path / "a.pcap", tmp_path / "b.pcap", _stats(matches))
+
+        assert store_file == tmp_path / "matched_connections.cmstore"
+        assert MatchStore.find_for_report(report) == store_file
+        assert parse_matched_connections(report) == text_pairs
+        assert parse_matched_connections(store_file) == text_pairs
+
+    def test_stale_store_is_ignored(self, tmp_path: Path) -> None:
+        matches = _make_matches(5)
+        report = tmp_path / "matched_connections.txt"
+        output_match_results(matches, _stats(matches), report)
+        store_file = save_match_store(matches, report, tmp_path / "a.pcap", tmp_path / "b.pcap", _stats(matches))
+
+        # Report rewritten after the store
+        stat = store_file.stat()
+        os.utime(report, (stat.st_atime, stat.st_mtime + 10))
+
+        assert MatchStore.find_for_report(report) is None
+
+    def test_capture_fingerprints(self, tmp_path: Path) -> None:
+        file_a = tmp_path / "a.pcap"
+        file_b = tmp_path / "b.pcap"
+        file_a.write_bytes(b"\x01" * 4096)
+        file_b.write_bytes(b"\x02" * 4096)
+        store_file = tmp_path / "matches.cmstore"
+        MatchStore.save(_make_matches(3), store_file, file_a, file_b)
+
+        with MatchStore.open(store_file) as store:
+            assert store.captures_match(file_a, file_b)
+            file_b.write_bytes(b"\x02" * 4097)
+            assert not store.captures_match(file_a, file_b)
+
+    def test_invalid_files(self, tmp_path: Path) -> None:
+        bogus = tmp_path / "bogus.cmstore"
+        bogus.write_text("not a store")
+
+        assert not MatchStore.is_store(bogus)
+        with pytest.raises(ValueError):
+            MatchStore.open(bogus)
+        with pytest.raises(FileNotFoundError):
+            MatchStore.open(tmp_path / "missing.cmstore")
+
+    def test_empty_store(self, tmp_path: Path) -> None:
+        store_file = tmp_path / "empty.cmstore"
+        MatchStore.save([], store_file, "a.pcap", "b.pcap")
+
+        with MatchStore.open(store_file) as store:
+            assert len(store) == 0
+            assert store.matches() == []
+            assert store.find_connection("a", 0) is None
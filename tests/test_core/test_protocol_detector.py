@@ -121,7 +121,7 @@ eth                                      frames:100 bytes:50000
         mock_tshark.execute.assert_called_once_with(
             args=["-q", "-z", "io,phs"],
             input_file=pcap_file,
-            timeout=60,
+            timeout=300,
         )
 
     def test_detect_tshark_failure(self, tmp_path: Path) -> None:
@@ -182,3 +182,93 @@ eth                                      frames:30 bytes:15000
         assert "ftp" in protocols
         assert "ftp-data" in protocols
 
+
+
+HIERARCHY = """
+eth                                      frames:30 bytes:15000
+  ip                                     frames:30 bytes:15000
+    tcp                                  frames:30 bytes:15000
+      http                               frames:15 bytes:7500
+"""
+
+
+def _tshark() -> MagicMock:
+    mock_tshark = MagicMock()
+    mock_tshark.version = "4.2.0"
+    mock_tshark.execute.return_value = subprocess.CompletedProcess([], 0, HIERARCHY, "")
+    return mock_tshark
+
+
+@pytest.mark.unit
+class TestProtocolDetectionCache:
+    """Detection results are memoized per capture fingerprint."""
+
+    def test_hierarchy_and_detect_share_one_pass(self, tmp_path: Path) -> None:
+        pcap_file = tmp_path / "test.pcap"
+        pcap_file.write_bytes(b"capture")
+        mock_tshark = _tshark()
+        detector = ProtocolDetector(mock_tshark)
+
+        assert detector.detect(pcap_file) == {"eth", "ip", "tcp", "http"}
+        assert detector.hierarchy(pcap_file) == HIERARCHY
+        mock_tshark.execute.assert_called_once()
+
+    def test_rerun_uses_disk_cache(self, tmp_path: Path) -> None:
+        pcap_file = tmp_path / "test.pcap"
+        pcap_file.write_bytes(b"capture")
+        ProtocolDetector(_tshark(), cache_dir=tmp_path / "cache").detect(pcap_file)
+
+        # A copy has the same content fingerprint
+        copy = tmp_path / "copy.pcap"
+        copy.write_bytes(b"capture")
+        mock_tshark = _tshark()
+        protocols = ProtocolDetector(mock_tshark, cache_dir=tmp_path / "cache").detect(copy)
+
+        assert protocols == {"eth", "ip", "tcp", "http"}
+        mock_tshark.execute.assert_not_called()
+
+    def test_changed_capture_is_detected_again(self, tmp_path: Path) -> None:
+        pcap_file = tmp_path / "test.pcap"
+        pcap_file.write_bytes(b"capture")
+        ProtocolDetector(_tshark(), cache_dir=tmp_path / "cache").detect(pcap_file)
+
+        pcap_file.write_bytes(b"capture, appended")
+        mock_tshark = _tshark()
+        ProtocolDetector(mock_tshark, cache_dir=tmp_path / "cache").detect(pcap_file)
+
+        mock_tshark.execute.assert_called_once()
+
+    def test_sampled_detection_reads_a_sample(self, tmp_path: Path) -> None:
+        pcap_file = tmp_path / "test.pcap"
+        pcap_file.write_bytes(bytes.fromhex("d4c3b2a1020004000000000000000000ffff000001000000"))
+        mock_tshark = _tshark()
+        detector = ProtocolDetector(mock_tshark, cache_dir=tmp_path / "cache")
+
+        assert detector.detect_sampled(pcap_file) == {"eth", "ip", "tcp", "http"}
+        sampled_input = mock_tshark.execute.call_args.kwargs["input_file"]
+        assert sampled_input != pcap_file
+
+        # The sampled result does not stand in for a complete one
+        detector.detect(pcap_file)
+        assert mock_tshark.execute.call_count == 2
+
+    def test_sampled_detection_prefers_complete_result(self, tmp_path: Path) -> None:
+        pcap_file = tmp_path / "test.pcap"
+        pcap_file.write_bytes(b"capture")
+        mock_tshark = _tshark()
+        detector = ProtocolDetector(mock_tshark)
+
+        detector.detect(pcap_file)
+        detector.detect_sampled(pcap_file)
+
+        mock_tshark.execute.assert_called_once()
+
+    def test_unsampleable_capture_reads_leading_packets(self, tmp_path: Path) -> None:
+        pcap_file = tmp_path / "test.pcap"
+        pcap_file.write_bytes(b"not a capture")
+        mock_tshark = _tshark()
+
+        ProtocolDetector(mock_tshark).detect_sampled(pcap_file)
+
+        args = mock_tshark.execute.call_args.kwargs["args"]
+        assert args[:2] == ["-c", "10000"] and args[2:] == ["-q", "-z", "io,phs"]
@@ -0,0 +1,68 @@
+"""Tests for largest-first scheduling helpers."""
+
+from __future__ import annotations
+
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+
+from capmaster.core.scheduling import estimate_packets, lpt_order, map_largest_first
+from tests.fixtures import PcapBuilder
+
+
+class RecordingExecutor:
+    """Executor running submissions inline and recording their order."""
+
+    def __init__(self) -> None:
+        self.submitted: list[object] = []
+
+    def submit(self, fn, item):
+        self.submitted.append(item)
+        future: Future = Future()
+        try:
+            future.set_result(fn(item))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+
+@pytest.mark.unit
+class TestLargestFirst:
+    """LPT ordering and dispatch."""
+
+    def test_lpt_order_is_stable(self) -> None:
+        assert lpt_order(["a", "bbb", "cc", "dd"], len) == ["bbb", "cc", "dd", "a"]
+
+    def test_map_submits_largest_first_and_keeps_input_order(self, tmp_path: Path) -> None:
+        files = []
+        for name, size in (("small", 10), ("large", 1000), ("medium", 100)):
+            path = tmp_path / f"{name}.pcap"
+            path.write_bytes(b"x" * size)
+            files.append(path)
+        executor = RecordingExecutor()
+
+        results = map_largest_first(executor, lambda p: p.stem, files)
+
+        assert [p.stem for p in executor.submitted] == ["large", "medium", "small"]
+        assert results == ["small", "large", "medium"]
+
+    def test_map_raises_first_failure(self) -> None:
+        def fail_on_b(item: str) -> str:
+            if item == "b":
+                raise RuntimeError("boom")
+            return item
+
+        with pytest.raises(RuntimeError, match="boom"):
+            map_largest_first(RecordingExecutor(), fail_on_b, ["a", "b"], cost=len)
+
+    def test_estimate_packets(self, tmp_path: Path) -> None:
+        builder = PcapBuilder()
+        for i in range(30):
+            builder.add_tcp_packet("10.0.0.1", "10.0.0.2", 40000, 80, seq=i)
+        capture = builder.build(tmp_path / "c.pcap")
+        compressed = tmp_path / "c.pcap.gz"
+        compressed.write_bytes(b"\x1f\x8b" + b"\x00" * 998)
+
+        assert estimate_packets(capture) == 30
+        assert estimate_packets(compressed) == 2  # 1000 bytes / 500
@@ -249,3 +249,51 @@ class TestTsharkWrapper:
 
         assert wrapper.check_version_requirement("4.0") is True
 
+
+
+def _script_wrapper(tmp_path: Path, body: str) -> TsharkWrapper:
+    """TsharkWrapper running a shell script in place of tshark."""
+    script = tmp_path / "tshark"
+    script.write_text(f"#!/bin/sh\n{body}\n")
+    script.chmod(0o755)
+    with patch("subprocess.run") as mock_run:
+        mock_run.return_value = MagicMock(stdout="TShark (Wireshark) 4.2.0\n", returncode=0)
+        return TsharkWrapper(tshark_path=str(script))
+
+
+@pytest.mark.unit
+class TestTsharkStream:
+    """Streaming execution of tshark."""
+
+    def test_stream_yields_lines(self, tmp_path: Path) -> None:
+        wrapper = _script_wrapper(tmp_path, 'echo "$@"; printf "a\\tb\\nc\\td\\n"')
+
+        lines = list(wrapper.stream(["-T", "fields"], input_file=Path("in.pcap")))
+
+        assert lines == ["-r in.pcap -T fields\n", "a\tb\n", "c\td\n"]
+
+    def test_stream_exit_code_2_is_a_warning(self, tmp_path: Path) -> None:
+        wrapper = _script_wrapper(tmp_path, 'echo row; echo "truncated" >&2; exit 2')
+
+        assert list(wrapper.stream([])) == ["row\n"]
+
+    def test_stream_failure_raises(self, tmp_path: Path) -> None:
+        wrapper = _script_wrapper(tmp_path, 'echo "bad field" >&2; exit 1')
+
+        with pytest.raises(TsharkExecutionError) as exc_info:
+            list(wrapper.stream(["-e", "nope"]))
+
+        assert "bad field" in exc_info.value.suggestion
+
+    def test_stream_timeout(self, tmp_path: Path) -> None:
+        wrapper = _script_wrapper(tmp_path, "echo first; exec sleep 5")
+
+        with pytest.raises(subprocess.TimeoutExpired):
+            list(wrapper.stream([], timeout=0.2))
+
+    def test_closing_stream_early_stops_tshark(self, tmp_path: Path) -> None:
+        wrapper = _script_wrapper(tmp_path, "echo first; exec sleep 5")
+
+        lines = wrapper.stream([])
+        assert next(lines) == "first\n"
+        lines.close()
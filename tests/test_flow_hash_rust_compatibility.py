@@ -5,11 +5,18 @@ the same results as the Rust xuanwu-core implementation.
 """
 
 import pytest
+import ipaddress
+import random
+
 from capmaster.plugins.compare_common.flow_hash import (
     calculate_flow_hash,
+    calculate_flow_hashes,
     calculate_connection_flow_hash,
     FlowSide,
     format_flow_hash,
+    siphash13,
+    _compare_addresses,
+    _u64_to_i64,
 )
 
 
@@ -260,5 +267,80 @@ class TestFlowHashRustCompatibility:
         assert hash1 == hash2, "Network byte order should ensure bidirectional consistency"
 
 
+def _reference_flow_hash(src_ip, dst_ip, src_port, dst_port, protocol):
+    """Message-by-message construction mirroring the Rust implementation."""
+    src_le = int.from_bytes(src_port.to_bytes(2, "big"), "little")
+    dst_le = int.from_bytes(dst_port.to_bytes(2, "big"), "little")
+    if src_le > dst_le:
+        side = FlowSide.LHS_GE_RHS
+    elif src_le < dst_le:
+        side = FlowSide.RHS_GT_LHS
+    else:
+        side = _compare_addresses(src_ip, dst_ip)
+    if side is FlowSide.LHS_GE_RHS:
+        p1, p2, ip1, ip2 = src_port, dst_port, src_ip, dst_ip
+    else:
+        p1, p2, ip1, ip2 = dst_port, src_port, dst_ip, src_ip
+    packed1 = ipaddress.ip_address(ip1).packed
+    packed2 = ipaddress.ip_address(ip2).packed
+    msgs = [
+        p1.to_bytes(2, "big"),
+        p2.to_bytes(2, "big"),
+        (0).to_bytes(8, "little"),
+        len(packed1).to_bytes(8, "little"),
+        packed1,
+        (0).to_bytes(8, "little"),
+        len(packed2).to_bytes(8, "little"),
+        packed2,
+        (1).to_bytes(8, "little"),
+        protocol.to_bytes(1, "big"),
+    ]
+    return _u64_to_i64(siphash13(b"\x00" * 16, msgs)), side
+
+
+def _random_flows(count, seed=5):
+    rng = random.Random(seed)
+    flows = []
+    for _ in range(count):
+        if rng.random() < 0.2:
+            src = str(ipaddress.IPv6Address(rng.getrandbits(128)))
+            dst = str(ipaddress.IPv6Address(rng.getrandbits(128)))
+        else:
+            src = str(ipaddress.IPv4Address(rng.getrandbits(32)))
+            dst = str(ipaddress.IPv4Address(rng.getrandbits(32)))
+        sport = rng.randint(0, 65535)
+        dport = sport if rng.random() < 0.1 else rng.randint(0, 65535)
+        flows.append((src, dst, sport, dport, rng.choice([6, 17])))
+    # Both directions of some flows
+    flows.extend((d, s, dp, sp, p) for s, d, sp, dp, p in flows[:50])
+    return flows
+
+
+class TestFlowHashBatch:
+    """Batch and cached paths must stay bit-identical to the reference."""
+
+    def test_scalar_matches_reference(self):
+        for flow in _random_flows(500):
+            assert calculate_flow_hash(*flow) == _reference_flow_hash(*flow)
+
+    def test_batch_matches_scalar(self):
+        flows = _random_flows(500, seed=8)
+        columns = [list(column) for column in zip(*flows)]
+
+        assert calculate_flow_hashes(*columns) == [_reference_flow_hash(*f) for f in flows]
+
+    def test_batch_single_protocol(self):
+        flows = _random_flows(50, seed=9)
+        src, dst, sport, dport, _ = (list(column) for column in zip(*flows))
+
+        assert calculate_flow_hashes(src, dst, sport, dport, 17) == [
+            calculate_flow_hash(s, d, sp, dp, 17) for s, d, sp, dp in zip(src, dst, sport, dport)
+        ]
+
+    def test_batch_rejects_ragged_columns(self):
+        with pytest.raises(ValueError):
+            calculate_flow_hashes(["10.0.0.1"], ["10.0.0.2"], [1, 2], [3], 6)
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,187 @@
+"""Tests for resumable, journaled batch analysis."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+import capmaster.plugins.analyze.plugin as analyze_plugin
+from capmaster.plugins.analyze.batch import JOURNAL_NAME, BatchJournal, run_batch
+from capmaster.plugins.analyze.executor import AnalysisExecutor
+from capmaster.plugins.analyze.modules.mq_stats import MqStatsModule
+from capmaster.plugins.analyze.modules.sip_stats import SipStatsModule
+from capmaster.plugins.analyze.modules.tcp_zero_window import TcpZeroWindowModule
+from capmaster.plugins.analyze.plugin import AnalyzePlugin
+
+
+class FakeAnalysis:
+    """Stand-in for _process_single_file recording its calls."""
+
+    def __init__(self, failures: dict[str, int] | None = None) -> None:
+        self.failures = dict(failures or {})
+        self.calls: list[tuple[str, tuple[str, ...], float | None]] = []
+
+    def __call__(self, pcap_file: Path, output_dir: Path, *args, skip_modules=(), on_module_done=None, budget=None):
+        self.calls.append((pcap_file.name, tuple(skip_modules), budget))
+        for name in ("mod_a", "mod_b"):
+            if name in skip_modules:
+                continue
+            if name == "mod_b" and self.failures.get(pcap_file.name, 0) > 0:
+                self.failures[pcap_file.name] -= 1
+                raise RuntimeError("tshark crashed")
+            on_module_done(name, output_dir / f"{pcap_file.stem}-{name}.txt")
+        return pcap_file, 2 - len(skip_modules)
+
+
+def _captures(tmp_path: Path, *names: str) -> list[Path]:
+    files = []
+    for name in names:
+        path = tmp_path / name
+        path.write_bytes(b"capture " + name.encode())
+        files.append(path)
+    return files
+
+
+def _events(journal: Path, kind: str) -> list[dict]:
+    return [e for e in map(json.loads, journal.read_text().splitlines()) if e["event"] == kind]
+
+
+@pytest.mark.unit
+class TestRunBatch:
+    """Journaling, resume, retries and metrics of run_batch."""
+
+    def test_journals_files_modules_and_metrics(self, tmp_path: Path) -> None:
+        files = _captures(tmp_path, "a.pcap", "b.pcap")
+        journal = tmp_path / "out" / JOURNAL_NAME
+
+        outcome = run_batch(files, journal, FakeAnalysis(), (tmp_path,), retries=0)
+
+        assert (outcome.outputs, outcome.failed, outcome.skipped) == (4, 0, 0)
+        assert [(e["file"], e["module"]) for e in _events(journal, "module")] == [
+            (str(files[0]), "mod_a"), (str(files[0]), "mod_b"),
+            (str(files[1]), "mod_a"), (str(files[1]), "mod_b"),
+        ]
+        assert [e["status"] for e in _events(journal, "file")] == ["done", "done"]
+        (metrics,) = _events(journal, "metrics")
+        assert metrics["files"] == 2 and metrics["files_per_s"] > 0 and "mb_per_s" in metrics
+
+    def test_retries_with_backoff_then_fails(self, tmp_path: Path) -> None:
+        files = _captures(tmp_path, "a.pcap")
+        analysis = FakeAnalysis(failures={"a.pcap": 5})
+
+        started = time.monotonic()
+        outcome = run_batch(files, tmp_path / JOURNAL_NAME, analysis, (tmp_path,), retries=2, backoff=0.05)
+
+        assert outcome.failed == 1
+        assert len(analysis.calls) == 3
+        assert time.monotonic() - started >= 0.15  # 0.05 + 0.1
+        # The module completed by the first attempt is not run again
+        assert [skip for _, skip, _ in analysis.calls] == [(), ("mod_a",), ("mod_a",)]
+
+    def test_retry_recovers(self, tmp_path: Path) -> None:
+        files = _captures(tmp_path, "a.pcap")
+
+        outcome = run_batch(files, tmp_path / JOURNAL_NAME, FakeAnalysis({"a.pcap": 1}), (tmp_path,), backoff=0)
+
+        assert (outcome.outputs, outcome.failed) == (2, 0)
+        statuses = [e["status"] for e in _events(tmp_path / JOURNAL_NAME, "file")]
+        assert statuses == ["failed", "done"]
+
+    def test_restart_skips_completed_work(self, tmp_path: Path) -> None:
+        files = _captures(tmp_path, "a.pcap", "b.pcap", "c.pcap")
+        journal = tmp_path / JOURNAL_NAME
+        run_batch(files, journal, FakeAnalysis({"b.pcap": 1}), (tmp_path,), retries=0)
+
+        analysis = FakeAnalysis()
+        outcome = run_batch(files, journal, analysis, (tmp_path,), retries=0)
+
+        assert analysis.calls == [("b.pcap", ("mod_a",), None)]
+        assert (outcome.outputs, outcome.failed, outcome.skipped) == (6, 0, 2)
+
+    def test_changed_capture_is_analyzed_again(self, tmp_path: Path) -> None:
+        files = _captures(tmp_path, "a.pcap")
+        journal = tmp_path / JOURNAL_NAME
+        run_batch(files, journal, FakeAnalysis(), (tmp_path,))
+
+        files[0].write_bytes(b"a longer, rewritten capture")
+        analysis = FakeAnalysis()
+        run_batch(files, journal, analysis, (tmp_path,))
+
+        assert analysis.calls == [("a.pcap", (), None)]
+
+    def test_budget_is_passed_to_each_attempt(self, tmp_path: Path) -> None:
+        files = _captures(tmp_path, "a.pcap")
+        analysis = FakeAnalysis()
+
+        run_batch(files, tmp_path / JOURNAL_NAME, analysis, (tmp_path,), file_timeout=12.5)
+
+        assert analysis.calls[0][2] == 12.5
+
+    def test_torn_journal_line_is_ignored(self, tmp_path: Path) -> None:
+        files = _captures(tmp_path, "a.pcap")
+        journal = tmp_path / JOURNAL_NAME
+        run_batch(files, journal, FakeAnalysis(), (tmp_path,))
+        with open(journal, "a", encoding="utf-8") as f:
+            f.write('{"event": "file", "fi')
+
+        assert BatchJournal(journal).state(files[0]).status == "done"
+
+
+def _executor(tmp_path: Path) -> AnalysisExecutor:
+    tshark = MagicMock()
+    tshark.execute.side_effect = lambda args, input_file, timeout: subprocess.CompletedProcess(args, 0, "", "")
+    detector = MagicMock()
+    detector.detect.return_value = {"tcp", "sip", "mq"}
+    return AnalysisExecutor(tshark, detector, fuse_taps=False, fuse_fields=False)
+
+
+MODULES = [SipStatsModule(), MqStatsModule(), TcpZeroWindowModule()]
+
+
+@pytest.mark.unit
+class TestExecutorResume:
+    """Executor support for resumed and time-bounded files."""
+
+    def test_skipped_modules_keep_sequence_numbers(self, tmp_path: Path) -> None:
+        full = _executor(tmp_path).execute_modules(Path("c.pcap"), tmp_path / "full", MODULES)
+        done: list[str] = []
+
+        resumed = _executor(tmp_path).execute_modules(
+            Path("c.pcap"),
+            tmp_path / "resumed",
+            MODULES,
+            skip_modules={"mq_stats"},
+            on_module_done=lambda name, _: done.append(name),
+        )
+
+        assert done == ["sip_stats", "tcp_zero_window"]
+        assert {n: p.name for n, p in resumed.items()} == {
+            n: p.name for n, p in full.items() if n != "mq_stats"
+        }
+
+    def test_exhausted_budget_stops_the_file(self, tmp_path: Path) -> None:
+        executor = _executor(tmp_path)
+        executor.deadline = time.monotonic() - 1
+
+        with pytest.raises(TimeoutError):
+            executor.execute_modules(Path("c.pcap"), tmp_path, MODULES)
+
+
+@pytest.mark.unit
+def test_plugin_batch_mode_writes_journal(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    files = _captures(tmp_path, "a.pcap", "b.pcap")
+    analysis = FakeAnalysis()
+    monkeypatch.setattr(analyze_plugin, "_process_single_file", analysis)
+    monkeypatch.setattr(analyze_plugin, "TsharkWrapper", MagicMock())
+
+    exit_code = AnalyzePlugin().execute(
+        file1=files[0], file2=files[1], output_dir=tmp_path / "out", quiet=True, batch=True
+    )
+
+    assert exit_code == 0
+    assert len(_events(tmp_path / "out" / JOURNAL_NAME, "file")) == 2
@@ -0,0 +1,132 @@
+"""Tests for concurrent module execution within one capture."""
+
+from __future__ import annotations
+
+import subprocess
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+import capmaster.plugins.analyze.plugin as analyze_plugin
+from capmaster.core.concurrency import get_extraction_limit, set_extraction_limit
+from capmaster.plugins.analyze.executor import AnalysisExecutor
+from capmaster.plugins.analyze.modules.http_response import HttpResponseModule
+from capmaster.plugins.analyze.modules.mq_stats import MqStatsModule
+from capmaster.plugins.analyze.modules.sip_stats import SipStatsModule
+from capmaster.plugins.analyze.modules.tcp_conversations import TcpConversationsModule
+from capmaster.plugins.analyze.modules.tcp_zero_window import TcpZeroWindowModule
+from capmaster.plugins.analyze.plugin import AnalyzePlugin
+from tests.test_plugins.test_analyze.test_concurrency_errors import DummyExecutor
+
+MODULES = [
+    SipStatsModule(),
+    MqStatsModule(),
+    TcpZeroWindowModule(),
+    HttpResponseModule(),
+    TcpConversationsModule(),
+]
+
+
+def _executor(workers: int, barrier: threading.Barrier | None = None) -> tuple[AnalysisExecutor, MagicMock]:
+    tshark = MagicMock()
+
+    def execute(args: list[str], input_file: Path, timeout: int) -> subprocess.CompletedProcess[str]:
+        if barrier is not None:
+            barrier.wait()
+        if "-Y" in args:
+            stdout = f"10.0.0.1\t80\t10.0.0.2\t40000\t{args[args.index('-Y') + 1]}\n"
+        else:
+            stdout = "10.0.0.1:80 <-> 10.0.0.2:40000  1 60 bytes  1 60 bytes  2 120 bytes  0.0  1.0\n"
+        return subprocess.CompletedProcess(args, 0, stdout, "")
+
+    tshark.execute.side_effect = execute
+    tshark.stream.side_effect = lambda args, input_file, timeout: iter(
+        execute(args, input_file, timeout).stdout.splitlines(keepends=True)
+    )
+    detector = MagicMock()
+    detector.detect.return_value = {"tcp", "sip", "mq", "http"}
+    executor = AnalysisExecutor(tshark, detector, fuse_taps=False, fuse_fields=False, workers=workers)
+    return executor, tshark
+
+
+@pytest.fixture(autouse=True)
+def extraction_limit():
+    """Allow concurrent extractions regardless of the host CPU count."""
+    original = get_extraction_limit()
+    set_extraction_limit(4)
+    yield
+    set_extraction_limit(original)
+
+
+@pytest.mark.unit
+class TestConcurrentModules:
+    """Modules of one file run concurrently within the worker budget."""
+
+    def test_tshark_runs_overlap(self, tmp_path: Path) -> None:
+        # Each run waits for a second one; sequential execution would time out
+        executor, tshark = _executor(workers=2, barrier=threading.Barrier(2, timeout=5))
+
+        results = executor.execute_modules(Path("capture.pcap"), tmp_path, MODULES[:4])
+
+        assert tshark.execute.call_count + tshark.stream.call_count == 4
+        assert list(results) == [m.name for m in MODULES[:4]]
+
+    def test_same_outputs_as_sequential(self, tmp_path: Path) -> None:
+        concurrent, _ = _executor(workers=4)
+        sequential, _ = _executor(workers=1)
+
+        concurrent_results = concurrent.execute_modules(Path("capture.pcap"), tmp_path / "a", MODULES)
+        sequential_results = sequential.execute_modules(Path("capture.pcap"), tmp_path / "b", MODULES)
+
+        assert [p.name for p in concurrent_results.values()] == [p.name for p in sequential_results.values()]
+        for name, path in concurrent_results.items():
+            assert path.read_text() == sequential_results[name].read_text()
+
+    def test_progress_advances_per_module(self, tmp_path: Path) -> None:
+        executor, _ = _executor(workers=3)
+        progress = MagicMock()
+
+        executor.execute_modules(Path("capture.pcap"), tmp_path, MODULES, progress=progress)
+
+        advances = [c for c in progress.update.call_args_list if c.kwargs.get("advance") == 1]
+        assert len(advances) == len(MODULES)
+
+    def test_module_failure_propagates(self, tmp_path: Path) -> None:
+        executor, tshark = _executor(workers=3)
+        tshark.execute.side_effect = RuntimeError("tshark crashed")
+
+        with pytest.raises(RuntimeError, match="tshark crashed"):
+            executor.execute_modules(Path("capture.pcap"), tmp_path, MODULES)
+
+
+@pytest.mark.unit
+def test_worker_budget_split_between_files_and_modules(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """With 8 workers and 2 files, each file process runs 4 modules at once."""
+    pool_sizes: list[int | None] = []
+    module_workers: list[int] = []
+
+    class RecordingExecutor(DummyExecutor):
+        def __init__(self, max_workers: int | None = None) -> None:
+            super().__init__(max_workers)
+            pool_sizes.append(max_workers)
+
+    def fake_worker(pcap_file, *args):
+        module_workers.append(args[4])
+        return pcap_file, 1
+
+    files = [tmp_path / "a.pcap", tmp_path / "b.pcap"]
+    monkeypatch.setattr(analyze_plugin, "ProcessPoolExecutor", RecordingExecutor)
+    monkeypatch.setattr(analyze_plugin, "_process_single_file", fake_worker)
+    monkeypatch.setattr(analyze_plugin, "TsharkWrapper", MagicMock())
+
+    exit_code = AnalyzePlugin().execute(
+        file1=files[0], file2=files[1], output_dir=tmp_path, workers=8, quiet=True
+    )
+
+    assert exit_code == 0
+    assert pool_sizes == [2]
+    assert module_workers == [4, 4]
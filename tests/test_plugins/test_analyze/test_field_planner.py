@@ -0,0 +1,167 @@
+"""Tests for single-pass field extraction across analysis modules."""
+
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+from typing import Iterator
+from unittest.mock import MagicMock
+
+import pytest
+
+from capmaster.plugins.analyze.executor import AnalysisExecutor
+from capmaster.plugins.analyze.field_planner import filter_fields, plan_field_passes
+from capmaster.plugins.analyze.modules.ftp_stats import FtpStatsModule
+from capmaster.plugins.analyze.modules.http_response import HttpResponseModule
+from capmaster.plugins.analyze.modules.icmp_stats import IcmpStatsModule
+from capmaster.plugins.analyze.modules.mq_stats import MqStatsModule
+from capmaster.plugins.analyze.modules.sip_stats import SipStatsModule
+from capmaster.plugins.analyze.modules.tcp_completeness import TcpCompletenessModule
+from capmaster.plugins.analyze.modules.tcp_zero_window import TcpZeroWindowModule
+from capmaster.plugins.analyze.modules.tls_alert import TlsAlertModule
+from capmaster.utils.errors import TsharkExecutionError
+
+_TCP = {"ip.src": "10.0.0.1", "ip.dst": "10.0.0.2", "ip.src_host": "client", "ip.dst_host": "server", "tcp": "1"}
+
+# Dissected packets: field name -> value (absent fields are not present)
+PACKETS = [
+    {**_TCP, "tcp.srcport": "5060", "tcp.dstport": "40000", "sip": "1", "sip.Status-Code": "200",
+     "sip.Status-Line": "SIP/2.0 200 OK"},
+    {**_TCP, "tcp.srcport": "40000", "tcp.dstport": "5060", "sip": "1", "sip.Method": "INVITE",
+     "tcp.analysis.zero_window": "1"},
+    {**_TCP, "tcp.srcport": "1414", "tcp.dstport": "40001", "tcp.stream": "3", "frame.number": "3",
+     "frame.len": "200", "mq": "1", "mq.api.completioncode": "2", "mq.api.reasoncode": "2033"},
+    {**_TCP, "tcp.srcport": "80", "tcp.dstport": "40002", "http.response": "1", "http.response.code": "404"},
+    {**_TCP, "tcp.srcport": "443", "tcp.dstport": "40003", "tls.alert_message": "1",
+     "tls.alert_message.desc": "40"},
+    {"ip.src": "10.0.0.9", "ip.dst": "10.0.0.8", "udp": "1", "tls.alert_message": "1",
+     "tls.alert_message.desc": "10"},
+    {**_TCP, "tcp.srcport": "21", "tcp.dstport": "40004", "ftp.response.code": "530",
+     "ftp.response.arg": "Login incorrect."},
+    {**_TCP, "tcp.srcport": "40005", "tcp.dstport": "22"},
+]
+
+
+def _matches(packet: dict[str, str], display_filter: str) -> bool:
+    return any(
+        all(packet.get(name.strip(" ()")) for name in clause.split("&&"))
+        for clause in display_filter.split("||")
+    )
+
+
+def _fake_tshark(args: list[str]) -> Iterator[str]:
+    """Evaluate a ``-Y <conjunctions> -T fields`` command over PACKETS."""
+    options = dict(zip(args[::2], args[1::2]))
+    fields = [args[i + 1] for i, arg in enumerate(args) if arg == "-e"]
+    separator = "\t"
+    if options.get("-E", "").startswith("separator="):
+        separator = options["-E"][len("separator="):]
+    for packet in PACKETS:
+        if _matches(packet, options["-Y"]):
+            yield separator.join(packet.get(name, "") for name in fields) + "\n"
+
+
+MODULES = [
+    SipStatsModule(),
+    MqStatsModule(),
+    TcpZeroWindowModule(),
+    HttpResponseModule(),
+    FtpStatsModule(),
+    TlsAlertModule(),
+    IcmpStatsModule(),
+    TcpCompletenessModule(),
+]
+
+
+@pytest.mark.unit
+class TestFieldPlanner:
+    """Planning and routing of fused field passes."""
+
+    def test_filter_fields(self) -> None:
+        assert filter_fields("sip") == ["sip"]
+        assert filter_fields("ftp-data") == ["ftp-data"]
+        assert filter_fields("tls.alert_message && tcp") == ["tls.alert_message", "tcp"]
+        assert filter_fields("tcp.port == 80") is None
+        assert filter_fields("sip || sdp") is None
+        assert filter_fields(None) is None
+
+    def test_plan_groups_by_dissection_options(self) -> None:
+        passes = plan_field_passes(MODULES)
+
+        assert [[m.name for m in p.modules] for p in passes] == [
+            ["sip_stats", "mq_stats", "tcp_zero_window", "http_response"],
+            ["ftp_stats", "tls_alert"],
+        ]
+        assert passes[1].dissection_options == FtpStatsModule().dissection_options
+        args = passes[0].build_tshark_args()
+        assert args[:2] == ["-Y", "(sip) || (mq) || (tcp.analysis.zero_window) || (http.response)"]
+        fields = [args[i + 1] for i, arg in enumerate(args) if arg == "-e"]
+        assert len(fields) == len(set(fields))
+        assert {"sip", "mq", "tcp.analysis.zero_window", "http.response"} <= set(fields)
+
+    def test_dispatch_matches_separate_extractions(self) -> None:
+        for field_pass in plan_field_passes(MODULES):
+            outputs = field_pass.dispatch(_fake_tshark(field_pass.build_tshark_args()))
+
+            for module in field_pass.modules:
+                separate = "".join(_fake_tshark(module.build_tshark_args(Path("x.pcap"))))
+                assert separate, module.name
+                assert outputs[module.name] == separate, module.name
+
+    def test_dispatch_skips_malformed_rows(self) -> None:
+        field_pass = plan_field_passes(MODULES)[0]
+
+        outputs = field_pass.dispatch(["garbage\n"])
+
+        assert all(output == "" for output in outputs.values())
+
+
+def _executor(fail_stream: bool = False) -> tuple[AnalysisExecutor, MagicMock]:
+    tshark = MagicMock()
+
+    def execute(args: list[str], input_file: Path, timeout: int) -> subprocess.CompletedProcess[str]:
+        return subprocess.CompletedProcess(args, 0, "".join(_fake_tshark(args)), "")
+
+    def stream(args: list[str], input_file: Path, timeout: int) -> Iterator[str]:
+        if fail_stream and " || " in args[args.index("-Y") + 1]:
+            raise TsharkExecutionError("tshark", 1, "tshark: Some fields aren't valid")
+        yield from _fake_tshark(args)
+
+    tshark.execute.side_effect = execute
+    tshark.stream.side_effect = stream
+    detector = MagicMock()
+    detector.detect.return_value = {"tcp", "sip", "mq", "http", "ftp", "tls"}
+    return AnalysisExecutor(tshark, detector, fuse_taps=False), tshark
+
+
+@pytest.mark.unit
+class TestFusedFieldExecution:
+    """AnalysisExecutor extracts the fields of grouped modules once."""
+
+    MODULES = MODULES[:6]
+
+    def _run(self, executor: AnalysisExecutor, out_dir: Path) -> dict[str, str]:
+        results = executor.execute_modules(Path("capture.pcap"), out_dir, self.MODULES)
+        return {name: path.read_text(encoding="utf-8") for name, path in results.items()}
+
+    def test_one_pass_per_option_group(self, tmp_path: Path) -> None:
+        fused, tshark = _executor()
+        separate, _ = _executor()
+        separate.fuse_fields = False
+
+        outputs = self._run(fused, tmp_path / "fused")
+
+        assert tshark.stream.call_count == 2
+        tshark.execute.assert_not_called()
+        assert outputs == self._run(separate, tmp_path / "separate")
+        assert "2033" in outputs["mq_stats"]
+
+    def test_failed_pass_falls_back_to_separate_runs(self, tmp_path: Path) -> None:
+        executor, tshark = _executor(fail_stream=True)
+
+        outputs = self._run(executor, tmp_path)
+
+        streaming = [m for m in self.MODULES if m.streaming]
+        assert tshark.execute.call_count == len(self.MODULES) - len(streaming)
+        assert tshark.stream.call_count == 2 + len(streaming)
+        assert "404" in outputs["http_response"]
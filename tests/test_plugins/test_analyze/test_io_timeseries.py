@@ -0,0 +1,114 @@
+"""Tests for the time-binned traffic series module."""
+
+from __future__ import annotations
+
+import pytest
+
+from capmaster.plugins.analyze.modules import io_timeseries
+from capmaster.plugins.analyze.modules.io_timeseries import IoTimeseriesModule
+
+
+def _row(
+    time: float, length: int = 100, retrans: bool = False, zero_window: bool = False
+) -> list[str]:
+    return [
+        f"{time:.6f}",
+        str(length),
+        "443",
+        "50000",
+        "",
+        "",
+        "1" if retrans else "",
+        "1" if zero_window else "",
+    ]
+
+
+def _section(report: str, title: str) -> list[str]:
+    """Data lines of a report section (without title and header)."""
+    lines = report.split("\n")
+    start = lines.index(title) + 2
+    end = lines.index("", start) if "" in lines[start:] else len(lines)
+    return lines[start:end]
+
+
+@pytest.mark.unit
+class TestIoTimeseriesModule:
+    """Single-pass binning at several resolutions."""
+
+    def test_declares_unfiltered_field_pass(self) -> None:
+        module = IoTimeseriesModule()
+        assert module.streaming
+        assert module.display_filter is None
+        assert module.required_protocols == set()
+        assert module.build_tshark_args(None)[:3] == ["-T", "fields", "-e"]  # type: ignore[arg-type]
+
+    def test_empty(self) -> None:
+        assert "No frames found" in IoTimeseriesModule().consume([])
+
+    def test_bins_at_every_resolution(self) -> None:
+        rows = [
+            _row(0.0005),
+            _row(0.0006, retrans=True),
+            _row(0.25, 1000),
+            _row(2.9, zero_window=True),
+        ]
+        report = IoTimeseriesModule().consume(rows)
+
+        assert "Frames,4" in report
+        assert "Retransmissions,1" in report
+        assert "Zero Window Events,1" in report
+        summary = _section(report, "Resolution Summary")
+        assert summary[0].startswith("1 ms,2901,")
+        assert summary[1].startswith("100 ms,30,")
+        assert summary[2].startswith("1 s,3,")
+
+        assert _section(report, "Series (1 s)") == [
+            "0.000,3,1200,0.010,1,0",
+            "1.000,0,0,0.000,0,0",
+            "2.000,1,100,0.001,0,1",
+        ]
+
+    def test_top_bursts_ranked_by_bytes(self) -> None:
+        rows = [_row(0.010, 1500) for _ in range(4)]  # 6000 bytes in one 1 ms bin
+        rows += [_row(0.020, 100) for _ in range(10)]
+        rows += [_row(0.030, 500)]
+        report = IoTimeseriesModule().consume(rows)
+
+        bursts = _section(report, "Top Bursts (1 ms)")
+        assert bursts[0] == "1,0.010,4,6000,48.000,0,0,tcp/443"
+        assert bursts[1].startswith("2,0.020,10,1000,")
+        assert len(bursts) == 3
+
+    def test_late_frames_fill_closed_bins(self) -> None:
+        rows = [_row(0.0), _row(1.5), _row(0.5), _row(2.1)]
+        report = IoTimeseriesModule().consume(rows)
+
+        assert _section(report, "Series (1 s)")[0].startswith("0.000,2,200,")
+
+    def test_late_frames_update_peak_and_bursts(self) -> None:
+        rows = [_row(0.0), _row(1.5), _row(0.5, 1500), _row(0.7, 1500), _row(2.1)]
+        report = IoTimeseriesModule().consume(rows)
+
+        assert _section(report, "Resolution Summary")[2].startswith("1 s,3,1.67,3,")
+        assert _section(report, "Top Bursts (1 s)")[0] == "1,0.000,3,3100,0.025,0,0,tcp/443"
+
+    def test_series_memory_bounded_by_bins(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(io_timeseries, "MAX_STORED_BINS", 100)
+        aggregator = IoTimeseriesModule().aggregator()
+        for i in range(5000):
+            aggregator.add(_row(i * 0.001))
+        fine, medium, coarse = aggregator.resolutions  # type: ignore[attr-defined]
+
+        assert fine.series is None  # 5000 bins > 100
+        assert len(medium.series[0]) == 49
+        report = aggregator.report()
+        assert "Frames,5000" in report
+        assert "Series (1 ms)" not in report
+        assert "Top Bursts (1 ms)" in report
+
+    def test_post_process_matches_streaming(self) -> None:
+        rows = [_row(i * 0.0137, 60 + i) for i in range(300)]
+        text = "".join("\t".join(row) + "\n" for row in rows)
+        module = IoTimeseriesModule()
+
+        assert module.post_process(text) == module.consume(rows)
@@ -0,0 +1,196 @@
+"""Tests for the per-capture cache of module results."""
+
+from __future__ import annotations
+
+import json
+import subprocess
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from capmaster.plugins.analyze.executor import AnalysisExecutor
+from capmaster.plugins.analyze.modules.sip_stats import SipStatsModule
+from capmaster.plugins.analyze.modules.tcp_conversations import TcpConversationsModule
+from capmaster.plugins.analyze.modules.tcp_zero_window import TcpZeroWindowModule
+from capmaster.plugins.analyze import result_cache
+from capmaster.plugins.analyze.result_cache import (
+    ANY_FORMAT,
+    ResultCache,
+    clear_result_cache,
+    renderer_digest,
+)
+
+SIP_ROWS = "10.0.0.1\t\t5060\t10.0.0.2\t\t5060\tINVITE\t\t\n"
+ZERO_WINDOW_ROWS = "10.0.0.1\t80\t10.0.0.2\t40000\n"
+CONV_TCP = "10.0.0.1:80 <-> 10.0.0.2:40000  1 60 bytes  1 60 bytes  2 120 bytes  0.0  1.0\n"
+
+MODULES = [TcpConversationsModule(), TcpZeroWindowModule(), SipStatsModule()]
+
+
+def _executor(cache_dir: Path) -> tuple[AnalysisExecutor, MagicMock]:
+    tshark = MagicMock()
+
+    def execute(args: list[str], input_file: Path, timeout: int) -> subprocess.CompletedProcess[str]:
+        return subprocess.CompletedProcess(args, 0, CONV_TCP if "-z" in args else ZERO_WINDOW_ROWS, "")
+
+    tshark.execute.side_effect = execute
+    tshark.stream.side_effect = lambda args, input_file, timeout: iter([SIP_ROWS])
+    detector = MagicMock()
+    detector.detect.return_value = {"tcp", "sip"}
+    executor = AnalysisExecutor(
+        tshark, detector, fuse_taps=False, fuse_fields=False, result_cache=ResultCache(cache_dir, "4.2.0")
+    )
+    return executor, tshark
+
+
+def _run(executor: AnalysisExecutor, capture: Path, out_dir: Path, modules=MODULES, output_format="txt"):
+    results = executor.execute_modules(
+        capture, out_dir, modules, output_format=output_format, generate_sidecar=True
+    )
+    return {name: path.read_text(encoding="utf-8") for name, path in results.items()}
+
+
+def _cache_hits(out_dir: Path) -> dict[str, bool]:
+    hits = {}
+    for sidecar in out_dir.glob("*.meta.json"):
+        content = json.loads(sidecar.read_text(encoding="utf-8"))
+        hits[content["id"]] = content["cache_hit"]
+    return hits
+
+
+@pytest.fixture
+def capture(tmp_path: Path) -> Path:
+    path = tmp_path / "capture.pcap"
+    path.write_bytes(b"capture content")
+    return path
+
+
+@pytest.mark.unit
+class TestResultCache:
+    """Re-analysis reuses module results."""
+
+    def test_rerun_does_not_run_tshark(self, tmp_path: Path, capture: Path) -> None:
+        first = _run(_executor(tmp_path / "cache")[0], capture, tmp_path / "a")
+        executor, tshark = _executor(tmp_path / "cache")
+
+        second = _run(executor, capture, tmp_path / "b")
+
+        assert second == first
+        tshark.execute.assert_not_called()
+        tshark.stream.assert_not_called()
+        assert _cache_hits(tmp_path / "a") == dict.fromkeys(first, False)
+        assert _cache_hits(tmp_path / "b") == dict.fromkeys(first, True)
+        assert executor.module_timings == {}
+
+    def test_format_change_does_not_run_tshark(self, tmp_path: Path, capture: Path) -> None:
+        first = _run(_executor(tmp_path / "cache")[0], capture, tmp_path / "a")
+        executor, tshark = _executor(tmp_path / "cache")
+
+        outputs = _run(executor, capture, tmp_path / "md", output_format="md")
+
+        # Streaming modules keep no raw output but their report fits every format
+        tshark.execute.assert_not_called()
+        tshark.stream.assert_not_called()
+        assert outputs["sip_stats"] == f"## sip stats\n\n```\n{first['sip_stats'].rstrip()}\n```\n"
+        assert _cache_hits(tmp_path / "md") == dict.fromkeys(first, True)
+
+    def test_format_dependent_module_is_cached_per_format(
+        self, tmp_path: Path, capture: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        monkeypatch.setattr(SipStatsModule, "format_dependent_output", True)
+        _run(_executor(tmp_path / "cache")[0], capture, tmp_path / "a")
+        executor, tshark = _executor(tmp_path / "cache")
+
+        _run(executor, capture, tmp_path / "md", output_format="md")
+
+        tshark.execute.assert_not_called()
+        assert tshark.stream.call_count == 1
+        assert _cache_hits(tmp_path / "md")["sip_stats"] is False
+
+    def test_added_module_runs_alone(self, tmp_path: Path, capture: Path) -> None:
+        _run(_executor(tmp_path / "cache")[0], capture, tmp_path / "a", modules=MODULES[:1])
+        executor, tshark = _executor(tmp_path / "cache")
+
+        _run(executor, capture, tmp_path / "b", modules=MODULES[:2])
+
+        assert [c.kwargs["args"] for c in tshark.execute.call_args_list] == [
+            TcpZeroWindowModule().build_tshark_args(capture)
+        ]
+
+    def test_changed_capture_is_analyzed_again(self, tmp_path: Path, capture: Path) -> None:
+        _run(_executor(tmp_path / "cache")[0], capture, tmp_path / "a")
+        capture.write_bytes(b"other capture content")
+        executor, tshark = _executor(tmp_path / "cache")
+
+        _run(executor, capture, tmp_path / "b")
+
+        assert tshark.execute.call_count == 2
+        assert tshark.stream.call_count == 1
+
+    def test_stale_report_is_rendered_again(self, tmp_path: Path, capture: Path) -> None:
+        cache = ResultCache(tmp_path, "4.2.0")
+        module = TcpZeroWindowModule()
+        cached = cache.lookup("fp", module, ["-Y", "x"])
+        cache.store(cached, module, "txt", "old report", raw=ZERO_WINDOW_ROWS)
+        entry = cache.lookup("fp", module, ["-Y", "x"])
+        entry.reports[ANY_FORMAT]["renderer"] = "0"
+
+        assert entry.render(module, "txt") == module.post_process(ZERO_WINDOW_ROWS)
+        assert cache.lookup("fp", module, ["-Y", "y"]).render(module, "txt") is None
+
+    def test_input_file_is_not_part_of_the_key(self, tmp_path: Path) -> None:
+        cache = ResultCache(tmp_path, "4.2.0")
+        module = TcpZeroWindowModule()
+
+        first = cache.lookup("fp", module, ["-r", "/a/capture.pcap", "-Y", "x"])
+        second = cache.lookup("fp", module, ["-r", "/b/copy.pcap", "-Y", "x"])
+
+        assert first.key == second.key == cache.lookup("fp", module, ["-Y", "x"]).key
+
+    def test_shared_code_change_invalidates_reports(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        module = TcpZeroWindowModule()
+        before = renderer_digest(module)
+        monkeypatch.setattr(result_cache, "_renderer_digests", {})
+        monkeypatch.setattr(result_cache, "_package_digest", b"changed rtp_engine.py")
+
+        assert renderer_digest(module) != before
+
+
+@pytest.mark.unit
+class TestResultCacheBudget:
+    """The cache stays within its size budget."""
+
+    @staticmethod
+    def _size(cache_dir: Path) -> int:
+        return sum(path.stat().st_size for path in cache_dir.glob("*.json"))
+
+    def test_budget_evicts_least_recently_used(self, tmp_path: Path) -> None:
+        cache = ResultCache(tmp_path, "4.2.0", max_bytes=20_000)
+        module = TcpZeroWindowModule()
+        raw = "x" * 3_000
+        for i in range(20):
+            cache.store(cache.lookup(f"fp{i}", module, []), module, "txt", "report", raw=raw)
+            if i >= 1:
+                # Keep using the first capture
+                assert cache.lookup("fp0", module, []).raw == raw
+
+        assert self._size(tmp_path) <= 20_000
+        assert cache.lookup("fp0", module, []).raw == raw
+        assert cache.lookup("fp19", module, []).raw == raw
+        assert cache.lookup("fp1", module, []).raw is None
+
+    def test_budget_from_environment(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        tshark = MagicMock(version="4.2.0")
+        monkeypatch.setenv("CAPMASTER_RESULT_CACHE_MB", "2")
+        assert ResultCache.with_default_cache(tshark).max_bytes == 2 * 1024 * 1024
+
+        monkeypatch.setenv("CAPMASTER_RESULT_CACHE_MB", "0")
+        assert ResultCache.with_default_cache(tshark) is None
+
+    def test_clear(self, tmp_path: Path, capture: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setenv("CAPMASTER_CACHE_DIR", str(tmp_path / "cache"))
+        _run(_executor(tmp_path / "cache" / "analyze-results")[0], capture, tmp_path / "a")
+
+        assert clear_result_cache() == len(MODULES)
+        assert not list((tmp_path / "cache" / "analyze-results").glob("*.json"))
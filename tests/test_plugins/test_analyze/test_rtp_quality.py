@@ -0,0 +1,277 @@
+"""Tests for the single-pass RTP quality engine and module."""
+
+from __future__ import annotations
+
+import pytest
+
+from capmaster.plugins.analyze.modules.rtp_quality import RtpQualityModule
+from capmaster.plugins.analyze.rtp_engine import RtpQualityEngine, estimate_mos
+
+SRC = "10.0.0.1:40000"
+DST = "10.0.0.2:50000"
+
+
+def _feed(
+    engine: RtpQualityEngine, seqs: list[int], spacing: float = 0.02, start: float = 0.0
+) -> None:
+    """Feed a G.711 stream sending one packet every ``spacing`` seconds."""
+    for i, seq in enumerate(seqs):
+        engine.add_packet(start + i * spacing, SRC, DST, 0x1234, seq, seq * 160, 0)
+
+
+def _rtp_row(
+    time: float,
+    seq: int,
+    timestamp: int,
+    ssrc: str = "0x00001234",
+    pt: str = "0",
+    ipv6: bool = False,
+) -> list[str]:
+    src, dst = ("2001:db8::1", "2001:db8::2") if ipv6 else ("10.0.0.1", "10.0.0.2")
+    return [
+        f"{time:.6f}",
+        "" if ipv6 else src,
+        "40000",
+        "" if ipv6 else dst,
+        "50000",
+        ssrc,
+        str(seq),
+        str(timestamp),
+        pt,
+        "",
+        "",
+        "",
+        "",
+        "",
+        "",
+        "",
+        "",
+        src if ipv6 else "",
+        dst if ipv6 else "",
+    ]
+
+
+def _sdp_row(
+    call_id: str, address: str, port: str, mime: str = "PCMU", rate: str = "8000"
+) -> list[str]:
+    return [
+        "0.000000",
+        "10.0.0.9",
+        "5060",
+        "10.0.0.8",
+        "5060",
+        "",
+        "",
+        "",
+        "",
+        "",
+        "",
+        "",
+        call_id,
+        address,
+        port,
+        mime,
+        rate,
+        "",
+        "",
+    ]
+
+
+@pytest.mark.unit
+class TestRtpQualityEngine:
+    """Per-stream statistics folded one packet at a time."""
+
+    def test_clean_stream(self) -> None:
+        engine = RtpQualityEngine()
+        _feed(engine, list(range(100)))
+        (stream,) = engine.streams.values()
+
+        assert stream.packets == 100
+        assert stream.expected == 100
+        assert stream.lost == 0
+        assert stream.seq_errors == 0
+        assert stream.mean_jitter == pytest.approx(0.0, abs=1e-6)
+        assert stream.max_delta == pytest.approx(20.0)
+        assert stream.codec == "g711U"
+
+    def test_loss_and_sequence_errors(self) -> None:
+        engine = RtpQualityEngine()
+        _feed(engine, [0, 1, 2, 5, 4, 6, 6, 7])
+        (stream,) = engine.streams.values()
+
+        assert stream.expected == 8
+        assert stream.packets == 8  # the duplicate makes up for one loss
+        assert stream.lost == 0
+        # 5 skips 3-4, 4 is late, 6 follows 5, the second 6 is a duplicate
+        assert stream.seq_errors == 3
+
+    def test_sequence_wraparound(self) -> None:
+        engine = RtpQualityEngine()
+        _feed(engine, [65533, 65534, 65535, 0, 2, 3])
+        (stream,) = engine.streams.values()
+
+        assert stream.expected == 7
+        assert stream.lost == 1
+        assert stream.seq_errors == 1
+
+    def test_rfc3550_jitter(self) -> None:
+        engine = RtpQualityEngine()
+        # Second packet arrives 10 ms late: |D| = 80 timestamp units at 8 kHz
+        engine.add_packet(0.00, SRC, DST, 1, 0, 0, 0)
+        engine.add_packet(0.03, SRC, DST, 1, 1, 160, 0)
+        engine.add_packet(0.04, SRC, DST, 1, 2, 320, 0)
+        (stream,) = engine.streams.values()
+
+        first = 80 / 16
+        second = first + (80 - first) / 16
+        assert stream.jitter == pytest.approx(second)
+        assert stream.max_jitter == pytest.approx(second / 8)
+        assert stream.mean_jitter == pytest.approx((first + second) / 2 / 8)
+        assert stream.max_delta == pytest.approx(30.0)
+
+    def test_timestamp_wraparound_does_not_spike_jitter(self) -> None:
+        engine = RtpQualityEngine()
+        base = (1 << 32) - 320
+        for i in range(5):
+            engine.add_packet(i * 0.02, SRC, DST, 1, i, (base + i * 160) % (1 << 32), 0)
+        (stream,) = engine.streams.values()
+
+        assert stream.max_jitter == pytest.approx(0.0, abs=1e-6)
+
+    def test_streams_keyed_by_ssrc_and_endpoints(self) -> None:
+        engine = RtpQualityEngine()
+        engine.add_packet(0.0, SRC, DST, 1, 0, 0, 0)
+        engine.add_packet(0.0, DST, SRC, 1, 0, 0, 0)
+        engine.add_packet(0.0, SRC, DST, 2, 0, 0, 8)
+
+        assert len(engine.streams) == 3
+
+    def test_mos_series_per_interval(self) -> None:
+        engine = RtpQualityEngine(interval=1.0)
+        # First second clean, second second loses every other packet
+        _feed(engine, list(range(50)), start=0.0)
+        _feed(engine, list(range(50, 100, 2)), spacing=0.04, start=1.0)
+        engine.finish()
+
+        step, series = engine.mos_series(max_points=100)
+        assert step == 1.0
+        assert [start for start, _ in series] == [0.0, 1.0]
+        clean, lossy = (bucket for _, bucket in series)
+        assert clean.packets == 50 and clean.loss_percent == 0.0
+        assert lossy.packets == 25 and lossy.expected == 49
+        assert lossy.mean_mos < clean.mean_mos
+
+    def test_mos_series_merges_intervals(self) -> None:
+        engine = RtpQualityEngine(interval=1.0)
+        _feed(engine, list(range(500)), spacing=0.02)
+        engine.finish()
+
+        step, series = engine.mos_series(max_points=4)
+        assert step == 3.0
+        assert len(series) == 4
+        assert sum(bucket.packets for _, bucket in series) == 500
+
+    def test_sdp_correlation_and_dynamic_clock_rate(self) -> None:
+        engine = RtpQualityEngine()
+        engine.add_sdp(
+            "call-1", "10.0.0.2", ["50000"], [("opus", 48000), ("telephone-event", 8000)]
+        )
+        engine.add_packet(0.0, SRC, DST, 7, 0, 0, 111)
+        (stream,) = engine.streams.values()
+
+        assert engine.call_id(stream) == "call-1"
+        assert stream.codec == "opus"
+        assert stream.clock_rate == 48000
+
+    def test_dtmf_events_skip_jitter(self) -> None:
+        engine = RtpQualityEngine()
+        engine.add_packet(0.00, SRC, DST, 1, 0, 0, 0)
+        engine.add_packet(0.02, SRC, DST, 1, 1, 160, 0)
+        engine.add_packet(0.04, SRC, DST, 1, 2, 99999, 101)
+        engine.add_packet(0.06, SRC, DST, 1, 3, 480, 0)
+        (stream,) = engine.streams.values()
+
+        assert stream.seq_errors == 0
+        assert stream.max_jitter == pytest.approx(0.0, abs=1e-6)
+
+    def test_rtcp_feedback(self) -> None:
+        engine = RtpQualityEngine()
+        engine.add_packet(0.0, SRC, DST, 1, 0, 0, 0)
+        engine.add_rtcp(1, 64, 160)
+        engine.add_rtcp(1, 0, 80)
+        (stream,) = engine.streams.values()
+
+        assert engine.rtcp_feedback(stream) == (25.0, 10.0)
+
+    def test_estimate_mos_rating(self) -> None:
+        mos, rating = estimate_mos(0.0, 5.0, "g711U")
+        assert mos > 4.0
+        assert rating in ("Excellent", "Good")
+
+
+@pytest.mark.unit
+class TestRtpQualityModule:
+    """Report of the rtp_quality module."""
+
+    def test_single_field_pass(self) -> None:
+        module = RtpQualityModule()
+        assert module.streaming
+        assert module.required_protocols == {"rtp"}
+        args = module.build_tshark_args(None)  # type: ignore[arg-type]
+        assert args[:2] == ["-Y", "rtp || rtcp || sdp"]
+        assert "rtp.ssrc" in args and "sdp.media.port" in args
+
+    def test_empty(self) -> None:
+        assert "No RTP streams found" in RtpQualityModule().consume([])
+
+    def test_report(self) -> None:
+        rows = [_sdp_row("abc@host", "10.0.0.2", "50000")]
+        rows += [_rtp_row(i * 0.02, i, i * 160) for i in range(100) if i % 10]
+        rows.append(
+            [
+                "1.0",
+                "10.0.0.2",
+                "50001",
+                "10.0.0.1",
+                "40001",
+                "",
+                "",
+                "",
+                "",
+                "0x00001234",
+                "26",
+                "40",
+                "",
+                "",
+                "",
+                "",
+                "",
+                "",
+                "",
+            ]
+        )
+
+        report = RtpQualityModule().consume(rows)
+
+        assert "Total Streams,1" in report
+        assert "Lost Packets,9 (9.09%)" in report
+        assert "Call Legs,1" in report
+        assert "10.0.0.1:40000 -> 10.0.0.2:50000,0x00001234,g711U,abc@host" in report
+        assert "10.2,5.00" in report  # RTCP loss and jitter
+        assert "Worst Call Legs" in report
+        assert "MOS Series (5 s intervals)" in report
+
+    def test_ipv6_endpoints(self) -> None:
+        rows = [_rtp_row(i * 0.02, i, i * 160, ipv6=True) for i in range(20)]
+
+        report = RtpQualityModule().consume(rows)
+
+        assert "Total Streams,1" in report
+        assert "2001:db8::1:40000 -> 2001:db8::2:50000,0x00001234" in report
+
+    def test_post_process_matches_streaming(self) -> None:
+        rows = [_rtp_row(i * 0.02, i, i * 160) for i in range(50)]
+        text = "".join("\t".join(row) + "\n" for row in rows)
+        module = RtpQualityModule()
+
+        assert module.post_process(text) == module.consume(rows)
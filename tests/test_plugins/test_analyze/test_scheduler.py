@@ -0,0 +1,133 @@
+"""Tests for size-aware scheduling of multi-file analysis."""
+
+from __future__ import annotations
+
+from concurrent.futures import Future
+from pathlib import Path
+
+import pytest
+
+from capmaster.plugins.analyze.scheduler import (
+    AnalysisJob,
+    ModuleCostModel,
+    dispatch_jobs,
+    plan_jobs,
+)
+
+MODULES = ["slow", "medium", "fast"]
+
+
+class InlineExecutor:
+    """Pool running each submission inline and recording it."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, Path, dict]] = []
+
+    def submit(self, fn, pcap_file, *args, **kwargs) -> Future:
+        self.calls.append((fn.__name__, pcap_file, kwargs))
+        future: Future = Future()
+        try:
+            future.set_result(fn(pcap_file, *args, **kwargs))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+
+def _model() -> ModuleCostModel:
+    return ModuleCostModel({"slow": 3e-6, "medium": 2e-6, "fast": 1e-6})
+
+
+@pytest.mark.unit
+class TestModuleCostModel:
+    """Learning and persistence of module costs."""
+
+    def test_update_is_moving_average(self) -> None:
+        model = ModuleCostModel()
+        model.update(1000, {"a": 0.01})
+        assert model.rate("a") == pytest.approx(1e-5)
+
+        model.update(1000, {"a": 0.02})
+        assert model.rate("a") == pytest.approx(1e-5 + 0.3 * 1e-5)
+
+    def test_unknown_module_uses_median(self) -> None:
+        assert _model().rate("unknown") == pytest.approx(2e-6)
+
+    def test_round_trip(self, tmp_path: Path) -> None:
+        model = ModuleCostModel.load(tmp_path)
+        model.update(100, {"a": 0.5})
+        model.save()
+
+        assert ModuleCostModel.load(tmp_path).rates == {"a": pytest.approx(0.005)}
+
+
+@pytest.mark.unit
+class TestPlanJobs:
+    """Job planning."""
+
+    def test_largest_first(self) -> None:
+        sizes = {Path("a"): 10, Path("b"): 30, Path("c"): 20}
+
+        jobs = plan_jobs(list(sizes), MODULES, 1, _model(), packets=sizes.__getitem__)
+
+        assert [job.pcap_file for job in jobs] == [Path("b"), Path("c"), Path("a")]
+        assert all(job.modules is None for job in jobs)
+
+    def test_splits_dominant_file(self) -> None:
+        sizes = {Path("big"): 1000, Path("s1"): 100, Path("s2"): 100}
+
+        jobs = plan_jobs(list(sizes), MODULES, 2, _model(), packets=sizes.__getitem__)
+
+        big = [job for job in jobs if job.pcap_file == Path("big")]
+        assert sorted(job.modules for job in big) == [("medium", "fast"), ("slow",)]
+        assert sum(job.cost for job in big) == pytest.approx(_model().cost(1000, MODULES))
+        assert [job.cost for job in jobs] == sorted((job.cost for job in jobs), reverse=True)
+
+
+def detect(pcap_file: Path) -> None:
+    if pcap_file.name == "broken":
+        raise RuntimeError("detection failed")
+
+
+def process(pcap_file: Path, tag: str, skip_modules: tuple[str, ...] = ()) -> tuple[Path, int]:
+    if pcap_file.name == "bad":
+        raise RuntimeError("analysis failed")
+    return pcap_file, len(MODULES) - len(skip_modules)
+
+
+@pytest.mark.unit
+class TestDispatchJobs:
+    """Job dispatch."""
+
+    def test_detects_split_file_before_groups(self) -> None:
+        big, small = Path("big"), Path("small")
+        jobs = [
+            AnalysisJob(big, 5.0, ("slow",)),
+            AnalysisJob(big, 4.0, ("medium", "fast")),
+            AnalysisJob(small, 1.0),
+        ]
+        pool = InlineExecutor()
+
+        outputs, failed = dispatch_jobs(pool, jobs, 2, process, ("tag",), detect, MODULES)
+
+        assert (outputs, failed) == (6, 0)
+        assert pool.calls == [
+            ("detect", big, {}),
+            ("process", small, {}),
+            ("process", big, {"skip_modules": ("medium", "fast")}),
+            ("process", big, {"skip_modules": ("slow",)}),
+        ]
+
+    def test_failures_counted_per_file(self) -> None:
+        jobs = [
+            AnalysisJob(Path("broken"), 3.0, ("slow",)),
+            AnalysisJob(Path("broken"), 2.0, ("medium", "fast")),
+            AnalysisJob(Path("bad"), 2.0, ("slow",)),
+            AnalysisJob(Path("bad"), 2.0, ("medium", "fast")),
+            AnalysisJob(Path("good"), 1.0),
+        ]
+        pool = InlineExecutor()
+
+        outputs, failed = dispatch_jobs(pool, jobs, 4, process, ("tag",), detect, MODULES)
+
+        assert (outputs, failed) == (3, 2)
+        assert not any(name == "process" and path.name == "broken" for name, path, _ in pool.calls)
@@ -0,0 +1,202 @@
+"""Tests for fused execution of statistics taps in the analyze executor."""
+
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from capmaster.plugins.analyze.executor import AnalysisExecutor
+from capmaster.plugins.analyze.modules.http_stats import HttpStatsModule
+from capmaster.plugins.analyze.modules.protocol_hierarchy import ProtocolHierarchyModule
+from capmaster.plugins.analyze.modules.tcp_conversations import TcpConversationsModule
+from capmaster.plugins.analyze.modules.tcp_duration import TcpDurationModule
+from capmaster.plugins.analyze.modules.tcp_zero_window import TcpZeroWindowModule
+from capmaster.plugins.analyze.stats_taps import (
+    assign_sections,
+    fused_tap_args,
+    split_sections,
+    stats_tap,
+)
+from capmaster.utils.errors import TsharkExecutionError
+
+RULE = "=" * 67
+
+PHS = f"""
+{RULE}
+Protocol Hierarchy Statistics
+Filter:
+
+eth                                      frames:10 bytes:1000
+  ip                                     frames:10 bytes:1000
+    tcp                                  frames:10 bytes:1000
+{RULE}
+"""
+
+CONV_TCP = f"""{RULE}
+TCP Conversations
+Filter:<No Filter>
+                                               |       <-      | |       ->      | |     Total     |    Relative    |   Duration   |
+10.0.0.1:40000             <-> 10.0.0.2:80                  5 500 bytes       5 500 bytes      10 1000 bytes     0.000000000         2.5000
+{RULE}
+"""
+
+HTTP_TREE = f"""
+{RULE}
+HTTP/Packet Counter:
+Topic / Item            Count         Average       Min Val       Max Val       Rate (ms)     Percent
+-------------------------------------------------------------------------------------------------------
+Total HTTP Packets      4                                                       0.0004        100%
+-------------------------------------------------------------------------------------------------------
+
+"""
+
+TAPS = ["io,phs", "conv,tcp", "http,tree"]
+
+
+def _fused_output(taps: list[str]) -> str:
+    """Combined output of a fused run (tshark draws the last tap first)."""
+    reports = {"io,phs": PHS, "conv,tcp": CONV_TCP, "http,tree": HTTP_TREE}
+    return "".join(reports[tap] for tap in reversed(taps))
+
+
+@pytest.mark.unit
+class TestStatsTaps:
+    """Splitting combined tap output."""
+
+    def test_stats_tap(self) -> None:
+        assert stats_tap(["-q", "-z", "conv,tcp"]) == "conv,tcp"
+        assert stats_tap(["-Y", "tcp", "-T", "fields", "-e", "frame.number"]) is None
+        assert fused_tap_args(["io,phs", "conv,tcp"]) == ["-q", "-z", "io,phs", "-z", "conv,tcp"]
+
+    def test_split_sections(self) -> None:
+        sections = split_sections(_fused_output(TAPS))
+
+        assert len(sections) == 3
+        assert sections[0].startswith(RULE) and "HTTP/Packet Counter" in sections[0]
+        assert "TCP Conversations" in sections[1] and sections[1].rstrip().endswith(RULE)
+        assert "eth " in sections[2]
+
+    def test_assign_sections_reverse_order(self) -> None:
+        sections = assign_sections(TAPS, _fused_output(TAPS))
+
+        assert sections is not None
+        assert "Protocol Hierarchy Statistics" in sections["io,phs"]
+        assert "10.0.0.1:40000" in sections["conv,tcp"]
+        assert "Topic / Item" in sections["http,tree"]
+
+    def test_assign_sections_command_line_order(self) -> None:
+        output = PHS + CONV_TCP + HTTP_TREE
+
+        sections = assign_sections(TAPS, output)
+
+        assert sections is not None
+        assert "TCP Conversations" in sections["conv,tcp"]
+
+    def test_assign_sections_rejects_unexpected_output(self) -> None:
+        assert assign_sections(TAPS, PHS + CONV_TCP) is None
+        assert assign_sections(["conv,udp", "io,phs"], PHS + CONV_TCP) is None
+
+
+def _executor(tmp_path: Path, fused_stdout: str | None = None) -> tuple[AnalysisExecutor, MagicMock]:
+    tshark = MagicMock()
+
+    def execute(args: list[str], input_file: Path, timeout: int) -> subprocess.CompletedProcess[str]:
+        taps = [args[i + 1] for i, arg in enumerate(args) if arg == "-z"]
+        if len(taps) > 1:
+            if fused_stdout is None:
+                raise TsharkExecutionError("tshark", 1, "unknown tap")
+            stdout = fused_stdout
+        elif taps:
+            stdout = _fused_output(taps)
+        else:
+            stdout = "1\t0\n"
+        return subprocess.CompletedProcess(args, 0, stdout, "")
+
+    tshark.execute.side_effect = execute
+    detector = MagicMock()
+    detector.detect.return_value = {"eth", "ip", "tcp", "http"}
+    detector.hierarchy.return_value = PHS
+    return AnalysisExecutor(tshark, detector), tshark
+
+
+# protocol_hierarchy reuses the detection pass and is not part of the fused pass
+FUSED_TAPS = TAPS[1:]
+
+MODULES = [
+    ProtocolHierarchyModule(),
+    TcpConversationsModule(),
+    TcpDurationModule(),
+    HttpStatsModule(),
+    TcpZeroWindowModule(),
+]
+
+
+@pytest.mark.unit
+class TestFusedExecution:
+    """AnalysisExecutor runs all statistics taps in one tshark pass."""
+
+    def _run(self, executor: AnalysisExecutor, tmp_path: Path) -> dict[str, str]:
+        results = executor.execute_modules(tmp_path / "capture.pcap", tmp_path / "out", MODULES)
+        return {name: path.read_text(encoding="utf-8") for name, path in results.items()}
+
+    def test_taps_run_once(self, tmp_path: Path) -> None:
+        executor, tshark = _executor(tmp_path, fused_stdout=_fused_output(FUSED_TAPS))
+
+        outputs = self._run(executor, tmp_path)
+
+        calls = [c.kwargs["args"] for c in tshark.execute.call_args_list]
+        assert calls[0] == ["-q", "-z", "conv,tcp", "-z", "http,tree"]
+        assert len(calls) == 2  # fused pass + tcp_zero_window fields pass
+        assert "Protocol Hierarchy Statistics" in outputs["protocol_hierarchy"]
+        assert "TCP Conversations" not in outputs["protocol_hierarchy"]
+        assert "10.0.0.1:40000" in outputs["tcp_conversations"]
+        assert "10.0.0.1,40000,10.0.0.2,80,TCP,2.500s" in outputs["tcp_duration"]
+        assert "HTTP/Packet Counter" in outputs["http_stats"]
+
+    def test_same_output_as_separate_runs(self, tmp_path: Path) -> None:
+        fused, _ = _executor(tmp_path, fused_stdout=_fused_output(FUSED_TAPS))
+        separate, _ = _executor(tmp_path)
+        separate.fuse_taps = False
+
+        fused_outputs = self._run(fused, tmp_path)
+        separate_outputs = self._run(separate, tmp_path)
+
+        # Only blank lines between the reports of a fused run are dropped
+        assert {name: text.strip() for name, text in fused_outputs.items()} == {
+            name: text.strip() for name, text in separate_outputs.items()
+        }
+
+    @pytest.mark.parametrize("fused_stdout", [None, PHS])
+    def test_falls_back_to_separate_runs(self, tmp_path: Path, fused_stdout: str | None) -> None:
+        executor, tshark = _executor(tmp_path, fused_stdout=fused_stdout)
+
+        outputs = self._run(executor, tmp_path)
+
+        assert tshark.execute.call_count == len(MODULES)
+        assert "10.0.0.1:40000" in outputs["tcp_conversations"]
+        assert "HTTP/Packet Counter" in outputs["http_stats"]
+
+    def test_hierarchy_module_reuses_detection(self, tmp_path: Path) -> None:
+        executor, tshark = _executor(tmp_path)
+        executor.sample_detection = True
+
+        outputs = self._run(executor, tmp_path)
+
+        executor.protocol_detector.detect.assert_called_once()
+        executor.protocol_detector.detect_sampled.assert_not_called()
+        assert outputs["protocol_hierarchy"] == PHS
+        assert all("io,phs" not in c.kwargs["args"] for c in tshark.execute.call_args_list)
+
+    def test_sampled_detection_without_hierarchy_module(self, tmp_path: Path) -> None:
+        executor, _ = _executor(tmp_path)
+        executor.sample_detection = True
+        executor.protocol_detector.detect_sampled.return_value = {"eth", "ip", "tcp"}
+
+        results = executor.execute_modules(tmp_path / "capture.pcap", tmp_path / "out", MODULES[1:])
+
+        executor.protocol_detector.detect.assert_not_called()
+        executor.protocol_detector.hierarchy.assert_not_called()
+        assert "http_stats" not in results
@@ -0,0 +1,120 @@
+"""Tests for streaming row aggregation of analysis modules."""
+
+from __future__ import annotations
+
+import subprocess
+import tracemalloc
+from pathlib import Path
+from typing import Iterator
+from unittest.mock import MagicMock
+
+import pytest
+
+from capmaster.plugins.analyze.executor import AnalysisExecutor
+from capmaster.plugins.analyze.modules.base import SpreadSample, iter_rows, sample_evenly
+from capmaster.plugins.analyze.modules.json_stats import JsonStatsModule
+from capmaster.plugins.analyze.modules.mq_stats import MqStatsModule
+from capmaster.plugins.analyze.modules.sip_stats import SipStatsModule
+from capmaster.plugins.analyze.modules.tcp_completeness import TcpCompletenessModule
+from capmaster.plugins.analyze.modules.tcp_zero_window import TcpZeroWindowModule
+
+SIP_ROWS = [
+    ["10.0.0.1", "", "5060", "10.0.0.2", "", "5060", "INVITE", "", ""],
+    ["10.0.0.2", "", "5060", "10.0.0.1", "", "5060", "", "486", "SIP/2.0 486 Busy Here"],
+    ["10.0.0.3", "", "5060", "10.0.0.2", "", "5060", "INVITE", "", ""],
+]
+
+
+def _text(rows: list[list[str]]) -> str:
+    return "".join("\t".join(row) + "\n" for row in rows)
+
+
+@pytest.mark.unit
+class TestSpreadSample:
+    """Bounded sampling of streamed items."""
+
+    @pytest.mark.parametrize("count", [0, 1, 2, 3, 7, 64])
+    def test_exact_within_capacity(self, count: int) -> None:
+        sample: SpreadSample[int] = SpreadSample(capacity=64)
+        for i in range(count):
+            sample.add(i)
+
+        assert sample.count == count
+        assert sample.sample(3) == sample_evenly(range(count), 3)
+
+    def test_bounded_beyond_capacity(self) -> None:
+        sample: SpreadSample[int] = SpreadSample(capacity=8)
+        for i in range(1001):
+            sample.add(i)
+
+        assert len(sample._kept) <= 8
+        assert sample.first == 0
+        assert sample.sample(3)[0] == 0
+        assert sample.sample(3)[-1] == 1000
+        assert 250 <= sample.sample(3)[1] <= 750
+
+
+@pytest.mark.unit
+class TestConsume:
+    """The row contract and its adapters."""
+
+    def test_iter_rows_skips_blank_lines(self) -> None:
+        assert list(iter_rows(["a\tb\n", "\n", "c\t\r\n"])) == [["a", "b"], ["c", ""]]
+
+    def test_string_module_is_adapted(self) -> None:
+        module = TcpZeroWindowModule()
+        rows = [["10.0.0.1", "80", "10.0.0.2", "40000"]]
+
+        assert not module.streaming
+        assert module.consume(iter(rows)) == module.post_process(_text(rows))
+
+    def test_streaming_module_accepts_text(self) -> None:
+        module = SipStatsModule()
+
+        assert module.streaming
+        assert module.post_process(_text(SIP_ROWS)) == module.consume(iter(SIP_ROWS))
+        assert "486" in module.consume(iter(SIP_ROWS))
+        assert module.consume(iter([])) == "No SIP messages found\n"
+
+    def test_last_row_with_empty_trailing_columns_is_counted(self) -> None:
+        rows = [["0", "F·DASS", "10.0.0.1", "40000", "10.0.0.2", "80", "", ""]]
+
+        output = TcpCompletenessModule().post_process(_text(rows))
+
+        assert "Complete, WITH_DATA_CLOSED,F·DASS,1,Low" in output
+
+    def test_memory_does_not_grow_with_rows(self) -> None:
+        def rows(count: int) -> Iterator[list[str]]:
+            for i in range(count):
+                yield [str(i), "1400", "10.0.0.1", "40000", "10.0.0.2", "80", "", "500",
+                       "application/json", "1200"]
+
+        def peak(count: int) -> int:
+            tracemalloc.start()
+            try:
+                JsonStatsModule().consume(rows(count))
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        assert peak(20_000) < 2 * peak(1_000) + 64 * 1024
+
+
+@pytest.mark.unit
+def test_executor_streams_rows_of_streaming_modules(tmp_path: Path) -> None:
+    tshark = MagicMock()
+    tshark.stream.side_effect = lambda args, input_file, timeout: iter(_text(SIP_ROWS).splitlines(True))
+    tshark.execute.side_effect = lambda args, input_file, timeout: subprocess.CompletedProcess(
+        args, 0, "10.0.0.1\t80\t10.0.0.2\t40000\n", ""
+    )
+    detector = MagicMock()
+    detector.detect.return_value = {"sip", "mq", "tcp"}
+    executor = AnalysisExecutor(tshark, detector, fuse_taps=False, fuse_fields=False)
+
+    results = executor.execute_modules(
+        Path("capture.pcap"), tmp_path, [SipStatsModule(), MqStatsModule(), TcpZeroWindowModule()]
+    )
+
+    assert tshark.stream.call_count == 2
+    assert tshark.execute.call_count == 1
+    assert results["sip_stats"].read_text(encoding="utf-8") == SipStatsModule().consume(iter(SIP_ROWS))
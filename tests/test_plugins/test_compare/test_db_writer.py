@@ -10,6 +10,27 @@ import pytest
 sys.modules['psycopg2'] = MagicMock()
 
 from capmaster.plugins.compare.db_writer import DatabaseWriter
+from capmaster.utils.database import _copy_field
+
+
+def _decode(field: str) -> int | str | None:
+    """Decode a COPY text field of the test data (no escapes needed)."""
+    if field == "\\N":
+        return None
+    if field.lstrip("-").isdigit():
+        return int(field)
+    return field
+
+
+def _copied_rows(mock_cursor: MagicMock, decode=_decode) -> list[list]:
+    """Rows sent to the database with COPY ... FROM STDIN."""
+    rows = []
+    for copy_call in mock_cursor.copy_expert.call_args_list:
+        sql, buffer = copy_call[0]
+        assert sql.startswith("COPY public.kase_1_tcp_stream_extra (")
+        for line in buffer.getvalue().splitlines():
+            rows.append([decode(field) for field in line.split("\t")])
+    return rows
 
 
 @pytest.mark.integration
@@ -36,7 +57,8 @@ class TestDatabaseWriter:
                 # Should not raise error with empty list
                 db.insert_flow_hash_batch([])
                 
-                # executemany should not be called
+                # Nothing should be loaded
+                mock_cursor.copy_expert.assert_not_called()
                 mock_cursor.executemany.assert_not_called()
 
     def test_insert_flow_hash_batch_single_record(self, mock_connection: MagicMock, mock_cursor: MagicMock):
@@ -57,15 +79,15 @@ class TestDatabaseWriter:
                 
                 db.insert_flow_hash_batch(records)
                 
-                # Verify executemany was called once
-                assert mock_cursor.executemany.call_count == 1
+                # Verify a single COPY was issued
+                assert mock_cursor.copy_expert.call_count == 1
                 
                 # Verify SQL contains correct table name
-                sql = mock_cursor.executemany.call_args[0][0]
+                sql = mock_cursor.copy_expert.call_args[0][0]
                 assert 'kase_1_tcp_stream_extra' in sql
                 
                 # Verify data was passed correctly
-                data = mock_cursor.executemany.call_args[0][1]
+                data = _copied_rows(mock_cursor)
                 assert len(data) == 1
                 assert data[0][0] == 1  # pcap_id
                 assert data[0][1] == 12345678901234567890  # flow_hash
@@ -119,11 +141,11 @@ class TestDatabaseWriter:
                 
                 db.insert_flow_hash_batch(records)
                 
-                # Verify executemany was called once
-                assert mock_cursor.executemany.call_count == 1
+                # Verify a single COPY was issued
+                assert mock_cursor.copy_expert.call_count == 1
                 
                 # Verify data contains all 3 records
-                data = mock_cursor.executemany.call_args[0][1]
+                data = _copied_rows(mock_cursor)
                 assert len(data) == 3
                 
                 # Verify first record
@@ -157,7 +179,7 @@ class TestDatabaseWriter:
                 db.insert_flow_hash_batch(records)
                 
                 # Verify None was converted to empty string
-                data = mock_cursor.executemany.call_args[0][1]
+                data = _copied_rows(mock_cursor)
                 assert data[0][6] == ''  # tcp_flags_different_text
                 assert data[0][8] == ''  # seq_num_different_text
 
@@ -174,7 +196,7 @@ class TestDatabaseWriter:
                 db.insert_flow_hash_batch(records)
                 
                 # Verify defaults were used
-                data = mock_cursor.executemany.call_args[0][1]
+                data = _copied_rows(mock_cursor)
                 assert data[0][2] is None  # first_time
                 assert data[0][3] is None  # last_time
                 assert data[0][4] == 0  # tcp_flags_different_cnt
@@ -255,10 +277,10 @@ class TestDatabaseWriter:
                 db.insert_flow_hash_batch(records)
             
             # Get batch insert data
-            batch_data = mock_cursor.executemany.call_args[0][1]
+            batch_data = _copied_rows(mock_cursor, decode=str)
             
             # Verify batch data matches individual inserts
             assert len(batch_data) == len(individual_calls)
             for i, individual_data in enumerate(individual_calls):
-                assert batch_data[i] == individual_data
+                assert batch_data[i] == [_copy_field(value) for value in individual_data]
 
@@ -0,0 +1,81 @@
+"""Unit tests for the streamed packet-diff report."""
+
+from __future__ import annotations
+
+import io
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from capmaster.plugins.compare_common.output_formatter import (
+    build_report_text,
+    iter_report_lines,
+    write_lines,
+)
+from capmaster.plugins.compare_common.packet_comparator import PacketComparator, TcpPacket
+
+
+def _stream(ip_ids: list[int], flags: str = "0x010") -> list[TcpPacket]:
+    return [
+        TcpPacket(n, ip_id, flags, n, 0, 1000.0 + n, "10.0.0.1", "10.0.0.2", 40000, 80, "")
+        for n, ip_id in enumerate(ip_ids, start=1)
+    ]
+
+
+def _results() -> list:
+    comparator = PacketComparator()
+    streams = [
+        (0, 10, _stream([1, 2, 3]), _stream([1, 2, 3])),
+        (0, 11, _stream([1, 2, 3]), _stream([1, 2, 3], flags="0x018")),
+        (1, 12, _stream([4, 5]), _stream([4])),
+    ]
+    results = []
+    for sid_a, sid_b, packets_a, packets_b in streams:
+        conn = SimpleNamespace(
+            client_ip="10.0.0.1", server_ip="10.0.0.2", client_port=40000, server_port=80
+        )
+        match = SimpleNamespace(
+            conn1=SimpleNamespace(stream_id=sid_a, **vars(conn)),
+            conn2=SimpleNamespace(stream_id=sid_b, **vars(conn)),
+        )
+        result = comparator.compare(packets_a, packets_b, f"{sid_a}-{sid_b}")
+        results.append((match, packets_a, packets_b, result))
+    return results
+
+
+@pytest.mark.unit
+class TestStreamedReport:
+    """Report lines are produced incrementally with running summary counters."""
+
+    def test_summary_counters(self) -> None:
+        lines = list(
+            iter_report_lines(
+                _results(), Path("a.pcap"), Path("b.pcap"), matched_only=False, show_flow_hash=False
+            )
+        )
+
+        assert "Total matched pairs: 3" in lines
+        assert "Unique baseline streams: 2" in lines
+        assert "Unique compare streams: 3" in lines
+        assert "Identical connections: 1" in lines
+        assert "Connections with differences: 2" in lines
+        assert "Stream Pair: Baseline Stream 0 ↔ Compare Stream 11" in lines
+
+    @pytest.mark.parametrize("chunk_size", [1, 4, 1024])
+    def test_write_lines_matches_joined_text(self, chunk_size: int) -> None:
+        results = _results()
+        expected = build_report_text(
+            results, Path("a.pcap"), Path("b.pcap"), matched_only=True, show_flow_hash=True
+        )
+        lines = list(
+            iter_report_lines(
+                results, Path("a.pcap"), Path("b.pcap"), matched_only=True, show_flow_hash=True
+            )
+        )
+        stream = io.StringIO()
+
+        count = write_lines(iter(lines), stream, chunk_size=chunk_size)
+
+        assert stream.getvalue() == expected
+        assert count == len(lines)
@@ -320,3 +320,137 @@ class TestPacketComparator:
         assert len(result.differences) == 1
         assert result.differences[0].frame_a == 10
         assert result.differences[0].frame_b == 20
+
+
+def _reference_compare(
+    packets_a: list[TcpPacket], packets_b: list[TcpPacket], matched_only: bool
+) -> list[PacketDiff]:
+    """Straightforward per-IP-ID pairing the indexed comparison must reproduce."""
+    map_a: dict[int, list[TcpPacket]] = {}
+    map_b: dict[int, list[TcpPacket]] = {}
+    for pkt in packets_a:
+        map_a.setdefault(pkt.ip_id, []).append(pkt)
+    for pkt in packets_b:
+        map_b.setdefault(pkt.ip_id, []).append(pkt)
+
+    diffs: list[PacketDiff] = []
+    if not matched_only and len(packets_a) != len(packets_b):
+        diffs.append(PacketDiff(DiffType.PACKET_COUNT, -1, -1, -1, len(packets_a), len(packets_b)))
+    for ipid in sorted(set(map_a) & set(map_b)):
+        for pkt_a, pkt_b in zip(map_a[ipid], map_b[ipid]):
+            for diff_type, attr in (
+                (DiffType.TCP_FLAGS, "tcp_flags"),
+                (DiffType.SEQ_NUM, "seq"),
+                (DiffType.ACK_NUM, "ack"),
+            ):
+                if getattr(pkt_a, attr) != getattr(pkt_b, attr):
+                    diffs.append(
+                        PacketDiff(
+                            diff_type, -1, pkt_a.frame_number, pkt_b.frame_number,
+                            getattr(pkt_a, attr), getattr(pkt_b, attr),
+                        )
+                    )
+    if not matched_only:
+        # Sets built from key views, exactly as the original implementation
+        for ipid in set(map_a.keys()) - set(map_b.keys()):
+            for pkt in map_a[ipid]:
+                diffs.append(PacketDiff(DiffType.IP_ID, -1, pkt.frame_number, -1, f"{ipid:#06x}", "N/A"))
+        for ipid in set(map_b.keys()) - set(map_a.keys()):
+            for pkt in map_b[ipid]:
+                diffs.append(PacketDiff(DiffType.IP_ID, -1, -1, pkt.frame_number, "N/A", f"{ipid:#06x}"))
+    return diffs
+
+
+def _random_stream(rng, count: int) -> list[TcpPacket]:
+    return [
+        TcpPacket(
+            frame, rng.randint(0, 40), rng.choice(["0x010", "0x018", "0x002"]),
+            rng.randint(0, 3), rng.randint(0, 3), 1000.0 + frame,
+            "1.1.1.1", "2.2.2.2", 1000, 2000, "Info",
+        )
+        for frame in range(1, count + 1)
+    ]
+
+
+@pytest.mark.unit
+class TestIndexedComparison:
+    """Indexed and batch comparison against the per-IP-ID reference."""
+
+    @pytest.mark.parametrize("matched_only", [False, True])
+    def test_matches_reference_on_random_streams(self, matched_only: bool):
+        import random
+
+        rng = random.Random(7)
+        comparator = PacketComparator()
+        for _ in range(50):
+            packets_a = _random_stream(rng, rng.randint(0, 60))
+            packets_b = _random_stream(rng, rng.randint(0, 60))
+
+            result = comparator.compare(packets_a, packets_b, "conn", matched_only)
+
+            assert result.differences == _reference_compare(packets_a, packets_b, matched_only)
+
+    def test_only_in_one_side_order_is_stable(self):
+        """IP IDs missing from B are listed in the order earlier versions used."""
+        ipids_a = [
+            39753, 13522, 51912, 62767, 20312, 11809, 8718, 2597, 52637,
+            37929, 7713, 29088, 47218, 36265, 22631, 13917, 34304, 28101,
+        ]
+        only_in_a = {39753, 2597, 52637, 37929, 29088, 28101}
+        packets_a = [
+            TcpPacket(frame, ipid, "0x010", 0, 0, 1000.0, "1.1.1.1", "2.2.2.2", 1000, 2000, "")
+            for frame, ipid in enumerate(ipids_a, 1)
+        ]
+        packets_b = [pkt for pkt in packets_a if pkt.ip_id not in only_in_a]
+
+        result = PacketComparator().compare(packets_a, packets_b, "conn")
+
+        assert [diff.value_a for diff in result.differences[1:]] == [
+            f"{ipid:#06x}" for ipid in (29088, 28101, 2597, 39753, 37929, 52637)
+        ]
+
+    def test_compare_many_matches_compare(self):
+        import random
+
+        rng = random.Random(11)
+        comparator = PacketComparator()
+        shared = _random_stream(rng, 30)
+        pairs = [
+            (shared, _random_stream(rng, 25), "one"),
+            (shared, _random_stream(rng, 35), "two"),
+            (_random_stream(rng, 10), shared, "three"),
+        ]
+
+        results = list(comparator.compare_many(pairs))
+
+        assert [r.connection_id for r in results] == ["one", "two", "three"]
+        for (packets_a, packets_b, conn_id), result in zip(pairs, results):
+            assert result == comparator.compare(packets_a, packets_b, conn_id)
+
+
+@pytest.mark.unit
+class TestStreamingFormatters:
+    """Line-by-line table and flow formatters with a row cap."""
+
+    @pytest.mark.parametrize("method", ["comparison_table", "flow_comparison"])
+    def test_row_cap_keeps_summary_counts(self, method: str):
+        import random
+
+        rng = random.Random(5)
+        comparator = PacketComparator()
+        packets_a = _random_stream(rng, 40)
+        packets_b = _random_stream(rng, 40)
+        result = comparator.compare(packets_a, packets_b, "conn")
+        iter_lines = getattr(comparator, f"iter_{method}")
+        format_text = getattr(comparator, f"format_{method}")
+
+        full = list(iter_lines(packets_a, packets_b, result))
+        capped = list(iter_lines(packets_a, packets_b, result, max_rows=5))
+
+        assert format_text(packets_a, packets_b, result) == "\n".join(full)
+        rows_line = next(line for line in full if line.startswith("Rows: "))
+        total_rows = int(rows_line.split()[1])
+        assert total_rows > 5
+        assert rows_line in capped
+        assert f"... {total_rows - 5} more rows not shown" in capped
+        assert len(full) - len(capped) == total_rows - 5 - 1
@@ -126,9 +126,9 @@ class TestPacketExtractor:
         # Mock tshark output with 3 packets
         # Format: frame_num, ip_id, flags, seq, ack, timestamp, src_ip, dst_ip, src_port, dst_port, info
         mock_output = (
-            "1\t64\t0x002\t1000000\t0\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\n"
-            "2\t65\t0x012\t2000000\t1000001\t1234567890.234567\t10.0.0.1\t192.168.1.100\t80\t54321\tSYN, ACK\n"
-            "3\t66\t0x010\t1000001\t2000001\t1234567890.345678\t192.168.1.100\t10.0.0.1\t54321\t80\tACK\n"
+            "1\t64\t0x002\t1000000\t0\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\t0\n"
+            "2\t65\t0x012\t2000000\t1000001\t1234567890.234567\t10.0.0.1\t192.168.1.100\t80\t54321\tSYN, ACK\t0\n"
+            "3\t66\t0x010\t1000001\t2000001\t1234567890.345678\t192.168.1.100\t10.0.0.1\t54321\t80\tACK\t0\n"
         )
 
         mock_tshark.execute.return_value = TsharkResult(
@@ -275,8 +275,8 @@ class TestPacketExtractor:
         extractor.tshark = mock_tshark
 
         mock_output = (
-            "1\t100\t0x002\t1000000\t0\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\n"
-            "2\t101\t0x012\t2000000\t1000001\t1234567890.234567\t10.0.0.1\t192.168.1.100\t80\t54321\tSYN, ACK\n"
+            "1\t100\t0x002\t1000000\t0\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\t0\n"
+            "2\t101\t0x012\t2000000\t1000001\t1234567890.234567\t10.0.0.1\t192.168.1.100\t80\t54321\tSYN, ACK\t0\n"
         )
 
         mock_tshark.execute.return_value = TsharkResult(
@@ -299,9 +299,9 @@ class TestPacketExtractor:
 
         # Include a malformed line (missing fields)
         mock_output = (
-            "1\t100\t0x002\t1000000\t0\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\n"
+            "1\t100\t0x002\t1000000\t0\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\t0\n"
             "2\t101\t0x012\n"  # Malformed: missing fields
-            "3\t102\t0x010\t1000001\t2000001\t1234567890.345678\t192.168.1.100\t10.0.0.1\t54321\t80\tACK\n"
+            "3\t102\t0x010\t1000001\t2000001\t1234567890.345678\t192.168.1.100\t10.0.0.1\t54321\t80\tACK\t0\n"
         )
 
         mock_tshark.execute.return_value = TsharkResult(
@@ -330,7 +330,7 @@ class TestPacketExtractor:
         extractor.tshark = mock_tshark
 
         # Empty IPID and ACK fields - these are converted to 0, not None
-        mock_output = "1\t\t0x002\t1000000\t\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\n"
+        mock_output = "1\t\t0x002\t1000000\t\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\t0\n"
 
         mock_tshark.execute.return_value = TsharkResult(
             returncode=0,
@@ -366,8 +366,8 @@ class TestPacketExtractor:
 
         # Mock output with tcp.stream field first
         mock_output = (
-            "0\t1\t0x0001\t0x002\t1000000\t0\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\n"
-            "0\t2\t0x0002\t0x012\t2000000\t1000001\t1234567890.234567\t10.0.0.1\t192.168.1.100\t80\t54321\tSYN, ACK\n"
+            "0\t1\t0x0001\t0x002\t1000000\t0\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\t0\n"
+            "0\t2\t0x0002\t0x012\t2000000\t1000001\t1234567890.234567\t10.0.0.1\t192.168.1.100\t80\t54321\tSYN, ACK\t0\n"
         )
 
         mock_tshark.execute.return_value = TsharkResult(
@@ -402,10 +402,10 @@ class TestPacketExtractor:
 
         # Mock output with mixed streams
         mock_output = (
-            "0\t1\t0x0001\t0x002\t1000000\t0\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\n"
-            "1\t2\t0x0002\t0x012\t2000000\t1000001\t1234567890.234567\t10.0.0.1\t192.168.1.100\t80\t54321\tSYN, ACK\n"
-            "0\t3\t0x0003\t0x010\t1000001\t2000001\t1234567890.345678\t192.168.1.100\t10.0.0.1\t54321\t80\tACK\n"
-            "2\t4\t0x0004\t0x002\t3000000\t0\t1234567890.456789\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\n"
+            "0\t1\t0x0001\t0x002\t1000000\t0\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\t0\n"
+            "1\t2\t0x0002\t0x012\t2000000\t1000001\t1234567890.234567\t10.0.0.1\t192.168.1.100\t80\t54321\tSYN, ACK\t0\n"
+            "0\t3\t0x0003\t0x010\t1000001\t2000001\t1234567890.345678\t192.168.1.100\t10.0.0.1\t54321\t80\tACK\t0\n"
+            "2\t4\t0x0004\t0x002\t3000000\t0\t1234567890.456789\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\t0\n"
         )
 
         mock_tshark.execute.return_value = TsharkResult(
@@ -419,8 +419,7 @@ class TestPacketExtractor:
         # Verify filter includes both streams
         args = mock_tshark.execute.call_args[0][0]
         filter_idx = args.index("-Y") + 1
-        assert "tcp.stream==0" in args[filter_idx]
-        assert "tcp.stream==1" in args[filter_idx]
+        assert args[filter_idx] == "tcp.stream in {0..1}"
 
         # Verify results
         assert 0 in result
@@ -450,9 +449,9 @@ class TestPacketExtractor:
 
         # Output contains stream 99 which was not requested
         mock_output = (
-            "0\t1\t0x0001\t0x002\t1000000\t0\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\n"
-            "99\t2\t0x0002\t0x012\t2000000\t1000001\t1234567890.234567\t10.0.0.1\t192.168.1.100\t80\t54321\tSYN, ACK\n"
-            "1\t3\t0x0003\t0x010\t1000001\t2000001\t1234567890.345678\t192.168.1.100\t10.0.0.1\t54321\t80\tACK\n"
+            "0\t1\t0x0001\t0x002\t1000000\t0\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\t0\n"
+            "99\t2\t0x0002\t0x012\t2000000\t1000001\t1234567890.234567\t10.0.0.1\t192.168.1.100\t80\t54321\tSYN, ACK\t0\n"
+            "1\t3\t0x0003\t0x010\t1000001\t2000001\t1234567890.345678\t192.168.1.100\t10.0.0.1\t54321\t80\tACK\t0\n"
         )
 
         mock_tshark.execute.return_value = TsharkResult(
@@ -478,10 +477,10 @@ class TestPacketExtractor:
 
         # Mock output with packets from different streams
         mock_output = (
-            "0\t1\t0x0001\t0x002\t1000000\t0\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\n"
-            "1\t2\t0x0002\t0x012\t2000000\t1000001\t1234567890.234567\t10.0.0.1\t192.168.1.100\t80\t54321\tSYN, ACK\n"
-            "0\t3\t0x0003\t0x010\t1000001\t2000001\t1234567890.345678\t192.168.1.100\t10.0.0.1\t54321\t80\tACK\n"
-            "2\t4\t0x0004\t0x002\t3000000\t0\t1234567890.456789\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\n"
+            "0\t1\t0x0001\t0x002\t1000000\t0\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\t0\n"
+            "1\t2\t0x0002\t0x012\t2000000\t1000001\t1234567890.234567\t10.0.0.1\t192.168.1.100\t80\t54321\tSYN, ACK\t0\n"
+            "0\t3\t0x0003\t0x010\t1000001\t2000001\t1234567890.345678\t192.168.1.100\t10.0.0.1\t54321\t80\tACK\t0\n"
+            "2\t4\t0x0004\t0x002\t3000000\t0\t1234567890.456789\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\t0\n"
         )
 
         mock_tshark.execute.return_value = TsharkResult(
@@ -492,11 +491,11 @@ class TestPacketExtractor:
 
         result = extractor.extract_multiple_streams(sample_pcap, [0, 1, 2])
 
-        # Verify tshark was called with correct filter (OR of all streams)
+        # Verify tshark was called with correct filter (set of all streams)
         args = mock_tshark.execute.call_args[0][0]
         assert "-Y" in args
         filter_idx = args.index("-Y") + 1
-        assert "tcp.stream==0 or tcp.stream==1 or tcp.stream==2" == args[filter_idx]
+        assert "tcp.stream in {0..2}" == args[filter_idx]
 
         # Verify results are grouped by stream
         assert len(result) == 3
@@ -541,9 +540,9 @@ class TestPacketExtractor:
 
         # Mock output includes stream 99 which is not requested
         mock_output = (
-            "0\t1\t0x0001\t0x002\t1000000\t0\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\n"
-            "99\t2\t0x0002\t0x012\t2000000\t1000001\t1234567890.234567\t10.0.0.1\t192.168.1.100\t80\t54321\tSYN, ACK\n"
-            "1\t3\t0x0003\t0x010\t1000001\t2000001\t1234567890.345678\t192.168.1.100\t10.0.0.1\t54321\t80\tACK\n"
+            "0\t1\t0x0001\t0x002\t1000000\t0\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\t0\n"
+            "99\t2\t0x0002\t0x012\t2000000\t1000001\t1234567890.234567\t10.0.0.1\t192.168.1.100\t80\t54321\tSYN, ACK\t0\n"
+            "1\t3\t0x0003\t0x010\t1000001\t2000001\t1234567890.345678\t192.168.1.100\t10.0.0.1\t54321\t80\tACK\t0\n"
         )
 
         mock_tshark.execute.return_value = TsharkResult(
@@ -568,9 +567,9 @@ class TestPacketExtractor:
 
         # Mock output for 3 streams
         mock_output = (
-            "0\t1\t0x0001\t0x002\t1000000\t0\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\n"
-            "1\t2\t0x0002\t0x012\t2000000\t1000001\t1234567890.234567\t10.0.0.1\t192.168.1.100\t80\t54321\tSYN, ACK\n"
-            "2\t3\t0x0003\t0x010\t1000001\t2000001\t1234567890.345678\t192.168.1.100\t10.0.0.1\t54321\t80\tACK\n"
+            "0\t1\t0x0001\t0x002\t1000000\t0\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\t0\n"
+            "1\t2\t0x0002\t0x012\t2000000\t1000001\t1234567890.234567\t10.0.0.1\t192.168.1.100\t80\t54321\tSYN, ACK\t0\n"
+            "2\t3\t0x0003\t0x010\t1000001\t2000001\t1234567890.345678\t192.168.1.100\t10.0.0.1\t54321\t80\tACK\t0\n"
         )
 
         mock_tshark.execute.return_value = TsharkResult(
@@ -589,13 +588,59 @@ class TestPacketExtractor:
         call_args = mock_tshark.execute.call_args[0][0]
         filter_arg_index = call_args.index("-Y") + 1
         filter_expr = call_args[filter_arg_index]
-        assert "tcp.stream==0" in filter_expr
-        assert "tcp.stream==1" in filter_expr
-        assert "tcp.stream==2" in filter_expr
-        assert " or " in filter_expr  # Should use OR to combine filters
+        # Single set-membership test instead of one OR term per stream
+        assert filter_expr == "tcp.stream in {0..2}"
+        assert " or " not in filter_expr
 
         # Verify results
         assert len(result) == 3
         assert 0 in result
         assert 1 in result
         assert 2 in result
+
+    def test_extract_multiple_streams_scans_when_selective(
+        self, extractor: PacketExtractor, sample_pcap: Path, mock_tshark: MagicMock
+    ):
+        """Requesting most streams uses one TCP pass filtered in Python."""
+        extractor.tshark = mock_tshark
+        mock_output = (
+            "0\t1\t0x0001\t0x002\t1000000\t0\t1234567890.123456\t192.168.1.100\t10.0.0.1\t54321\t80\tSYN\t0\n"
+            "1\t2\t0x0002\t0x012\t2000000\t1000001\t1234567890.234567\t10.0.0.1\t192.168.1.100\t80\t54321\tSYN, ACK\t0\n"
+            "5\t3\t0x0003\t0x010\t1000001\t2000001\t1234567890.345678\t192.168.1.100\t10.0.0.1\t54321\t80\tACK\t0\n"
+        )
+
+        def write_output(args, output_file=None, **kwargs):
+            output_file.write_text(mock_output)
+            return TsharkResult(returncode=0, stdout="", stderr="")
+
+        mock_tshark.execute.side_effect = write_output
+
+        result = extractor.extract_multiple_streams(sample_pcap, [0, 1, 2], total_streams=4)
+
+        args = mock_tshark.execute.call_args[0][0]
+        assert args[args.index("-Y") + 1] == "tcp"
+        assert mock_tshark.execute.call_args.kwargs["output_file"] is not None
+        assert [len(result[sid]) for sid in (0, 1, 2)] == [1, 1, 0]
+        assert 5 not in result
+
+
+@pytest.mark.unit
+class TestBuildStreamFilter:
+    """Selection of the multi-stream display filter."""
+
+    def test_single_stream(self):
+        assert PacketExtractor.build_stream_filter([7]) == "tcp.stream==7"
+
+    def test_ranges_are_collapsed(self):
+        stream_filter = PacketExtractor.build_stream_filter([9, 1, 2, 3, 5, 10, 3])
+        assert stream_filter == "tcp.stream in {1..3 5 9..10}"
+
+    def test_low_selectivity_keeps_filter(self):
+        assert PacketExtractor.build_stream_filter([1, 5], total_streams=100) == "tcp.stream in {1 5}"
+
+    def test_high_selectivity_scans(self):
+        assert PacketExtractor.build_stream_filter(range(60), total_streams=100) is None
+
+    def test_fragmented_set_scans(self):
+        many = range(0, 2 * (PacketExtractor.MAX_SET_FILTER_TERMS + 1), 2)
+        assert PacketExtractor.build_stream_filter(many) is None
@@ -0,0 +1,113 @@
+"""Unit tests for the packet store filled by the connection extraction pass."""
+
+from __future__ import annotations
+
+from collections import namedtuple
+from decimal import Decimal
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from capmaster.core.connection.connection_extractor import extract_connections_from_pcap
+from capmaster.core.connection.extractor import TcpFieldExtractor
+from capmaster.core.tshark_wrapper import TsharkWrapper
+from capmaster.plugins.compare_common.packet_extractor import PacketExtractor, TcpPacket
+from capmaster.plugins.compare_common.packet_store import StreamPacketStore
+
+TsharkResult = namedtuple("TsharkResult", ["returncode", "stdout", "stderr"])
+
+# (stream, frame, time, src, dst, sport, dport, flags, seq, ack, ip.id, info, tcp.len)
+PACKETS = [
+    (0, 1, "1700000000.000000001", "10.0.0.1", "10.0.0.2", 40000, 80, "0x0002", 1000, 0, "0x1a2b", "40000 → 80 [SYN]", 0),
+    (1, 2, "1700000000.000100000", "10.0.0.3", "10.0.0.2", 40001, 443, "0x0002", 5000, 0, "0x0001", "40001 → 443 [SYN]", 0),
+    (0, 3, "1700000000.000200000", "10.0.0.2", "10.0.0.1", 80, 40000, "0x0012", 9000, 1001, "0x0000", "80 → 40000 [SYN, ACK]", 0),
+    (1, 4, "1700000000.123456789", "10.0.0.2", "10.0.0.3", 443, 40001, "", 7000, 5001, "", "443 → 40001 [ACK]", 517),
+    (0, 5, "1700000001.5", "10.0.0.1", "10.0.0.2", 40000, 80, "0x0010", 1001, 9001, "0xffff", "40000 → 80 [ACK]", 1460),
+]
+
+
+def _connection_rows() -> str:
+    """Output of the fused extraction pass (TcpFieldExtractor fields + info)."""
+    lines = []
+    for stream, frame, time, src, dst, sport, dport, flags, seq, ack, ip_id, info, length in PACKETS:
+        row = [
+            str(frame), time, str(stream), "6", src, dst, str(sport), str(dport),
+            flags, str(seq), str(ack), "", str(length), ip_id, "", "", "", "64", "60", info,
+        ]
+        lines.append("\t".join(row))
+    return "\n".join(lines) + "\n"
+
+
+def _packet_extractor_rows() -> list[str]:
+    """Output of the dedicated PacketExtractor pass for the same packets."""
+    return [
+        "\t".join(
+            [
+                str(stream), str(frame), ip_id, flags, str(seq), str(ack), time,
+                src, dst, str(sport), str(dport), info, str(length),
+            ]
+        )
+        for stream, frame, time, src, dst, sport, dport, flags, seq, ack, ip_id, info, length in PACKETS
+    ]
+
+
+def _extract(store: StreamPacketStore) -> tuple[list, MagicMock]:
+    tshark = MagicMock(spec=TsharkWrapper)
+    tshark.execute.return_value = TsharkResult(0, _connection_rows(), "")
+    with patch("capmaster.core.connection.extractor.TsharkWrapper", return_value=tshark):
+        connections = extract_connections_from_pcap(Path("capture.pcap"), packet_sink=store)
+    return connections, tshark
+
+
+def _reference(stream_ids: list[int]) -> dict[int, list[TcpPacket]]:
+    extractor = PacketExtractor(tshark=MagicMock(spec=TsharkWrapper))
+    packets_by_stream: dict[int, list[TcpPacket]] = {sid: [] for sid in stream_ids}
+    extractor._collect_stream_packets(_packet_extractor_rows(), packets_by_stream)
+    return packets_by_stream
+
+
+@pytest.mark.unit
+class TestStreamPacketStore:
+    """Retention of packet fields during connection extraction."""
+
+    def test_single_tshark_pass_requests_info(self) -> None:
+        with StreamPacketStore() as store:
+            connections, tshark = _extract(store)
+
+            assert len(connections) == 2
+            assert tshark.execute.call_count == 1
+            args = tshark.execute.call_args[0][0]
+            fields = [args[i + 1] for i, arg in enumerate(args) if arg == "-e"]
+            assert fields == TcpFieldExtractor.FIELDS + ["_ws.col.Info"]
+            assert len(store) == len(PACKETS)
+            assert 0 in store and 1 in store and 7 not in store
+
+    def test_packets_match_dedicated_extraction(self) -> None:
+        with StreamPacketStore() as store:
+            _extract(store)
+            packets_by_stream = store.packets_by_stream([0, 1, 7])
+
+        assert packets_by_stream == _reference([0, 1, 7])
+        assert packets_by_stream[1][1].tcp_flags == "0x000"
+        assert packets_by_stream[1][1].timestamp == Decimal("1700000000.123456789")
+        assert packets_by_stream[1][1].tcp_len == 517
+        assert packets_by_stream[7] == []
+
+    def test_spilled_chunks_read_back_in_order(self, tmp_path: Path) -> None:
+        with StreamPacketStore(memory_limit=1, spill_dir=tmp_path) as store:
+            _extract(store)
+
+            assert store.spilled
+            assert store.packets(0) == _reference([0])[0]
+            assert store.packets_by_stream([1]) == _reference([1])
+
+    def test_extraction_without_sink_is_unchanged(self) -> None:
+        tshark = MagicMock(spec=TsharkWrapper)
+        tshark.execute.return_value = TsharkResult(0, _connection_rows(), "")
+        with patch("capmaster.core.connection.extractor.TsharkWrapper", return_value=tshark):
+            packets = list(TcpFieldExtractor().extract(Path("capture.pcap")))
+
+        args = tshark.execute.call_args[0][0]
+        assert "_ws.col.Info" not in args
+        assert [p.frame_number for p in packets] == [1, 2, 3, 4, 5]
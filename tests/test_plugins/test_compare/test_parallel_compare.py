@@ -0,0 +1,60 @@
+"""Unit tests for parallel packet-level comparison."""
+
+from __future__ import annotations
+
+import random
+from decimal import Decimal
+
+import pytest
+
+from capmaster.plugins.compare_common.packet_comparator import PacketComparator
+from capmaster.plugins.compare_common.packet_extractor import TcpPacket
+from capmaster.plugins.compare_common.parallel_compare import (
+    _chunk_pairs,
+    compare_pairs_parallel,
+)
+
+
+def _stream(rng: random.Random, count: int) -> list[TcpPacket]:
+    return [
+        TcpPacket(
+            frame, rng.randint(0, 30), rng.choice(["0x010", "0x018", "0x002"]),
+            rng.randint(0, 2), rng.randint(0, 2), Decimal(frame),
+            "1.1.1.1", "2.2.2.2", 1000, 2000, "Info",
+        )
+        for frame in range(1, count + 1)
+    ]
+
+
+@pytest.mark.unit
+class TestParallelCompare:
+    """Worker results must equal the serial comparison, in order."""
+
+    @pytest.mark.parametrize("matched_only", [False, True])
+    def test_matches_serial_results(self, matched_only: bool) -> None:
+        rng = random.Random(3)
+        shared = _stream(rng, 40)
+        pairs = [
+            (_stream(rng, rng.randint(0, 50)), _stream(rng, rng.randint(0, 50)), f"conn {i}")
+            for i in range(30)
+        ]
+        pairs.append((shared, _stream(rng, 20), "shared 1"))
+        pairs.append((shared, [], "shared 2"))
+
+        chunks = list(compare_pairs_parallel(pairs, jobs=2, matched_only=matched_only))
+
+        assert len(chunks) > 1
+        parallel = [result for chunk in chunks for result in chunk]
+        serial = list(PacketComparator().compare_many(pairs, matched_only))
+        assert parallel == serial
+
+    def test_no_pairs(self) -> None:
+        assert list(compare_pairs_parallel([], jobs=2)) == []
+
+    def test_chunks_are_contiguous_and_balanced(self) -> None:
+        weights = [100, 1, 1, 1, 1, 100, 50, 50, 1, 1]
+
+        chunks = _chunk_pairs(weights, 3)
+
+        assert [i for chunk in chunks for i in chunk] == list(range(len(weights)))
+        assert all(sum(weights[i] for i in chunk) <= 150 for chunk in chunks)
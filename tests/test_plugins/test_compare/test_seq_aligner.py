@@ -0,0 +1,151 @@
+"""Unit tests for sequence-aware stream alignment."""
+
+from __future__ import annotations
+
+from decimal import Decimal
+
+import pytest
+
+from capmaster.plugins.compare_common.packet_extractor import TcpPacket
+from capmaster.plugins.compare_common.seq_aligner import (
+    CLIENT_TO_SERVER,
+    SERVER_TO_CLIENT,
+    align_streams,
+    format_alignment,
+)
+
+CLIENT = ("10.0.0.1", 40000)
+SERVER = ("10.0.0.2", 80)
+
+
+def _stream(
+    segments: int,
+    isn_client: int = 1000,
+    isn_server: int = 5000,
+    ip_id_xor: int = 0,
+    with_handshake: bool = True,
+) -> list[TcpPacket]:
+    """Server sends ``segments`` 1000-byte segments, the client ACKs each."""
+    packets: list[TcpPacket] = []
+
+    def add(src, dst, flags: str, seq: int, ack: int, length: int) -> None:
+        frame = len(packets) + 1
+        packets.append(
+            TcpPacket(
+                frame, (frame ^ ip_id_xor) & 0xFFFF, flags, seq & 0xFFFFFFFF, ack & 0xFFFFFFFF,
+                Decimal(frame), src[0], dst[0], src[1], dst[1], "", length,
+            )
+        )
+
+    if with_handshake:
+        add(CLIENT, SERVER, "0x002", isn_client, 0, 0)
+        add(SERVER, CLIENT, "0x012", isn_server, isn_client + 1, 0)
+        add(CLIENT, SERVER, "0x010", isn_client + 1, isn_server + 1, 0)
+    seq = isn_server + 1
+    for _ in range(segments):
+        add(SERVER, CLIENT, "0x018", seq, isn_client + 1, 1000)
+        seq += 1000
+        add(CLIENT, SERVER, "0x010", isn_client + 1, seq, 0)
+    return packets
+
+
+@pytest.mark.unit
+class TestAlignStreams:
+    """Pairing by (direction, relative seq, payload length)."""
+
+    def test_identical_streams(self) -> None:
+        packets = _stream(20)
+
+        alignment = align_streams(packets, list(packets), "conn")
+
+        assert alignment.is_identical
+        assert len(alignment.matched) == len(packets)
+        assert [s.packet_a.frame_number for s in alignment.matched] == list(range(1, len(packets) + 1))
+        assert all(s.packet_a is s.packet_b for s in alignment.matched)
+
+    def test_rewritten_ip_ids_and_sequence_numbers(self) -> None:
+        packets_a = _stream(50)
+        packets_b = _stream(50, isn_client=0xFFFFFF00, isn_server=777, ip_id_xor=0x5A5A)
+
+        alignment = align_streams(packets_a, packets_b)
+
+        assert alignment.is_identical
+        assert [(s.packet_a.frame_number, s.packet_b.frame_number) for s in alignment.matched] == [
+            (n, n) for n in range(1, len(packets_a) + 1)
+        ]
+
+    def test_dropped_inserted_and_reordered_segments(self) -> None:
+        packets_a = _stream(30)
+        packets_b = _stream(30, ip_id_xor=0x1111)
+        dropped = packets_b.pop(10)
+        extra = TcpPacket(
+            999, 1, "0x018", 5000 + 1 + 30 * 1000, 1001, Decimal(0),
+            SERVER[0], CLIENT[0], SERVER[1], CLIENT[1], "", 1000,
+        )
+        packets_b.append(extra)
+        packets_b[30], packets_b[40] = packets_b[40], packets_b[30]
+
+        alignment = align_streams(packets_a, packets_b)
+
+        assert [s.packet_a.frame_number for s in alignment.dropped] == [dropped.frame_number]
+        assert [s.packet_b for s in alignment.inserted] == [extra]
+        assert alignment.inserted[0].direction == SERVER_TO_CLIENT
+        assert alignment.inserted[0].rel_seq == 30 * 1000 + 1
+        assert len(alignment.matched) == len(packets_a) - 1
+        assert [s.packet_b.frame_number for s in alignment.reordered] == [32, 42]
+
+    def test_capture_started_mid_stream(self) -> None:
+        packets_a = _stream(20)
+        # B has no handshake and starts at the 6th data segment
+        packets_b = _stream(20, isn_server=90000, with_handshake=False)[10:]
+        for packet in packets_b:
+            packet.ip_id = packets_a[packet.frame_number + 2].ip_id
+
+        alignment = align_streams(packets_a, packets_b)
+
+        assert not alignment.inserted
+        assert len(alignment.matched) == len(packets_b)
+        assert all(s.packet_a.frame_number == s.packet_b.frame_number + 3 for s in alignment.matched)
+        assert [s.packet_a.frame_number for s in alignment.dropped] == list(range(1, 14))
+
+    def test_late_segment_beyond_window_is_dropped_and_inserted(self) -> None:
+        packets_a = _stream(30)
+        packets_b = list(packets_a)
+        late = packets_b.pop(5)
+        packets_b.append(late)
+
+        in_window = align_streams(packets_a, packets_b, window=100)
+        out_of_window = align_streams(packets_a, packets_b, window=10)
+
+        assert not in_window.dropped and not in_window.inserted
+        assert [s.packet_b for s in in_window.reordered] == [late]
+        assert [s.packet_a for s in out_of_window.dropped] == [late]
+        assert [s.packet_b for s in out_of_window.inserted] == [late]
+
+    def test_duplicate_pure_acks_prefer_same_ip_id(self) -> None:
+        packets_a = _stream(2)
+        dup_acks = [
+            TcpPacket(
+                100 + n, 300 + n, "0x010", 1001, 7001, Decimal(0),
+                CLIENT[0], SERVER[0], CLIENT[1], SERVER[1], "", 0,
+            )
+            for n in range(3)
+        ]
+        packets_a += dup_acks
+        packets_b = packets_a[:-3] + [dup_acks[2], dup_acks[0], dup_acks[1]]
+
+        alignment = align_streams(packets_a, packets_b)
+
+        pairs = [(s.packet_a, s.packet_b) for s in alignment.matched if s.packet_a in dup_acks]
+        assert all(a is b for a, b in pairs)
+        assert all(s.direction == CLIENT_TO_SERVER for s in alignment.reordered)
+
+    def test_format_alignment(self) -> None:
+        packets_a = _stream(5)
+        packets_b = packets_a[:3] + packets_a[4:]
+
+        report = format_alignment(align_streams(packets_a, packets_b), max_rows=1)
+
+        assert "Dropped segments (A only): 1" in report
+        assert "Inserted segments (B only): 0" in report
+        assert "S->C" in report
@@ -0,0 +1,254 @@
+"""Unit tests for the compact cardinality index used by ServerDetector."""
+
+from __future__ import annotations
+
+import random
+from collections import defaultdict
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from capmaster.cli import cli
+from capmaster.core.connection.models import TcpConnection
+from capmaster.plugins.match.cardinality_index import CardinalityIndex, CardinalityOptions
+from capmaster.plugins.match.server_detector import ServerDetector
+from capmaster.utils.errors import CapMasterError
+
+
+def _make_connection(
+    stream_id: int,
+    client_ip: str,
+    client_port: int,
+    server_ip: str,
+    server_port: int,
+) -> TcpConnection:
+    """Create a minimal TcpConnection without SYN information."""
+    return TcpConnection(
+        stream_id=stream_id,
+        protocol=6,
+        client_ip=client_ip,
+        client_port=client_port,
+        server_ip=server_ip,
+        server_port=server_port,
+        syn_timestamp=0.0,
+        syn_options="",
+        client_isn=0,
+        server_isn=0,
+        tcp_timestamp_tsval="",
+        tcp_timestamp_tsecr="",
+        client_payload_md5="",
+        server_payload_md5="",
+        length_signature="",
+        is_header_only=False,
+        ipid_first=0,
+        ipid_set=set(),
+        client_ipid_set=set(),
+        server_ipid_set=set(),
+        first_packet_time=0.0,
+        last_packet_time=0.0,
+        packet_count=1,
+    )
+
+
+def _random_connections(count: int, seed: int = 7) -> list[TcpConnection]:
+    rng = random.Random(seed)
+    servers = [(f"10.0.0.{i}", rng.choice([80, 443, 8000, 9000, 50001])) for i in range(1, 8)]
+    connections = []
+    for stream_id in range(count):
+        server_ip, server_port = rng.choice(servers)
+        client_ip = f"192.168.{rng.randint(0, 3)}.{rng.randint(1, 40)}"
+        client_port = rng.randint(1024, 65535)
+        if rng.random() < 0.3:
+            # Reversed direction: SYN was not observed, roles guessed wrong
+            client_ip, server_ip = server_ip, client_ip
+            client_port, server_port = server_port, client_port
+        connections.append(
+            _make_connection(stream_id, client_ip, client_port, server_ip, server_port)
+        )
+    return connections
+
+
+@pytest.mark.unit
+class TestCardinalityIndexExact:
+    """Exact mode must reproduce the original set-based counts."""
+
+    def test_counts_match_reference_sets(self) -> None:
+        connections = _random_connections(500)
+        index = CardinalityIndex()
+
+        endpoint_peers: dict[tuple[str, int], set[str]] = defaultdict(set)
+        port_ips: dict[int, set[str]] = defaultdict(set)
+        peer_ports: dict[tuple[str, int], set[int]] = defaultdict(set)
+        for c in connections:
+            index.add_connection(c.client_ip, c.client_port, c.server_ip, c.server_port)
+            endpoint_peers[(c.server_ip, c.server_port)].add(c.client_ip)
+            endpoint_peers[(c.client_ip, c.client_port)].add(c.server_ip)
+            port_ips[c.server_port].add(c.server_ip)
+            port_ips[c.client_port].add(c.client_ip)
+            peer_ports[(c.server_ip, c.server_port)].add(c.client_port)
+            peer_ports[(c.client_ip, c.client_port)].add(c.server_port)
+
+        for endpoint, peers in endpoint_peers.items():
+            assert index.endpoint_peer_count(*endpoint) == len(peers)
+            assert index.endpoint_peer_port_count(*endpoint) == len(peer_ports[endpoint])
+        for port, ips in port_ips.items():
+            assert index.port_ip_count(port) == len(ips)
+
+        assert index.endpoint_peer_count("203.0.113.1", 80) == 0
+        assert index.port_ip_count(1) == 0
+
+    def test_merge_equals_single_index(self) -> None:
+        connections = _random_connections(300)
+        combined = CardinalityIndex()
+        part_a = CardinalityIndex()
+        part_b = CardinalityIndex()
+        for i, c in enumerate(connections):
+            combined.add_connection(c.client_ip, c.client_port, c.server_ip, c.server_port)
+            target = part_a if i % 2 else part_b
+            target.add_connection(c.client_ip, c.client_port, c.server_ip, c.server_port)
+
+        part_a.merge(part_b)
+
+        assert part_a.connection_count == combined.connection_count
+        for c in connections:
+            for ip, port in ((c.client_ip, c.client_port), (c.server_ip, c.server_port)):
+                assert part_a.endpoint_peer_count(ip, port) == combined.endpoint_peer_count(ip, port)
+                assert part_a.endpoint_peer_port_count(ip, port) == combined.endpoint_peer_port_count(
+                    ip, port
+                )
+                assert part_a.port_ip_count(port) == combined.port_ip_count(port)
+
+    def test_save_and_load_roundtrip(self, tmp_path: Path) -> None:
+        connections = _random_connections(200)
+        index = CardinalityIndex()
+        for c in connections:
+            index.add_connection(c.client_ip, c.client_port, c.server_ip, c.server_port)
+
+        path = tmp_path / "index.json"
+        index.save(path)
+        loaded = CardinalityIndex.load(path)
+
+        assert loaded.to_dict() == index.to_dict()
+
+    def test_detect_unchanged_with_reused_index(self) -> None:
+        """Detector built from a loaded index behaves like a freshly populated one."""
+        connections = _random_connections(400)
+        fresh = ServerDetector()
+        for c in connections:
+            fresh.collect_connection(c)
+        fresh.finalize_cardinality()
+
+        reused = ServerDetector(index=CardinalityIndex.from_dict(fresh.index.to_dict()))
+        reused.finalize_cardinality()
+
+        for c in connections:
+            assert reused.detect(c) == fresh.detect(c)
+
+    def test_invalid_arguments(self) -> None:
+        with pytest.raises(ValueError):
+            CardinalityIndex(mode="fuzzy")
+        with pytest.raises(ValueError):
+            CardinalityIndex(precision=2)
+        with pytest.raises(ValueError):
+            CardinalityIndex().merge(CardinalityIndex(mode="approx"))
+
+
+@pytest.mark.unit
+class TestCardinalityIndexApprox:
+    """Approximate mode bounds per-key memory with HyperLogLog registers."""
+
+    def test_small_counts_are_exact(self) -> None:
+        index = CardinalityIndex(mode="approx")
+        for i in range(CardinalityIndex.SPARSE_LIMIT):
+            index.add_connection(f"192.168.0.{i}", 40000 + i, "10.0.0.1", 80)
+
+        assert index.endpoint_peer_count("10.0.0.1", 80) == CardinalityIndex.SPARSE_LIMIT
+        assert index.endpoint_peer_port_count("10.0.0.1", 80) == CardinalityIndex.SPARSE_LIMIT
+
+    def test_large_counts_are_estimated_within_error(self) -> None:
+        index = CardinalityIndex(mode="approx", precision=10)
+        clients = 5000
+        for i in range(clients):
+            index.add_connection(f"172.16.{i // 250}.{i % 250}", 1024 + i, "10.0.0.1", 443)
+
+        estimate = index.endpoint_peer_count("10.0.0.1", 443)
+        assert abs(estimate - clients) / clients < 0.1
+
+        # Dense counters have a fixed size regardless of the number of members
+        counter = index._endpoint_peers[index.endpoint_key("10.0.0.1", 443)]
+        assert isinstance(counter, bytearray)
+        assert len(counter) == 1 << 10
+
+    def test_merge_dense_counters(self) -> None:
+        part_a = CardinalityIndex(mode="approx")
+        part_b = CardinalityIndex(mode="approx")
+        for i in range(2000):
+            target = part_a if i < 1000 else part_b
+            target.add_connection(f"172.16.{i // 250}.{i % 250}", 2000 + i, "10.0.0.1", 443)
+
+        part_a.merge(part_b)
+
+        estimate = part_a.endpoint_peer_count("10.0.0.1", 443)
+        assert abs(estimate - 2000) / 2000 < 0.2
+
+
+@pytest.mark.unit
+class TestCardinalityPersistence:
+    """Index files reused and updated across command runs."""
+
+    def test_detector_saves_index_on_finalize(self, tmp_path: Path) -> None:
+        path = tmp_path / "index.json"
+        options = CardinalityOptions(mode="approx", index_file=path)
+        detector = ServerDetector(cardinality=options)
+        for c in _random_connections(50):
+            detector.collect_connection(c)
+        detector.finalize_cardinality()
+
+        saved = CardinalityIndex.load(path)
+        assert saved.mode == "approx"
+        assert saved.to_dict() == detector.index.to_dict()
+
+    def test_mode_mismatch_is_reported(self, tmp_path: Path) -> None:
+        path = tmp_path / "index.json"
+        CardinalityIndex(mode="approx").save(path)
+
+        with pytest.raises(CapMasterError):
+            CardinalityOptions(mode="exact", index_file=path).open_index()
+
+    def test_topology_command_accumulates_index(
+        self, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+    ) -> None:
+        pcap = tmp_path / "single.pcap"
+        pcap.touch()
+        index_file = tmp_path / "cardinality.json"
+        connections = _random_connections(200)
+        monkeypatch.setattr(
+            "capmaster.plugins.topology.runner.extract_connections_from_pcap",
+            lambda _path: connections,
+        )
+        args = [
+            "topology",
+            "--file1",
+            str(pcap),
+            "--cardinality",
+            "approx",
+            "--cardinality-index",
+            str(index_file),
+            "--quiet",
+        ]
+
+        first = CliRunner().invoke(cli, args)
+        assert first.exit_code == 0, first.output
+        saved = CardinalityIndex.load(index_file)
+        assert saved.mode == "approx"
+        assert saved.connection_count == 200
+
+        second = CliRunner().invoke(cli, args)
+        assert second.exit_code == 0, second.output
+        reused = CardinalityIndex.load(index_file)
+        # Connections of the second run are merged into the persisted index
+        assert reused.connection_count == 400
+        # Replaying the same connections adds no new distinct peers
+        server = (connections[0].server_ip, connections[0].server_port)
+        assert reused.endpoint_peer_count(*server) == saved.endpoint_peer_count(*server)
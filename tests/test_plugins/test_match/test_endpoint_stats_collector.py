@@ -2,14 +2,17 @@
 
 from __future__ import annotations
 
+import random
+from collections import Counter
 from types import SimpleNamespace
 
 import pytest
 
 from capmaster.core.connection.matcher import ConnectionMatch
 from capmaster.core.connection.models import TcpConnection
-from capmaster.plugins.match.endpoint_stats import EndpointStatsCollector
-from capmaster.plugins.match.server_detector import ServerInfo
+from capmaster.plugins.match.endpoint_stats import EndpointStatsCollector, aggregate_by_service
+from capmaster.plugins.match.server_detector import ServerDetector, ServerInfo
+from capmaster.plugins.match.ttl_utils import most_common_hops
 
 
 class FakeDetector:
@@ -50,6 +53,13 @@ class FakeDetector:
             method="TEST_KEEP",
         )
 
+    def detect_many(self, connections: list[TcpConnection]) -> list[ServerInfo]:
+        return [self.detect(connection) for connection in connections]
+
+    def detect_without_cardinality(self, connection: TcpConnection) -> ServerInfo | None:
+        """Defer every connection until finalize()."""
+        return None
+
 
 def _make_connection(
     stream_id: int,
@@ -59,6 +69,8 @@ def _make_connection(
     server_port: int,
     client_ttl: int,
     server_ttl: int,
+    syn_options: str = "",
+    total_bytes: int = 100,
 ) -> TcpConnection:
     """Create a minimal TcpConnection for tests."""
     return TcpConnection(
@@ -69,7 +81,7 @@ def _make_connection(
         server_ip=server_ip,
         server_port=server_port,
         syn_timestamp=0.0,
-        syn_options="",
+        syn_options=syn_options,
         client_isn=0,
         server_isn=0,
         tcp_timestamp_tsval="",
@@ -87,7 +99,7 @@ def _make_connection(
         packet_count=1,
         client_ttl=client_ttl,
         server_ttl=server_ttl,
-        total_bytes=100,
+        total_bytes=total_bytes,
         has_syn=False,
     )
 
@@ -189,3 +201,141 @@ def test_keeps_roles_and_ttls_when_no_swap() -> None:
     assert pair.client_ttl_b == 45
     assert pair.server_ttl_b == 75
 
+
+
+def _random_matches(count: int, seed: int = 17) -> list[ConnectionMatch]:
+    """Matches mixing SYN-resolved, port-resolved and ambiguous connections."""
+    rng = random.Random(seed)
+    ports = [80, 443, 3306, 8000, 9000, 50001]
+    servers = [(f"10.9.0.{i}", rng.choice(ports)) for i in range(1, 6)]
+    matches = []
+    for stream_id in range(count):
+        sides = []
+        for offset in (0, 1):
+            server_ip, server_port = rng.choice(servers)
+            client_ip = f"172.30.{offset}.{rng.randint(1, 12)}"
+            client_port = rng.randint(1024, 65535)
+            if rng.random() < 0.3:
+                client_ip, server_ip = server_ip, client_ip
+                client_port, server_port = server_port, client_port
+            sides.append(
+                _make_connection(
+                    stream_id=stream_id,
+                    client_ip=client_ip,
+                    client_port=client_port,
+                    server_ip=server_ip,
+                    server_port=server_port,
+                    client_ttl=rng.choice([0, 62, 63, 64, 126, 127]),
+                    server_ttl=rng.choice([0, 60, 61, 125, 250]),
+                    syn_options="mss=1460" if rng.random() < 0.3 else "",
+                    total_bytes=rng.randint(60, 5000),
+                )
+            )
+        matches.append(ConnectionMatch(conn1=sides[0], conn2=sides[1], score=SimpleNamespace()))
+    return matches
+
+
+def _reference_stats(matches: list[ConnectionMatch]) -> list[tuple]:
+    """Aggregate matches with the original buffer-then-aggregate approach."""
+    detector = ServerDetector()
+    for match in matches:
+        detector.collect_connection(match.conn1)
+        detector.collect_connection(match.conn2)
+    detector.finalize_cardinality()
+
+    helper = EndpointStatsCollector(detector)
+    groups: dict[tuple, dict[str, list]] = {}
+    for match in matches:
+        info_a = detector.detect(match.conn1)
+        info_b = detector.detect(match.conn2)
+        key = (
+            (info_a.client_ip, info_a.server_ip, info_a.server_port),
+            (info_b.client_ip, info_b.server_ip, info_b.server_port),
+        )
+        group = groups.setdefault(key, {"conf": [], "ca": [], "sa": [], "cb": [], "sb": [], "bytes": [0, 0]})
+        group["conf"].append(helper._min_confidence(info_a.confidence, info_b.confidence))
+        ttls = []
+        for conn, info in ((match.conn1, info_a), (match.conn2, info_b)):
+            client_ttl, server_ttl = conn.client_ttl, conn.server_ttl
+            if info.server_ip != conn.server_ip or info.server_port != conn.server_port:
+                client_ttl, server_ttl = server_ttl, client_ttl
+            ttls.extend([client_ttl, server_ttl])
+        for name, ttl in zip(("ca", "sa", "cb", "sb"), ttls):
+            if ttl > 0:
+                group[name].append(ttl)
+        group["bytes"][0] += match.conn1.total_bytes
+        group["bytes"][1] += match.conn2.total_bytes
+
+    results = []
+    for key, group in groups.items():
+        results.append(
+            (
+                key,
+                len(group["conf"]),
+                helper._average_confidence(group["conf"]),
+                *(Counter(group[n]).most_common(1)[0][0] if group[n] else 0 for n in ("ca", "sa", "cb", "sb")),
+                *(most_common_hops(group[n]) if group[n] else None for n in ("ca", "sa", "cb", "sb")),
+                *group["bytes"],
+            )
+        )
+    results.sort(key=lambda row: row[1], reverse=True)
+    return results
+
+
+def _as_rows(stats: list) -> list[tuple]:
+    return [
+        (
+            (
+                (s.tuple_a.client_ip, s.tuple_a.server_ip, s.tuple_a.server_port),
+                (s.tuple_b.client_ip, s.tuple_b.server_ip, s.tuple_b.server_port),
+            ),
+            s.count,
+            s.confidence,
+            s.client_ttl_a,
+            s.server_ttl_a,
+            s.client_ttl_b,
+            s.server_ttl_b,
+            s.client_hops_a,
+            s.server_hops_a,
+            s.client_hops_b,
+            s.server_hops_b,
+            s.total_bytes_a,
+            s.total_bytes_b,
+        )
+        for s in stats
+    ]
+
+
+@pytest.mark.unit
+def test_streaming_aggregates_match_reference() -> None:
+    """Incremental aggregation reproduces the buffered aggregation exactly."""
+    matches = _random_matches(800)
+    collector = EndpointStatsCollector(ServerDetector())
+    for match in matches:
+        collector.add_match(match)
+    collector.finalize()
+
+    stats = collector.get_stats()
+
+    assert _as_rows(stats) == _reference_stats(matches)
+    assert collector.get_service_stats() == aggregate_by_service(stats)
+
+
+@pytest.mark.unit
+def test_streaming_with_finalized_detector() -> None:
+    """A prepopulated detector lets every match be aggregated on arrival."""
+    matches = _random_matches(300, seed=4)
+    detector = ServerDetector()
+    for match in matches:
+        detector.collect_connection(match.conn1)
+        detector.collect_connection(match.conn2)
+    detector.finalize_cardinality()
+
+    collector = EndpointStatsCollector(detector, detector_finalized=True)
+    for match in matches:
+        collector.add_match(match)
+    # Results are available without finalize()
+    stats = collector.get_stats()
+
+    assert _as_rows(stats) == _reference_stats(matches)
+    assert collector.get_service_stats() == aggregate_by_service(stats)
@@ -0,0 +1,107 @@
+"""Unit tests for ServerDetector batch detection."""
+
+from __future__ import annotations
+
+import random
+from pathlib import Path
+
+import pytest
+
+from capmaster.core.connection.models import TcpConnection
+from capmaster.plugins.match.server_detector import ServerDetector
+
+
+def _make_connection(
+    stream_id: int,
+    client_ip: str,
+    client_port: int,
+    server_ip: str,
+    server_port: int,
+    syn_options: str = "",
+) -> TcpConnection:
+    """Create a minimal TcpConnection for detection tests."""
+    return TcpConnection(
+        stream_id=stream_id,
+        protocol=6,
+        client_ip=client_ip,
+        client_port=client_port,
+        server_ip=server_ip,
+        server_port=server_port,
+        syn_timestamp=0.0,
+        syn_options=syn_options,
+        client_isn=0,
+        server_isn=0,
+        tcp_timestamp_tsval="",
+        tcp_timestamp_tsecr="",
+        client_payload_md5="",
+        server_payload_md5="",
+        length_signature="",
+        is_header_only=False,
+        ipid_first=0,
+        ipid_set=set(),
+        client_ipid_set=set(),
+        server_ipid_set=set(),
+        first_packet_time=0.0,
+        last_packet_time=0.0,
+        packet_count=1,
+    )
+
+
+def _mixed_connections(count: int, seed: int = 11) -> list[TcpConnection]:
+    """Connections exercising every detection layer, including duplicates."""
+    rng = random.Random(seed)
+    ports = [22, 80, 443, 1521, 3306, 700, 5000, 8000, 9000, 50001, 60001]
+    servers = [(f"10.1.0.{i}", rng.choice(ports)) for i in range(1, 12)]
+    connections: list[TcpConnection] = []
+    for stream_id in range(count):
+        server_ip, server_port = rng.choice(servers)
+        client_ip = f"172.20.{rng.randint(0, 2)}.{rng.randint(1, 30)}"
+        client_port = rng.choice([rng.randint(1024, 65535), rng.choice(ports)])
+        syn = "mss=1460" if rng.random() < 0.3 else ""
+        if rng.random() < 0.4:
+            client_ip, server_ip = server_ip, client_ip
+            client_port, server_port = server_port, client_port
+        connections.append(
+            _make_connection(stream_id, client_ip, client_port, server_ip, server_port, syn)
+        )
+    # Exact duplicates (e.g. merged 5-tuples) must share the memoized result
+    connections.extend(connections[:25])
+    return connections
+
+
+@pytest.mark.unit
+class TestDetectMany:
+    """detect_many must agree with detect for every connection."""
+
+    def _build_detector(self, connections: list[TcpConnection], **kwargs: object) -> ServerDetector:
+        detector = ServerDetector(**kwargs)  # type: ignore[arg-type]
+        for conn in connections:
+            detector.collect_connection(conn)
+        detector.finalize_cardinality()
+        return detector
+
+    def test_matches_per_connection_detect(self) -> None:
+        connections = _mixed_connections(600)
+        detector = self._build_detector(connections)
+
+        assert detector.detect_many(connections) == [detector.detect(c) for c in connections]
+
+    def test_matches_detect_with_service_list(self, tmp_path: Path) -> None:
+        service_list = tmp_path / "services.txt"
+        service_list.write_text("10.1.0.3:*\n172.20.1.5:5000\n")
+        connections = _mixed_connections(400, seed=3)
+        detector = self._build_detector(connections, service_list_path=service_list)
+
+        results = detector.detect_many(connections)
+
+        assert results == [detector.detect(c) for c in connections]
+        assert any(info.method.startswith("SERVICE_LIST") for info in results)
+
+    def test_without_cardinality(self) -> None:
+        connections = _mixed_connections(200, seed=5)
+        detector = ServerDetector()
+
+        assert detector.detect_many(connections) == [detector.detect(c) for c in connections]
+
+    def test_empty_table(self) -> None:
+        assert ServerDetector().detect_many([]) == []
@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+import logging
 from pathlib import Path
+from unittest.mock import MagicMock
 
 import subprocess
 
@@ -57,3 +59,282 @@ def test_cli_help_invocation() -> None:
     # Help text should mention that we report only-in-A and only-in-B packets
     assert "only in A" in result.stdout or "only in B" in result.stdout
 
+
+
+def _make_connection(stream_id: int, client_ip: str, server_ip: str):
+    from capmaster.core.connection.models import TcpConnection
+
+    return TcpConnection(
+        stream_id=stream_id,
+        protocol=6,
+        client_ip=client_ip,
+        client_port=40000 + stream_id,
+        server_ip=server_ip,
+        server_port=443,
+        syn_timestamp=0.0,
+        syn_options="mss=1460",
+        client_isn=0,
+        server_isn=0,
+        tcp_timestamp_tsval="",
+        tcp_timestamp_tsecr="",
+        client_payload_md5="",
+        server_payload_md5="",
+        length_signature="",
+        is_header_only=False,
+        ipid_first=0,
+        ipid_set=set(),
+        client_ipid_set=set(),
+        server_ipid_set=set(),
+        first_packet_time=0.0,
+        last_packet_time=0.0,
+        packet_count=1,
+        client_ttl=62,
+        server_ttl=125,
+    )
+
+
+def _write_store(tmp_path: Path, file_a: Path, file_b: Path, scores: list[float]) -> Path:
+    from capmaster.core.connection.match_store import MatchStore
+    from capmaster.core.connection.matcher import ConnectionMatch
+    from capmaster.core.connection.scorer import MatchScore
+
+    matches = [
+        ConnectionMatch(
+            conn1=_make_connection(i, "10.0.0.1", "10.0.0.9"),
+            conn2=_make_connection(100 + i, "192.168.1.1", "192.168.1.9"),
+            score=MatchScore(
+                normalized_score=score,
+                raw_score=score,
+                available_weight=1.0,
+                ipid_match=True,
+                evidence="synopt",
+            ),
+        )
+        for i, score in enumerate(scores)
+    ]
+    store_file = tmp_path / "matched_connections.cmstore"
+    MatchStore.save(matches, store_file, file_a, file_b)
+    return store_file
+
+
+def _packets(stream_id: int, ip_ids: list[int]):
+    from decimal import Decimal
+
+    from capmaster.plugins.compare_common.packet_extractor import TcpPacket
+
+    return [
+        TcpPacket(
+            frame_number=stream_id * 100 + n,
+            ip_id=ip_id,
+            tcp_flags="0x010",
+            seq=n,
+            ack=0,
+            timestamp=Decimal(n),
+            src_ip="10.0.0.1",
+            dst_ip="10.0.0.9",
+            src_port=40000,
+            dst_port=443,
+            info="",
+        )
+        for n, ip_id in enumerate(ip_ids, start=1)
+    ]
+
+
+@pytest.mark.unit
+def test_parse_pair_spec() -> None:
+    from capmaster.plugins.streamdiff.plugin import _parse_pair_spec
+    from capmaster.utils.errors import CapMasterError
+
+    assert _parse_pair_spec("all") is None
+    assert _parse_pair_spec("3,1-2, 2,5") == [3, 1, 2, 5]
+    with pytest.raises(CapMasterError):
+        _parse_pair_spec("4-2")
+    with pytest.raises(CapMasterError):
+        _parse_pair_spec("x")
+
+
+@pytest.mark.unit
+def test_batch_extracts_each_capture_once(tmp_path: Path, monkeypatch) -> None:
+    """Batch mode extracts all selected streams in one call per capture."""
+    from capmaster.plugins.compare_common.packet_extractor import PacketExtractor
+
+    file_a = tmp_path / "a.pcap"
+    file_b = tmp_path / "b.pcap"
+    file_a.write_bytes(b"capture-a")
+    file_b.write_bytes(b"capture-b")
+    store_file = _write_store(tmp_path, file_a, file_b, [0.9, 0.5, 0.4])
+
+    calls: list[tuple[str, list[int]]] = []
+
+    def fake_extract_multiple(self, pcap_file, stream_ids, total_streams=None):
+        calls.append((pcap_file.name, list(stream_ids)))
+        # Stream 1/101 loses one packet in B
+        return {
+            sid: _packets(sid, [1, 2, 3] if sid in (0, 1, 2, 100, 102) else [1, 3])
+            for sid in stream_ids
+        }
+
+    def forbid_single(self, pcap_file, stream_id):
+        raise AssertionError("batch mode must not extract streams one by one")
+
+    monkeypatch.setattr(PacketExtractor, "extract_multiple_streams", fake_extract_multiple)
+    monkeypatch.setattr(PacketExtractor, "extract_by_stream_id", forbid_single)
+    monkeypatch.setattr(
+        "capmaster.plugins.compare_common.packet_extractor.TsharkWrapper", MagicMock
+    )
+
+    output_dir = tmp_path / "reports"
+    exit_code = StreamDiffPlugin().execute(
+        file1=file_a,
+        file2=file_b,
+        quiet=True,
+        matched_connections=store_file,
+        max_confidence=0.8,
+        output_dir=output_dir,
+    )
+
+    assert exit_code == 0
+    assert calls == [("a.pcap", [1, 2]), ("b.pcap", [101, 102])]
+    assert sorted(p.name for p in output_dir.iterdir()) == ["pair_2.txt", "pair_3.txt"]
+    assert "A-only packets (by IP ID): 1" in (output_dir / "pair_2.txt").read_text()
+    assert "No A-only or B-only packets detected." in (output_dir / "pair_3.txt").read_text()
+
+
+@pytest.mark.unit
+def test_batch_rejects_out_of_range_pairs(tmp_path: Path) -> None:
+    file_a = tmp_path / "a.pcap"
+    file_b = tmp_path / "b.pcap"
+    file_a.write_bytes(b"capture-a")
+    file_b.write_bytes(b"capture-b")
+    store_file = _write_store(tmp_path, file_a, file_b, [0.9])
+
+    exit_code = StreamDiffPlugin().execute(
+        file1=file_a,
+        file2=file_b,
+        quiet=True,
+        matched_connections=store_file,
+        pair_spec="1-2",
+    )
+
+    assert exit_code != 0
+
+
+@pytest.mark.unit
+def test_seq_alignment_report(tmp_path: Path, monkeypatch) -> None:
+    """--alignment seq reports dropped segments even with rewritten IP IDs."""
+    from capmaster.plugins.compare_common.packet_extractor import PacketExtractor
+
+    file_a = tmp_path / "a.pcap"
+    file_b = tmp_path / "b.pcap"
+    file_a.write_bytes(b"capture-a")
+    file_b.write_bytes(b"capture-b")
+
+    def fake_extract(self, pcap_file, stream_id):
+        packets = _packets(stream_id, [1, 2, 3])
+        for n, packet in enumerate(packets):
+            packet.seq = 1000 * n
+            packet.tcp_len = 1000
+        if pcap_file == file_b:
+            del packets[1]
+            for packet in packets:
+                packet.ip_id ^= 0x4000
+        return packets
+
+    monkeypatch.setattr(PacketExtractor, "extract_by_stream_id", fake_extract)
+    monkeypatch.setattr(
+        "capmaster.plugins.compare_common.packet_extractor.TsharkWrapper", MagicMock
+    )
+
+    output_file = tmp_path / "report.txt"
+    exit_code = StreamDiffPlugin().execute(
+        file1=file_a,
+        file2=file_b,
+        quiet=True,
+        file1_stream_id=3,
+        file2_stream_id=4,
+        alignment="seq",
+        output_file=output_file,
+    )
+
+    report = output_file.read_text()
+    assert exit_code == 0
+    assert "Matched segments: 2" in report
+    assert "Dropped segments (A only): 1" in report
+
+
+@pytest.mark.unit
+def test_batch_seq_alignment_warns_about_jobs(tmp_path: Path, monkeypatch, caplog) -> None:
+    """--jobs does not apply to sequence alignment, and says so."""
+    from capmaster.plugins.compare_common.packet_extractor import PacketExtractor
+
+    file_a = tmp_path / "a.pcap"
+    file_b = tmp_path / "b.pcap"
+    file_a.write_bytes(b"capture-a")
+    file_b.write_bytes(b"capture-b")
+    store_file = _write_store(tmp_path, file_a, file_b, [0.5, 0.5])
+
+    def fake_extract_multiple(self, pcap_file, stream_ids, total_streams=None):
+        return {sid: _packets(sid, [1, 2, 3]) for sid in stream_ids}
+
+    monkeypatch.setattr(PacketExtractor, "extract_multiple_streams", fake_extract_multiple)
+    monkeypatch.setattr(
+        "capmaster.plugins.compare_common.packet_extractor.TsharkWrapper", MagicMock
+    )
+
+    output_dir = tmp_path / "reports"
+    with caplog.at_level(logging.WARNING):
+        exit_code = StreamDiffPlugin().execute(
+            file1=file_a,
+            file2=file_b,
+            matched_connections=store_file,
+            max_confidence=0.8,
+            output_dir=output_dir,
+            jobs=2,
+            alignment="seq",
+        )
+
+    assert exit_code == 0
+    assert len(list(output_dir.iterdir())) == 2
+    assert "sequence alignment runs in a single process" in caplog.text
+
+
+@pytest.mark.unit
+def test_batch_report_file_with_row_cap(tmp_path: Path, monkeypatch) -> None:
+    """Combined batch output is streamed to one file and --max-rows caps each table."""
+    from capmaster.plugins.compare_common.packet_extractor import PacketExtractor
+
+    file_a = tmp_path / "a.pcap"
+    file_b = tmp_path / "b.pcap"
+    file_a.write_bytes(b"capture-a")
+    file_b.write_bytes(b"capture-b")
+    store_file = _write_store(tmp_path, file_a, file_b, [0.5, 0.5])
+
+    def fake_extract_multiple(self, pcap_file, stream_ids, total_streams=None):
+        # Every A stream has five packets B never saw
+        ip_ids = list(range(1, 9)) if pcap_file == file_a else [1, 2, 3]
+        return {sid: _packets(sid, ip_ids) for sid in stream_ids}
+
+    monkeypatch.setattr(PacketExtractor, "extract_multiple_streams", fake_extract_multiple)
+    monkeypatch.setattr(
+        "capmaster.plugins.compare_common.packet_extractor.TsharkWrapper", MagicMock
+    )
+
+    output_file = tmp_path / "report.txt"
+    exit_code = StreamDiffPlugin().execute(
+        file1=file_a,
+        file2=file_b,
+        quiet=True,
+        matched_connections=store_file,
+        pair_spec="all",
+        max_rows=2,
+        output_file=output_file,
+    )
+
+    report = output_file.read_text()
+    assert exit_code == 0
+    assert report.startswith("## Pair 1\n\n# streamdiff report")
+    assert "\n\n## Pair 2\n\n# streamdiff report" in report
+    assert report.count("A-only packets (by IP ID): 5") == 2
+    assert report.count("  ... 3 more") == 2
+    assert report.count("... 6 more rows not shown") == 2
+    assert report.count("Rows: 8 (ONLY_IN_A=5, MATCH=3)") == 2
@@ -75,6 +75,7 @@ def test_dual_pipeline_no_pairs_fallback_single(monkeypatch, tmp_path: Path) ->
         file_path: Path,
         *,
         service_list: Path | None,
+        cardinality: object = None,
         quiet: bool = False,
     ) -> DummySingleTopology:  # type: ignore[override]
         return DummySingleTopology(file_path.name)
@@ -161,6 +162,7 @@ def test_dual_pipeline_no_rebuilt_matches_respects_behavior(monkeypatch, tmp_pat
         file_path: Path,
         *,
         service_list: Path | None,
+        cardinality: object = None,
         quiet: bool = False,
     ) -> DummySingleTopology2:  # type: ignore[override]
         return DummySingleTopology2(file_path.name)
@@ -0,0 +1,157 @@
+"""Tests for dual topology reusing serialized match state.
+
+When the matched connections come from a match store or match JSON built
+from the same captures, the dual pipeline must not dissect the PCAPs again.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from capmaster.core.connection.match_serializer import MatchSerializer
+from capmaster.core.connection.match_store import MatchStore
+from capmaster.core.connection.matcher import ConnectionMatch
+from capmaster.core.connection.models import TcpConnection
+from capmaster.core.connection.scorer import MatchScore
+from capmaster.plugins.topology.runner import _run_dual_capture_pipeline
+
+
+def _make_connection(stream_id: int, client_ip: str, server_ip: str) -> TcpConnection:
+    return TcpConnection(
+        stream_id=stream_id,
+        protocol=6,
+        client_ip=client_ip,
+        client_port=40000 + stream_id,
+        server_ip=server_ip,
+        server_port=443,
+        syn_timestamp=0.0,
+        syn_options="mss=1460",
+        client_isn=0,
+        server_isn=0,
+        tcp_timestamp_tsval="",
+        tcp_timestamp_tsecr="",
+        client_payload_md5="",
+        server_payload_md5="",
+        length_signature="",
+        is_header_only=False,
+        ipid_first=0,
+        ipid_set=set(),
+        client_ipid_set=set(),
+        server_ipid_set=set(),
+        first_packet_time=0.0,
+        last_packet_time=0.0,
+        packet_count=1,
+        client_ttl=62,
+        server_ttl=125,
+    )
+
+
+def _matches() -> list[ConnectionMatch]:
+    score = MatchScore(
+        normalized_score=0.9,
+        raw_score=0.9,
+        available_weight=1.0,
+        ipid_match=True,
+        evidence="synopt",
+    )
+    return [
+        ConnectionMatch(
+            conn1=_make_connection(i, "10.0.0.1", "10.0.0.9"),
+            conn2=_make_connection(100 + i, "192.168.1.1", "192.168.1.9"),
+            score=score,
+        )
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def captures(tmp_path: Path) -> tuple[Path, Path]:
+    file_a = tmp_path / "a.pcap"
+    file_b = tmp_path / "b.pcap"
+    file_a.write_bytes(b"capture-a")
+    file_b.write_bytes(b"capture-b")
+    return file_a, file_b
+
+
+def _forbid_extraction(monkeypatch) -> None:
+    def fail(_path: Path) -> list[TcpConnection]:
+        raise AssertionError("captures must not be dissected again")
+
+    monkeypatch.setattr(
+        "capmaster.plugins.topology.runner.extract_connections_from_pcap", fail
+    )
+
+
+@pytest.mark.unit
+def test_store_with_matching_fingerprints_skips_extraction(
+    monkeypatch, tmp_path: Path, captures: tuple[Path, Path]
+) -> None:
+    file_a, file_b = captures
+    store_file = tmp_path / "matched_connections.cmstore"
+    MatchStore.save(_matches(), store_file, file_a, file_b)
+    _forbid_extraction(monkeypatch)
+
+    output = _run_dual_capture_pipeline(
+        file_a=file_a,
+        file_b=file_b,
+        matched_file=store_file,
+        service_list=None,
+        quiet=True,
+    )
+
+    assert "443" in output
+
+
+@pytest.mark.unit
+def test_match_json_with_matching_fingerprints_skips_extraction(
+    monkeypatch, tmp_path: Path, captures: tuple[Path, Path]
+) -> None:
+    file_a, file_b = captures
+    match_json = tmp_path / "matches.json"
+    MatchSerializer.save_matches(_matches(), match_json, str(file_a), str(file_b))
+    _forbid_extraction(monkeypatch)
+
+    output = _run_dual_capture_pipeline(
+        file_a=file_a,
+        file_b=file_b,
+        matched_file=match_json,
+        service_list=None,
+        quiet=True,
+    )
+
+    assert "443" in output
+
+
+@pytest.mark.unit
+def test_changed_capture_falls_back_to_extraction(
+    monkeypatch, tmp_path: Path, captures: tuple[Path, Path]
+) -> None:
+    file_a, file_b = captures
+    match_json = tmp_path / "matches.json"
+    matches = _matches()
+    MatchSerializer.save_matches(matches, match_json, str(file_a), str(file_b))
+    file_b.write_bytes(b"capture-b rewritten")
+
+    extracted: list[Path] = []
+
+    def fake_extract(path: Path) -> list[TcpConnection]:
+        extracted.append(path)
+        side = [m.conn1 for m in matches] if path == file_a else [m.conn2 for m in matches]
+        return side
+
+    monkeypatch.setattr(
+        "capmaster.plugins.topology.runner.extract_connections_from_pcap", fake_extract
+    )
+
+    output = _run_dual_capture_pipeline(
+        file_a=file_a,
+        file_b=file_b,
+        matched_file=match_json,
+        service_list=None,
+        quiet=True,
+    )
+
+    assert extracted == [file_a, file_b]
+    assert "443" in output
@@ -96,6 +96,9 @@ def test_single_topology_ttl_direction_swapped(monkeypatch, tmp_path: Path) -> N
             assert conn is connection
             return DummyServerInfo()
 
+        def detect_many(self, conns: list[TcpConnection]) -> list[DummyServerInfo]:
+            return [self.detect(conn) for conn in conns]
+
     monkeypatch.setattr(
         "capmaster.plugins.topology.runner.ServerDetector", DummyDetector
     )
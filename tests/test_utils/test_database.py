@@ -0,0 +1,185 @@
+"""Tests for the bulk-load layer of BaseDatabaseWriter."""
+
+from __future__ import annotations
+
+import sys
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from capmaster.utils.database import BaseDatabaseWriter, _copy_field
+
+COLUMNS = ("id", "name", "flag", "tags")
+
+
+class FakeCursor:
+    """Cursor recording statements and the rows sent with COPY."""
+
+    def __init__(self, copy_error: Exception | None = None) -> None:
+        self.copy_error = copy_error
+        self.statements: list[str] = []
+        self.copies: list[tuple[str, str]] = []
+        self.executemany_calls: list[tuple[str, list]] = []
+
+    def execute(self, sql: str, params: Any = None) -> None:
+        self.statements.append(sql)
+
+    def copy_expert(self, sql: str, buffer: Any) -> None:
+        if self.copy_error is not None:
+            raise self.copy_error
+        self.copies.append((sql, buffer.read()))
+
+    def executemany(self, sql: str, rows: list) -> None:
+        self.executemany_calls.append((sql, list(rows)))
+
+    def close(self) -> None:
+        pass
+
+
+class CursorWithoutCopy(FakeCursor):
+    """Cursor of a driver without COPY support."""
+
+    def __getattribute__(self, name: str) -> Any:
+        if name == "copy_expert":
+            raise AttributeError(name)
+        return super().__getattribute__(name)
+
+
+class _Writer(BaseDatabaseWriter):
+    def ensure_table_exists(self) -> None:
+        pass
+
+
+def _writer(cursor: FakeCursor, batch_size: int = 100) -> _Writer:
+    writer = _Writer("postgresql://u:p@localhost/db", 7, "bulk", batch_size=batch_size)
+    writer._conn = MagicMock()
+    writer._cursor = cursor
+    return writer
+
+
+@pytest.mark.unit
+class TestCopyFormat:
+    """Values rendered in the COPY text format."""
+
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [
+            (None, "\\N"),
+            (True, "t"),
+            (False, "f"),
+            (42, "42"),
+            ("", ""),
+            ("a\tb\nc\\d\re", "a\\tb\\nc\\\\d\\re"),
+            ([], "{}"),
+            ([1, 2], "{1,2}"),
+            (["x", 'q"t', None], '{"x","q\\\\"t",NULL}'),
+        ],
+    )
+    def test_copy_field(self, value: Any, expected: str) -> None:
+        assert _copy_field(value) == expected
+
+
+@pytest.mark.unit
+class TestBulkLoad:
+    """Buffering, flushing and fallback of queued rows."""
+
+    def test_rows_loaded_with_one_copy(self) -> None:
+        cursor = FakeCursor()
+        writer = _writer(cursor)
+
+        writer._queue_row(COLUMNS, (1, "a", True, [1]))
+        writer._queue_row(COLUMNS, (2, None, False, []))
+
+        assert cursor.copies == []
+        assert writer.flush_rows() == 2
+        assert cursor.copies == [
+            (
+                "COPY public.kase_7_bulk (id, name, flag, tags) FROM STDIN",
+                "1\ta\tt\t{1}\n2\t\\N\tf\t{}\n",
+            )
+        ]
+        assert cursor.statements == [
+            "SAVEPOINT capmaster_bulk_load",
+            "RELEASE SAVEPOINT capmaster_bulk_load",
+        ]
+        assert writer.flush_rows() == 0
+
+    def test_batch_size_triggers_load(self) -> None:
+        cursor = FakeCursor()
+        writer = _writer(cursor, batch_size=2)
+
+        for n in range(5):
+            writer._queue_row(COLUMNS, (n, "x", True, []))
+
+        assert [payload.count("\n") for _, payload in cursor.copies] == [2, 2]
+        writer.commit()
+        assert [payload.count("\n") for _, payload in cursor.copies] == [2, 2, 1]
+        writer._conn.commit.assert_called_once()
+
+    def test_column_change_loads_pending_rows(self) -> None:
+        cursor = FakeCursor()
+        writer = _writer(cursor)
+
+        writer._queue_row(COLUMNS, (1, "a", True, []))
+        writer._queue_row(("id",), (2,))
+        writer.flush_rows()
+
+        assert [sql for sql, _ in cursor.copies] == [
+            "COPY public.kase_7_bulk (id, name, flag, tags) FROM STDIN",
+            "COPY public.kase_7_bulk (id) FROM STDIN",
+        ]
+
+    def test_rollback_discards_buffered_rows(self) -> None:
+        cursor = FakeCursor()
+        writer = _writer(cursor)
+
+        writer._queue_row(COLUMNS, (1, "a", True, []))
+        writer.rollback()
+
+        assert writer.flush_rows() == 0
+        assert cursor.copies == []
+
+    def test_failed_copy_falls_back_to_execute_values(self) -> None:
+        cursor = FakeCursor(copy_error=RuntimeError("COPY not supported"))
+        writer = _writer(cursor)
+        extras = MagicMock()
+        rows = [(1, "a", True, ["x"]), (2, "b", False, [])]
+
+        with patch.dict(sys.modules, {"psycopg2.extras": extras}):
+            for row in rows:
+                writer._queue_row(COLUMNS, row)
+            assert writer.flush_rows() == 2
+
+        assert cursor.statements == [
+            "SAVEPOINT capmaster_bulk_load",
+            "ROLLBACK TO SAVEPOINT capmaster_bulk_load",
+        ]
+        assert not writer.use_copy
+        extras.execute_values.assert_called_once_with(
+            cursor,
+            "INSERT INTO public.kase_7_bulk (id, name, flag, tags) VALUES %s",
+            rows,
+            page_size=100,
+        )
+
+    def test_cursor_without_copy_uses_executemany(self) -> None:
+        cursor = CursorWithoutCopy()
+        writer = _writer(cursor)
+
+        with patch.dict(sys.modules, {"psycopg2.extras": None}):
+            writer._queue_row(COLUMNS, (1, "a", True, []))
+            writer.flush_rows()
+
+        assert not writer.use_copy
+        assert cursor.statements == []
+        assert cursor.executemany_calls == [
+            (
+                "INSERT INTO public.kase_7_bulk (id, name, flag, tags) VALUES (%s, %s, %s, %s)",
+                [(1, "a", True, [])],
+            )
+        ]
+
+    def test_invalid_batch_size(self) -> None:
+        with pytest.raises(ValueError):
+            _Writer("postgresql://u:p@localhost/db", 7, "bulk", batch_size=0)